@@ -16,6 +16,9 @@ logger.setLevel(logging.INFO)
 from . import (
     compat,
     math,
+    covariance,
+    cost,
+    pipeline,
     flux,
     sp,
     ops,
@@ -1,38 +1,412 @@
+from .starry_process_version import __version__
 from pathlib import Path
+from collections import OrderedDict
 import numpy as np
 import functools
+import hashlib
+import tempfile
+import threading
+import inspect
+import shutil
+import json
+import os
 
 
-def cache(*cache_args):
+__all__ = ["cache", "shared", "memoize", "clear_cache"]
+
+
+# Bump this whenever the layout of the cache entries changes
+CACHE_FORMAT = 1
+
+# Maximum size of the cache on disk in bytes. The least recently
+# used entries are evicted once this is exceeded.
+CACHE_SIZE = 512 * 1024 ** 2
+
+# Process-wide registry of pre-computed results and shared objects
+_registry = {}
+_registry_lock = threading.Lock()
+_key_locks = {}
+
+
+def _cache_dir():
+    """
+    Return the directory where pre-computed arrays are stored. This is
+    ``~/.starry_process`` unless the ``STARRY_PROCESS_CACHE_DIR``
+    environment variable is set. Setting it to an empty string disables
+    the cache.
+
+    """
+    path = os.environ.get("STARRY_PROCESS_CACHE_DIR", None)
+    if path is None:
+        return Path.home() / ".starry_process"
+    elif path == "":
+        return None
+    else:
+        return Path(path)
+
+
+def _token(value, strict=False):
+    """
+    Return a hashable string representation of ``value``. If ``strict``,
+    raises a ``TypeError`` for anything other than (containers of) plain
+    Python types and ``numpy`` arrays, whose ``repr`` may not be unique.
+
+    """
+    if isinstance(value, np.ndarray):
+        digest = hashlib.sha1(np.ascontiguousarray(value).tobytes())
+        return "{}{}{}".format(
+            value.dtype.str, value.shape, digest.hexdigest()
+        )
+    elif isinstance(value, (list, tuple)):
+        return "[{}]".format(",".join([_token(v, strict) for v in value]))
+    elif isinstance(value, dict):
+        return "{{{}}}".format(
+            ",".join(
+                [
+                    "{}:{}".format(k, _token(value[k], strict))
+                    for k in sorted(value)
+                ]
+            )
+        )
+    elif isinstance(value, (bool, np.bool_)):
+        return repr(bool(value))
+    elif isinstance(value, (float, np.floating)):
+        return repr(float(value))
+    elif isinstance(value, (int, np.integer)):
+        return repr(int(value))
+    elif (not strict) or isinstance(value, (str, bytes, type(None))):
+        return repr(value)
+    else:
+        raise TypeError("Cannot hash objects of type {}.".format(type(value)))
+
+
+def _code_token(func, seen=None):
+    """
+    Return a string that changes whenever the code of ``func`` changes.
+    This includes its bytecode, its constants and default arguments (and
+    those of any nested functions) and, recursively, the code of the
+    functions in this package that it calls by their global name.
+
+    """
+    if seen is None:
+        seen = set()
+    func = inspect.unwrap(func)
+    if func in seen:
+        return ""
+    seen.add(func)
+
+    def code_token(code):
+        consts = []
+        for const in code.co_consts:
+            if inspect.iscode(const):
+                consts.append(code_token(const))
+            elif isinstance(const, frozenset):
+                consts.append(repr(sorted(const, key=repr)))
+            else:
+                consts.append(repr(const))
+        return "{}{}".format(_token(code.co_code), _token(consts))
+
+    tokens = [
+        code_token(func.__code__),
+        _token(func.__defaults__),
+        _token(func.__kwdefaults__),
+    ]
+    package = __name__.split(".")[0]
+    for name in func.__code__.co_names:
+        helper = func.__globals__.get(name, None)
+        if (
+            inspect.isfunction(helper)
+            and (helper.__module__ or "").split(".")[0] == package
+        ):
+            tokens.append(_code_token(helper, seen))
+    return "|".join(tokens)
+
+
+def _lazy(key, func):
     """
-    Decorator for caching pre-computable things. Not
-    currently used in the code.
+    Return the entry ``key`` of the process-wide registry, initializing it
+    to ``func()`` if needed. The initialization is thread-safe: concurrent
+    requests for the same key wait for the first one to finish, while
+    requests for different keys proceed in parallel.
+
+    """
+    try:
+        return _registry[key]
+    except KeyError:
+        pass
+    with _registry_lock:
+        lock = _key_locks.setdefault(key, threading.Lock())
+    with lock:
+        if key not in _registry:
+            _registry[key] = func()
+        return _registry[key]
+
+
+def _freeze(results):
+    """Make the arrays in ``results`` read-only so they can be shared."""
+    arrays = results.values() if isinstance(results, dict) else results
+    for array in arrays:
+        if isinstance(array, np.ndarray):
+            array.setflags(write=False)
+    return results
+
+
+def _entry_size(path):
+    return sum(f.stat().st_size for f in path.iterdir())
+
+
+def _evict(cache_dir, max_size=None):
+    """
+    Delete the least recently used entries in ``cache_dir`` until its
+    total size is below ``max_size``.
+
+    """
+    if max_size is None:
+        max_size = CACHE_SIZE
+    entries = []
+    for path in cache_dir.iterdir():
+        if path.is_dir() and (path / "meta.json").exists():
+            try:
+                entries.append(
+                    (path.stat().st_mtime, _entry_size(path), path)
+                )
+            except OSError:
+                # Deleted by another process
+                pass
+    size = sum(entry[1] for entry in entries)
+    for _, entry_size, path in sorted(entries):
+        if size <= max_size:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        size -= entry_size
+
+
+def _load(path):
+    """Load a cache entry, memory-mapping its arrays."""
+    with open(path / "meta.json", "r") as f:
+        meta = json.load(f)
+    arrays = [
+        np.load(str(path / "{}.npy".format(n)), mmap_mode="r")
+        for n in range(len(meta["keys"]))
+    ]
+
+    # Mark the entry as recently used
+    os.utime(path)
+
+    if meta["type"] == "dict":
+        return dict(zip(meta["keys"], arrays))
+    else:
+        return arrays
+
+
+def _save(path, results):
+    """
+    Save a cache entry. The arrays are written to a temporary directory
+    that is then atomically renamed, so concurrent readers (e.g., other
+    processes on the same node) never see a partial entry.
+
+    """
+    if isinstance(results, dict):
+        meta = dict(type="dict", keys=list(results.keys()))
+        arrays = list(results.values())
+    else:
+        meta = dict(type="list", keys=list(range(len(results))))
+        arrays = list(results)
+    tmp = Path(tempfile.mkdtemp(dir=str(path.parent), prefix=".tmp-"))
+    try:
+        for n, array in enumerate(arrays):
+            np.save(str(tmp / "{}.npy".format(n)), np.asarray(array))
+        with open(tmp / "meta.json", "w") as f:
+            json.dump(meta, f)
+        if path.exists():
+            shutil.rmtree(path, ignore_errors=True)
+        os.rename(str(tmp), str(path))
+    except OSError:
+        # Someone else got there first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def clear_cache(disk=True):
+    """
+    Clear the process-wide registry of pre-computed arrays, shared
+    objects and memoized results and, if ``disk`` is ``True``, delete the
+    arrays stored on disk.
+
+    """
+    with _registry_lock:
+        _registry.clear()
+        _key_locks.clear()
+    if disk:
+        cache_dir = _cache_dir()
+        if cache_dir is not None and cache_dir.exists():
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def shared(cls, *args, **kwargs):
+    """
+    Return a process-wide shared instance of ``cls(*args, **kwargs)``.
+
+    Use this for immutable objects (such as ops) that are expensive to
+    construct and are needed by many instances of the same model. The
+    instance is keyed on ``args`` and on the keyword arguments named in
+    the signature of any of the constructors in the class hierarchy
+    (or of ``cls`` itself, if it is a function returning the object);
+    other keyword arguments must not change the object. If the arguments
+    can't be hashed reliably (e.g., they are tensors), a new instance is
+    returned.
+
+    """
+    if inspect.isclass(cls):
+        funcs = [
+            vars(base)["__init__"]
+            for base in inspect.getmro(cls)
+            if "__init__" in vars(base)
+        ]
+    else:
+        funcs = [cls]
+    names = set()
+    for func in funcs:
+        try:
+            params = inspect.signature(func).parameters
+        except (TypeError, ValueError):
+            continue
+        names |= set(
+            name
+            for name, param in params.items()
+            if param.kind in (param.POSITIONAL_OR_KEYWORD, param.KEYWORD_ONLY)
+        )
+    try:
+        key = "shared|{}.{}|{}|{}".format(
+            cls.__module__,
+            cls.__qualname__,
+            _token(args, strict=True),
+            _token(
+                {k: v for k, v in kwargs.items() if k in names}, strict=True
+            ),
+        )
+    except TypeError:
+        return cls(*args, **kwargs)
+    return _lazy(key, lambda: cls(*args, **kwargs))
+
+
+def memoize(maxsize):
+    """
+    Decorator for memoizing a function of numerical arguments in memory.
+
+    This is similar to ``functools.lru_cache``, but the arguments may be
+    (containers of) ``numpy`` arrays, which are keyed on their values, and
+    the results are stored in the process-wide registry, so they are
+    discarded by ``clear_cache``. At most ``maxsize`` results are kept; the
+    least recently used ones are evicted first. The number of results
+    currently stored is returned by the ``cache_size`` attribute of the
+    decorated function.
 
     """
 
     def decorator(func):
+        name = "memoize|{}.{}".format(func.__module__, func.__qualname__)
+
+        def results():
+            return _lazy(name, OrderedDict)
+
         @functools.wraps(func)
-        def wrapper(self, *args, clobber=False, **kwargs):
+        def wrapper(*args):
+            key = _token(args, strict=True)
+            entries = results()
+            with _registry_lock:
+                if key in entries:
+                    entries.move_to_end(key)
+                    return entries[key]
+            value = func(*args)
+            entries = results()
+            with _registry_lock:
+                entries[key] = value
+                while len(entries) > maxsize:
+                    entries.popitem(last=False)
+            return value
+
+        wrapper.cache_size = lambda: len(results())
+        return wrapper
+
+    return decorator
+
+
+def cache(*cache_args):
+    """
+    Decorator for caching pre-computable things.
+
+    The decorated function must return a ``dict`` or a ``list`` of
+    ``numpy`` arrays that depend only on its arguments and, if it is a
+    method, on the instance attributes named in ``cache_args``. Results
+    are keyed on these values, the package version and the code of the
+    function and of the helpers it calls (see ``_code_token``). They are
+    computed at most once per process and shared (read-only) by all
+    callers; across processes, they are stored as ``.npy`` files that are
+    memory-mapped when loaded. If caching to disk fails for any reason,
+    the results are simply computed. Pass ``clobber=True`` to force a
+    recomputation.
+
+    """
+
+    def decorator(func):
+        def load_or_compute(path, clobber, args, kwargs):
+            cache_dir = _cache_dir()
+            if cache_dir is None:
+                return _freeze(func(*args, **kwargs))
+            path = cache_dir / path
+
+            # Load from or save to the disk cache
+            try:
+                if (not clobber) and path.exists():
+                    return _load(path)
+            except (OSError, ValueError, KeyError):
+                # Corrupted entry
+                pass
+            results = func(*args, **kwargs)
             try:
-                CACHE_DIR = Path.home() / ".starry_process"
-                CACHE_DIR.mkdir(exist_ok=True)
-                classname = str(self.__class__).split("'")[1]
-                file = CACHE_DIR / (
-                    "{}.{}-".format(classname, func.__name__)
-                    + "-".join(
-                        ["{}".format(getattr(self, arg)) for arg in cache_args]
-                    )
-                    + ".npz"
+                cache_dir.mkdir(parents=True, exist_ok=True)
+                _save(path, results)
+                _evict(cache_dir)
+
+                # Re-load the memory-mapped arrays so their pages
+                # are shared with other processes
+                return _load(path)
+            except (OSError, ValueError, KeyError):
+                # Caching failed!
+                return _freeze(results)
+
+        @functools.wraps(func)
+        def wrapper(*args, clobber=False, **kwargs):
+
+            # Get the key for this call
+            if len(cache_args):
+                self = args[0]
+                attrs = [getattr(self, arg) for arg in cache_args]
+            else:
+                attrs = []
+            key = hashlib.sha1(
+                "|".join(
+                    [
+                        _token(CACHE_FORMAT),
+                        _token(__version__),
+                        _code_token(func),
+                        _token(attrs),
+                        _token(args[1:] if len(cache_args) else args),
+                        _token(kwargs),
+                    ]
+                ).encode()
+            ).hexdigest()
+            path = "{}-{}".format(func.__qualname__, key)
+
+            if clobber:
+                results = load_or_compute(path, True, args, kwargs)
+                with _registry_lock:
+                    _registry[path] = results
+                return results
+            else:
+                return _lazy(
+                    path, lambda: load_or_compute(path, False, args, kwargs)
                 )
-                if (not clobber) and file.exists():
-                    return np.load(str(file))
-                else:
-                    results = func(self, *args, **kwargs)
-                    np.savez(file, **results)
-                    return results
-            except:
-                # caching failed!
-                return func(self, *args, **kwargs)
 
         return wrapper
 
@@ -1,5 +1,5 @@
 from .defaults import update_with_defaults
-from .log_prob import get_log_prob
+from ..pipeline import MomentsStage, LikelihoodStage
 import numpy as np
 from tqdm.auto import tqdm
 from dynesty import utils as dyfunc
@@ -32,26 +32,18 @@ def compute_inclination_pdf(data, results, **kwargs):
     inc = np.linspace(0, 90, ninc_pts)
     lp = np.empty((nlc, ninc_samples, ninc_pts))
 
-    # Compile the likelihood function for a given inclination
-    if sample_kwargs["fit_bm"]:
-        baseline_mean = None
-    else:
-        baseline_mean = sample_kwargs["bm"]
-    if sample_kwargs["fit_blv"]:
-        baseline_log_var = None
-    else:
-        baseline_log_var = sample_kwargs["blv"]
-    log_prob = get_log_prob(
-        t,
-        flux=None,
-        ferr=ferr,
-        p=period,
+    # Compile the two stages of the likelihood: the moments of the
+    # process depend only on the hyperparameters, so we compute them
+    # once per posterior sample and reuse them for all inclinations.
+    # As in `get_log_prob`, we don't cut off the likelihood at large
+    # values of the normalization parameter `z`
+    moments = MomentsStage(ydeg=ydeg)
+    log_like = LikelihoodStage(
         ydeg=ydeg,
-        baseline_mean=baseline_mean,
-        baseline_log_var=baseline_log_var,
-        apply_jac=apply_jac,
         normalized=normalized,
         marginalize_over_inclination=False,
+        covpts=len(t) - 1,
+        normalization_zmax=np.inf,
     )
 
     # Resample posterior samples to equal weight
@@ -66,12 +58,36 @@ def compute_inclination_pdf(data, results, **kwargs):
     for n in tqdm(range(nlc), disable=bool(int(os.getenv("NOTQDM", "0")))):
         for j in range(ninc_samples):
             idx = np.random.randint(len(samples))
+            r, a, b, c, N = samples[idx][:5]
+            k = 5
+            if sample_kwargs["fit_bm"]:
+                baseline_mean = samples[idx][k]
+                k += 1
+            else:
+                baseline_mean = sample_kwargs["bm"]
+            if sample_kwargs["fit_blv"]:
+                baseline_var = 10 ** samples[idx][k]
+            else:
+                baseline_var = 10 ** sample_kwargs["blv"]
+            mean_ylm, cov_ylm, log_jac = moments(r, a, b, c, N)
             lp[n, j] = np.array(
                 [
-                    log_prob(flux[n].reshape(1, -1), *samples[idx], i)
+                    log_like(
+                        mean_ylm,
+                        cov_ylm,
+                        t,
+                        flux[n],
+                        ferr ** 2,
+                        i=i,
+                        p=period,
+                        u=[0.0, 0.0],
+                        baseline_mean=baseline_mean,
+                        baseline_var=baseline_var,
+                    )
                     for i in inc
                 ]
             )
+            if apply_jac:
+                lp[n, j] += log_jac
 
     return dict(inc=inc, lp=lp)
-
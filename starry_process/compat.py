@@ -3,7 +3,7 @@ from aesara_theano_fallback import aesara as theano
 import aesara_theano_fallback.tensor as tt
 from aesara_theano_fallback import ifelse, USE_AESARA
 from aesara_theano_fallback.tensor import slinalg
-from aesara_theano_fallback.graph import basic, op, params_type, fg
+from aesara_theano_fallback.graph import basic, op, opt, params_type, fg
 
 __all__ = [
     "USE_AESARA",
@@ -21,6 +21,8 @@ __all__ = [
     "random_normal",
     "random_uniform",
     "floatX",
+    "local_optimizer",
+    "register_specialize",
 ]
 
 # Set double precision
@@ -33,11 +35,13 @@ Op = op.Op
 COp = op.ExternalCOp
 Params = params_type.Params
 ParamsType = params_type.ParamsType
+local_optimizer = opt.local_optimizer
 theano.config.floatX = floatX
 theano.config.cast_policy = "numpy+floatX"
 
 if USE_AESARA:
 
+    from aesara.tensor.basic_opt import register_specialize
     from aesara.tensor.random.utils import RandomStream
 
     def random_normal(rng, shape):
@@ -49,6 +53,8 @@ if USE_AESARA:
 
 else:
 
+    from theano.tensor.opt import register_specialize
+
     try:
 
         from theano.tensor.random.utils import RandomStream
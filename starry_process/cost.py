@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+A simple cost model for the linear algebra strategies (``solver``) used to
+evaluate the flux process; see ``StarryProcess``. The cost of each
+strategy is estimated from the number of data points ``K``, the spherical
+harmonic degree, the number of light curves and the structure of the
+problem, using the throughputs in ``COST_MODEL``.
+
+"""
+import numpy as np
+import time
+
+
+__all__ = ["COST_MODEL", "NOMINAL_NTIMES", "solver_costs", "calibrate"]
+
+
+#: Calibrated throughputs (in seconds) of the kernels underlying each of
+#: the solvers. These were measured with ``calibrate()`` on a single core
+#: of a reference machine; only their *ratios* matter for the solver choice.
+COST_MODEL = dict(
+    # Per-graph overhead of each strategy
+    overhead_dense=1.0e-4,
+    overhead_lowrank=3.0e-4,
+    overhead_celerite=1.0e-4,
+    overhead_toeplitz=2.0e-4,
+    # Seconds per floating point operation in BLAS/LAPACK kernels
+    flop=2.2e-10,
+    # Seconds per element of an elementwise kernel
+    elem=1.5e-8,
+    # Seconds per step of the celerite recursion...
+    step=4.0e-7,
+    # ... plus this times the squared number of columns per step
+    step_flop=2.5e-9,
+    # Seconds per step of the Levinson-Durbin recursion
+    step_toeplitz=1.6e-5,
+    # Seconds per element (times log2 of the size) of an FFT
+    fft=3.4e-9,
+)
+
+#: The number of data points assumed when it is not known
+#: at the time the graph is built (i.e., if the time array is symbolic).
+NOMINAL_NTIMES = 1000
+
+
+def solver_costs(
+    K,
+    ydeg,
+    nflux=1,
+    marginalize_over_inclination=True,
+    normalized=True,
+    time_variable=False,
+    baseline_var=True,
+    dense_noise=False,
+    celerite=False,
+    toeplitz=False,
+    model=None,
+):
+    """
+    Return the estimated cost in seconds of evaluating the log likelihood
+    with each of the solvers that can be used for the given problem.
+
+    Args:
+        K (int): The number of data points. If ``None``, this is set to
+            ``NOMINAL_NTIMES``.
+        ydeg (int): The spherical harmonic degree of the process.
+        nflux (int, optional): The number of light curves. Default 1.
+        marginalize_over_inclination (bool, optional): Whether the process
+            is marginalized over inclination. Default ``True``.
+        normalized (bool, optional): Whether the process models normalized
+            light curves. Default ``True``.
+        time_variable (bool, optional): Whether the process is time-variable.
+            Default ``False``.
+        baseline_var (bool, optional): Whether there is a (scalar) baseline
+            variance term. Default ``True``.
+        dense_noise (bool, optional): Whether the data covariance or the
+            baseline variance is a full matrix. Default ``False``.
+        celerite (bool, optional): Whether the temporal kernel admits a
+            semiseparable representation. Default ``False``.
+        toeplitz (bool, optional): Whether the times are evenly spaced and
+            the data variance is a scalar, so the covariance is a Toeplitz
+            matrix. Default ``False``.
+        model (dict, optional): The throughputs; default is ``COST_MODEL``.
+
+    Returns:
+        A dictionary of costs keyed by solver name.
+
+    """
+    if model is None:
+        model = COST_MODEL
+    if K is None:
+        K = NOMINAL_NTIMES
+    K = float(K)
+    M = float(nflux)
+    N = (ydeg + 1) ** 2
+    if marginalize_over_inclination:
+        R = 2 * ydeg + 1
+    else:
+        R = N
+
+    # Dense: build the covariance, Cholesky-factorize and solve
+    if marginalize_over_inclination:
+        build = 4 * model["elem"] * K ** 2
+    else:
+        build = model["flop"] * 2 * K ** 2 * N
+    if time_variable:
+        build += model["elem"] * K ** 2
+    costs = dict(
+        dense=model["overhead_dense"]
+        + build
+        + model["flop"] * (K ** 3 / 3 + 2 * K ** 2 * M)
+    )
+    if dense_noise:
+        return costs
+
+    # Number of columns of the low-rank updates
+    extra = 2 * int(normalized) + int(baseline_var)
+
+    # Woodbury identity on a diagonal matrix
+    if not time_variable:
+        Rt = R + extra
+        costs["lowrank"] = (
+            model["overhead_lowrank"]
+            + model["elem"] * K * Rt
+            + model["flop"] * (2 * K * Rt ** 2 + Rt ** 3 + 4 * K * Rt * M)
+        )
+
+    # Generalized celerite recursion
+    elif celerite:
+        J = 2 * R + extra
+        costs["celerite"] = model["overhead_celerite"] + K * (
+            model["step"] + model["step_flop"] * (J ** 2 + J * M)
+        )
+
+    # Levinson-Durbin recursion, plus FFT-based solves for the low-rank
+    # terms and the data
+    if toeplitz:
+        if marginalize_over_inclination:
+            build = model["elem"] * K * R
+        else:
+            build = model["flop"] * 2 * K * N
+        costs["toeplitz"] = (
+            model["overhead_toeplitz"]
+            + build
+            + K * model["step_toeplitz"]
+            + model["flop"] * 2 * K ** 2
+            + model["fft"] * 8 * K * np.log2(2 * K) * (1 + extra + M)
+        )
+
+    return costs
+
+
+def calibrate(K=1000, R=64, ntrials=3):
+    """
+    Measure the throughputs of the kernels underlying each solver on this
+    machine. The result can be used to update ``COST_MODEL``.
+
+    Args:
+        K (int, optional): The size of the test problems. Default 1000.
+        R (int, optional): The number of columns of the test low-rank
+            problems. Default 64.
+        ntrials (int, optional): The number of timing trials. Default 3.
+
+    Returns:
+        A dictionary with the same keys as ``COST_MODEL``.
+
+    """
+    from .compat import theano
+    from .ops.celerite.celerite import CeleriteSolveOp
+    from .ops.toeplitz.toeplitz import _levinson
+
+    def timeit(func):
+        func()
+        tstart = time.perf_counter()
+        for n in range(ntrials):
+            func()
+        return (time.perf_counter() - tstart) / ntrials
+
+    np.random.seed(0)
+    model = dict(COST_MODEL)
+
+    # BLAS/LAPACK
+    A = np.random.randn(K, K)
+    A = np.dot(A, A.T) + K * np.eye(K)
+    model["flop"] = timeit(lambda: np.linalg.cholesky(A)) / (K ** 3 / 3)
+
+    # Elementwise kernels
+    x = np.random.random(K ** 2)
+    model["elem"] = timeit(lambda: np.cos(x) * x + x ** 2) / K ** 2
+
+    # Celerite recursion, for two different numbers of columns
+    Kc = K // 10
+    cost = []
+    for nblk in [1, R // 2]:
+        J = 2 * nblk
+        d = J * np.ones(Kc)
+        U = 0.1 * np.random.randn(Kc, J)
+        Phi = 0.9 * np.tile(np.eye(2), (Kc, 1, 1))
+        y = np.random.randn(Kc, 1)
+        args = [theano.shared(arg) for arg in [d, U, U, Phi, y]]
+        func = theano.function([], CeleriteSolveOp(nblk)(*args))
+        cost.append(timeit(func) / Kc)
+    model["step_flop"] = (cost[1] - cost[0]) / (R ** 2 - 4)
+    model["step"] = cost[0] - 4 * model["step_flop"]
+
+    # Levinson-Durbin recursion
+    c = np.exp(-0.5 * (np.arange(K) / (0.1 * K)) ** 2)
+    c[0] += 1.0
+    model["step_toeplitz"] = (
+        timeit(lambda: _levinson(c)) - model["flop"] * 2 * K ** 2
+    ) / K
+
+    # FFTs
+    x = np.random.randn(2 * K)
+    model["fft"] = timeit(lambda: np.fft.irfft(np.fft.rfft(x))) / (
+        2 * K * np.log2(2 * K)
+    )
+
+    return model
@@ -0,0 +1,544 @@
+# -*- coding: utf-8 -*-
+from .compat import tt, random_normal
+from .math import (
+    Solve,
+    cho_factor,
+    cho_solve,
+    dense_log_likelihood,
+    cast,
+    is_tensor,
+    logabsdet,
+    matrix_sqrt,
+    celerite_solve,
+    celerite_factor,
+    celerite_dot,
+    celerite_lower_dot,
+    celerite_lower_solve,
+    toeplitz_solve,
+    toeplitz_dot,
+)
+import numpy as np
+
+
+__all__ = [
+    "Covariance",
+    "DenseCovariance",
+    "DiagonalCovariance",
+    "LowRankCovariance",
+    "SemiseparableCovariance",
+    "ToeplitzCovariance",
+    "SumCovariance",
+    "is_zero",
+]
+
+
+def is_zero(x):
+    """Return ``True`` if ``x`` is a numerical array of zeros."""
+    return not is_tensor(x) and np.all(np.asarray(x) == 0)
+
+
+class Covariance(object):
+    """
+    A symmetric ``(K, K)`` covariance operator.
+
+    Subclasses exploit the structure of the matrix to solve linear systems,
+    compute log determinants and draw samples without (necessarily)
+    instantiating the full matrix. Operators can be added together;
+    whenever possible, the sum is simplified into a single structured
+    operator, so, e.g., a low-rank matrix plus a diagonal matrix is
+    solved with the Woodbury identity.
+
+    """
+
+    def __init__(self, K):
+        self.K = K
+
+    def dense(self):
+        """The full ``(K, K)`` matrix."""
+        raise NotImplementedError("Not implemented for this operator.")
+
+    def dot(self, x):
+        """The product of the matrix and the ``(K, M)`` matrix ``x``."""
+        return tt.dot(self.dense(), x)
+
+    def scale(self, c):
+        """The operator multiplied by the scalar ``c``."""
+        raise NotImplementedError("Not implemented for this operator.")
+
+    def solve(self, b):
+        """The solution ``x`` to the linear system ``C . x = b``."""
+        return DenseCovariance(self.dense()).solve(b)
+
+    def logdet(self):
+        """The log determinant of the matrix."""
+        return DenseCovariance(self.dense()).logdet()
+
+    def inv_quad(self, a, b):
+        """The product ``a^T . C^-1 . b``."""
+        a, b = cast(a, b)
+        return tt.dot(tt.transpose(a), self.solve(b))
+
+    def quad_logdet(self, r):
+        """
+        The quadratic form ``r^T . C^-1 . r`` (summed over the columns of
+        ``r``) and the log determinant of the matrix. This is all we need to
+        compute the log likelihood.
+
+        """
+        return tt.sum(r * self.solve(r)), self.logdet()
+
+    def log_likelihood(self, r):
+        """
+        The log likelihood of the ``(K, M)`` residuals ``r`` under a
+        zero-mean Gaussian with this covariance, summed over the columns
+        of ``r``.
+
+        """
+        quad, logdet = self.quad_logdet(r)
+        K, M = r.shape[0], r.shape[1]
+        return -0.5 * quad - 0.5 * M * logdet - 0.5 * K * M * np.log(2 * np.pi)
+
+    def sample(self, random, nsamples=1):
+        """
+        Return ``nsamples`` draws from a zero-mean Gaussian with this
+        covariance as a ``(K, nsamples)`` matrix.
+
+        """
+        return DenseCovariance(self.dense()).sample(random, nsamples)
+
+    def _add(self, other):
+        """
+        Return the simplified sum of this operator and ``other``,
+        or ``None`` if this operator doesn't know how to simplify it.
+
+        """
+        return None
+
+    def __add__(self, other):
+        cov = self._add(other)
+        if cov is None:
+            cov = other._add(self)
+        if cov is None:
+            cov = SumCovariance(self, other)
+        return cov
+
+
+class DenseCovariance(Covariance):
+    """A full ``(K, K)`` covariance matrix, solved via Cholesky."""
+
+    def __init__(self, C):
+        self.C = cast(C)
+        self._cho_C = None
+        super().__init__(self.C.shape[0])
+
+    @property
+    def cho_C(self):
+        if self._cho_C is None:
+            self._cho_C = cho_factor(self.C)
+        return self._cho_C
+
+    def dense(self):
+        return self.C
+
+    def scale(self, c):
+        return DenseCovariance(c * self.C)
+
+    def solve(self, b):
+        return cho_solve(self.cho_C, b)
+
+    def logdet(self):
+        return 2 * tt.sum(tt.log(tt.diag(self.cho_C)))
+
+    def log_likelihood(self, r):
+        # A single fused op, which only factorizes the matrix once
+        # for both the value and the gradient
+        return dense_log_likelihood(self.C, r)
+
+    def sample(self, random, nsamples=1):
+        return tt.dot(self.cho_C, random_normal(random, (self.K, nsamples)))
+
+    def _add(self, other):
+        if isinstance(other, DenseCovariance):
+            return DenseCovariance(self.C + other.C)
+        elif isinstance(other, DiagonalCovariance):
+            return DenseCovariance(other.add_to(self.C))
+
+
+class DiagonalCovariance(Covariance):
+    """
+    A diagonal covariance matrix. The diagonal ``d`` may be a scalar
+    (a multiple of the identity) or a vector of length ``K``.
+
+    """
+
+    def __init__(self, d, K):
+        self.d = cast(d)
+        super().__init__(K)
+
+    def _column(self, x):
+        if self.d.ndim == 0 or x.ndim == 1:
+            return self.d
+        else:
+            return tt.reshape(self.d, (-1, 1))
+
+    def add_to(self, C):
+        """Add the diagonal to the ``(K, K)`` matrix ``C``."""
+        K = tt.arange(self.K)
+        return tt.inc_subtensor(C[K, K], self.d)
+
+    def dense(self):
+        return self.add_to(tt.zeros((self.K, self.K)))
+
+    def dot(self, x):
+        return self._column(x) * x
+
+    def scale(self, c):
+        return DiagonalCovariance(c * self.d, self.K)
+
+    def solve(self, b):
+        return b / self._column(b)
+
+    def logdet(self):
+        if self.d.ndim == 0:
+            return self.K * tt.log(self.d)
+        else:
+            return tt.sum(tt.log(self.d))
+
+    def sample(self, random, nsamples=1):
+        if self.d.ndim == 0:
+            sqrtd = tt.sqrt(self.d)
+        else:
+            sqrtd = tt.reshape(tt.sqrt(self.d), (-1, 1))
+        return sqrtd * random_normal(random, (self.K, nsamples))
+
+    def _add(self, other):
+        if isinstance(other, DiagonalCovariance):
+            return DiagonalCovariance(self.d + other.d, self.K)
+        elif isinstance(other, DenseCovariance):
+            return DenseCovariance(self.add_to(other.C))
+
+
+class LowRankCovariance(Covariance):
+    """
+    A low-rank update ``U . S . U^T`` to a ``base`` covariance operator,
+    where ``U`` has shape ``(K, R)`` and ``S`` is symmetric with shape
+    ``(R, R)``. If ``base`` is ``None``, the operator is singular.
+
+    Linear systems are solved with the Woodbury identity and log
+    determinants with the matrix determinant lemma, at a cost of ``R``
+    solves with the ``base`` operator plus ``O(K R^2 + R^3)``. Note that
+    ``S`` need not be invertible (or positive definite).
+
+    """
+
+    def __init__(self, U, S, base=None):
+        self.U = cast(U)
+        self.S = cast(S)
+        self.base = base
+        self._CInvU = None
+        self._Z = None
+        super().__init__(self.U.shape[0])
+
+    def _woodbury(self):
+        # Push-through form of the Woodbury identity:
+        # (C + U S U^T)^-1 = C^-1 - C^-1 U (I + S U^T C^-1 U)^-1 S U^T C^-1
+        if self.base is None:
+            raise ValueError("Cannot solve a singular low-rank system.")
+        if self._Z is None:
+            self._CInvU = self.base.solve(self.U)
+            self._Z = tt.eye(self.U.shape[1]) + tt.dot(
+                self.S, tt.dot(tt.transpose(self.U), self._CInvU)
+            )
+        return self._CInvU, self._Z
+
+    def dense(self):
+        USU = tt.dot(tt.dot(self.U, self.S), tt.transpose(self.U))
+        if self.base is None:
+            return USU
+        else:
+            return self.base.dense() + USU
+
+    def dot(self, x):
+        USUx = tt.dot(self.U, tt.dot(self.S, tt.dot(tt.transpose(self.U), x)))
+        if self.base is None:
+            return USUx
+        else:
+            return self.base.dot(x) + USUx
+
+    def scale(self, c):
+        if self.base is None:
+            return LowRankCovariance(self.U, c * self.S)
+        else:
+            return LowRankCovariance(self.U, c * self.S, self.base.scale(c))
+
+    def solve(self, b):
+        CInvU, Z = self._woodbury()
+        CInvb = self.base.solve(b)
+        return CInvb - tt.dot(
+            CInvU,
+            Solve()(Z, tt.dot(self.S, tt.dot(tt.transpose(self.U), CInvb))),
+        )
+
+    def logdet(self):
+        _, Z = self._woodbury()
+        return self.base.logdet() + logabsdet(Z)
+
+    def sample(self, random, nsamples=1):
+        if self.base is None or isinstance(self.base, DiagonalCovariance):
+            # Sample the low-rank term in the `R`-dimensional space.
+            # Individual terms in `S` may not be positive semi-definite,
+            # so we take the square root of `R . S . R^T`, where `U = Q . R`
+            Q, R = tt.nlinalg.qr(self.U)
+            x = tt.dot(
+                Q,
+                tt.dot(
+                    matrix_sqrt(tt.dot(tt.dot(R, self.S), tt.transpose(R))),
+                    random_normal(random, (R.shape[0], nsamples)),
+                ),
+            )
+            if self.base is not None:
+                x += self.base.sample(random, nsamples)
+            return x
+        else:
+            return super().sample(random, nsamples)
+
+    def _add(self, other):
+        if isinstance(other, LowRankCovariance):
+            R1 = self.S.shape[0]
+            R2 = other.S.shape[0]
+            S = tt.zeros((R1 + R2, R1 + R2))
+            S = tt.set_subtensor(S[:R1, :R1], self.S)
+            S = tt.set_subtensor(S[R1:, R1:], other.S)
+            U = tt.concatenate((self.U, other.U), axis=1)
+            if self.base is None:
+                base = other.base
+            elif other.base is None:
+                base = self.base
+            else:
+                base = self.base + other.base
+            return LowRankCovariance(U, S, base)
+        elif isinstance(other, SemiseparableCovariance):
+            # The semiseparable operator absorbs the low-rank term
+            return None
+        elif self.base is None:
+            return LowRankCovariance(self.U, self.S, other)
+        else:
+            return LowRankCovariance(self.U, self.S, self.base + other)
+
+
+class SemiseparableCovariance(Covariance):
+    """
+    A symmetric semiseparable covariance matrix with diagonal ``d`` and
+    lower triangle
+
+        C_nm = U_n^T . P_n . P_(n-1) ... P_(m+1) . V_m    (n > m)
+
+    in the basis of *sorted* times; see ``math.celerite_solve``.
+    The optional ``inds`` are the indices that sort the data points, so
+    that this operator acts on vectors in the original order.
+
+    Solves, log determinants and samples use the generalized celerite
+    algorithm at a cost of ``O(K J^2)``. Diagonal terms and low-rank
+    updates are absorbed into the semiseparable representation.
+
+    """
+
+    def __init__(self, d, U, V, Phi, nblk, inds=None):
+        self.d, self.U, self.V, self.Phi = cast(d, U, V, Phi)
+        self.nblk = nblk
+        self.inds = inds
+        self._factor = None
+        super().__init__(self.U.shape[0])
+
+    @property
+    def factor(self):
+        # The semiseparable Cholesky factorization C = L . diag(D) . L^T
+        if self._factor is None:
+            self._factor = celerite_factor(
+                self.d, self.U, self.V, self.Phi, self.nblk
+            )
+        return self._factor
+
+    def _sort(self, x):
+        if self.inds is None:
+            return x
+        else:
+            return x[self.inds]
+
+    def _unsort(self, x):
+        if self.inds is None:
+            return x
+        else:
+            return tt.set_subtensor(tt.zeros_like(x)[self.inds], x)
+
+    def _solve(self, b):
+        b = self._sort(cast(b))
+        if b.ndim == 1:
+            b = tt.reshape(b, (-1, 1))
+        return celerite_solve(self.d, self.U, self.V, self.Phi, self.nblk, b)
+
+    def dense(self):
+        return self.dot(tt.eye(self.K))
+
+    def dot(self, x):
+        x = self._sort(cast(x))
+        y = celerite_dot(self.d, self.U, self.V, self.Phi, self.nblk, x)
+        return self._unsort(y)
+
+    def scale(self, c):
+        return SemiseparableCovariance(
+            c * self.d, self.U, c * self.V, self.Phi, self.nblk, self.inds
+        )
+
+    def solve(self, b):
+        # C^-1 . b = L^-T . D^-1 . L^-1 . b
+        b = cast(b)
+        D, W = self.factor
+        z = celerite_lower_solve(
+            self.U,
+            W,
+            self.Phi,
+            self.nblk,
+            self._sort(tt.reshape(b, (self.K, -1))),
+        )
+        x = celerite_lower_solve(
+            self.U,
+            W,
+            self.Phi,
+            self.nblk,
+            z / tt.reshape(D, (-1, 1)),
+            transpose=True,
+        )
+        x = self._unsort(x)
+        if b.ndim == 1:
+            return x[:, 0]
+        else:
+            return x
+
+    def logdet(self):
+        D, _ = self.factor
+        return tt.sum(tt.log(D))
+
+    def inv_quad(self, a, b):
+        # Solve for `a` and `b` at once, since L^-1 . a and L^-1 . b
+        # are all we need: a^T . C^-1 . b = (L^-1 . a)^T . D^-1 . (L^-1 . b)
+        a, b = cast(a, b)
+        A = tt.reshape(a, (self.K, -1))
+        B = tt.reshape(b, (self.K, -1))
+        D, z = self._solve(tt.concatenate((A, B), axis=1))
+        zD = z / tt.reshape(D, (-1, 1))
+        res = tt.dot(tt.transpose(z[:, : A.shape[1]]), zD[:, A.shape[1] :])
+        if a.ndim == 1 and b.ndim == 1:
+            return res[0, 0]
+        elif a.ndim == 1:
+            return res[0]
+        elif b.ndim == 1:
+            return res[:, 0]
+        else:
+            return res
+
+    def quad_logdet(self, r):
+        D, z = self._solve(r)
+        return tt.sum(z ** 2 / tt.reshape(D, (-1, 1))), tt.sum(tt.log(D))
+
+    def sample(self, random, nsamples=1):
+        # L . D^1/2 . x, where x is standard normal
+        D, W = self.factor
+        x = tt.reshape(tt.sqrt(D), (-1, 1)) * random_normal(
+            random, (self.K, nsamples)
+        )
+        return self._unsort(
+            celerite_lower_dot(self.U, W, self.Phi, self.nblk, x)
+        )
+
+    def _add(self, other):
+        if isinstance(other, DiagonalCovariance):
+            if other.d.ndim == 0:
+                d = self.d + other.d
+            else:
+                d = self.d + self._sort(other.d)
+            return SemiseparableCovariance(
+                d, self.U, self.V, self.Phi, self.nblk, self.inds
+            )
+        elif isinstance(other, LowRankCovariance):
+            # Low-rank terms are extra columns with identity transitions
+            U = self._sort(other.U)
+            V = tt.dot(U, other.S)
+            cov = SemiseparableCovariance(
+                self.d + tt.sum(U * V, axis=1),
+                tt.concatenate((self.U, U), axis=1),
+                tt.concatenate((self.V, V), axis=1),
+                self.Phi,
+                self.nblk,
+                self.inds,
+            )
+            if other.base is None:
+                return cov
+            else:
+                return cov + other.base
+
+
+class ToeplitzCovariance(Covariance):
+    """
+    A symmetric Toeplitz covariance matrix ``C_nm = c_|n - m|`` with first
+    column ``c``, as is the case for a stationary process sampled at
+    evenly spaced times.
+
+    Log determinants are computed with the Levinson-Durbin recursion at a
+    cost of ``O(K^2)``; solves and products then cost ``O(K log K)`` per
+    column. The full matrix is never instantiated. Scalar diagonal terms
+    are absorbed into ``c``.
+
+    """
+
+    def __init__(self, c):
+        self.c = cast(c)
+        super().__init__(self.c.shape[0])
+
+    def dense(self):
+        n = tt.arange(self.K)
+        return self.c[tt.abs_(tt.reshape(n, (-1, 1)) - tt.reshape(n, (1, -1)))]
+
+    def dot(self, x):
+        return toeplitz_dot(self.c, x)
+
+    def scale(self, c):
+        return ToeplitzCovariance(c * self.c)
+
+    def solve(self, b):
+        return toeplitz_solve(self.c, b)[1]
+
+    def logdet(self):
+        return toeplitz_solve(self.c, tt.zeros((self.K, 0)))[0]
+
+    def quad_logdet(self, r):
+        logdet, CInvr = toeplitz_solve(self.c, r)
+        return tt.sum(r * CInvr), logdet
+
+    def _add(self, other):
+        if isinstance(other, DiagonalCovariance) and other.d.ndim == 0:
+            return ToeplitzCovariance(tt.inc_subtensor(self.c[0], other.d))
+        elif isinstance(other, ToeplitzCovariance):
+            return ToeplitzCovariance(self.c + other.c)
+
+
+class SumCovariance(Covariance):
+    """
+    The sum of two covariance operators that can't be simplified into
+    a single structured operator. Solves are done on the dense matrix.
+
+    """
+
+    def __init__(self, first, second):
+        self.first = first
+        self.second = second
+        super().__init__(first.K)
+
+    def dense(self):
+        return self.first.dense() + self.second.dense()
+
+    def dot(self, x):
+        return self.first.dot(x) + self.second.dot(x)
+
+    def scale(self, c):
+        return SumCovariance(self.first.scale(c), self.second.scale(c))
@@ -26,10 +26,13 @@ defaults = dict(
     epsy=1e-12,
     epsy15=1e-9,
     covpts=300,
+    design_matrix_cache_size=32,
+    solver="auto",
     log_alpha_max=10,
     log_beta_max=10,
     abmin=1e-12,
     sigma_max=45.0,
+    latitude_tol=None,
     mx=300,
     my=150,
 )
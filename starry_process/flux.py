@@ -1,15 +1,17 @@
 # -*- coding: utf-8 -*-
 from .ops import (
-    RxOp,
+    dotRxOp,
     tensordotRzOp,
     special_tensordotRzOp,
     rTA1Op,
     rTA1LOp,
+    KernelInterpOp,
     CheckBoundsOp,
 )
 from .wigner import R
+from .cache import cache, shared, memoize
 from .defaults import defaults
-from .math import cast
+from .math import cast, is_tensor
 from .compat import theano, tt, ifelse
 from scipy.special import gamma, hyp2f1
 import numpy as np
@@ -20,6 +22,55 @@ import os
 __all__ = ["FluxIntegral"]
 
 
+@cache()
+def _rTA1(ydeg):
+    """
+    Return the flux operator for a star with no limb darkening. This
+    doesn't depend on any user inputs, so it is cached.
+
+    """
+    return [rTA1Op(ydeg=ydeg)().eval()]
+
+
+def _compile_design_matrix(ydeg, udeg, compile_args=[]):
+    """
+    Return a compiled function of the star parameters ``(t, i, p, u)``
+    that evaluates the design matrix. Use ``cache.shared`` to get it, so
+    that it is only compiled once.
+
+    """
+    N = (ydeg + 1) ** 2
+    F = FluxIntegral(
+        tt.zeros(N),
+        tt.zeros((N, N)),
+        udeg=udeg,
+        marginalize_over_inclination=False,
+        ydeg=ydeg,
+        compile_args=compile_args,
+    )
+    t, u = tt.dvector(), tt.dvector()
+    i, p = tt.dscalar(), tt.dscalar()
+    return theano.function(
+        [t, i, p, u], F.design_matrix(t, i, p, u), on_unused_input="ignore"
+    )
+
+
+@memoize(defaults["design_matrix_cache_size"])
+def _numerical_design_matrix(ydeg, udeg, compile_args, t, i, p, u):
+    """
+    Return the design matrix for numerical star parameters. This doesn't
+    depend on the hyperparameters of the process, so it is shared across
+    instances (e.g., across evaluations of the likelihood in a sampler).
+
+    """
+    func = shared(
+        _compile_design_matrix, ydeg, udeg, compile_args=compile_args
+    )
+    A = func(t, i, p, u)
+    A.setflags(write=False)
+    return A
+
+
 class FluxIntegral:
     def __init__(
         self,
@@ -41,11 +92,18 @@ class FluxIntegral:
         self._ydeg = ydeg
         self._nylm = (self._ydeg + 1) ** 2
         self._angle_fac = np.pi / 180
+        self._compile_args = list(kwargs.get("compile_args", []))
 
         # Set up the ops
-        self._special_tensordotRz = special_tensordotRzOp(ydeg, **kwargs)
-        self._tensordotRz = tensordotRzOp(ydeg, **kwargs)
-        self._Rx = RxOp(ydeg, **kwargs)
+        self._special_tensordotRz = shared(
+            special_tensordotRzOp, ydeg, **kwargs
+        )
+        self._tensordotRz = shared(tensordotRzOp, ydeg, **kwargs)
+        self._dotRx = shared(dotRxOp, ydeg, **kwargs)
+        self._interp = shared(
+            KernelInterpOp, ydeg, symmetric=True, **kwargs
+        )
+        self._interp_cross = shared(KernelInterpOp, ydeg, **kwargs)
         self._R = R(
             self._ydeg, cos_alpha=0, sin_alpha=1, cos_gamma=0, sin_gamma=-1
         )
@@ -70,20 +128,7 @@ class FluxIntegral:
         self._i = None
         self._p = None
         self._u = None
-
-    def _dotRx(self, M, theta):
-        f = tt.zeros_like(M)
-        rx = self._Rx(theta)[0]
-        nwig = lambda l: ((l + 1) * (2 * l + 1) * (2 * l + 3)) // 3
-        for l in range(self._ydeg + 1):
-            start = nwig(l - 1)
-            stop = nwig(l)
-            Rxl = tt.reshape(rx[start:stop], (2 * l + 1, 2 * l + 1))
-            f = tt.set_subtensor(
-                f[:, l ** 2 : (l + 1) ** 2],
-                tt.dot(M[:, l ** 2 : (l + 1) ** 2], Rxl),
-            )
-        return f
+        self._key = None
 
     def _right_project(self, M, theta, inc):
         """Apply the projection operator on the right.
@@ -118,16 +163,13 @@ class FluxIntegral:
             1 + 0.5 * i, -0.5 * j, 2 + 0.5 * i, 0.5
         )
 
-    def _precompute(self):
+    @cache("_ydeg")
+    def _integrals(self):
         """
-        Pre-compute some stuff that doesn't depend on
-        user inputs.
+        Compute the first and second moment integrals over inclination.
+        These don't depend on any user inputs, so they are cached on disk.
 
         """
-        # First, we can pre-compute a bunch of stuff
-        # using `numpy`, as it doesn't depend on tensor
-        # variables.
-
         # The marginalization integral
         G = np.array(
             [
@@ -136,47 +178,65 @@ class FluxIntegral:
             ]
         )
 
-        # First moment integral
-        self._wnp = [None for l in range(self._ydeg + 1)]
+        # First moment integral (stored as a block-diagonal matrix)
+        wnp = np.zeros((self._nylm, self._nylm))
         for l in range(self._ydeg + 1):
             m = np.arange(-l, l + 1)
             i = slice(l ** 2, (l + 1) ** 2)
-            self._wnp[l] = self._R[l] @ G[l - m, l + m]
-
-        # Second moment integral. Apologies for
-        # how opaque this all is, since it's the result of
-        # a few hours of tinkering with linear algebra to
-        # maximize the number of operations *before*
-        # we get theano involved.
-        Q = np.empty(
-            (
-                2 * self._ydeg + 1,
-                2 * self._ydeg + 1,
-                2 * self._ydeg + 1,
-                self._nylm,
-            )
-        )
-        for l1 in range(self._ydeg + 1):
-            k = np.arange(l1 ** 2, (l1 + 1) ** 2)
-            k0 = np.arange(2 * l1 + 1).reshape(-1, 1)
-            for p in range(self._nylm):
-                l2 = int(np.floor(np.sqrt(p)))
-                j = np.arange(l2 ** 2, (l2 + 1) ** 2)
-                j0 = np.arange(2 * l2 + 1).reshape(1, -1)
-                L = (
-                    self._R[l1][l1, k - l1 ** 2]
-                    @ G[k0 + j0, 2 * l1 - k0 + 2 * l2 - j0]
-                )
-                R = self._R[l2][j - l2 ** 2, p - l2 ** 2].T
-                Q[l1, : 2 * l1 + 1, : 2 * l2 + 1, p] = L @ R
-        self._Wnp = np.empty((self._nylm, self._nylm))
+            wnp[i, i] = self._R[l] @ G[l - m, l + m]
+
+        # Second moment integral. Only the `m' = 0` rows of the
+        # Wigner matrices contribute, so each `(l1, l2)` block is
+        #
+        #     R[l1][l1] . G[a + b, 2 * (l1 + l2) - a - b] . R[l2][l2]^T
+        #
+        # where `a` and `b` index the Wigner basis of degrees `l1` and
+        # `l2`. This lets us fill in `Wnp` directly with small matrix
+        # products in `O(N^2)` memory.
+        Wnp = np.empty((self._nylm, self._nylm))
         for l1 in range(self._ydeg + 1):
-            i = np.arange(l1 ** 2, (l1 + 1) ** 2)
-            for l2 in range(self._ydeg + 1):
-                j = np.arange(l2 ** 2, (l2 + 1) ** 2)
-                self._Wnp[i.reshape(-1, 1), j.reshape(1, -1)] = Q[
-                    l1, : 2 * l1 + 1, l2, j
-                ].T
+            i = slice(l1 ** 2, (l1 + 1) ** 2)
+            a = np.arange(2 * l1 + 1).reshape(-1, 1)
+            R1 = self._R[l1][l1]
+            for l2 in range(l1 + 1):
+                j = slice(l2 ** 2, (l2 + 1) ** 2)
+                b = np.arange(2 * l2 + 1).reshape(1, -1)
+                R2 = self._R[l2][l2]
+                Wnp[i, j] = R1 @ G[a + b, 2 * (l1 + l2) - a - b] @ R2.T
+                Wnp[j, i] = Wnp[i, j].T
+
+        return dict(wnp=wnp, Wnp=Wnp)
+
+    def _precompute(self):
+        """
+        Pre-compute some stuff that doesn't depend on
+        user inputs.
+
+        """
+        # First, we can pre-compute a bunch of stuff
+        # using `numpy`, as it doesn't depend on tensor
+        # variables.
+        integrals = self._integrals()
+        self._wnp = [
+            integrals["wnp"][l ** 2 : (l + 1) ** 2, l ** 2 : (l + 1) ** 2]
+            for l in range(self._ydeg + 1)
+        ]
+        self._Wnp = integrals["Wnp"]
+
+        # The index of the `m = 0` coefficient of the degree of each
+        # spherical harmonic coefficient
+        ls = np.floor(np.sqrt(np.arange(self._nylm))).astype(int)
+        self._m0 = ls ** 2 + ls
+
+        # The marginalized kernel is a trigonometric polynomial of
+        # degree `ydeg` in the phase lag, so its Fourier coefficients
+        # can be computed *exactly* from its values on `2 * ydeg + 1`
+        # equally spaced points
+        nf = 2 * self._ydeg + 1
+        self._mf = np.arange(self._ydeg + 1)
+        self._xf = 2 * np.pi * np.arange(nf) / nf
+        self._dft = (2.0 / nf) * np.cos(np.outer(self._mf, self._xf))
+        self._dft[0] /= 2
 
     def _compute_inclination_integrals(self):
 
@@ -188,7 +248,9 @@ class FluxIntegral:
         if self._udeg > 0:
 
             # Flux integral op
-            self._rTA1 = rTA1LOp(ydeg=self._ydeg, udeg=self._udeg)(self._u)
+            self._rTA1 = shared(
+                rTA1LOp, ydeg=self._ydeg, udeg=self._udeg
+            )(self._u)
 
             # First moment
             self._w = [None for l in range(self._ydeg + 1)]
@@ -196,23 +258,16 @@ class FluxIntegral:
                 i = slice(l ** 2, (l + 1) ** 2)
                 self._w[l] = tt.dot(self._rTA1[i], self._wnp[l])
 
-            # Second moment
-            m0 = np.array([l ** 2 + l for l in range(self._ydeg + 1)])
-            Z = tt.outer(self._rTA1[m0], self._rTA1[m0])
-            self._W = tt.zeros((self._nylm, self._nylm))
-            for l1 in range(self._ydeg + 1):
-                i = np.arange(l1 ** 2, (l1 + 1) ** 2).reshape(-1, 1)
-                for l2 in range(self._ydeg + 1):
-                    j = np.arange(l2 ** 2, (l2 + 1) ** 2).reshape(1, -1)
-                    self._W = tt.set_subtensor(
-                        self._W[i, j], self._Wnp[i, j] * Z[l1, l2]
-                    )
+            # Second moment: each `(l1, l2)` block of `Wnp` is scaled
+            # by the product of the `m = 0` terms of degrees `l1` and `l2`
+            rho = self._rTA1[self._m0]
+            self._W = self._Wnp * tt.outer(rho, rho)
 
         else:
 
             # Get the numeric value of the flux op, since it
             # doesn't depend on any user inputs
-            self._rTA1 = rTA1Op(ydeg=self._ydeg)().eval()
+            self._rTA1 = _rTA1(self._ydeg)[0]
 
             # First moment
             self._w = [None for l in range(self._ydeg + 1)]
@@ -221,16 +276,25 @@ class FluxIntegral:
                 self._w[l] = self._rTA1[i] @ self._wnp[l]
 
             # Second moment
-            m0 = np.array([l ** 2 + l for l in range(self._ydeg + 1)])
-            Z = np.outer(self._rTA1[m0], self._rTA1[m0])
-            self._W = np.zeros((self._nylm, self._nylm))
-            for l1 in range(self._ydeg + 1):
-                i = np.arange(l1 ** 2, (l1 + 1) ** 2).reshape(-1, 1)
-                for l2 in range(self._ydeg + 1):
-                    j = np.arange(l2 ** 2, (l2 + 1) ** 2).reshape(1, -1)
-                    self._W[i, j] = self._Wnp[i, j] * Z[l1, l2]
+            rho = self._rTA1[self._m0]
+            self._W = self._Wnp * np.outer(rho, rho)
 
     def _set_params(self, t, i, p, u):
+        # If the star parameters are numerical, the design matrix
+        # can be computed once and cached
+        if is_tensor(t, i, p, u):
+            key = None
+        else:
+            key = (
+                self._ydeg,
+                self._udeg,
+                self._compile_args,
+                np.array(t, dtype="float64").reshape(-1),
+                float(i),
+                float(p),
+                np.array(u, dtype="float64").reshape(-1)[: self._udeg],
+            )
+
         # Ingest
         t = cast(t, vectorize=True)
         i = CheckBoundsOp(name="i", lower=0, upper=0.5 * np.pi)(
@@ -251,6 +315,7 @@ class FluxIntegral:
             self._i = i
             self._p = p
             self._u = u
+            self._key = key
             self._compute()
 
     def _interpolate_cov(self):
@@ -260,22 +325,36 @@ class FluxIntegral:
 
         """
         theta = 2 * np.pi * tt.mod(self._t / self._p, 1.0)
-        x = tt.reshape(tt.abs_(theta[:, None] - theta[None, :]), (-1,))
-        inds = tt.cast(tt.floor(x / self._dx), "int64")
-        x0 = (x - self._xp[inds + 1]) / self._dx
-        cov = tt.reshape(
-            self._a0[inds]
-            + self._a1[inds] * x0
-            + self._a2[inds] * x0 ** 2
-            + self._a3[inds] * x0 ** 3,
-            (theta.shape[0], theta.shape[0]),
-        )
+        cov = self._interp(theta, theta, self._A, self._dx)
 
         # If len(theta) == 1, return the *variance* instead
         cov = ifelse(tt.eq(theta.shape[0], 1), self._var, cov)
         return cov
 
+    def _interpolate_cross_cov(self, t1, t2):
+        """
+        Interpolate the pre-computed kernel onto the grid of time lags
+        between ``t1`` and ``t2``.
+
+        """
+        theta1 = 2 * np.pi * tt.mod(t1 / self._p, 1.0)
+        theta2 = 2 * np.pi * tt.mod(t2 / self._p, 1.0)
+        return self._interp_cross(theta1, theta2, self._A, self._dx)
+
     def _design_matrix(self):
+        """
+        Return the design matrix. If the star parameters are numerical,
+        it is evaluated once and cached, since it does not depend on
+        the hyperparameters of the process.
+
+        """
+        if self._key is not None:
+            A = _numerical_design_matrix(*self._key)
+            return tt.as_tensor_variable(A)
+        else:
+            return self._compute_design_matrix()
+
+    def _compute_design_matrix(self):
         theta = 2 * np.pi * tt.mod(self._t / self._p, 1.0)
         rTA1 = tt.tile(self._rTA1, (theta.shape[0], 1))
         return self._right_project(rTA1, theta, self._i)
@@ -328,10 +407,19 @@ class FluxIntegral:
             self._a1 = -y0 / 3.0 - 0.5 * y1 + y2 - y3 / 6.0
             self._a2 = 0.5 * (y0 + y2) - y1
             self._a3 = 0.5 * ((y1 - y2) + (y3 - y0) / 3.0)
+            self._A = tt.stack((self._a0, self._a1, self._a2, self._a3))
 
             # Compute the covariance
             self._cov = self._interpolate_cov()
 
+            # Fourier (cosine) coefficients of the kernel. By symmetry,
+            # the coefficients of the sine terms are all zero.
+            self._fourier_coeffs = tt.dot(
+                self._dft,
+                self._special_tensordotRz(self._W, self._Ez, self._xf)
+                - self._mean ** 2,
+            )
+
         else:
 
             A = self._design_matrix()
@@ -364,6 +452,158 @@ class FluxIntegral:
         else:
             return self._cov[0]
 
+    def low_rank_cov(self, t, i, p, u):
+        """
+        Return the factors ``U`` and ``S`` of the exact low-rank
+        representation of the covariance, ``cov = U . S . U^T``.
+
+        When marginalizing over inclination, ``U`` is the ``(K, 2 * ydeg + 1)``
+        matrix of Fourier features ``[cos(m theta), sin(m theta)]`` and
+        ``S`` is diagonal. Unlike ``cov``, this is not interpolated.
+        Otherwise, ``U`` is the ``(K, (ydeg + 1)^2)`` design matrix and
+        ``S`` is the spherical harmonic covariance.
+
+        """
+        self._set_params(t, i, p, u)
+        if self._marginalize_over_inclination:
+            theta = 2 * np.pi * tt.mod(self._t / self._p, 1.0)
+            mtheta = tt.reshape(theta, (-1, 1)) * self._mf.reshape(1, -1)
+            U = tt.concatenate(
+                (tt.cos(mtheta), tt.sin(mtheta[:, 1:])), axis=1
+            )
+            S = tt.diag(
+                tt.concatenate(
+                    (self._fourier_coeffs, self._fourier_coeffs[1:])
+                )
+            )
+            return U, S
+        else:
+            return self._design_matrix(), self._cov_ylm
+
+    def _precompute_batch(self):
+        """
+        Pre-compute the constant matrices used in ``batch_low_rank_cov``.
+
+        """
+        if hasattr(self, "_Bl"):
+            return
+        ls = np.floor(np.sqrt(np.arange(self._nylm))).astype(int)
+        ms = np.arange(self._nylm) - ls ** 2 - ls
+
+        # Indicator matrix of the `l` blocks and the spherical harmonic
+        # index of the `-m` counterpart of each coefficient
+        self._Bl = np.zeros((self._nylm, self._ydeg + 1))
+        self._Bl[np.arange(self._nylm), ls] = 1.0
+        self._mirror = ls ** 2 + ls - ms
+
+        # The Fourier transform of the `zhat` rotation vectors; see
+        # `computeSpecialTensordotRz` in `wigner.h`
+        Dc = np.dot(self._dft, np.cos(np.outer(self._xf, ms)))
+        Ds = np.dot(self._dft, np.sin(np.outer(self._xf, ms)))
+        self._Dc = Dc[:, :, None] * self._Bl[None, :, :]
+        self._Ds = Ds[:, :, None] * self._Bl[None, :, :]
+
+        # The central rows of the `Rx` Wigner matrices are linear
+        # combinations of `sin(i / 2)^(2l - k) cos(i / 2)^k`
+        self._Rx0 = np.zeros((self._nylm, self._nylm))
+        for l in range(self._ydeg + 1):
+            j = slice(l ** 2, (l + 1) ** 2)
+            self._Rx0[j, j] = self._R[l][l].T
+        self._Rx0_pow = 2 * ls - (np.arange(self._nylm) - ls ** 2)
+        self._Rx0_ls = ls
+
+    def batch_low_rank_cov(self, t, star, i, p, u):
+        """
+        Return the factors of the exact low-rank representation of the
+        covariance (see ``low_rank_cov``) for a batch of stars with
+        different inclinations, periods and limb darkening coefficients.
+
+        Args:
+            t (vector): The concatenated time arrays of all stars.
+            star (vector): The (integer) index of the star each time
+                corresponds to.
+            i (vector): The inclination of each star in degrees.
+            p (vector): The period of each star.
+            u (matrix): The limb darkening coefficients of each star.
+
+        Returns:
+            A tuple ``(U, S, mean)``, where ``U`` is the matrix of features
+            evaluated at each time, ``S`` has shape ``(nstars, R, R)``
+            (or ``(1, R, R)`` if it is the same for all stars) and ``mean``
+            is the flux mean at each time.
+
+        """
+        self._precompute_batch()
+        t = cast(t, vectorize=True)
+        star = tt.cast(star, "int64")
+        i = CheckBoundsOp(name="i", lower=0, upper=0.5 * np.pi)(
+            i * self._angle_fac
+        )
+        p = CheckBoundsOp(name="p", lower=0, upper=np.inf)(p)
+        nstars = p.shape[0]
+        m0 = np.array([l ** 2 + l for l in range(self._ydeg + 1)])
+
+        # The `m = 0` coefficients of the flux operator of each star
+        if self._udeg > 0:
+            u = cast(u)[..., : self._udeg]
+            u = u * tt.ones((nstars, 1))
+            rho = shared(rTA1LOp, ydeg=self._ydeg, udeg=self._udeg)(u)[:, m0]
+        else:
+            rTA1 = _rTA1(self._ydeg)[0]
+            rho = tt.ones((nstars, 1)) * rTA1[m0].reshape(1, -1)
+        theta = 2 * np.pi * tt.mod(t / p[star], 1.0)
+
+        if self._marginalize_over_inclination:
+
+            # The flux mean is linear in `rho`
+            v = tt.stack(
+                [
+                    tt.dot(self._wnp[l][l], self._ez[l ** 2 : (l + 1) ** 2, 0])
+                    for l in range(self._ydeg + 1)
+                ]
+            )
+            mean = tt.dot(rho, v)
+
+            # The Fourier coefficients of the kernel are quadratic in `rho`
+            HA = tt.dot(self._Wnp * self._Ez, self._Bl)
+            HB = tt.dot(self._Wnp * self._Ez[:, self._mirror], self._Bl)
+            G = tt.tensordot(self._Dc, HA, axes=[[1], [0]]) + tt.tensordot(
+                self._Ds, HB, axes=[[1], [0]]
+            )
+            c = tt.sum(
+                tt.tensordot(rho, G, axes=[[1], [1]]) * rho[:, None, :],
+                axis=2,
+            )
+            c = tt.set_subtensor(c[:, 0], c[:, 0] - mean ** 2)
+
+            # Fourier features
+            mtheta = tt.reshape(theta, (-1, 1)) * self._mf.reshape(1, -1)
+            U = tt.concatenate(
+                (tt.cos(mtheta), tt.sin(mtheta[:, 1:])), axis=1
+            )
+            s = tt.concatenate((c, c[:, 1:]), axis=1)
+            R = 2 * self._ydeg + 1
+            S = tt.set_subtensor(
+                tt.zeros((nstars, R, R))[:, np.arange(R), np.arange(R)], s
+            )
+            return U, S, mean[star]
+
+        else:
+
+            # Rotate the flux operator to the sky frame; this is
+            # the same as `_right_project` for a batch of inclinations
+            x = tt.power(
+                tt.sin(0.5 * i)[:, None], self._Rx0_pow[None, :]
+            ) * tt.power(
+                tt.cos(0.5 * i)[:, None],
+                2 * self._Rx0_ls[None, :] - self._Rx0_pow[None, :],
+            )
+            M = tt.dot(rho[:, self._Rx0_ls] * x, self._Rx0)[star]
+            M = self._tensordotRz(M, theta)
+            U = self._dotRx(M, 0.5 * np.pi)
+            mean = tt.dot(U, self._mean_ylm)
+            return U, tt.shape_padleft(self._cov_ylm), mean
+
     def mean(self, t, i, p, u):
         """
 
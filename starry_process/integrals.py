@@ -1,4 +1,6 @@
 from .math import matrix_sqrt
+from .ops import tensordotROp
+from .cache import shared
 from .compat import tt, ifelse, Op, Apply, floatX
 from .defaults import defaults
 import numpy as np
@@ -109,32 +111,26 @@ class MomentIntegral(object):
 
 
 class WignerIntegral(MomentIntegral):
+    def __init__(self, *params, ydeg=defaults["ydeg"], **kwargs):
+        self._tensordotR = shared(tensordotROp, ydeg, **kwargs)
+        super().__init__(*params, ydeg=ydeg, **kwargs)
+
     @property
     def _neig(self):
         return 2 * self._ydeg + 1
 
     def _compute(self):
         self._U = matrix_sqrt(self._Q, neig=self._neig, driver=self._driver)
-        self._t = [None for l in range(self._ydeg + 1)]
-        for l in range(self._ydeg + 1):
-            self._t[l] = tt.dot(self._R[l], self._q[l ** 2 : (l + 1) ** 2])
-        self._T = [None for l in range(self._ydeg + 1)]
-        for l in range(self._ydeg + 1):
-            i = slice(l ** 2, (l + 1) ** 2)
-            self._T[l] = tt.swapaxes(tt.dot(self._R[l], self._U[i]), 1, 2)
+        self._Rflat = np.concatenate([Rl.reshape(-1) for Rl in self._R])
 
     def _first_moment(self, e):
-        mu = tt.zeros(self._nylm)
-        for l in range(self._ydeg + 1):
-            i = slice(l ** 2, (l + 1) ** 2)
-            mu = tt.set_subtensor(mu[i], tt.dot(self._t[l], e[i]))
-        return mu
+        mu = self._tensordotR(
+            self._Rflat, tt.reshape(self._q, (-1, 1)), tt.reshape(e, (-1, 1))
+        )
+        return tt.reshape(mu, (self._nylm,))
 
     def _second_moment(self, eigE):
-        sqrtC = tt.zeros((self._nylm, self._neig, eigE.shape[-1]))
-        for l in range(self._ydeg + 1):
-            i = slice(l ** 2, (l + 1) ** 2)
-            sqrtC = tt.set_subtensor(sqrtC[i], tt.dot(self._T[l], eigE[i]))
+        sqrtC = self._tensordotR(self._Rflat, self._U, eigE)
         sqrtC = tt.reshape(sqrtC, (self._nylm, -1))
         # Sometimes it's useful to reduce the size of `sqrtC` by
         # finding the equivalent lower dimension representation
@@ -25,8 +25,6 @@ class MCMCInterface:
     """
     An interface for using a ``pymc3`` model with a plain vanilla MCMC sampler.
 
-
-
     Args:
         model (optional): The ``pymc3`` model. If ``None`` (default), uses the
             current model on the stack.
@@ -1,16 +1,202 @@
 from .wigner import R
 from .integrals import WignerIntegral
 from .ops import LatitudeIntegralOp, CheckBoundsOp
+from .cache import cache, shared
 from .defaults import defaults
 from .math import is_tensor
-from .compat import tt, ifelse
+from .compat import theano, tt, ifelse
 from scipy.stats import beta as Beta
+from scipy.special import gammaln, digamma, polygamma
 import numpy as np
 
 
 __all__ = ["gauss2beta", "beta2gauss", "LatitudeIntegral"]
 
 
+def _log_moments(ydeg, x, y, chunk=256):
+    """
+    Return the log of the moments ``E[(1 + z)^i (1 - z)^j]`` for
+    ``i + j <= 2 * ydeg`` of the Beta distribution in ``z = cos(phi)``
+    with shape parameters ``alpha = exp(x)`` and ``beta = exp(y)``, as
+    well as their first derivatives and their cross derivative with
+    respect to ``x`` and ``y``. These are the (strictly positive) building
+    blocks of the latitude integrals ``q`` and ``Q``. Each moment is
+    computed as the sum of the positive terms
+
+        C(i, k) E[z^k (1 - z)^j]
+            = C(i, k) B(alpha + k, beta + j) / B(alpha, beta)
+
+    so there's no cancellation. Returns an array of shape ``(len(x), 4, M)``
+    with the moments ordered by ``i + j`` and then by ``i``.
+
+    """
+    n = 2 * ydeg + 1
+    i = np.concatenate([np.arange(s + 1) for s in range(n)])
+    j = np.concatenate([s - np.arange(s + 1) for s in range(n)])
+    k = np.arange(n)
+    idx = j[:, None] + k[None, :]
+    log_binom = np.where(
+        k[None, :] <= i[:, None],
+        gammaln(i[:, None] + 1)
+        - gammaln(k[None, :] + 1)
+        - gammaln(np.maximum(i[:, None] - k[None, :], 0) + 1),
+        -np.inf,
+    )
+    res = np.empty((len(x), 4, len(i)))
+    for start in range(0, len(x), chunk):
+        alpha = np.exp(x[start : start + chunk])[:, None]
+        beta = np.exp(y[start : start + chunk])[:, None]
+        ab = alpha + beta
+        m = np.arange(2 * n)
+        lga = (gammaln(alpha + k) - gammaln(alpha))[:, None, :]
+        lgb = (gammaln(beta + k) - gammaln(beta))[:, j, None]
+        lgab = (gammaln(ab + m) - gammaln(ab))[:, idx]
+        pga = (digamma(alpha + k) - digamma(alpha))[:, None, :]
+        pgb = (digamma(beta + k) - digamma(beta))[:, j, None]
+        pgab = (digamma(ab + m) - digamma(ab))[:, idx]
+        tgab = (polygamma(1, ab + m) - polygamma(1, ab))[:, idx]
+
+        # Normalized weights of each term in the sum
+        log_w = log_binom + lga + lgb - lgab
+        log_w_max = np.max(log_w, axis=-1, keepdims=True)
+        w = np.exp(log_w - log_w_max)
+        wsum = np.sum(w, axis=-1)
+        w /= wsum[..., None]
+
+        # The moments and their derivatives
+        da = pga - pgab
+        db = pgb - pgab
+        g = log_w_max[..., 0] + np.log(wsum)
+        gx = alpha * np.sum(w * da, axis=-1)
+        gy = beta * np.sum(w * db, axis=-1)
+        gxy = alpha * beta * np.sum(w * (da * db - tgab), axis=-1) - gx * gy
+        res[start : start + chunk] = np.stack((g, gx, gy, gxy), axis=1)
+    return res
+
+
+def _interpolate(table, x, y, x0, y0, dx, dy, math=np):
+    """
+    Evaluate the bicubic Hermite interpolant of ``table``, an array of
+    shape ``(nx, ny, 4, M)`` of values and derivatives (as returned by
+    ``_log_moments``) on a regular grid, at the point(s) ``x``, ``y``.
+
+    """
+    nx, ny = table.shape[:2]
+    u = (x - x0) / dx
+    v = (y - y0) / dy
+    if math is np:
+        # Vectorized over points
+        i = np.clip(np.floor(u).astype(int), 0, nx - 2)
+        j = np.clip(np.floor(v).astype(int), 0, ny - 2)
+        t = (u - i)[:, None]
+        s = (v - j)[:, None]
+    else:
+        i = tt.clip(tt.cast(tt.floor(u), "int64"), 0, nx - 2)
+        j = tt.clip(tt.cast(tt.floor(v), "int64"), 0, ny - 2)
+        t = u - i
+        s = v - j
+
+    # The cubic Hermite basis functions
+    ht = [
+        (1 + 2 * t) * (1 - t) ** 2,
+        t ** 2 * (3 - 2 * t),
+        dx * t * (1 - t) ** 2,
+        dx * t ** 2 * (t - 1),
+    ]
+    hs = [
+        (1 + 2 * s) * (1 - s) ** 2,
+        s ** 2 * (3 - 2 * s),
+        dy * s * (1 - s) ** 2,
+        dy * s ** 2 * (s - 1),
+    ]
+    res = 0.0
+    for p in range(2):
+        for q in range(2):
+            res += ht[p] * hs[q] * table[i + p, j + q, 0]
+            res += ht[p + 2] * hs[q] * table[i + p, j + q, 1]
+            res += ht[p] * hs[q + 2] * table[i + p, j + q, 2]
+            res += ht[p + 2] * hs[q + 2] * table[i + p, j + q, 3]
+    return res
+
+
+@cache()
+def _latitude_table(ydeg, log_alpha_max, log_beta_max, tol, max_size=129):
+    """
+    Return a table of the log moments of the latitude distribution (see
+    ``_log_moments``) on a regular grid in ``log(alpha)`` and
+    ``log(beta)``. The grid is refined until the error of the bicubic
+    interpolant at the centers of the cells is below ``tol``. This
+    doesn't depend on any user inputs (other than the tolerance), so it
+    is cached on disk.
+
+    """
+    x0, y0 = 0.0, np.log(0.5)
+    n = 17
+    while True:
+        x = np.linspace(x0, log_alpha_max, n)
+        y = np.linspace(y0, log_beta_max, n)
+        dx, dy = x[1] - x[0], y[1] - y[0]
+        X, Y = np.meshgrid(x, y, indexing="ij")
+        table = _log_moments(ydeg, X.reshape(-1), Y.reshape(-1))
+        table = table.reshape(n, n, 4, -1)
+
+        # Check the interpolant at the centers of the cells
+        X, Y = np.meshgrid(
+            x[:-1] + 0.5 * dx, y[:-1] + 0.5 * dy, indexing="ij"
+        )
+        X, Y = X.reshape(-1), Y.reshape(-1)
+        error = np.max(
+            np.abs(
+                _interpolate(table, X, Y, x0, y0, dx, dy)
+                - _log_moments(ydeg, X, Y)[:, 0]
+            )
+        )
+        if error < tol:
+            break
+        elif 2 * n - 1 > max_size:
+            raise ValueError(
+                "Unable to tabulate the latitude integrals to a "
+                "tolerance of {0:.1e}; the error on a grid of size {1} "
+                "is {2:.1e}.".format(tol, n, error)
+            )
+        n = 2 * n - 1
+
+    # Indices of the moments in `q` and `Q`, whose entries are
+    # E[(1 + z)^i (1 - z)^j] / 2^(i + j) with i = (l + m) / 2 and
+    # j = (l - m) / 2, or zero if these aren't integers
+    N = (ydeg + 1) ** 2
+    l = np.floor(np.sqrt(np.arange(N))).astype(int)
+    m = np.arange(N) - l ** 2 - l
+    L = l[:, None] + l[None, :]
+    M = m[:, None] + m[None, :]
+    nonzero = (L + M) % 2 == 0
+    i = np.where(nonzero, (L + M) // 2, 0)
+    j = np.where(nonzero, (L - M) // 2, 0)
+    indices = ((i + j) * (i + j + 1)) // 2 + i
+    factors = np.where(nonzero, 0.5 ** L, 0.0)
+    return dict(
+        table=table,
+        q_indices=indices[:, 0],
+        q_factors=factors[:, 0],
+        Q_indices=indices,
+        Q_factors=factors,
+        x0=np.array(x0),
+        y0=np.array(y0),
+        dx=np.array(dx),
+        dy=np.array(dy),
+    )
+
+
+def _shared_latitude_table(ydeg, log_alpha_max, log_beta_max, tol):
+    """
+    Return the table of ``_latitude_table`` as a theano shared variable.
+    Use ``cache.shared`` to get it, so that all graphs share one buffer.
+
+    """
+    data = _latitude_table(ydeg, log_alpha_max, log_beta_max, tol)
+    return theano.shared(data["table"], name="latitude_table", borrow=True)
+
+
 def gauss2beta(
     mu,
     sigma,
@@ -205,11 +391,52 @@ class LatitudeIntegral(WignerIntegral):
             self._ydeg, cos_alpha=0, sin_alpha=1, cos_gamma=0, sin_gamma=-1
         )
 
-        # Compute the integrals
-        self._integral_op = LatitudeIntegralOp(self._ydeg, **kwargs)
-        self._q, _, _, self._Q, _, _ = self._integral_op(
-            self._alpha, self._beta
+        # Compute the integrals, either exactly or by interpolating
+        # a table of the moments of the distribution
+        tol = kwargs.get("latitude_tol", defaults["latitude_tol"])
+        if tol is None:
+            self._integral_op = shared(
+                LatitudeIntegralOp, self._ydeg, **kwargs
+            )
+            self._q, _, _, self._Q, _, _ = self._integral_op(
+                self._alpha, self._beta
+            )
+        else:
+            self._q, self._Q = self._interpolate_integrals(tol)
+
+    def _interpolate_integrals(self, tol):
+        """
+        Return the integrals ``q`` and ``Q`` computed from a bicubic
+        interpolation of the tabulated moments of the distribution. The
+        relative error on each entry is at most ``tol``.
+
+        """
+        args = (
+            self._ydeg,
+            float(self._log_alpha_max),
+            float(self._log_beta_max),
+            float(tol),
+        )
+        data = _latitude_table(*args)
+        x = self._a * self._log_alpha_max
+        y = np.log(0.5) + self._b * (self._log_beta_max - np.log(0.5))
+        moments = tt.exp(
+            _interpolate(
+                shared(_shared_latitude_table, *args),
+                x,
+                y,
+                float(data["x0"]),
+                float(data["y0"]),
+                float(data["dx"]),
+                float(data["dy"]),
+                math=tt,
+            )
         )
+        q = moments[data["q_indices"]] * data["q_factors"]
+        Q = tt.reshape(
+            moments[data["Q_indices"].reshape(-1)], data["Q_factors"].shape
+        ) * tt.as_tensor_variable(data["Q_factors"])
+        return q, Q
 
     @property
     def mu(self):
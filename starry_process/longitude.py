@@ -1,6 +1,7 @@
 from .wigner import R
 from .integrals import WignerIntegral
 from .ops import RyOp, CheckBoundsOp
+from .cache import cache
 import numpy as np
 from scipy.special import gamma
 
@@ -19,34 +20,39 @@ class LongitudeIntegral(WignerIntegral):
             self._ydeg, cos_alpha=1, sin_alpha=0, cos_gamma=1, sin_gamma=0
         )
 
-        # Integrate the basis terms
+        # Compute the moment integrals
+        integrals = self._integrals()
+        self._q = integrals["q"]
+        self._Q = integrals["Q"]
+
+    @cache("_ydeg")
+    def _integrals(self):
+        """
+        Compute the first and second moment integrals. These don't
+        depend on any user inputs, so they are cached on disk.
+
+        """
+        # Integrate the basis terms (the odd powers of `sin` vanish)
+        n = np.arange(4 * self._ydeg + 1)
+        i = n.reshape(-1, 1)
+        j = n[::2].reshape(1, -1)
         term = np.zeros((4 * self._ydeg + 1, 4 * self._ydeg + 1))
-        for i in range(4 * self._ydeg + 1):
-            for j in range(0, 4 * self._ydeg + 1, 2):
-                term[i, j] = (
-                    gamma(0.5 * (i + 1))
-                    * gamma(0.5 * (j + 1))
-                    / gamma(0.5 * (2 + i + j))
-                )
+        term[:, ::2] = (
+            gamma(0.5 * (i + 1))
+            * gamma(0.5 * (j + 1))
+            / gamma(0.5 * (2 + i + j))
+        )
         term /= np.pi
 
-        # Compute the moment integrals
-        self._q = np.zeros(self._nylm)
-        self._Q = np.zeros((self._nylm, self._nylm))
-        n1 = 0
-        for l1 in range(self._ydeg + 1):
-            for m1 in range(-l1, l1 + 1):
-                j1 = m1 + l1
-                i1 = l1 - m1
-                self._q[n1] = term[j1, i1]
-                n2 = 0
-                for l2 in range(self._ydeg + 1):
-                    for m2 in range(-l2, l2 + 1):
-                        j2 = m2 + l2
-                        i2 = l2 - m2
-                        self._Q[n1, n2] = term[j1 + j2, i1 + i2]
-                        n2 += 1
-                n1 += 1
+        # Compute the moment integrals by gathering the terms
+        # corresponding to each pair of spherical harmonics
+        l = np.floor(np.sqrt(np.arange(self._nylm))).astype(int)
+        m = np.arange(self._nylm) - l ** 2 - l
+        j = m + l
+        i = l - m
+        q = term[j, i]
+        Q = term[j.reshape(-1, 1) + j, i.reshape(-1, 1) + i]
+        return dict(q=q, Q=Q)
 
     def _pdf(self, lam):
         """
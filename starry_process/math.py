@@ -1,11 +1,37 @@
-from .ops import EighOp
-from .compat import theano, tt, slinalg, Node, floatX
+from .ops import (
+    EighOp,
+    CeleriteSolveOp,
+    CeleriteDotOp,
+    CeleriteLowerSolveOp,
+    ToeplitzSolveOp,
+    ToeplitzDotOp,
+)
+from .ops.celerite.celerite import _reverse
+from .ops.base_op import independent_grad
+from .compat import theano, tt, slinalg, Node, Op, Apply, floatX
 import numpy as np
 import scipy.linalg
 from inspect import getmro
 
 
-__all__ = ["is_tensor", "cho_solve", "cho_factor", "cast", "matrix_sqrt"]
+__all__ = [
+    "is_tensor",
+    "is_evenly_spaced",
+    "cho_solve",
+    "cho_factor",
+    "cho_inv",
+    "dense_log_likelihood",
+    "cast",
+    "matrix_sqrt",
+    "logabsdet",
+    "celerite_solve",
+    "celerite_factor",
+    "celerite_dot",
+    "celerite_lower_dot",
+    "celerite_lower_solve",
+    "toeplitz_solve",
+    "toeplitz_dot",
+]
 
 
 def is_tensor(*objs):
@@ -17,6 +43,45 @@ def is_tensor(*objs):
     return False
 
 
+def is_evenly_spaced(t, rtol=1e-6):
+    """
+    Return ``True`` if ``t`` is a numerical vector of (at least two)
+    evenly spaced values.
+
+    """
+    if is_tensor(t):
+        return False
+    t = np.atleast_1d(t)
+    if t.ndim != 1 or len(t) < 2:
+        return False
+    dt = np.diff(t)
+    return dt[0] != 0 and np.all(np.abs(dt - dt[0]) <= rtol * np.abs(dt[0]))
+
+
+def _lapack(name, *arrays):
+    """Return the LAPACK routine ``name`` for the dtype of ``arrays``."""
+    return scipy.linalg.get_lapack_funcs((name,), arrays)[0]
+
+
+def _has_nan(*arrays):
+    """
+    Return ``True`` if any of ``arrays`` contains NaNs (or infinities).
+    This is a single pass over the data with no temporaries.
+
+    """
+    return any(not np.isfinite(np.sum(x)) for x in arrays)
+
+
+def _chol_is_nan(L):
+    """
+    Return ``True`` if the Cholesky factor ``L`` is invalid. Since NaNs in
+    the input of the factorization propagate to the diagonal of the factor,
+    we only need to check the diagonal.
+
+    """
+    return not np.isfinite(np.sum(np.diagonal(L)))
+
+
 class Solve(slinalg.Solve):
     """
     Subclassing to override errors due to NaNs.
@@ -26,15 +91,22 @@ class Solve(slinalg.Solve):
 
     def perform(self, node, inputs, output_storage):
         A, b = inputs
-        if np.any(np.isnan(A)) or np.any(np.isnan(b)):
-            rval = np.ones_like(b) * np.nan
+        if _has_nan(A, b):
+            rval = np.full_like(b, np.nan)
         else:
             if self.A_structure == "lower_triangular":
-                rval = scipy.linalg.solve_triangular(A, b, lower=True)
+                rval = scipy.linalg.solve_triangular(
+                    A, b, lower=True, check_finite=False
+                )
             elif self.A_structure == "upper_triangular":
-                rval = scipy.linalg.solve_triangular(A, b, lower=False)
+                rval = scipy.linalg.solve_triangular(
+                    A, b, lower=False, check_finite=False
+                )
             else:
-                rval = scipy.linalg.solve(A, b)
+                try:
+                    rval = scipy.linalg.solve(A, b, check_finite=False)
+                except scipy.linalg.LinAlgError:
+                    rval = np.full_like(b, np.nan)
         output_storage[0][0] = rval
 
     def L_op(self, inputs, outputs, output_gradients):
@@ -72,32 +144,426 @@ class Solve(slinalg.Solve):
         return [A_bar, b_bar]
 
 
-class Cholesky(slinalg.Cholesky):
+class Cholesky(Op):
     """
-    Subclassing to override errors due to NaNs.
-    Instead, just set the output to NaN.
+    Lower Cholesky factor of a symmetric positive definite matrix, computed
+    with LAPACK's ``potrf``. Only the lower triangle of the input is used.
+    Instead of raising an error, the output is set to NaN if the input is
+    not positive definite or contains NaNs.
 
     """
 
+    __props__ = ()
+
+    def make_node(self, A):
+        A = tt.as_tensor_variable(A).astype(floatX)
+        assert A.ndim == 2
+        return Apply(self, [A], [A.type()])
+
+    def infer_shape(self, *args):
+        shapes = args[-1]
+        return [shapes[0]]
+
+    def perform(self, node, inputs, outputs):
+        (A,) = inputs
+        L, info = _lapack("potrf", A)(A, lower=1, clean=1)
+        if info != 0 or _chol_is_nan(L):
+            L = np.full_like(A, np.nan)
+        outputs[0][0] = L
+
+    def L_op(self, inputs, outputs, gradients):
+        # The upper triangle of the factor is identically zero
+        return [CholeskyGrad()(outputs[0], tt.tril(gradients[0]))]
+
+
+def _cholesky_grad(L, bL):
+    """
+    The gradient of the Cholesky factorization as a theano expression.
+    This is the same as ``CholeskyGrad``, but it can be differentiated.
+
+    """
+    P = tt.tril(tt.dot(tt.transpose(L), bL))
+    P = P - 0.5 * tt.diag(tt.diag(P))
+    solve_upper = Solve(A_structure="upper_triangular", lower=False)
+    X = solve_upper(tt.transpose(L), P)
+    S = tt.transpose(solve_upper(tt.transpose(L), tt.transpose(X)))
+    return tt.tril(S + tt.transpose(S)) - tt.diag(tt.diag(S))
+
+
+class CholeskyGrad(Op):
+    """
+    Reverse-mode gradient of the Cholesky factorization (Murray 2016,
+    https://arxiv.org/abs/1602.07527), computed with two triangular solves.
+
+    """
+
+    __props__ = ()
+
+    def make_node(self, L, bL):
+        in_args = [
+            tt.as_tensor_variable(arg).astype(floatX) for arg in [L, bL]
+        ]
+        return Apply(self, in_args, [in_args[0].type()])
+
+    def infer_shape(self, *args):
+        shapes = args[-1]
+        return [shapes[0]]
+
     def perform(self, node, inputs, outputs):
-        x = inputs[0]
-        z = outputs[0]
-        try:
-            z[0] = scipy.linalg.cholesky(x, lower=self.lower).astype(x.dtype)
-        except (scipy.linalg.LinAlgError, ValueError):
-            if self.on_error == "raise":
-                raise
+        L, bL = inputs
+        if _chol_is_nan(L) or _has_nan(bL):
+            outputs[0][0] = np.full_like(L, np.nan)
+            return
+
+        # P = Phi(L^T . bL), the lower triangle with a halved diagonal
+        P = np.tril(np.dot(L.T, bL))
+        P[np.diag_indices_from(P)] *= 0.5
+
+        # S = L^-T . P . L^-1
+        trtrs = _lapack("trtrs", L)
+        X, _ = trtrs(L, P.T, lower=1, trans=1)
+        S, _ = trtrs(L, np.ascontiguousarray(X.T), lower=1, trans=1)
+
+        # Symmetrize, keeping only the lower triangle
+        bA = np.tril(S + S.T)
+        bA[np.diag_indices_from(bA)] -= np.diagonal(S)
+        outputs[0][0] = bA
+
+    def grad(self, inputs, gradients):
+        return independent_grad(
+            lambda L, bL: tt.sum(gradients[0] * _cholesky_grad(L, bL)),
+            inputs,
+        )
+
+
+class ChoSolve(Op):
+    """
+    Solve ``A . x = b`` given the lower Cholesky factor ``L`` of ``A`` with
+    a single call to LAPACK's ``potrs``. The output is NaN if ``L`` or
+    ``b`` contain NaNs.
+
+    """
+
+    __props__ = ()
+
+    def make_node(self, L, b):
+        in_args = [
+            tt.as_tensor_variable(arg).astype(floatX) for arg in [L, b]
+        ]
+        assert in_args[0].ndim == 2
+        assert in_args[1].ndim in [1, 2]
+        return Apply(self, in_args, [in_args[1].type()])
+
+    def infer_shape(self, *args):
+        shapes = args[-1]
+        return [shapes[1]]
+
+    def perform(self, node, inputs, outputs):
+        L, b = inputs
+        if _chol_is_nan(L):
+            x = np.full_like(b, np.nan)
+        else:
+            x, _ = _lapack("potrs", L, b)(L, b, lower=1)
+        outputs[0][0] = x
+
+    def L_op(self, inputs, outputs, gradients):
+        L, b = inputs
+        x = outputs[0]
+        bb = self(L, gradients[0])
+        G = tt.outer(bb, x) if x.ndim == 1 else tt.dot(bb, tt.transpose(x))
+        bL = -tt.tril(tt.dot(G + tt.transpose(G), L))
+        return [bL, bb]
+
+
+class ChoInv(Op):
+    """
+    Inverse of a matrix ``A`` given its lower Cholesky factor ``L``,
+    computed with LAPACK's ``potri``. The output is NaN if ``L`` contains
+    NaNs.
+
+    """
+
+    __props__ = ()
+
+    def make_node(self, L):
+        L = tt.as_tensor_variable(L).astype(floatX)
+        assert L.ndim == 2
+        return Apply(self, [L], [L.type()])
+
+    def infer_shape(self, *args):
+        shapes = args[-1]
+        return [shapes[0]]
+
+    def perform(self, node, inputs, outputs):
+        (L,) = inputs
+        if _chol_is_nan(L):
+            X = np.full_like(L, np.nan)
+        else:
+            X, info = _lapack("potri", L)(L, lower=1)
+            if info != 0:
+                X = np.full_like(L, np.nan)
             else:
-                z[0] = (np.zeros(x.shape) * np.nan).astype(x.dtype)
+                X = np.tril(X)
+                X += np.tril(X, -1).T
+        outputs[0][0] = X
 
+    def L_op(self, inputs, outputs, gradients):
+        (L,) = inputs
+        X = outputs[0]
+        G = -tt.dot(tt.dot(X, gradients[0]), X)
+        bL = tt.tril(tt.dot(G + tt.transpose(G), L))
+        return [bL]
 
-cho_factor = Cholesky(on_error="nan")
+
+class DenseLogLike(Op):
+    """
+    Log likelihood of the ``(K, M)`` matrix of residuals ``r`` (one light
+    curve per column) under a zero-mean Gaussian with dense covariance
+    ``C``. Also returns ``alpha = C^-1 . r`` and the lower Cholesky factor
+    ``L`` of ``C``, which are reused in the gradient
+
+        d lnlike / dC = 0.5 * (alpha . alpha^T - M * C^-1),
+
+    so the covariance is only factorized once. All outputs are NaN if
+    ``C`` is not positive definite or the inputs contain NaNs.
+
+    """
+
+    __props__ = ()
+
+    def make_node(self, C, r):
+        in_args = [
+            tt.as_tensor_variable(arg).astype(floatX) for arg in [C, r]
+        ]
+        assert in_args[0].ndim == 2
+        assert in_args[1].ndim == 2
+        out_args = [
+            tt.TensorType(floatX, ())(),
+            in_args[1].type(),
+            in_args[0].type(),
+        ]
+        return Apply(self, in_args, out_args)
+
+    def infer_shape(self, *args):
+        shapes = args[-1]
+        return [(), shapes[1], shapes[0]]
+
+    def perform(self, node, inputs, outputs):
+        C, r = inputs
+        K, M = r.shape
+        L, info = _lapack("potrf", C)(C, lower=1, clean=1)
+        if info != 0 or _chol_is_nan(L) or _has_nan(r):
+            lnlike = np.nan
+            alpha = np.full_like(r, np.nan)
+            L = np.full_like(C, np.nan)
+        else:
+            alpha, _ = _lapack("potrs", L, r)(L, r, lower=1)
+            lnlike = (
+                -0.5 * np.sum(r * alpha)
+                - M * np.sum(np.log(np.diagonal(L)))
+                - 0.5 * K * M * np.log(2 * np.pi)
+            )
+        outputs[0][0] = np.array(lnlike, dtype=floatX)
+        outputs[1][0] = alpha
+        outputs[2][0] = L
+
+    def L_op(self, inputs, outputs, gradients):
+        C, r = inputs
+        _, alpha, L = outputs
+        g, balpha, bL = [
+            None if isinstance(g.type, theano.gradient.DisconnectedType) else g
+            for g in gradients
+        ]
+        bC = tt.zeros_like(C)
+        br = tt.zeros_like(r)
+        if g is not None:
+            bC += (0.5 * g) * (
+                tt.dot(alpha, tt.transpose(alpha))
+                - tt.cast(r.shape[1], floatX) * ChoInv()(L)
+            )
+            br += -g * alpha
+
+        # The gradients with respect to `alpha` and `L` (e.g., when
+        # computing second derivatives) are those of ``cho_solve`` and
+        # ``cho_factor``
+        if balpha is not None:
+            bb = ChoSolve()(L, balpha)
+            G = tt.dot(bb, tt.transpose(alpha))
+            G = -tt.tril(tt.dot(G + tt.transpose(G), L))
+            bL = G if bL is None else bL + G
+            br += bb
+        if bL is not None:
+            bC += CholeskyGrad()(L, tt.tril(bL))
+        return [bC, br]
+
+
+cho_factor = Cholesky()
 
 
 def cho_solve(cho_A, b):
-    solve_lower = Solve(A_structure="lower_triangular", lower=True)
-    solve_upper = Solve(A_structure="upper_triangular", lower=False)
-    return solve_upper(tt.transpose(cho_A), solve_lower(cho_A, b))
+    """Solve ``A . x = b`` given the lower Cholesky factor of ``A``."""
+    return ChoSolve()(cho_A, b)
+
+
+def cho_inv(cho_A):
+    """Return the inverse of ``A`` given its lower Cholesky factor."""
+    return ChoInv()(cho_A)
+
+
+def dense_log_likelihood(C, r):
+    """
+    Return the log likelihood of the ``(K, M)`` residuals ``r`` under a
+    zero-mean Gaussian with dense covariance ``C``, summed over the columns
+    of ``r``.
+
+    """
+    return DenseLogLike()(C, r)[0]
+
+
+class LogAbsDet(Op):
+    """
+    Log of the absolute value of the determinant of a square matrix.
+    Returns NaN if the input contains NaNs.
+
+    """
+
+    __props__ = ()
+
+    def make_node(self, A):
+        A = tt.as_tensor_variable(A).astype(floatX)
+        assert A.ndim == 2
+        return Apply(self, [A], [tt.TensorType(floatX, ())()])
+
+    def infer_shape(self, *args):
+        return [()]
+
+    def perform(self, node, inputs, outputs):
+        (A,) = inputs
+        if _has_nan(A):
+            logdet = np.nan
+        else:
+            try:
+                _, logdet = np.linalg.slogdet(A)
+            except np.linalg.LinAlgError:
+                logdet = np.nan
+        outputs[0][0] = np.array(logdet, dtype=floatX)
+
+    def grad(self, inputs, gradients):
+        (A,) = inputs
+        return [
+            gradients[0] * tt.transpose(tt.nlinalg.matrix_inverse(A))
+        ]
+
+
+logabsdet = LogAbsDet()
+
+
+def celerite_solve(d, U, V, Phi, nblk, y):
+    """
+    Factorize the symmetric semiseparable matrix ``K`` with diagonal ``d``
+    and lower triangle
+
+        K_nm = U_n^T . P_n . P_(n-1) ... P_(m+1) . V_m    (n > m)
+
+    as ``L . diag(D) . L^T`` and return ``D`` and ``L^-1 . y``.
+    The transition matrices ``P_n = diag(I_nblk (x) Phi_n, I)`` are given
+    by the ``(K, 2, 2)`` tensor ``Phi``. The cost is ``O(K J^2)``, where
+    ``J`` is the number of columns in ``U`` and ``V``. Note that
+
+        y^T . K^-1 . y = sum(z^2 / D)   and   log|K| = sum(log(D))
+
+    where ``z = L^-1 . y``.
+
+    """
+    y = cast(y)
+    if y.ndim == 1:
+        D, _, z = CeleriteSolveOp(nblk)(
+            d, U, V, Phi, tt.reshape(y, (-1, 1))
+        )
+        return D, z[:, 0]
+    else:
+        D, _, z = CeleriteSolveOp(nblk)(d, U, V, Phi, y)
+        return D, z
+
+
+def celerite_factor(d, U, V, Phi, nblk):
+    """
+    Return the factorization ``K = L . diag(D) . L^T`` of the symmetric
+    semiseparable matrix defined by ``(d, U, V, Phi)`` (see
+    ``celerite_solve``). The unit lower triangular matrix ``L`` is itself
+    semiseparable, with strictly lower triangle
+
+        L_nm = U_n^T . P_n . P_(n-1) ... P_(m+1) . W_m    (n > m),
+
+    so it is returned as the vector ``D`` and the matrix ``W``.
+
+    """
+    d, U, V, Phi = cast(d, U, V, Phi)
+    D, W, _ = CeleriteSolveOp(nblk)(d, U, V, Phi, tt.zeros((U.shape[0], 0)))
+    return D, W
+
+
+def celerite_dot(d, U, V, Phi, nblk, y):
+    """
+    Compute the product of the symmetric semiseparable matrix defined by
+    ``(d, U, V, Phi)`` (see ``celerite_solve``) and the ``(K, M)`` matrix
+    ``y`` at a cost of ``O(K J M)``.
+
+    """
+    d, U, V, Phi, y = cast(d, U, V, Phi, y)
+    lower = CeleriteDotOp(nblk)(U, V, Phi, y)
+
+    # The upper triangle is the lower triangle of the matrix with the
+    # order of the data points reversed and transposed transitions
+    upper = CeleriteDotOp(nblk)(*_reverse(U, V, Phi, y))[::-1]
+
+    return tt.reshape(d, (-1, 1)) * y + lower + upper
+
+
+def celerite_lower_dot(U, W, Phi, nblk, y):
+    """
+    Compute the product of the unit lower triangular factor ``L`` defined
+    by ``(U, W, Phi)`` (see ``celerite_factor``) and the ``(K, M)`` matrix
+    ``y`` at a cost of ``O(K J M)``.
+
+    """
+    U, W, Phi, y = cast(U, W, Phi, y)
+    return y + CeleriteDotOp(nblk)(U, W, Phi, y)
+
+
+def celerite_lower_solve(U, W, Phi, nblk, y, transpose=False):
+    """
+    Return ``L^-1 . y`` (or ``L^-T . y`` if ``transpose``), where ``L``
+    is the unit lower triangular factor defined by ``(U, W, Phi)`` (see
+    ``celerite_factor``) and ``y`` is a ``(K, M)`` matrix. The cost is
+    ``O(K J M)``.
+
+    """
+    U, W, Phi, y = cast(U, W, Phi, y)
+    if transpose:
+        return CeleriteLowerSolveOp(nblk)(*_reverse(U, W, Phi, y))[::-1]
+    else:
+        return CeleriteLowerSolveOp(nblk)(U, W, Phi, y)
+
+
+def toeplitz_solve(c, y):
+    """
+    Return the log determinant of the symmetric Toeplitz matrix ``T``
+    with first column ``c`` and the solution ``T^-1 . y``. The cost is
+    ``O(K^2)`` for the factorization plus ``O(K log K)`` per column of
+    ``y``; see ``ToeplitzSolveOp``.
+
+    """
+    return ToeplitzSolveOp()(c, y)
+
+
+def toeplitz_dot(c, y):
+    """
+    Return the product of the symmetric Toeplitz matrix with first column
+    ``c`` and ``y`` at a cost of ``O(K log K)`` per column of ``y``.
+
+    """
+    return ToeplitzDotOp()(c, y)
 
 
 def cast(*args, vectorize=False):
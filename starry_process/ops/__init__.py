@@ -1,8 +1,19 @@
 from .latitude import LatitudeIntegralOp
-from .wigner import RxOp, RyOp, tensordotRzOp, special_tensordotRzOp
-from .flux import rTA1Op, rTA1LOp, LOp
+from .wigner import (
+    ROp,
+    RxOp,
+    RyOp,
+    dotRxOp,
+    tensordotROp,
+    tensordotRzOp,
+    special_tensordotRzOp,
+)
+from .flux import rTA1Op, rTA1LOp, LOp, KernelInterpOp
 from .exceptions import CheckBoundsOp, CheckVectorSizeOp
 from .eigh import EighOp
 from .norm import AlphaBetaOp
 from .sample import SampleYlmTemporalOp
 from .poly import pTA1Op
+from .celerite import CeleriteSolveOp, CeleriteDotOp, CeleriteLowerSolveOp
+from .lnlike import LowRankLogLikeOp
+from .toeplitz import ToeplitzSolveOp, ToeplitzDotOp
@@ -1,7 +1,16 @@
 # -*- coding: utf-8 -*-
 from ..starry_process_version import __version__
 from ..defaults import defaults
-from ..compat import theano, tt, COp, Apply, floatX
+from ..cache import shared
+from ..compat import (
+    theano,
+    tt,
+    COp,
+    Apply,
+    floatX,
+    local_optimizer,
+    register_specialize,
+)
 import sys
 import pkg_resources
 
@@ -11,20 +20,38 @@ try:
 except:
     CACHE_DEV_C_CODE = False
 
-__all__ = ["BaseOp", "IntegralOp"]
+__all__ = [
+    "BaseOp",
+    "IntegralOp",
+    "derivative_grad",
+    "derivative_R_op",
+    "reverse_grad",
+    "independent_grad",
+]
 
 
 class BaseOp(COp):
 
-    __props__ = ("ydeg", "udeg", "compile_args")
+    __props__ = ("ydeg", "udeg", "compile_args", "value_only")
     func_file = None
     func_name = None
 
+    # Indices of the outputs that are values (as opposed to derivatives).
+    # Ops that set this have a value-only version (``value_only=True``)
+    # that doesn't compute the remaining outputs, which are then left
+    # uninitialized. It is substituted automatically in compiled graphs
+    # where the derivatives aren't used. The derivatives of the k-th value
+    # output with respect to the inputs are the outputs with the indices in
+    # ``derivative_outputs[k]``.
+    value_outputs = None
+    derivative_outputs = None
+
     def __init__(
         self,
         ydeg=defaults["ydeg"],
         udeg=defaults["udeg"],
         compile_args=[],
+        value_only=False,
         **kwargs
     ):
         self.ydeg = ydeg
@@ -38,8 +65,27 @@ class BaseOp(COp):
             ), "items in `compile_args` must be tuples"
             assert len(item) == 2, "tuples in `compile_args` must have 2 items"
         self.compile_args = tuple(compile_args)
+        self.value_only = bool(value_only)
+        if self.value_only:
+            assert (
+                self.value_outputs is not None
+            ), "this op doesn't have a value-only version"
         super().__init__(self.func_file, self.func_name)
 
+    def value_only_op(self):
+        """Return the value-only version of this op."""
+        return self.related_op(type(self), value_only=True)
+
+    def related_op(self, cls, **kwargs):
+        """Return a shared instance of ``cls`` with the settings of this op."""
+        return shared(
+            cls,
+            self.ydeg,
+            udeg=self.udeg,
+            compile_args=list(self.compile_args),
+            **kwargs
+        )
+
     def perform(self, *args):
         raise NotImplementedError("Only C op is implemented")
 
@@ -63,6 +109,8 @@ class BaseOp(COp):
             "wigner.h",
             "eigh.h",
             "flux.h",
+            "lnlike.h",
+            "interp.h",
             "theano_helpers.h",
             "vector",
         ]
@@ -84,13 +132,181 @@ class BaseOp(COp):
             args += ["-stdlib=libc++", "-mmacosx-version-min=10.7"]
         args += ["-DSP__LMAX={0}".format(self.ydeg)]
         args += ["-DSP__UMAX={0}".format(self.udeg)]
+        if self.value_only:
+            args += ["-DSP__GRADIENT=0"]
         for (key, value) in self.compile_args:
             if key.startswith("SP_"):
                 args += ["-D{0}={1}".format(key, value)]
         return args
 
 
+@register_specialize
+@local_optimizer(None)
+def local_value_only(fgraph, node):
+    """
+    Replace ops whose derivative outputs are not used anywhere in the
+    graph with their value-only versions.
+
+    """
+    op = node.op
+    if (
+        (not isinstance(op, BaseOp))
+        or (op.value_outputs is None)
+        or op.value_only
+    ):
+        return False
+    for i, output in enumerate(node.outputs):
+        if (i not in op.value_outputs) and len(fgraph.clients[output]):
+            return False
+    return op.value_only_op()(*node.inputs, return_list=True)
+
+
+def _is_disconnected(g):
+    return (g is None) or isinstance(g.type, theano.gradient.DisconnectedType)
+
+
+def _derivatives(op, inputs, second_order=False):
+    """
+    Return the derivatives of each output of ``op`` with respect to each of
+    the inputs it differentiates. Ops that use this set ``value_outputs``
+    and ``derivative_outputs``, the indices of the outputs that are the
+    derivatives of each value output. If ``second_order``, the derivatives
+    of the derivative outputs are also returned; these are computed by the
+    op's ``second_derivatives`` method, which returns them in the same
+    format (with ``None`` for the value outputs).
+
+    """
+    outputs = op(*inputs, return_list=True)
+    derivs = [None] * len(outputs)
+    for k, idx in zip(op.value_outputs, op.derivative_outputs):
+        derivs[k] = [outputs[i] for i in idx]
+    if second_order:
+        second = op.second_derivatives(inputs)
+        for k in range(len(outputs)):
+            if derivs[k] is None:
+                derivs[k] = second[k]
+    return derivs
+
+
+def derivative_grad(op, inputs, gradients):
+    """
+    The chain rule for ops that return their own derivatives (see
+    ``_derivatives``). Returns the gradients with respect to the inputs
+    that are differentiated. If any of the derivative outputs are
+    differentiated (e.g., when computing a Hessian), this requires the
+    second derivatives of the op.
+
+    """
+    second_order = any(
+        not _is_disconnected(g)
+        for k, g in enumerate(gradients)
+        if k not in op.value_outputs
+    )
+    derivs = _derivatives(op, inputs, second_order=second_order)
+    nargs = len(op.derivative_outputs[0])
+    grads = [tt.zeros_like(inputs[i]) for i in range(nargs)]
+    for g, dfdx in zip(gradients, derivs):
+        if _is_disconnected(g):
+            continue
+        for i in range(nargs):
+            axis = list(range(inputs[i].ndim, g.ndim))
+            grads[i] += tt.sum(g * dfdx[i], axis=axis)
+    return grads
+
+
+def derivative_R_op(op, inputs, eval_points):
+    """
+    The Jacobian-vector products for ops that return their own
+    derivatives (see ``_derivatives``).
+
+    """
+    nargs = len(op.derivative_outputs[0])
+    if all(_is_disconnected(v) for v in eval_points[:nargs]):
+        return [None] * len(op.make_node(*inputs).outputs)
+    derivs = _derivatives(op, inputs, second_order=True)
+    jvp = []
+    for dfdx in derivs:
+        res = None
+        for i in range(nargs):
+            v = eval_points[i]
+            if _is_disconnected(v):
+                continue
+            v = tt.shape_padright(v, dfdx[i].ndim - v.ndim)
+            res = v * dfdx[i] if res is None else res + v * dfdx[i]
+        jvp.append(res)
+    return jvp
+
+
+def independent_grad(cost, wrt):
+    """
+    Return the gradient of the scalar ``cost(*wrt)`` with respect to each
+    of the variables in ``wrt``, treating them as independent variables.
+
+    Unlike ``theano.grad``, which differentiates through any dependence of
+    one of the variables in ``wrt`` on the others (as is the case when the
+    inputs of a gradient op are themselves gradients), this returns the
+    partial derivatives, as required by the ``grad`` method of an op.
+
+    """
+    # Differentiate with respect to copies of the variables, which the
+    # others don't depend on
+    x = [w.copy() for w in wrt]
+    return theano.grad(
+        cost(*x), x, disconnected_inputs="ignore", return_disconnected="zero"
+    )
+
+
+def reverse_grad(op, forward_op, inputs, eval_points, constant=()):
+    """
+    The gradient of the reverse-mode op ``op`` of ``forward_op``.
+
+    Given the inputs ``x`` of ``forward_op`` and the gradient ``bf`` with
+    respect to its output, ``op`` computes ``J^T . bf``, where ``J`` is the
+    Jacobian of ``forward_op``. Its gradient follows from the identity
+
+        v . (J^T . bf) = bf . (J . v),
+
+    where ``v`` are the gradients with respect to the outputs of ``op``
+    (``eval_points``, one per input of ``forward_op``) and ``J . v`` is the
+    ``R_op`` of ``forward_op``. Since the right hand side is written in
+    terms of the forward op, we get derivatives of any order. Gradients
+    with respect to the inputs in ``constant`` are not implemented.
+
+    """
+    x, bf = inputs[:-1], inputs[-1]
+    v = [
+        None if _is_disconnected(vi) else theano.gradient.disconnected_grad(vi)
+        for vi in eval_points
+    ]
+    wrt = [xi for i, xi in enumerate(x) if i not in constant] + [bf]
+    if all(vi is None for vi in v):
+        grads = [tt.zeros_like(w) for w in wrt]
+    else:
+
+        def cost(*args):
+            args = iter(args)
+            xargs = [
+                xi if i in constant else next(args) for i, xi in enumerate(x)
+            ]
+            (jvp,) = forward_op.R_op(xargs, v)
+            return tt.sum(next(args) * jvp)
+
+        grads = independent_grad(cost, wrt)
+    grads = iter(grads)
+    res = []
+    for i, xi in enumerate(x):
+        if i in constant:
+            res.append(theano.gradient.grad_not_implemented(op, i, xi))
+        else:
+            res.append(next(grads))
+    return res + [next(grads)]
+
+
 class IntegralOp(BaseOp):
+
+    value_outputs = (0, 3)
+    derivative_outputs = ((1, 2), (4, 5))
+
     def make_node(self, alpha, beta):
         in_args = [
             tt.as_tensor_variable(arg).astype(floatX) for arg in [alpha, beta]
@@ -116,28 +332,7 @@ class IntegralOp(BaseOp):
         )
 
     def grad(self, inputs, gradients):
-        alpha, beta = inputs
-        q, dqda, dqdb, Q, dQda, dQdb = self(*inputs)
-        bq = gradients[0]
-        bQ = gradients[3]
-        # Derivs of derivs not implemented
-        for i, g in enumerate(list(gradients[1:3]) + list(gradients[4:6])):
-            if not isinstance(g.type, theano.gradient.DisconnectedType):
-                raise ValueError(
-                    "can't propagate gradients wrt parameter {0}".format(i + 1)
-                )
-
-        # Chain rule
-        ba = 0.0
-        bb = 0.0
-        for g, fa, fb in zip([bq, bQ], [dqda, dQda], [dqdb, dQdb]):
-            if not isinstance(g.type, theano.gradient.DisconnectedType):
-                ba += tt.sum(g * fa)
-                bb += tt.sum(g * fb)
-
-        return ba, bb
+        return derivative_grad(self, inputs, gradients)
 
     def R_op(self, inputs, eval_points):
-        if eval_points[0] is None:
-            return eval_points
-        return self.grad(inputs, eval_points)
+        return derivative_R_op(self, inputs, eval_points)
@@ -0,0 +1 @@
+from .celerite import CeleriteSolveOp, CeleriteDotOp, CeleriteLowerSolveOp
@@ -0,0 +1,83 @@
+#section support_code_struct
+
+// Shorthand
+#define DI0 DTYPE_INPUT_0
+#define DO0 DTYPE_OUTPUT_0
+#define TO0 TYPENUM_OUTPUT_0
+#define TO1 TYPENUM_OUTPUT_1
+#define TO2 TYPENUM_OUTPUT_2
+
+int APPLY_SPECIFIC(celerite)(PyArrayObject *input0,   // d
+                             PyArrayObject *input1,   // U
+                             PyArrayObject *input2,   // V
+                             PyArrayObject *input3,   // Phi
+                             PyArrayObject *input4,   // Y
+                             PyArrayObject **output0, // D
+                             PyArrayObject **output1, // W
+                             PyArrayObject **output2  // Z
+) {
+
+  using namespace sp::theano;
+  using namespace sp::celerite;
+
+  // Get the inputs
+  int success = 0;
+  npy_intp K, J, N1, N2, M;
+  auto U = get_matrix_input<DI0>(&K, &J, input1, &success);
+  if (success)
+    return 1;
+  auto V = get_matrix_input<DI0>(&N1, &N2, input2, &success);
+  if (success)
+    return 1;
+  if ((N1 != K) || (N2 != J)) {
+    PyErr_Format(PyExc_ValueError, "dimension mismatch in V");
+    return 1;
+  }
+  auto d = get_input<DI0>(&K, input0, &success);
+  if (success)
+    return 1;
+  std::vector<npy_intp> shape_Phi(3);
+  shape_Phi[0] = K;
+  shape_Phi[1] = 2;
+  shape_Phi[2] = 2;
+  auto Phi = get_input<DI0>(3, &(shape_Phi[0]), input3, &success);
+  if (success)
+    return 1;
+  auto Y = get_matrix_input<DI0>(&N1, &M, input4, &success);
+  if (success)
+    return 1;
+  if (N1 != K) {
+    PyErr_Format(PyExc_ValueError, "dimension mismatch in Y");
+    return 1;
+  }
+  int nblk = SP__CELERITE_NBLK;
+  if (2 * nblk > J) {
+    PyErr_Format(PyExc_ValueError, "U must have at least 2 * nblk columns");
+    return 1;
+  }
+
+  // Allocate the outputs
+  auto D = allocate_output<DO0>(1, &K, TO0, output0, &success);
+  if (success)
+    return 1;
+  std::vector<npy_intp> shape(2);
+  shape[0] = K;
+  shape[1] = J;
+  auto W = allocate_output<DO0>(2, &(shape[0]), TO1, output1, &success);
+  if (success)
+    return 1;
+  shape[1] = M;
+  auto Z = allocate_output<DO0>(2, &(shape[0]), TO2, output2, &success);
+  if (success)
+    return 1;
+
+  // Compute!
+  Factor<DO0> factor(K, J, M, nblk, d, U, V, Phi, Y);
+  factor.compute();
+  Map<Vector<DO0, Dynamic>>(D, K) = factor.D;
+  Map<Matrix<DO0>>(W, K, J) = factor.W;
+  Map<Matrix<DO0>>(Z, K, M) = factor.Z;
+
+  // We're done!
+  return 0;
+}
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+from ..base_op import BaseOp
+from ...compat import theano, tt, floatX, Apply
+
+__all__ = ["CeleriteSolveOp", "CeleriteDotOp", "CeleriteLowerSolveOp"]
+
+
+def _zeros_if_disconnected(g, x):
+    if isinstance(g.type, theano.gradient.DisconnectedType):
+        return tt.zeros_like(x)
+    else:
+        return g
+
+
+def _reverse(A, B, Phi, Y):
+    """
+    Return the arguments of the semiseparable matrix that is the transpose
+    of the one defined by ``(A, B, Phi)`` with the order of the data points
+    reversed, and the reversed ``Y``.
+
+    """
+    Phi_rev = tt.concatenate((Phi[1:], Phi[:1]), axis=0)
+    Phi_rev = tt.transpose(Phi_rev, (0, 2, 1))[::-1]
+    return B[::-1], A[::-1], Phi_rev, Y[::-1]
+
+
+class CeleriteBaseOp(BaseOp):
+
+    __props__ = BaseOp.__props__ + ("nblk",)
+
+    def __init__(self, nblk, *args, **kwargs):
+        self.nblk = int(nblk)
+        super().__init__(*args, **kwargs)
+
+    def c_headers(self, *args, **kwargs):
+        return super().c_headers(*args, **kwargs) + ["celerite.h"]
+
+    def c_compile_args(self, *args, **kwargs):
+        args = super().c_compile_args(*args, **kwargs)
+        args += ["-DSP__CELERITE_NBLK={0}".format(self.nblk)]
+        return args
+
+    def _inputs(self, *args):
+        CC = tt.extra_ops.CpuContiguous()
+        return [CC(tt.as_tensor_variable(arg).astype(floatX)) for arg in args]
+
+
+class CeleriteSolveOp(CeleriteBaseOp):
+    """
+    Factorize the symmetric semiseparable matrix with diagonal ``d`` and
+    lower triangle
+
+        K_nm = U_n^T . P_n . P_(n-1) ... P_(m+1) . V_m    (n > m)
+
+    as ``K = L . diag(D) . L^T`` and compute ``Z = L^-1 . Y``. The unit
+    lower triangular matrix ``L`` has strictly lower triangle
+
+        L_nm = U_n^T . P_n . P_(n-1) ... P_(m+1) . W_m    (n > m),
+
+    and the op returns ``D``, ``W`` and ``Z``. The transition matrices are
+    ``P_n = diag(I_nblk (x) Phi_n, I)``, where ``Phi`` has shape
+    ``(K, 2, 2)``. This is the generalized celerite algorithm of
+    Foreman-Mackey et al. (2017); the cost is ``O(K J^2)``, where ``J`` is
+    the number of columns of ``U`` and ``V``. Only the current state of the
+    recursion is kept in memory; the reverse pass recomputes it from
+    checkpoints every ``sqrt(K)`` data points.
+
+    """
+
+    func_file = "./celerite.cc"
+    func_name = "APPLY_SPECIFIC(celerite)"
+
+    def make_node(self, d, U, V, Phi, Y):
+        in_args = self._inputs(d, U, V, Phi, Y)
+        out_args = [in_args[0].type(), in_args[1].type(), in_args[4].type()]
+        return Apply(self, in_args, out_args)
+
+    def infer_shape(self, *args):
+        shapes = args[-1]
+        return [shapes[0], shapes[1], shapes[4]]
+
+    def grad(self, inputs, gradients):
+        outputs = self(*inputs)
+        bD, bW, bZ = [
+            _zeros_if_disconnected(g, x) for g, x in zip(gradients, outputs)
+        ]
+        return CeleriteSolveRevOp(self.nblk)(*inputs, bD, bW, bZ)
+
+
+class CeleriteSolveRevOp(CeleriteBaseOp):
+    """
+    The reverse-mode (adjoint) pass of ``CeleriteSolveOp``.
+
+    """
+
+    func_file = "./celerite_rev.cc"
+    func_name = "APPLY_SPECIFIC(celerite_rev)"
+
+    def make_node(self, d, U, V, Phi, Y, bD, bW, bZ):
+        in_args = self._inputs(d, U, V, Phi, Y, bD, bW, bZ)
+        out_args = [arg.type() for arg in in_args[:5]]
+        return Apply(self, in_args, out_args)
+
+    def infer_shape(self, *args):
+        shapes = args[-1]
+        return shapes[:5]
+
+    def grad(self, inputs, gradients):
+        raise NotImplementedError(
+            "Second derivatives are not implemented for the `celerite` "
+            "solver. Use the `lowrank` or `dense` solver instead."
+        )
+
+
+class CeleriteDotOp(CeleriteBaseOp):
+    """
+    Compute the product of the strictly lower triangular part of a
+    semiseparable matrix and the matrix ``Y``,
+
+        X_n = sum_(m < n) A_n^T . P_n . P_(n-1) ... P_(m+1) . B_m . Y_m,
+
+    at a cost of ``O(K J M)``. See ``CeleriteSolveOp`` for details on the
+    transition matrices.
+
+    """
+
+    func_file = "./dot.cc"
+    func_name = "APPLY_SPECIFIC(dot)"
+    solve = False
+
+    def c_compile_args(self, *args, **kwargs):
+        args = super().c_compile_args(*args, **kwargs)
+        args += ["-DSP__CELERITE_SOLVE={0}".format(int(self.solve))]
+        return args
+
+    def make_node(self, A, B, Phi, Y):
+        in_args = self._inputs(A, B, Phi, Y)
+        out_args = [in_args[3].type()]
+        return Apply(self, in_args, out_args)
+
+    def infer_shape(self, *args):
+        shapes = args[-1]
+        return [shapes[3]]
+
+    def grad(self, inputs, gradients):
+        return CeleriteDotRevOp(self.nblk)(*inputs, gradients[0])
+
+
+class CeleriteDotRevOp(CeleriteBaseOp):
+    """
+    The reverse-mode (adjoint) pass of ``CeleriteDotOp``.
+
+    """
+
+    func_file = "./dot_rev.cc"
+    func_name = "APPLY_SPECIFIC(dot_rev)"
+
+    def make_node(self, A, B, Phi, Y, bX):
+        in_args = self._inputs(A, B, Phi, Y, bX)
+        out_args = [arg.type() for arg in in_args[:4]]
+        return Apply(self, in_args, out_args)
+
+    def infer_shape(self, *args):
+        shapes = args[-1]
+        return shapes[:4]
+
+    def grad(self, inputs, gradients):
+        raise NotImplementedError(
+            "Second derivatives are not implemented for the `celerite` "
+            "solver. Use the `lowrank` or `dense` solver instead."
+        )
+
+
+class CeleriteLowerSolveOp(CeleriteDotOp):
+    """
+    Solve the unit lower triangular system ``(I + N) . X = Y``, where
+    ``N`` is the strictly lower triangular semiseparable matrix of
+    ``CeleriteDotOp``, at a cost of ``O(K J M)``.
+
+    """
+
+    solve = True
+
+    def grad(self, inputs, gradients):
+        # If X = (I + N)^-1 . Y, then bY = (I + N)^-T . bX, and the
+        # gradient with respect to `N` is that of the product `N . X`
+        # weighted by `-bY`
+        A, B, Phi, Y = inputs
+        X = self(*inputs)
+        bX = gradients[0]
+        bY = self(*_reverse(A, B, Phi, bX))[::-1]
+        bA, bB, bPhi, _ = CeleriteDotRevOp(self.nblk)(A, B, Phi, X, -bY)
+        return [bA, bB, bPhi, bY]
@@ -0,0 +1,104 @@
+#section support_code_struct
+
+// Shorthand
+#define DI0 DTYPE_INPUT_0
+#define DO0 DTYPE_OUTPUT_0
+#define TO0 TYPENUM_OUTPUT_0
+#define TO1 TYPENUM_OUTPUT_1
+#define TO2 TYPENUM_OUTPUT_2
+#define TO3 TYPENUM_OUTPUT_3
+#define TO4 TYPENUM_OUTPUT_4
+
+int APPLY_SPECIFIC(celerite_rev)(PyArrayObject *input0,   // d
+                                 PyArrayObject *input1,   // U
+                                 PyArrayObject *input2,   // V
+                                 PyArrayObject *input3,   // Phi
+                                 PyArrayObject *input4,   // Y
+                                 PyArrayObject *input5,   // bD
+                                 PyArrayObject *input6,   // bW
+                                 PyArrayObject *input7,   // bZ
+                                 PyArrayObject **output0, // bd
+                                 PyArrayObject **output1, // bU
+                                 PyArrayObject **output2, // bV
+                                 PyArrayObject **output3, // bPhi
+                                 PyArrayObject **output4  // bY
+) {
+
+  using namespace sp::theano;
+  using namespace sp::celerite;
+
+  // Get the inputs
+  int success = 0;
+  npy_intp K, J, N1, N2, M;
+  auto U = get_matrix_input<DI0>(&K, &J, input1, &success);
+  if (success)
+    return 1;
+  auto V = get_matrix_input<DI0>(&N1, &N2, input2, &success);
+  if (success)
+    return 1;
+  if ((N1 != K) || (N2 != J)) {
+    PyErr_Format(PyExc_ValueError, "dimension mismatch in V");
+    return 1;
+  }
+  auto d = get_input<DI0>(&K, input0, &success);
+  if (success)
+    return 1;
+  std::vector<npy_intp> shape_Phi(3);
+  shape_Phi[0] = K;
+  shape_Phi[1] = 2;
+  shape_Phi[2] = 2;
+  auto Phi = get_input<DI0>(3, &(shape_Phi[0]), input3, &success);
+  if (success)
+    return 1;
+  auto Y = get_matrix_input<DI0>(&N1, &M, input4, &success);
+  if (success)
+    return 1;
+  if (N1 != K) {
+    PyErr_Format(PyExc_ValueError, "dimension mismatch in Y");
+    return 1;
+  }
+  auto bD = get_input<DI0>(&K, input5, &success);
+  if (success)
+    return 1;
+  std::vector<npy_intp> shape(2);
+  shape[0] = K;
+  shape[1] = J;
+  auto bW = get_input<DI0>(2, &(shape[0]), input6, &success);
+  if (success)
+    return 1;
+  shape[1] = M;
+  auto bZ = get_input<DI0>(2, &(shape[0]), input7, &success);
+  if (success)
+    return 1;
+  int nblk = SP__CELERITE_NBLK;
+  if (2 * nblk > J) {
+    PyErr_Format(PyExc_ValueError, "U must have at least 2 * nblk columns");
+    return 1;
+  }
+
+  // Allocate the outputs
+  auto bd = allocate_output<DO0>(1, &K, TO0, output0, &success);
+  if (success)
+    return 1;
+  shape[1] = J;
+  auto bU = allocate_output<DO0>(2, &(shape[0]), TO1, output1, &success);
+  if (success)
+    return 1;
+  auto bV = allocate_output<DO0>(2, &(shape[0]), TO2, output2, &success);
+  if (success)
+    return 1;
+  auto bPhi = allocate_output<DO0>(3, &(shape_Phi[0]), TO3, output3, &success);
+  if (success)
+    return 1;
+  shape[1] = M;
+  auto bY = allocate_output<DO0>(2, &(shape[0]), TO4, output4, &success);
+  if (success)
+    return 1;
+
+  // Compute!
+  Factor<DO0> factor(K, J, M, nblk, d, U, V, Phi, Y);
+  factor.gradient(bD, bW, bZ, bd, bU, bV, bPhi, bY);
+
+  // We're done!
+  return 0;
+}
@@ -0,0 +1,86 @@
+#section support_code_struct
+
+// Shorthand
+#define DI0 DTYPE_INPUT_0
+#define DO0 DTYPE_OUTPUT_0
+#define TO0 TYPENUM_OUTPUT_0
+#define TO1 TYPENUM_OUTPUT_1
+#define TO2 TYPENUM_OUTPUT_2
+#define TO3 TYPENUM_OUTPUT_3
+
+int APPLY_SPECIFIC(dot_rev)(PyArrayObject *input0,   // A
+                            PyArrayObject *input1,   // B
+                            PyArrayObject *input2,   // Phi
+                            PyArrayObject *input3,   // Y
+                            PyArrayObject *input4,   // bX
+                            PyArrayObject **output0, // bA
+                            PyArrayObject **output1, // bB
+                            PyArrayObject **output2, // bPhi
+                            PyArrayObject **output3  // bY
+) {
+
+  using namespace sp::theano;
+  using namespace sp::celerite;
+
+  // Get the inputs
+  int success = 0;
+  npy_intp K, J, N1, N2, M;
+  auto A = get_matrix_input<DI0>(&K, &J, input0, &success);
+  if (success)
+    return 1;
+  auto B = get_matrix_input<DI0>(&N1, &N2, input1, &success);
+  if (success)
+    return 1;
+  if ((N1 != K) || (N2 != J)) {
+    PyErr_Format(PyExc_ValueError, "dimension mismatch in B");
+    return 1;
+  }
+  std::vector<npy_intp> shape_Phi(3);
+  shape_Phi[0] = K;
+  shape_Phi[1] = 2;
+  shape_Phi[2] = 2;
+  auto Phi = get_input<DI0>(3, &(shape_Phi[0]), input2, &success);
+  if (success)
+    return 1;
+  auto Y = get_matrix_input<DI0>(&N1, &M, input3, &success);
+  if (success)
+    return 1;
+  if (N1 != K) {
+    PyErr_Format(PyExc_ValueError, "dimension mismatch in Y");
+    return 1;
+  }
+  std::vector<npy_intp> shape(2);
+  shape[0] = K;
+  shape[1] = M;
+  auto bX = get_input<DI0>(2, &(shape[0]), input4, &success);
+  if (success)
+    return 1;
+  int nblk = SP__CELERITE_NBLK;
+  if (2 * nblk > J) {
+    PyErr_Format(PyExc_ValueError, "A must have at least 2 * nblk columns");
+    return 1;
+  }
+
+  // Allocate the outputs
+  shape[1] = J;
+  auto bA = allocate_output<DO0>(2, &(shape[0]), TO0, output0, &success);
+  if (success)
+    return 1;
+  auto bB = allocate_output<DO0>(2, &(shape[0]), TO1, output1, &success);
+  if (success)
+    return 1;
+  auto bPhi = allocate_output<DO0>(3, &(shape_Phi[0]), TO2, output2, &success);
+  if (success)
+    return 1;
+  shape[1] = M;
+  auto bY = allocate_output<DO0>(2, &(shape[0]), TO3, output3, &success);
+  if (success)
+    return 1;
+
+  // Compute!
+  Dot<DO0> dot(K, J, M, nblk, false, A, B, Phi, Y);
+  dot.gradient(bX, bA, bB, bPhi, bY);
+
+  // We're done!
+  return 0;
+}
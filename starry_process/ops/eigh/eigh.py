@@ -1,4 +1,4 @@
-from ..base_op import BaseOp
+from ..base_op import BaseOp, independent_grad
 from ...compat import Op, Apply, theano, tt, floatX
 import numpy as np
 from functools import partial
@@ -104,11 +104,30 @@ def _zero_disconnected(outputs, grads):
     return l
 
 
+def _eigh_grad(w, v, gw, gv, mindiff):
+    """
+    The gradient of an eigensystem of a Hermitian matrix as a theano
+    expression. This is the same as ``EighGrad``, but it can be
+    differentiated.
+
+    """
+    diff = tt.shape_padright(w) - tt.shape_padleft(w)
+    divisor = tt.switch(
+        tt.gt(tt.abs_(diff), mindiff),
+        1.0 / tt.switch(tt.eq(diff, 0.0), 1.0, diff),
+        0.0,
+    )
+    G = tt.dot(v, tt.dot(tt.transpose(v), gv) * tt.transpose(divisor))
+    g = tt.dot(v * gw, tt.transpose(v)) + tt.dot(v, tt.transpose(G))
+    return tt.tril(g) + tt.transpose(tt.triu(g, 1))
+
+
 class EighGrad(BaseOp):
     func_file = "./eigh.cc"
     func_name = "APPLY_SPECIFIC(eigh)"
 
     def __init__(self, mindiff=1e-15):
+        self.mindiff = mindiff
         compile_args = [("SP__EIGH_MINDIFF", "{:.5e}".format(mindiff))]
         super().__init__(compile_args=compile_args)
 
@@ -130,6 +149,15 @@ class EighGrad(BaseOp):
         shapes = args[-1]
         return [shapes[0]]
 
+    def grad(self, inputs, gradients):
+        # The output doesn't depend on the values of `x`
+        x = inputs[0]
+        (bX,) = gradients
+        return [tt.zeros_like(x)] + independent_grad(
+            lambda *args: tt.sum(bX * _eigh_grad(*args, self.mindiff)),
+            inputs[1:],
+        )
+
 
 class EighGradPython(Op):
     """
@@ -2,3 +2,4 @@
 from .rTA1 import rTA1Op
 from .rTA1L import rTA1LOp
 from .L import LOp
+from .interp import KernelInterpOp
@@ -0,0 +1,57 @@
+#section support_code_struct
+
+// Shorthand
+#define DI0 DTYPE_INPUT_0
+#define DO0 DTYPE_OUTPUT_0
+#define TO0 TYPENUM_OUTPUT_0
+
+int APPLY_SPECIFIC(interp)(PyArrayObject *input0,  // theta1
+                           PyArrayObject *input1,  // theta2
+                           PyArrayObject *input2,  // A
+                           PyArrayObject *input3,  // dx
+                           PyArrayObject **output0 // cov
+) {
+
+  using namespace sp::theano;
+  using namespace sp::interp;
+
+  // Get the inputs
+  int success = 0;
+  npy_intp K1 = -1, K2 = -1, N1, n, one = 1;
+  auto theta1 = get_input<DI0>(&K1, input0, &success);
+  if (success)
+    return 1;
+  auto theta2 = get_input<DI0>(&K2, input1, &success);
+  if (success)
+    return 1;
+  auto A = get_matrix_input<DI0>(&N1, &n, input2, &success);
+  if (success)
+    return 1;
+  if (N1 != 4) {
+    PyErr_Format(PyExc_ValueError, "A must have shape (4, n)");
+    return 1;
+  }
+  auto dx = get_input<DI0>(&one, input3, &success);
+  if (success)
+    return 1;
+  bool symmetric = SP__INTERP_SYMMETRIC;
+  if (symmetric && (K1 != K2)) {
+    PyErr_Format(PyExc_ValueError, "theta1 and theta2 must be the same");
+    return 1;
+  }
+
+  // Allocate the output
+  std::vector<npy_intp> shape(2);
+  shape[0] = K1;
+  shape[1] = K2;
+  auto cov = allocate_output<DO0>(2, &(shape[0]), TO0, output0, &success);
+  if (success)
+    return 1;
+
+  // Compute!
+  computeKernelInterp<DO0>(theta1, K1, theta2, K2, A, n, dx[0], symmetric,
+                           cov);
+
+  // We're done!
+  return 0;
+}
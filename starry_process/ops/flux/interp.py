@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+from ..base_op import BaseOp, reverse_grad
+from ...compat import theano, tt, floatX, Apply
+import sys
+
+__all__ = ["KernelInterpOp"]
+
+
+class KernelInterpOp(BaseOp):
+    """
+    Cubic interpolation of a kernel tabulated on a regular grid of lags.
+    Given the vectors ``theta1`` and ``theta2``, the ``(4, n)`` matrix
+    ``A`` of interpolation coefficients and the grid spacing ``dx``,
+    returns the ``(K1, K2)`` matrix
+
+        cov_ij = a0[k] + a1[k] x0 + a2[k] x0^2 + a3[k] x0^3
+
+    where ``k = floor(|theta1_i - theta2_j| / dx)`` and ``x0`` is the
+    fractional position of the lag within that grid cell. If
+    ``symmetric`` is ``True``, ``theta1`` and ``theta2`` must be the same
+    vector and only half of the matrix is computed. This replaces a graph
+    with several ``K1 * K2`` temporaries (and as many in the backward
+    pass) with a single pass over the output; rows are processed in
+    parallel.
+
+    """
+
+    __props__ = BaseOp.__props__ + ("symmetric",)
+    func_file = "./interp.cc"
+    func_name = "APPLY_SPECIFIC(interp)"
+
+    def __init__(self, *args, symmetric=False, **kwargs):
+        self.symmetric = bool(symmetric)
+        self.grad_op = KernelInterpRevOp(
+            *args, symmetric=symmetric, **kwargs
+        )
+        super().__init__(*args, **kwargs)
+
+    def c_compile_args(self, *args, **kwargs):
+        args = super().c_compile_args(*args, **kwargs)
+        args += ["-DSP__INTERP_SYMMETRIC={0}".format(int(self.symmetric))]
+        if sys.platform != "darwin":
+            args += ["-fopenmp"]
+        return args
+
+    def make_node(self, theta1, theta2, A, dx):
+        CC = tt.extra_ops.CpuContiguous()
+        in_args = [
+            CC(tt.as_tensor_variable(arg).astype(floatX))
+            for arg in [theta1, theta2, A, dx]
+        ]
+        out_args = [
+            tt.TensorType(dtype=floatX, broadcastable=[False, False])()
+        ]
+        return Apply(self, in_args, out_args)
+
+    def infer_shape(self, *args):
+        shapes = args[-1]
+        return ((shapes[0][0], shapes[1][0]),)
+
+    def grad(self, inputs, gradients):
+        btheta1, btheta2, bA = self.grad_op(*inputs, gradients[0])
+        return [btheta1, btheta2, bA, tt.zeros_like(inputs[3])]
+
+    def R_op(self, inputs, eval_points):
+        theta1, theta2, A, dx = inputs
+        vtheta1, vtheta2, vA, _ = eval_points
+
+        # The output is linear in `A`...
+        if vA is None:
+            jvp = tt.zeros_like(self(*inputs))
+        else:
+            jvp = self(theta1, theta2, vA, dx)
+
+        # ... and its derivative with respect to the lag is itself a
+        # (quadratic) interpolant, with coefficients `(a1, 2 a2, 3 a3, 0)`
+        if vtheta1 is not None or vtheta2 is not None:
+            dA = tt.concatenate(
+                (
+                    A[1:] * tt.arange(1, 4, dtype=floatX)[:, None],
+                    tt.zeros_like(A[:1]),
+                ),
+                axis=0,
+            ) / tt.reshape(dx, ())
+            dlag = tt.zeros_like(jvp)
+            if vtheta1 is not None:
+                dlag += vtheta1[:, None]
+            if vtheta2 is not None:
+                dlag -= vtheta2[None, :]
+            sign = tt.sgn(theta1[:, None] - theta2[None, :])
+            jvp += sign * self(theta1, theta2, dA, dx) * dlag
+        return [jvp]
+
+
+class KernelInterpRevOp(KernelInterpOp):
+    func_file = "./interp_rev.cc"
+    func_name = "APPLY_SPECIFIC(interp_rev)"
+
+    def __init__(self, *args, symmetric=False, **kwargs):
+        self.symmetric = bool(symmetric)
+        BaseOp.__init__(self, *args, **kwargs)
+
+    def make_node(self, theta1, theta2, A, dx, bcov):
+        CC = tt.extra_ops.CpuContiguous()
+        in_args = [
+            CC(tt.as_tensor_variable(arg).astype(floatX))
+            for arg in [theta1, theta2, A, dx, bcov]
+        ]
+        out_args = [
+            in_args[0].type(),
+            in_args[1].type(),
+            in_args[2].type(),
+        ]
+        return Apply(self, in_args, out_args)
+
+    def infer_shape(self, *args):
+        shapes = args[-1]
+        return shapes[:3]
+
+    def grad(self, inputs, gradients):
+        forward_op = self.related_op(KernelInterpOp, symmetric=self.symmetric)
+        return reverse_grad(
+            self, forward_op, inputs, list(gradients) + [None], constant=(3,)
+        )
@@ -25,27 +25,29 @@ int APPLY_SPECIFIC(rTA1L)(PyArrayObject *input0, PyArrayObject **output0) {
   using namespace sp::flux;
   using namespace sp::utils;
 
-  // Get the inputs
+  // Get the inputs. If `u` is a matrix, each of its rows is the vector
+  // of limb darkening coefficients of a different star
   int success = 0;
   int ndim = -1;
   npy_intp *shape;
   auto u_in = get_input<DI0>(&ndim, &shape, input0, &success);
-  if (ndim != 1) {
-    PyErr_Format(PyExc_ValueError, "u must be a vector");
+  if (success)
+    return 1;
+  if ((ndim != 1) && (ndim != 2)) {
+    PyErr_Format(PyExc_ValueError, "u must be a vector or a matrix");
     return 1;
   }
-  Map<Vector<DO0, SP__UMAX>> u(u_in);
+  npy_intp nrows = (ndim == 2) ? shape[0] : 1;
 
   // Allocate the outputs
-  ndim = 1;
   std::vector<npy_intp> shape_vec(ndim);
-  shape_vec[0] = SP__N;
-  shape = &(shape_vec[0]);
-  auto f_out = allocate_output<DO0>(ndim, shape, TO0, output0, &success);
+  shape_vec[0] = nrows;
+  shape_vec[ndim - 1] = SP__N;
+  auto f_out =
+      allocate_output<DO0>(ndim, &(shape_vec[0]), TO0, output0, &success);
   if (success) {
     return 1;
   }
-  Map<RowVector<DO0, SP__N>> f(f_out);
 
   // Initialize the class if needed
   if (APPLY_SPECIFIC(LD) == NULL) {
@@ -53,7 +55,11 @@ int APPLY_SPECIFIC(rTA1L)(PyArrayObject *input0, PyArrayObject **output0) {
   }
 
   // Compute
-  APPLY_SPECIFIC(LD)->template computerTA1L(u, f);
+  for (npy_intp n = 0; n < nrows; ++n) {
+    Map<Vector<DO0, SP__UMAX>> u(u_in + n * SP__UMAX);
+    Map<RowVector<DO0, SP__N>> f(f_out + n * SP__N);
+    APPLY_SPECIFIC(LD)->template computerTA1L(u, f);
+  }
 
   // We're done!
   return 0;
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
-from ..base_op import BaseOp
+from ..base_op import BaseOp, reverse_grad
 from ...compat import theano, tt, floatX, Apply
+import numpy as np
 
 __all__ = ["rTA1LOp"]
 
@@ -14,30 +15,77 @@ class rTA1LOp(BaseOp):
         super(rTA1LOp, self).__init__(*args, **kwargs)
 
     def make_node(self, u):
-        in_args = [tt.as_tensor_variable(arg).astype(floatX) for arg in [u]]
-        out_args = [tt.TensorType(dtype=floatX, broadcastable=[False])()]
+        CC = tt.extra_ops.CpuContiguous()
+        in_args = [CC(tt.as_tensor_variable(u).astype(floatX))]
+        assert in_args[0].ndim in [1, 2], "`u` must be a vector or a matrix"
+        out_args = [
+            tt.TensorType(
+                dtype=floatX, broadcastable=[False] * in_args[0].ndim
+            )()
+        ]
         return Apply(self, in_args, out_args)
 
     def infer_shape(self, *args):
-        return ([self.N],)
+        shapes = args[-1]
+        return (tuple(shapes[0][:-1]) + (self.N,),)
 
     def grad(self, inputs, gradients):
         return (self.grad_op(inputs[0], gradients[0]),)
 
+    def R_op(self, inputs, eval_points):
+        (u,) = inputs
+        (v,) = eval_points
+        if v is None:
+            return [None]
+        # The operator is `pi u_^T M / (s^T u_)`, where `u_ = (-1, u)`
+        M, s = self.related_op(rTA1LBasisOp)()
+        f = self(u)
+        norm = tt.shape_padright(tt.dot(u, s[1:]) - s[0], 1)
+        dnorm = tt.shape_padright(tt.dot(v, s[1:]), 1)
+        return [(np.pi * tt.dot(v, M[1:]) - f * dnorm) / norm]
+
 
 class rTA1LRevOp(BaseOp):
     func_file = "./rTA1L_rev.cc"
     func_name = "APPLY_SPECIFIC(rTA1L_rev)"
 
     def make_node(self, u, bf):
+        CC = tt.extra_ops.CpuContiguous()
         in_args = [
-            tt.as_tensor_variable(arg).astype(floatX) for arg in [u, bf]
+            CC(tt.as_tensor_variable(arg).astype(floatX)) for arg in [u, bf]
+        ]
+        out_args = [in_args[0].type()]
+        return Apply(self, in_args, out_args)
+
+    def infer_shape(self, *args):
+        shapes = args[-1]
+        return (tuple(shapes[0][:-1]) + (self.udeg,),)
+
+    def grad(self, inputs, gradients):
+        return reverse_grad(self, self.related_op(rTA1LOp), inputs, gradients)
+
+
+class rTA1LBasisOp(BaseOp):
+    """
+    The matrix ``M`` and the vector ``s`` in the expression
+    ``rTA1L = pi u_^T M / (s^T u_)`` for the limb-darkened flux operator,
+    where ``u_ = (-1, u)``.
+
+    """
+
+    func_file = "./rTA1L_basis.cc"
+    func_name = "APPLY_SPECIFIC(rTA1L_basis)"
+
+    def make_node(self):
+        in_args = []
+        out_args = [
+            tt.TensorType(dtype=floatX, broadcastable=[False, False])(),
+            tt.TensorType(dtype=floatX, broadcastable=[False])(),
         ]
-        out_args = [tt.TensorType(dtype=floatX, broadcastable=[False])()]
         return Apply(self, in_args, out_args)
 
     def infer_shape(self, *args):
-        return ([self.udeg],)
+        return ([self.udeg + 1, self.N], [self.udeg + 1])
 
     def grad(self, inputs, gradients):
         raise NotImplementedError("No gradient available for this op.")
@@ -0,0 +1,39 @@
+#section support_code_struct
+
+// Shorthand
+#define DO0 DTYPE_OUTPUT_0
+#define DO1 DTYPE_OUTPUT_1
+#define TO0 TYPENUM_OUTPUT_0
+#define TO1 TYPENUM_OUTPUT_1
+
+int APPLY_SPECIFIC(rTA1L_basis)(PyArrayObject **output0,
+                                PyArrayObject **output1) {
+
+  using namespace sp::theano;
+  using namespace sp::flux;
+  using namespace sp::utils;
+
+  // Allocate the outputs
+  int success = 0;
+  std::vector<npy_intp> shape_vec(2);
+  shape_vec[0] = SP__UMAX + 1;
+  shape_vec[1] = SP__N;
+  npy_intp *shape = &(shape_vec[0]);
+  auto M_out = allocate_output<DO0>(2, shape, TO0, output0, &success);
+  if (success) {
+    return 1;
+  }
+  auto s_out = allocate_output<DO1>(1, shape, TO1, output1, &success);
+  if (success) {
+    return 1;
+  }
+  Map<RowMatrix<DO0, Dynamic, Dynamic>> M(M_out, SP__UMAX + 1, SP__N);
+  Map<Vector<DO1, SP__UMAX + 1>> s(s_out);
+
+  // Compute!
+  LimbDark<DO0> LD;
+  LD.computerTA1LBasis(M, s);
+
+  // We're done!
+  return 0;
+}
@@ -32,30 +32,28 @@ int APPLY_SPECIFIC(rTA1L_rev)(PyArrayObject *input0, PyArrayObject *input1,
   int ndim = -1;
   npy_intp *shape;
   auto u_in = get_input<DI0>(&ndim, &shape, input0, &success);
-  if (ndim != 1) {
-    PyErr_Format(PyExc_ValueError, "u must be a vector");
+  if (success)
+    return 1;
+  if ((ndim != 1) && (ndim != 2)) {
+    PyErr_Format(PyExc_ValueError, "u must be a vector or a matrix");
     return 1;
   }
-  Map<Vector<DI0, SP__UMAX>> u(u_in);
+  npy_intp nrows = (ndim == 2) ? shape[0] : 1;
 
-  ndim = -1;
-  auto bf_in = get_input<DI1>(&ndim, &shape, input1, &success);
-  if (ndim != 1) {
-    PyErr_Format(PyExc_ValueError, "bf must be a vector");
+  std::vector<npy_intp> shape_vec(ndim);
+  shape_vec[0] = nrows;
+  shape_vec[ndim - 1] = SP__N;
+  auto bf_in = get_input<DI1>(ndim, &(shape_vec[0]), input1, &success);
+  if (success)
     return 1;
-  }
-  Map<RowVector<DI1, SP__N>> bf(bf_in);
 
   // Allocate the outputs
-  ndim = 1;
-  std::vector<npy_intp> shape_vec(ndim);
-  shape_vec[0] = SP__UMAX;
-  shape = &(shape_vec[0]);
-  auto bu_out = allocate_output<DO0>(ndim, shape, TO0, output0, &success);
+  shape_vec[ndim - 1] = SP__UMAX;
+  auto bu_out =
+      allocate_output<DO0>(ndim, &(shape_vec[0]), TO0, output0, &success);
   if (success) {
     return 1;
   }
-  Map<Vector<DO0, SP__UMAX>> bu(bu_out);
 
   // Initialize the class if needed
   if (APPLY_SPECIFIC(LD_rev) == NULL) {
@@ -63,7 +61,12 @@ int APPLY_SPECIFIC(rTA1L_rev)(PyArrayObject *input0, PyArrayObject *input1,
   }
 
   // Compute
-  APPLY_SPECIFIC(LD_rev)->template computerTA1L(u, bf, bu);
+  for (npy_intp n = 0; n < nrows; ++n) {
+    Map<Vector<DI0, SP__UMAX>> u(u_in + n * SP__UMAX);
+    Map<RowVector<DI1, SP__N>> bf(bf_in + n * SP__N);
+    Map<Vector<DO0, SP__UMAX>> bu(bu_out + n * SP__UMAX);
+    APPLY_SPECIFIC(LD_rev)->template computerTA1L(u, bf, bu);
+  }
 
   // We're done!
   return 0;
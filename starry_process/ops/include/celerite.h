@@ -0,0 +1,371 @@
+/**
+ * \file celerite.h
+ * \brief The generalized celerite algorithm for semiseparable matrices.
+ *
+ * A symmetric semiseparable matrix has diagonal `d` and lower triangle
+ *
+ *     K_nm = U_n^T . P_n . P_(n-1) ... P_(m+1) . V_m    (n > m),
+ *
+ * where the transition matrices are `P_n = diag(I_nblk (x) Phi_n, I)` and
+ * `Phi_n` is `(2, 2)`. All recursions below carry a `(J, J)` and/or a
+ * `(J, M)` state from one data point to the next. The forward passes only
+ * keep the current state; the reverse passes store it every `sqrt(K)`
+ * steps and recompute it within each block of steps, so the memory cost
+ * is `O(sqrt(K) J^2)` instead of `O(K J^2)`.
+ *
+ */
+
+#ifndef _SP_CELERITE_H_
+#define _SP_CELERITE_H_
+
+#include "utils.h"
+#include <cmath>
+#include <utility>
+#include <vector>
+
+namespace sp {
+namespace celerite {
+
+using namespace utils;
+
+template <typename Scalar> using Matrix = RowMatrix<Scalar, Dynamic, Dynamic>;
+
+/**
+ * Left-multiply `X` in place by the transition matrix with block `Phi`
+ * (or by its transpose).
+ *
+ */
+template <typename Scalar>
+inline void transition(const Scalar *Phi, const int nblk, Matrix<Scalar> &X,
+                       const bool transpose = false) {
+  Scalar p00 = Phi[0], p11 = Phi[3];
+  Scalar p01 = transpose ? Phi[2] : Phi[1];
+  Scalar p10 = transpose ? Phi[1] : Phi[2];
+  for (int b = 0; b < nblk; ++b) {
+    for (int m = 0; m < X.cols(); ++m) {
+      Scalar x0 = X(2 * b, m), x1 = X(2 * b + 1, m);
+      X(2 * b, m) = p00 * x0 + p01 * x1;
+      X(2 * b + 1, m) = p10 * x0 + p11 * x1;
+    }
+  }
+}
+
+/**
+ * Right-multiply `X` in place by the transpose of the transition matrix
+ * with block `Phi` (or by the matrix itself).
+ *
+ */
+template <typename Scalar>
+inline void transition_cols(const Scalar *Phi, const int nblk,
+                            Matrix<Scalar> &X, const bool transpose = false) {
+  Scalar p00 = Phi[0], p11 = Phi[3];
+  Scalar p01 = transpose ? Phi[2] : Phi[1];
+  Scalar p10 = transpose ? Phi[1] : Phi[2];
+  for (int m = 0; m < X.rows(); ++m) {
+    for (int b = 0; b < nblk; ++b) {
+      Scalar x0 = X(m, 2 * b), x1 = X(m, 2 * b + 1);
+      X(m, 2 * b) = p00 * x0 + p01 * x1;
+      X(m, 2 * b + 1) = p10 * x0 + p11 * x1;
+    }
+  }
+}
+
+/**
+ * Add the gradient of `tr(Xbar^T . P . X)` with respect to the block
+ * `Phi` of the transition matrix `P` to `bPhi`.
+ *
+ */
+template <typename Scalar>
+inline void transition_grad(const Matrix<Scalar> &Xbar,
+                            const Matrix<Scalar> &X, const int nblk,
+                            Scalar *bPhi) {
+  for (int b = 0; b < nblk; ++b) {
+    for (int i = 0; i < 2; ++i) {
+      for (int j = 0; j < 2; ++j) {
+        bPhi[2 * i + j] += Xbar.row(2 * b + i).dot(X.row(2 * b + j));
+      }
+    }
+  }
+}
+
+/**
+ * Run the recursion `advance(n, state)`, which takes the state before step
+ * `n` to the state before step `n + 1`, forward over all `K` steps, and
+ * then call `backward(n, state)` with the state before step `n` for
+ * `n = K - 1 ... 0`. The state is stored every `sqrt(K)` steps and
+ * recomputed within each block, so `advance` is called twice per step.
+ *
+ */
+template <typename State, typename Advance, typename Backward>
+inline void checkpointed(const npy_intp K, const State &init,
+                         Advance advance, Backward backward) {
+  if (K == 0)
+    return;
+  npy_intp B = npy_intp(std::ceil(std::sqrt(double(K))));
+  std::vector<State> checkpoints;
+  State state = init;
+  for (npy_intp n = 0; n < K; ++n) {
+    if (n % B == 0)
+      checkpoints.push_back(state);
+    advance(n, state);
+  }
+  std::vector<State> block(B);
+  for (npy_intp k = checkpoints.size() - 1; k >= 0; --k) {
+    npy_intp n0 = k * B;
+    npy_intp n1 = std::min(n0 + B, K);
+    block[0] = checkpoints[k];
+    for (npy_intp n = n0; n < n1 - 1; ++n) {
+      block[n - n0 + 1] = block[n - n0];
+      advance(n, block[n - n0 + 1]);
+    }
+    for (npy_intp n = n1 - 1; n >= n0; --n)
+      backward(n, block[n - n0]);
+  }
+}
+
+/**
+ * The recursion of the factorization `K = L . diag(D) . L^T` and of the
+ * solve `Z = L^-1 . Y`, where `L` is unit lower triangular with strictly
+ * lower triangle
+ *
+ *     L_nm = U_n^T . P_n . P_(n-1) ... P_(m+1) . W_m    (n > m).
+ *
+ * The state before step `n` is `(S, f)`, where
+ *
+ *     S = sum_(m < n) D_m P_(n-1) ... P_(m+1) W_m W_m^T P_(m+1)^T ...
+ *     f = sum_(m < n) P_(n-1) ... P_(m+1) W_m Z_m^T.
+ *
+ */
+template <typename Scalar> class Factor {
+
+  using State = std::pair<Matrix<Scalar>, Matrix<Scalar>>;
+
+  const npy_intp K;
+  const int J, M, nblk;
+  const Scalar *d, *Phi;
+  Map<const Matrix<Scalar>> U, V, Y;
+
+public:
+  Vector<Scalar, Dynamic> D;
+  Matrix<Scalar> W, Z;
+
+  Factor(const npy_intp K, const int J, const int M, const int nblk,
+         const Scalar *d, const Scalar *U, const Scalar *V,
+         const Scalar *Phi, const Scalar *Y)
+      : K(K), J(J), M(M), nblk(nblk), d(d), Phi(Phi), U(U, K, J),
+        V(V, K, J), Y(Y, K, M), D(K), W(K, J), Z(K, M) {}
+
+  State init() const {
+    return State(Matrix<Scalar>::Zero(J, J), Matrix<Scalar>::Zero(J, M));
+  }
+
+  /**
+   * Take the state before step `n` to the state before step `n + 1`,
+   * computing `D_n`, `W_n` and `Z_n` along the way.
+   *
+   */
+  void advance(const npy_intp n, State &state) {
+    Matrix<Scalar> &S = state.first;
+    Matrix<Scalar> &f = state.second;
+    transition(Phi + 4 * n, nblk, S);
+    transition_cols(Phi + 4 * n, nblk, S);
+    transition(Phi + 4 * n, nblk, f);
+    Vector<Scalar, Dynamic> a = S * U.row(n).transpose();
+    D(n) = d[n] - U.row(n).dot(a.transpose());
+    W.row(n) = (V.row(n) - a.transpose()) / D(n);
+    Z.row(n) = Y.row(n) - U.row(n) * f;
+    S.noalias() += D(n) * W.row(n).transpose() * W.row(n);
+    f.noalias() += W.row(n).transpose() * Z.row(n);
+  }
+
+  /**
+   * Compute `D`, `W` and `Z`.
+   *
+   */
+  void compute() {
+    State state = init();
+    for (npy_intp n = 0; n < K; ++n)
+      advance(n, state);
+  }
+
+  /**
+   * Compute the gradients of a scalar with respect to the inputs given
+   * its gradients `bD`, `bW` and `bZ` with respect to the outputs.
+   *
+   */
+  void gradient(const Scalar *bD_in, const Scalar *bW_in,
+                const Scalar *bZ_in, Scalar *bd, Scalar *bU_out,
+                Scalar *bV_out, Scalar *bPhi, Scalar *bY_out) {
+    Map<const Matrix<Scalar>> bW_(bW_in, K, J), bZ_(bZ_in, K, M);
+    Map<Matrix<Scalar>> bU(bU_out, K, J), bV(bV_out, K, J), bY(bY_out, K, M);
+    Map<Matrix<Scalar>>(bPhi, K, 4).setZero();
+
+    // Gradients with respect to the state after step `n`
+    Matrix<Scalar> bSt = Matrix<Scalar>::Zero(J, J);
+    Matrix<Scalar> bft = Matrix<Scalar>::Zero(J, M);
+
+    checkpointed(
+        K, init(), [this](npy_intp n, State &state) { advance(n, state); },
+        [&](npy_intp n, const State &state) {
+          const Matrix<Scalar> &St = state.first;
+          const Matrix<Scalar> &ft = state.second;
+
+          // Recompute the state
+          Matrix<Scalar> PSt = St;
+          transition(Phi + 4 * n, nblk, PSt);
+          Matrix<Scalar> S = PSt;
+          transition_cols(Phi + 4 * n, nblk, S);
+          Matrix<Scalar> f = ft;
+          transition(Phi + 4 * n, nblk, f);
+          Vector<Scalar, Dynamic> a = S * U.row(n).transpose();
+
+          // Contributions from step `n + 1`
+          Matrix<Scalar> bS = bSt;
+          Matrix<Scalar> bf = bft;
+          Scalar bDn =
+              bD_in[n] + W.row(n).dot((bSt * W.row(n).transpose()).transpose());
+          Vector<Scalar, Dynamic> bW =
+              D(n) * (bSt + bSt.transpose()) * W.row(n).transpose() +
+              bft * Z.row(n).transpose() + bW_.row(n).transpose();
+          Vector<Scalar, Dynamic> bz =
+              bZ_.row(n).transpose() + bft.transpose() * W.row(n).transpose();
+
+          // Z[n] = Y[n] - f^T . U[n]
+          bY.row(n) = bz.transpose();
+          bf.noalias() -= U.row(n).transpose() * bz.transpose();
+          bU.row(n) = -(f * bz).transpose();
+
+          // W[n] = (V[n] - a) / D[n]
+          bV.row(n) = bW.transpose() / D(n);
+          Vector<Scalar, Dynamic> ba = -bW / D(n);
+          bDn -= W.row(n).dot(bW.transpose()) / D(n);
+
+          // D[n] = d[n] - U[n]^T . a
+          bd[n] = bDn;
+          bU.row(n) -= bDn * a.transpose();
+          ba -= bDn * U.row(n).transpose();
+
+          // a = S . U[n]
+          bS.noalias() += ba * U.row(n);
+          bU.row(n) += (S * ba).transpose();
+
+          // f = P . ft
+          bft = bf;
+          transition(Phi + 4 * n, nblk, bft, true);
+          transition_grad(bf, ft, nblk, bPhi + 4 * n);
+
+          // S = P . St . P^T
+          bSt = bS;
+          transition(Phi + 4 * n, nblk, bSt, true);
+          transition_cols(Phi + 4 * n, nblk, bSt, true);
+          Matrix<Scalar> bSsym = bS + bS.transpose();
+          Matrix<Scalar> PStT = PSt.transpose();
+          transition_grad(bSsym, PStT, nblk, bPhi + 4 * n);
+        });
+  }
+};
+
+/**
+ * The recursion of the product of the strictly lower triangular
+ * semiseparable matrix
+ *
+ *     N_nm = A_n^T . P_n . P_(n-1) ... P_(m+1) . B_m    (n > m)
+ *
+ * and `Y`, `X = N . Y`, or, if `solve` is true, of the solution of the
+ * unit lower triangular system `(I + N) . X = Y`. The state before step
+ * `n` is `f = sum_(m < n) P_(n-1) ... P_(m+1) B_m X'_m^T`, where `X'` is
+ * `Y` or `X`, respectively.
+ *
+ */
+template <typename Scalar> class Dot {
+
+  using State = Matrix<Scalar>;
+
+  const npy_intp K;
+  const int J, M, nblk;
+  const bool solve;
+  const Scalar *Phi;
+  Map<const Matrix<Scalar>> A, B, Y;
+
+public:
+  Matrix<Scalar> X;
+
+  Dot(const npy_intp K, const int J, const int M, const int nblk,
+      const bool solve, const Scalar *A, const Scalar *B, const Scalar *Phi,
+      const Scalar *Y)
+      : K(K), J(J), M(M), nblk(nblk), solve(solve), Phi(Phi), A(A, K, J),
+        B(B, K, J), Y(Y, K, M), X(K, M) {}
+
+  State init() const { return Matrix<Scalar>::Zero(J, M); }
+
+  /**
+   * Take the state before step `n` to the state before step `n + 1`,
+   * computing `X_n` along the way.
+   *
+   */
+  void advance(const npy_intp n, State &f) {
+    transition(Phi + 4 * n, nblk, f);
+    if (solve) {
+      X.row(n) = Y.row(n) - A.row(n) * f;
+      f.noalias() += B.row(n).transpose() * X.row(n);
+    } else {
+      X.row(n) = A.row(n) * f;
+      f.noalias() += B.row(n).transpose() * Y.row(n);
+    }
+  }
+
+  /**
+   * Compute `X`.
+   *
+   */
+  void compute() {
+    State f = init();
+    for (npy_intp n = 0; n < K; ++n)
+      advance(n, f);
+  }
+
+  /**
+   * Compute the gradients of a scalar with respect to the inputs given its
+   * gradient `bX` with respect to the output. Only implemented for the
+   * product.
+   *
+   */
+  void gradient(const Scalar *bX_in, Scalar *bA_out, Scalar *bB_out,
+                Scalar *bPhi, Scalar *bY_out) {
+    Map<const Matrix<Scalar>> bX(bX_in, K, M);
+    Map<Matrix<Scalar>> bA(bA_out, K, J), bB(bB_out, K, J), bY(bY_out, K, M);
+    Map<Matrix<Scalar>>(bPhi, K, 4).setZero();
+    bB.setZero();
+    bY.setZero();
+
+    // Gradient with respect to the state after step `n`
+    Matrix<Scalar> bft = Matrix<Scalar>::Zero(J, M);
+
+    checkpointed(
+        K, init(), [this](npy_intp n, State &f) { advance(n, f); },
+        [&](npy_intp n, const State &ft) {
+          // X[n] = A[n]^T . f
+          Matrix<Scalar> f = ft;
+          transition(Phi + 4 * n, nblk, f);
+          Matrix<Scalar> bf = bft;
+          bf.noalias() += A.row(n).transpose() * bX.row(n);
+          bA.row(n) = (f * bX.row(n).transpose()).transpose();
+
+          // f = P . ft
+          bft = bf;
+          transition(Phi + 4 * n, nblk, bft, true);
+          transition_grad(bf, ft, nblk, bPhi + 4 * n);
+
+          // ft = f_prev + B[n - 1] . Y[n - 1]^T
+          if (n > 0) {
+            bB.row(n - 1) = (bft * Y.row(n - 1).transpose()).transpose();
+            bY.row(n - 1) = B.row(n - 1) * bft;
+          }
+        });
+  }
+};
+
+} // namespace celerite
+} // namespace sp
+
+#endif
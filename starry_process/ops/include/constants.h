@@ -33,6 +33,11 @@
 #define SP__NWIG                                                               \
   (((SP__LMAX + 1) * (2 * SP__LMAX + 1) * (2 * SP__LMAX + 3)) / 3)
 
+//! Compute the derivatives of the outputs of the ops that return them?
+#ifndef SP__GRADIENT
+#define SP__GRADIENT 1
+#endif
+
 //! Eigendecomposition tolerance
 #ifndef SP__EIGH_MINDIFF
 #define SP__EIGH_MINDIFF 1.0e-15
@@ -72,4 +77,14 @@
 #define SP_WIGNER_TOL 1.0e-14
 #endif
 
+//! Number of OpenMP threads used by the parallel ops (0 = OpenMP default)
+#ifndef SP_NUM_THREADS
+#define SP_NUM_THREADS 0
+#endif
+
+//! Number of rows per thread in the parallel loops over time
+#ifndef SP_TILE_SIZE
+#define SP_TILE_SIZE 64
+#endif
+
 #endif
\ No newline at end of file
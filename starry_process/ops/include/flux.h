@@ -550,6 +550,27 @@ public:
     bu = (bp * DpDu).template tail<SP__UMAX>();
   }
 
+  /**
+  Compute the matrix `M` and the vector `s` such that the starry flux
+  operator under limb darkening is `rTA1L = pi u_^T M / (s^T u_)`, where
+  `u_ = (-1, u)`. These are independent of `u`, so the derivatives of
+  `rTA1L` of any order follow from this expression.
+
+  */
+  template <typename ROWMATRIX, typename VECTOR>
+  void computerTA1LBasis(ROWMATRIX &M, VECTOR &s) {
+
+    if (SP__UMAX == 0) {
+      throw std::runtime_error("Limb darkening is currently disabled.");
+    }
+
+    // The flux operator is linear in the polynomial `p`, which is
+    // `U1 . u_` divided by its total flux
+    M = U1.transpose() * DDp;
+    s = U1.transpose() *
+        rT.template head<(SP__UMAX + 1) * (SP__UMAX + 1)>().transpose();
+  }
+
   /**
   Compute the limb darkening operator `L` (ylm -> ylm).
 
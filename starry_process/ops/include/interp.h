@@ -0,0 +1,124 @@
+/**
+ * \file interp.h
+ * \brief Cubic interpolation of the (marginalized) flux kernel.
+ *
+ */
+
+#ifndef _SP_INTERP_H_
+#define _SP_INTERP_H_
+
+#include "utils.h"
+#include <cmath>
+#include <vector>
+
+namespace sp {
+namespace interp {
+
+using namespace utils;
+
+/**
+ * Locate the lag `x = |theta1 - theta2|` on the interpolation grid of
+ * spacing `dx` (whose first point is at `-dx`). Returns the index `ind` of
+ * the grid cell and sets `x0`, the fractional position within it, and
+ * `sgn`, the sign of `theta1 - theta2`.
+ *
+ */
+template <typename Scalar>
+inline npy_intp locate(const Scalar &theta1, const Scalar &theta2,
+                       const Scalar &dx, const npy_intp &n, Scalar &x0,
+                       Scalar &sgn) {
+  Scalar diff = theta1 - theta2;
+  Scalar x = std::abs(diff);
+  sgn = (diff > 0) - (diff < 0);
+  npy_intp ind = npy_intp(std::floor(x / dx));
+  if (ind < 0)
+    ind = 0;
+  else if (ind > n - 1)
+    ind = n - 1;
+  x0 = (x - (-dx + (ind + 1) * dx)) / dx;
+  return ind;
+}
+
+/**
+ * Compute the `(K1, K2)` covariance matrix
+ *
+ *     cov_ij = a0[k] + a1[k] x0 + a2[k] x0^2 + a3[k] x0^3
+ *
+ * where `k` and `x0` locate the lag `|theta1_i - theta2_j|` on the grid
+ * (see `locate`) and `a0 ... a3` are the rows of the `(4, n)` matrix `A`.
+ * If `symmetric` is true, `theta1` and `theta2` must be the same vector
+ * and only the upper triangle is computed. Rows are processed in
+ * parallel.
+ *
+ */
+template <typename Scalar>
+inline void computeKernelInterp(const Scalar *theta1, const npy_intp &K1,
+                                const Scalar *theta2, const npy_intp &K2,
+                                const Scalar *A, const npy_intp &n,
+                                const Scalar &dx, const bool &symmetric,
+                                Scalar *cov) {
+  const Scalar *a0 = A, *a1 = A + n, *a2 = A + 2 * n, *a3 = A + 3 * n;
+#pragma omp parallel for schedule(dynamic) num_threads(num_threads())
+  for (npy_intp i = 0; i < K1; ++i) {
+    Scalar x0, sgn;
+    for (npy_intp j = (symmetric ? i : 0); j < K2; ++j) {
+      npy_intp k = locate(theta1[i], theta2[j], dx, n, x0, sgn);
+      Scalar value = a0[k] + x0 * (a1[k] + x0 * (a2[k] + x0 * a3[k]));
+      cov[i * K2 + j] = value;
+      if (symmetric)
+        cov[j * K2 + i] = value;
+    }
+  }
+}
+
+/**
+ * Compute the gradient of `computeKernelInterp` with respect to `theta1`,
+ * `theta2` and `A` given the gradient `bcov` with respect to the output.
+ * The outputs must be zero-initialized. Rows are processed in parallel,
+ * with thread-local accumulators for the scattered gradients.
+ *
+ */
+template <typename Scalar>
+inline void computeKernelInterpRev(const Scalar *theta1, const npy_intp &K1,
+                                   const Scalar *theta2, const npy_intp &K2,
+                                   const Scalar *A, const npy_intp &n,
+                                   const Scalar &dx, const bool &symmetric,
+                                   const Scalar *bcov, Scalar *btheta1,
+                                   Scalar *btheta2, Scalar *bA) {
+  const Scalar *a1 = A + n, *a2 = A + 2 * n, *a3 = A + 3 * n;
+#pragma omp parallel num_threads(num_threads())
+  {
+    std::vector<Scalar> btheta2_loc(K2, 0.0), bA_loc(4 * n, 0.0);
+#pragma omp for schedule(dynamic)
+    for (npy_intp i = 0; i < K1; ++i) {
+      Scalar x0, sgn, b, g;
+      Scalar btheta1_i = 0.0;
+      for (npy_intp j = (symmetric ? i : 0); j < K2; ++j) {
+        npy_intp k = locate(theta1[i], theta2[j], dx, n, x0, sgn);
+        b = bcov[i * K2 + j];
+        if (symmetric && (j != i))
+          b += bcov[j * K2 + i];
+        bA_loc[k] += b;
+        bA_loc[n + k] += b * x0;
+        bA_loc[2 * n + k] += b * x0 * x0;
+        bA_loc[3 * n + k] += b * x0 * x0 * x0;
+        g = b * sgn * (a1[k] + x0 * (2 * a2[k] + 3 * x0 * a3[k])) / dx;
+        btheta1_i += g;
+        btheta2_loc[j] -= g;
+      }
+      btheta1[i] = btheta1_i;
+    }
+#pragma omp critical
+    {
+      for (npy_intp j = 0; j < K2; ++j)
+        btheta2[j] += btheta2_loc[j];
+      for (npy_intp k = 0; k < 4 * n; ++k)
+        bA[k] += bA_loc[k];
+    }
+  }
+}
+
+} // namespace interp
+} // namespace sp
+
+#endif
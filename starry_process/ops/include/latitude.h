@@ -16,9 +16,10 @@ using namespace utils;
 using special::hyp2f1;
 
 /**
- * Compute the mean `q` and variance `Q` latitude integrals.
+ * Compute the mean `q` and variance `Q` latitude integrals. If `GRADIENT`
+ * is false, their derivatives are not computed.
 */
-template <typename SCALAR, typename VECTOR, typename MATRIX>
+template <bool GRADIENT, typename SCALAR, typename VECTOR, typename MATRIX>
 inline void computeLatitudeIntegrals(const SCALAR &alpha, const SCALAR &beta,
                                      VECTOR &q, VECTOR &dqda, VECTOR &dqdb,
                                      MATRIX &Q, MATRIX &dQda, MATRIX &dQdb) {
@@ -38,11 +39,13 @@ inline void computeLatitudeIntegrals(const SCALAR &alpha, const SCALAR &beta,
 
   // Initialize the output
   q.setZero();
-  dqda.setZero();
-  dqdb.setZero();
   Q.setZero();
-  dQda.setZero();
-  dQdb.setZero();
+  if (GRADIENT) {
+    dqda.setZero();
+    dqdb.setZero();
+    dQda.setZero();
+    dQdb.setZero();
+  }
 
   // B functions
   B(0) = 1.0;
@@ -52,21 +55,25 @@ inline void computeLatitudeIntegrals(const SCALAR &alpha, const SCALAR &beta,
   for (int k = 1; k < n; ++k) {
     c1 = 1.0 / (alpha + beta + k - 1.0);
     c2 = (alpha + k - 1.0) * c1;
-    c3 = beta * c1 * c1;
-    c4 = (1 - k - alpha) * c1 * c1;
     B(k) = c2 * B(k - 1);
-    dBda(k) = c3 * B(k - 1) + c2 * dBda(k - 1);
-    dBdb(k) = c4 * B(k - 1) + c2 * dBdb(k - 1);
+    if (GRADIENT) {
+      c3 = beta * c1 * c1;
+      c4 = (1 - k - alpha) * c1 * c1;
+      dBda(k) = c3 * B(k - 1) + c2 * dBda(k - 1);
+      dBdb(k) = c4 * B(k - 1) + c2 * dBdb(k - 1);
+    }
   }
 
   // F functions
   SCALAR ab = alpha + beta;
   SCALAR a2 = alpha * alpha;
   SCALAR dfdb, dfdc;
-  F(0) = sqrt(2.0) * hyp2f1(-0.5, beta, ab, 0.5, dfdb, dfdc);
+  F(0) = sqrt(2.0) *
+         hyp2f1<GRADIENT, SCALAR>(-0.5, beta, ab, 0.5, dfdb, dfdc);
   dFda(0) = sqrt(2.0) * dfdc;
   dFdb(0) = sqrt(2.0) * (dfdb + dfdc);
-  F(1) = sqrt(2.0) * hyp2f1(-0.5, beta, ab + 1.0, 0.5, dfdb, dfdc);
+  F(1) = sqrt(2.0) *
+         hyp2f1<GRADIENT, SCALAR>(-0.5, beta, ab + 1.0, 0.5, dfdb, dfdc);
   dFda(1) = sqrt(2.0) * dfdc;
   dFdb(1) = sqrt(2.0) * (dfdb + dfdc);
   for (int k = 2; k < n; ++k) {
@@ -75,6 +82,8 @@ inline void computeLatitudeIntegrals(const SCALAR &alpha, const SCALAR &beta,
     c2 = c1 * (ab + k - 2.0);
     c3 = c1 * (1.5 - beta);
     F(k) = c2 * F(k - 2) + c3 * F(k - 1);
+    if (!GRADIENT)
+      continue;
 
     // d / dalpha
     c6 = 1.0 / (2.0 * ab + 2.0 * k - 1.0);
@@ -103,17 +112,21 @@ inline void computeLatitudeIntegrals(const SCALAR &alpha, const SCALAR &beta,
         (c8 * F(k - 2) + c2 * dFdb(k - 2)) + (c9 * F(k - 1) + c3 * dFdb(k - 1));
   }
   F.array() = F.array().cwiseProduct(B.array()).eval();
-  dFda.array() = dFda.array().cwiseProduct(B.array()).eval() +
-                 F.array().cwiseProduct(dBda.array()).eval();
-  dFdb.array() = dFdb.array().cwiseProduct(B.array()).eval() +
-                 F.array().cwiseProduct(dBdb.array()).eval();
+  if (GRADIENT) {
+    dFda.array() = dFda.array().cwiseProduct(B.array()).eval() +
+                   F.array().cwiseProduct(dBda.array()).eval();
+    dFdb.array() = dFdb.array().cwiseProduct(B.array()).eval() +
+                   F.array().cwiseProduct(dBdb.array()).eval();
+  }
 
   // Terms
   Map<Vector<SCALAR, n>> func(NULL), dfuncda(NULL), dfuncdb(NULL);
   SCALAR fac1, fac2;
   term.setZero();
-  dtermda.setZero();
-  dtermdb.setZero();
+  if (GRADIENT) {
+    dtermda.setZero();
+    dtermdb.setZero();
+  }
   for (int i = 0; i < n; ++i) {
     if (is_even(i)) {
       new (&func) Map<Vector<SCALAR, n>>(B.data());
@@ -133,8 +146,10 @@ inline void computeLatitudeIntegrals(const SCALAR &alpha, const SCALAR &beta,
         fac2 = fac1;
         for (int k2 = 0; k2 < j2 + 1; ++k2) {
           term(i, j) += fac2 * func(k1 + k2);
-          dtermda(i, j) += fac2 * dfuncda(k1 + k2);
-          dtermdb(i, j) += fac2 * dfuncdb(k1 + k2);
+          if (GRADIENT) {
+            dtermda(i, j) += fac2 * dfuncda(k1 + k2);
+            dtermdb(i, j) += fac2 * dfuncdb(k1 + k2);
+          }
           fac2 *= (k2 - j2) / (k2 + 1.0);
         }
         fac1 *= (i2 - k1) / (k1 + 1.0);
@@ -151,8 +166,10 @@ inline void computeLatitudeIntegrals(const SCALAR &alpha, const SCALAR &beta,
       j1 = m1 + l1;
       i1 = l1 - m1;
       q(n1) = term(j1, i1) * inv_two_l1;
-      dqda(n1) = dtermda(j1, i1) * inv_two_l1;
-      dqdb(n1) = dtermdb(j1, i1) * inv_two_l1;
+      if (GRADIENT) {
+        dqda(n1) = dtermda(j1, i1) * inv_two_l1;
+        dqdb(n1) = dtermdb(j1, i1) * inv_two_l1;
+      }
       n2 = 0;
       inv_two_l1l2 = inv_two_l1;
       for (int l2 = 0; l2 < SP__LMAX + 1; ++l2) {
@@ -160,8 +177,10 @@ inline void computeLatitudeIntegrals(const SCALAR &alpha, const SCALAR &beta,
           j2 = m2 + l2;
           i2 = l2 - m2;
           Q(n1, n2) = term(j1 + j2, i1 + i2) * inv_two_l1l2;
-          dQda(n1, n2) = dtermda(j1 + j2, i1 + i2) * inv_two_l1l2;
-          dQdb(n1, n2) = dtermdb(j1 + j2, i1 + i2) * inv_two_l1l2;
+          if (GRADIENT) {
+            dQda(n1, n2) = dtermda(j1 + j2, i1 + i2) * inv_two_l1l2;
+            dQdb(n1, n2) = dtermdb(j1 + j2, i1 + i2) * inv_two_l1l2;
+          }
           n2 += 1;
         }
         inv_two_l1l2 *= 0.5;
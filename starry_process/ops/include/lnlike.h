@@ -0,0 +1,90 @@
+/**
+ * \file lnlike.h
+ * \brief Gaussian log likelihoods with structured covariance matrices.
+ *
+ */
+
+#ifndef _SP_LNLIKE_H_
+#define _SP_LNLIKE_H_
+
+#include "utils.h"
+
+namespace sp {
+namespace lnlike {
+
+using namespace utils;
+
+/**
+ * Compute the log likelihood of the residuals `r` under a Gaussian with
+ * covariance
+ *
+ *     C = diag(d) + W . B . W^T,
+ *
+ * where `W` is `(K, J)` and `B` is a symmetric `(J, J)` matrix (that need
+ * not be positive definite), as well as its gradient with respect to all
+ * inputs. Linear systems are solved with the Woodbury identity and the
+ * log determinant is computed with the matrix determinant lemma, at a cost
+ * of `O(K J^2 + J^3)`.
+ *
+ */
+template <typename Scalar>
+inline Scalar computeLowRankLogLike(
+    const RowMatrix<Scalar, Dynamic, Dynamic> &W,
+    const RowMatrix<Scalar, Dynamic, Dynamic> &B,
+    const Vector<Scalar, Dynamic> &r, const Vector<Scalar, Dynamic> &d,
+    RowMatrix<Scalar, Dynamic, Dynamic> &bW,
+    RowMatrix<Scalar, Dynamic, Dynamic> &bB, Vector<Scalar, Dynamic> &br,
+    Vector<Scalar, Dynamic> &bd) {
+
+  int K = W.rows();
+  int J = W.cols();
+
+  // The Woodbury matrix `Z = I + B . W^T . N^-1 . W`
+  Vector<Scalar, Dynamic> Ninv = d.cwiseInverse();
+  RowMatrix<Scalar, Dynamic, Dynamic> WN = Ninv.asDiagonal() * W;
+  RowMatrix<Scalar, Dynamic, Dynamic> G0 = W.transpose() * WN;
+  RowMatrix<Scalar, Dynamic, Dynamic> Z =
+      RowMatrix<Scalar, Dynamic, Dynamic>::Identity(J, J) + B * G0;
+  Eigen::PartialPivLU<RowMatrix<Scalar, Dynamic, Dynamic>> LU(Z);
+
+  // Log determinant; if `det(Z) < 0`, the matrix is not positive definite
+  Scalar logdet = d.array().log().sum();
+  RowMatrix<Scalar, Dynamic, Dynamic> LUmat = LU.matrixLU();
+  Scalar sign = LU.permutationP().determinant();
+  for (int j = 0; j < J; ++j) {
+    if (LUmat(j, j) < 0)
+      sign = -sign;
+    logdet += log(abs(LUmat(j, j)));
+  }
+  if (sign < 0)
+    logdet = NAN;
+
+  // alpha = C^-1 . r
+  Vector<Scalar, Dynamic> a0 = WN.transpose() * r;
+  Vector<Scalar, Dynamic> x = LU.solve(B * a0);
+  Vector<Scalar, Dynamic> alpha = Ninv.cwiseProduct(r) - WN * x;
+
+  // The log likelihood
+  Scalar lnlike =
+      -0.5 * r.dot(alpha) - 0.5 * logdet - 0.5 * K * log(2 * M_PI);
+
+  // Gradient. Note that C^-1 . W = N^-1 . W . Z^-1
+  // and W^T . C^-1 . W = W^T . N^-1 . W . Z^-1
+  RowMatrix<Scalar, Dynamic, Dynamic> ZInv =
+      LU.solve(RowMatrix<Scalar, Dynamic, Dynamic>::Identity(J, J));
+  RowMatrix<Scalar, Dynamic, Dynamic> CInvW = WN * ZInv;
+  Vector<Scalar, Dynamic> a = W.transpose() * alpha;
+  bB = 0.5 * (a * a.transpose() - G0 * ZInv);
+  bW = (alpha * a.transpose() - CInvW) * B;
+  br = -alpha;
+  RowMatrix<Scalar, Dynamic, Dynamic> ZInvB = ZInv * B;
+  bd = 0.5 * (alpha.cwiseProduct(alpha) - Ninv +
+              (WN * ZInvB).cwiseProduct(WN).rowwise().sum());
+
+  return lnlike;
+}
+
+} // namespace lnlike
+} // namespace sp
+
+#endif
@@ -167,9 +167,11 @@ inline double psi(const double &x_) {
 } // namespace digamma
 
 /**
- * The Gauss hypergeometric function 2F1 and its `b` and `c` derivs.
+ * The Gauss hypergeometric function 2F1 and its `b` and `c` derivs. If
+ * `GRADIENT` is false, the derivatives are set to zero and the series is
+ * only summed until the value converges.
 */
-template <typename T>
+template <bool GRADIENT = true, typename T>
 inline T hyp2f1(const T &a_, const T &b_, const T &c_, const T &z, T &dfdb,
                 T &dfdc) {
 
@@ -181,12 +183,17 @@ inline T hyp2f1(const T &a_, const T &b_, const T &c_, const T &z, T &dfdb,
   T dtermdc = -term / c;
   T value = 1.0 + term;
   T fac1, fac2, fac3;
-  dfdb = dtermdb;
-  dfdc = dtermdc;
+  if (GRADIENT) {
+    dfdb = dtermdb;
+    dfdc = dtermdc;
+  } else {
+    dfdb = 0.0;
+    dfdc = 0.0;
+  }
   int n = 1;
   while (((abs(term / value) > SP_2F1_MAXTOL) ||
-          (abs(dtermdb / dfdb) > SP_2F1_MAXDTOL) ||
-          (abs(dtermdc / dfdc) > SP_2F1_MAXDTOL)) &&
+          (GRADIENT && (abs(dtermdb / dfdb) > SP_2F1_MAXDTOL)) ||
+          (GRADIENT && (abs(dtermdc / dfdc) > SP_2F1_MAXDTOL))) &&
          (n < SP_2F1_MAXITER)) {
     a += 1;
     b += 1;
@@ -194,15 +201,19 @@ inline T hyp2f1(const T &a_, const T &b_, const T &c_, const T &z, T &dfdb,
     n += 1;
     fac1 = a * z / c / n;
     fac2 = fac1 * b;
-    fac3 = -fac2 / c;
-    dtermdb *= fac2;
-    dtermdb += fac1 * term;
-    dtermdc *= fac2;
-    dtermdc += fac3 * term;
+    if (GRADIENT) {
+      fac3 = -fac2 / c;
+      dtermdb *= fac2;
+      dtermdb += fac1 * term;
+      dtermdc *= fac2;
+      dtermdc += fac3 * term;
+    }
     term *= fac2;
     value += term;
-    dfdb += dtermdb;
-    dfdc += dtermdc;
+    if (GRADIENT) {
+      dfdb += dtermdb;
+      dfdc += dtermdc;
+    }
   }
   if (n == SP_2F1_MAXITER) {
     std::stringstream args, msg;
@@ -210,7 +221,7 @@ inline T hyp2f1(const T &a_, const T &b_, const T &c_, const T &z, T &dfdb,
          << "b_ = " << b_ << ", "
          << "c_ = " << c_ << ", "
          << "z = " << z;
-    if (abs(term / value) > SP_2F1_MINTOL) {
+    if (!GRADIENT || (abs(term / value) > SP_2F1_MINTOL)) {
       msg << "Series for 2F1 did not converge "
           << "(value = " << std::setprecision(9) << value
           << ", frac. error = " << abs(term / value) << ").";
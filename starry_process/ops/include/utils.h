@@ -6,6 +6,7 @@
 #ifndef _SP_UTILS_H_
 #define _SP_UTILS_H_
 
+#include "constants.h"
 #include <Eigen/Core>
 #include <Eigen/Dense>
 #include <Eigen/SparseCore>
@@ -17,6 +18,9 @@
 #include <math.h>
 #include <stdlib.h>
 #include <vector>
+#ifdef _OPENMP
+#include <omp.h>
+#endif
 
 namespace sp {
 namespace utils {
@@ -37,6 +41,15 @@ using ColMatrix = Eigen::Matrix<Scalar, M, N, Eigen::ColMajor>;
 template <typename Scalar, int N> using Vector = Eigen::Matrix<Scalar, N, 1>;
 template <typename Scalar, int N> using RowVector = Eigen::Matrix<Scalar, 1, N>;
 
+//! Number of threads used by the parallel loops (see `SP_NUM_THREADS`)
+inline int num_threads() {
+#ifdef _OPENMP
+  return (SP_NUM_THREADS > 0) ? SP_NUM_THREADS : omp_get_max_threads();
+#else
+  return 1;
+#endif
+}
+
 //! Check if a number is even (or doubly, triply, quadruply... even)
 inline bool is_even(int n, int ntimes = 1) {
   for (int i = 0; i < ntimes; i++) {
@@ -30,10 +30,19 @@ Number of terms in the Wigner rotation matrix of degree `l`.
 constexpr int nwigl(const int l) { return (2 * l + 1) * (2 * l + 1); }
 
 /**
-Compute the Wigner d matrices.
+Number of terms in the Wigner basis tensors up to and including degree `l`.
 
 */
-template <class Scalar, class T2, class T1, class T>
+constexpr int nwig3(const int l) {
+  return ((l + 1) * (l + 1) * (2 * (l + 1) * (l + 1) - 1));
+}
+
+/**
+Compute the Wigner d matrices. If `GRADIENT` is false, the derivatives
+`Dlp` are not computed.
+
+*/
+template <bool GRADIENT, class Scalar, class T2, class T1, class T>
 inline void dlmn(int l, const Scalar &c2, const Scalar &s2, const T2 &Dlm2,
                  const T2 &Dlm2p, const T1 &Dlm1, const T1 &Dlm1p, T &Dl,
                  T &Dlp) {
@@ -55,19 +64,23 @@ inline void dlmn(int l, const Scalar &c2, const Scalar &s2, const T2 &Dlm2,
   // First row by recurrence (Eq. 19 and 20 in Alvarez Collado et al.)
   Dl(2 * l, 2 * l) =
       0.5 * Dlm1(isup + l - 1, isup + l - 1) * (Scalar(1.0) + c2);
-  Dlp(2 * l, 2 * l) =
-      0.5 * (Dlm1p(isup + l - 1, isup + l - 1) * (Scalar(1.0) + c2) -
-             Dlm1(isup + l - 1, isup + l - 1) * s2);
   Dl(2 * l, 0) = 0.5 * Dlm1(isup + l - 1, -isup + l - 1) * (Scalar(1.0) - c2);
-  Dlp(2 * l, 0) =
-      0.5 * (Dlm1p(isup + l - 1, -isup + l - 1) * (Scalar(1.0) - c2) +
-             Dlm1(isup + l - 1, -isup + l - 1) * s2);
   for (m = isup; m > iinf - 1; --m) {
     Dl(2 * l, m + l) =
         -tgbet2 * sqrt(Scalar(l + m + 1) / (l - m)) * Dl(2 * l, m + 1 + l);
-    Dlp(2 * l, m + l) = -sqrt(Scalar(l + m + 1) / (l - m)) *
-                        (Dl(2 * l, m + 1 + l) / (Scalar(1.0) + c2) +
-                         tgbet2 * Dlp(2 * l, m + 1 + l));
+  }
+  if (GRADIENT) {
+    Dlp(2 * l, 2 * l) =
+        0.5 * (Dlm1p(isup + l - 1, isup + l - 1) * (Scalar(1.0) + c2) -
+               Dlm1(isup + l - 1, isup + l - 1) * s2);
+    Dlp(2 * l, 0) =
+        0.5 * (Dlm1p(isup + l - 1, -isup + l - 1) * (Scalar(1.0) - c2) +
+               Dlm1(isup + l - 1, -isup + l - 1) * s2);
+    for (m = isup; m > iinf - 1; --m) {
+      Dlp(2 * l, m + l) = -sqrt(Scalar(l + m + 1) / (l - m)) *
+                          (Dl(2 * l, m + 1 + l) / (Scalar(1.0) + c2) +
+                           tgbet2 * Dlp(2 * l, m + 1 + l));
+    }
   }
 
   // The rows of the upper quarter triangle of the D[l;m',m) matrix
@@ -90,16 +103,20 @@ inline void dlmn(int l, const Scalar &c2, const Scalar &s2, const T2 &Dlm2,
       auz = Scalar(1.0) / sqrt(Scalar(lauz * lbuz));
       fact = aux * auz;
       term = tal1 * (cosaux - Scalar(am * amp)) * Dlm1(mp + l - 1, m + l - 1);
-      termp =
-          tal1 * (-s2 * al * al1 * Dlm1(mp + l - 1, m + l - 1) +
-                  (cosaux - Scalar(am * amp)) * Dlm1p(mp + l - 1, m + l - 1));
       if ((lbuz != 1) && (lbux != 1)) {
         cuz = sqrt(Scalar((lauz - 1) * (lbuz - 1)));
         term = term - Dlm2(mp + l - 2, m + l - 2) * cux * cuz;
-        termp = termp - Dlm2p(mp + l - 2, m + l - 2) * cux * cuz;
       }
       Dl(mp + l, m + l) = fact * term;
-      Dlp(mp + l, m + l) = fact * termp;
+      if (GRADIENT) {
+        termp =
+            tal1 * (-s2 * al * al1 * Dlm1(mp + l - 1, m + l - 1) +
+                    (cosaux - Scalar(am * amp)) * Dlm1p(mp + l - 1, m + l - 1));
+        if ((lbuz != 1) && (lbux != 1)) {
+          termp = termp - Dlm2p(mp + l - 2, m + l - 2) * cux * cuz;
+        }
+        Dlp(mp + l, m + l) = fact * termp;
+      }
     }
     ++iinf;
     --isup;
@@ -117,7 +134,8 @@ inline void dlmn(int l, const Scalar &c2, const Scalar &s2, const T2 &Dlm2,
   for (m = l; m > 0; --m) {
     for (mp = iinf; mp < isup + 1; ++mp) {
       Dl(mp + l, m + l) = sign * Dl(m + l, mp + l);
-      Dlp(mp + l, m + l) = sign * Dlp(m + l, mp + l);
+      if (GRADIENT)
+        Dlp(mp + l, m + l) = sign * Dlp(m + l, mp + l);
       sign *= -1;
     }
     ++iinf;
@@ -131,7 +149,8 @@ inline void dlmn(int l, const Scalar &c2, const Scalar &s2, const T2 &Dlm2,
     sign = -1;
     for (mp = isup; mp > iinf - 1; --mp) {
       Dl(mp + l, m + l) = sign * Dl(-mp + l, -m + l);
-      Dlp(mp + l, m + l) = sign * Dlp(-mp + l, -m + l);
+      if (GRADIENT)
+        Dlp(mp + l, m + l) = sign * Dlp(-mp + l, -m + l);
       sign *= -1;
     }
     ++isup;
@@ -139,15 +158,19 @@ inline void dlmn(int l, const Scalar &c2, const Scalar &s2, const T2 &Dlm2,
 }
 
 /**
-Compute the Wigner D matrices.
+Compute the real Wigner rotation matrices `R` and their derivatives `Rp`
+with respect to `theta` for a rotation with Euler angles `alpha`, `theta`
+and `gamma`, given `c1 = cos(alpha)`, `s1 = sin(alpha)`, `c3 = cos(gamma)`
+and `s3 = sin(gamma)`. If `GRADIENT` is false, only `R` is computed.
 
 */
-template <class Scalar, class T>
-inline void rotar(const Scalar &theta, T &R, T &Rp) {
+template <bool GRADIENT = true, class Scalar, class T>
+inline void rotar(const Scalar &theta, const Scalar &c1, const Scalar &s1,
+                  const Scalar &c3, const Scalar &s3, T &R, T &Rp) {
   // Temporaries
   Scalar root_two = sqrt(Scalar(2.0));
   Scalar d1, d2, d1p, d2p;
-  int aux, cosag, sinag, cosmal, sinmal, cosmga, sinmga, cosagm, sinagm;
+  Scalar aux, cosag, sinag, cosmal, sinmal, cosmga, sinmga, cosagm, sinagm;
   int sign;
 
   Scalar c2 = cos(theta);
@@ -161,47 +184,55 @@ inline void rotar(const Scalar &theta, T &R, T &Rp) {
 
   // Compute the initial complex matrices D[0], D[1]
   D(0) = 1.0;
-  Dp(0) = 0.0;
   D(9) = 0.5 * (Scalar(1.0) + c2);
-  Dp(9) = 0.5 * c2p;
   D(8) = -s2 / root_two;
-  Dp(8) = -s2p / root_two;
   D(7) = 0.5 * (Scalar(1.0) - c2);
-  Dp(7) = -0.5 * c2p;
   D(6) = -D(8);
-  Dp(6) = -Dp(8);
   D(5) = D(9) - D(7);
-  Dp(5) = Dp(9) - Dp(7);
   D(4) = D(8);
-  Dp(4) = Dp(8);
   D(3) = D(7);
-  Dp(3) = Dp(7);
   D(2) = D(6);
-  Dp(2) = Dp(6);
   D(1) = D(9);
-  Dp(1) = Dp(9);
+  if (GRADIENT) {
+    Dp(0) = 0.0;
+    Dp(9) = 0.5 * c2p;
+    Dp(8) = -s2p / root_two;
+    Dp(7) = -0.5 * c2p;
+    Dp(6) = -Dp(8);
+    Dp(5) = Dp(9) - Dp(7);
+    Dp(4) = Dp(8);
+    Dp(3) = Dp(7);
+    Dp(2) = Dp(6);
+    Dp(1) = Dp(9);
+  }
 
   // Compute the initial real matrices R[0], R[1]
+  Scalar cosag1 = c1 * c3 - s1 * s3;
+  Scalar cosamg1 = c1 * c3 + s1 * s3;
+  Scalar sinag1 = s1 * c3 + c1 * s3;
+  Scalar sinamg1 = s1 * c3 - c1 * s3;
   R(0) = 1.0;
-  Rp(0) = 0.0;
-  R(1) = D(9) - D(7);
-  Rp(1) = Dp(9) - Dp(7);
-  R(2) = -root_two * D(6);
-  Rp(2) = -root_two * Dp(6);
-  R(3) = 0;
-  Rp(3) = 0;
-  R(4) = -root_two * D(8);
-  Rp(4) = -root_two * Dp(8);
+  R(1) = D(9) * cosag1 + D(7) * cosamg1;
+  R(2) = root_two * D(6) * s1;
+  R(3) = D(9) * sinag1 - D(7) * sinamg1;
+  R(4) = -root_two * D(8) * s3;
   R(5) = D(5);
-  Rp(5) = Dp(5);
-  R(6) = 0;
-  Rp(6) = 0;
-  R(7) = 0;
-  Rp(7) = 0;
-  R(8) = 0;
-  Rp(8) = 0;
-  R(9) = D(9) + D(7);
-  Rp(9) = Dp(9) + Dp(7);
+  R(6) = root_two * D(8) * c3;
+  R(7) = -D(9) * sinag1 - D(7) * sinamg1;
+  R(8) = root_two * D(6) * c1;
+  R(9) = D(9) * cosag1 - D(7) * cosamg1;
+  if (GRADIENT) {
+    Rp(0) = 0.0;
+    Rp(1) = Dp(9) * cosag1 + Dp(7) * cosamg1;
+    Rp(2) = root_two * Dp(6) * s1;
+    Rp(3) = Dp(9) * sinag1 - Dp(7) * sinamg1;
+    Rp(4) = -root_two * Dp(8) * s3;
+    Rp(5) = Dp(5);
+    Rp(6) = root_two * Dp(8) * c3;
+    Rp(7) = -Dp(9) * sinag1 - Dp(7) * sinamg1;
+    Rp(8) = root_two * Dp(6) * c1;
+    Rp(9) = Dp(9) * cosag1 - Dp(7) * cosamg1;
+  }
 
   // The remaining matrices are calculated using
   // symmetry and and recurrence relations
@@ -220,7 +251,7 @@ inline void rotar(const Scalar &theta, T &R, T &Rp) {
         D.segment(nwig(l - 1), nwigl(l)).data());
     Map<RowMatrix<Scalar, 2 * l + 1, 2 * l + 1>> Dlp(
         Dp.segment(nwig(l - 1), nwigl(l)).data());
-    dlmn(l, c2, s2, Dlm2, Dlm2p, Dlm1, Dlm1p, Dl, Dlp);
+    dlmn<GRADIENT>(l, c2, s2, Dlm2, Dlm2p, Dlm1, Dlm1p, Dl, Dlp);
 
     // Compute the real rotation matrix R[l] from the complex one D[l]
     Map<RowMatrix<Scalar, 2 * l + 1, 2 * l + 1>> Rl(
@@ -228,45 +259,50 @@ inline void rotar(const Scalar &theta, T &R, T &Rp) {
     Map<RowMatrix<Scalar, 2 * l + 1, 2 * l + 1>> Rlp(
         Rp.segment(nwig(l - 1), nwigl(l)).data());
     Rl(0 + l, 0 + l) = Dl(0 + l, 0 + l);
-    Rlp(0 + l, 0 + l) = Dlp(0 + l, 0 + l);
-    cosmal = 0;
-    sinmal = -1;
+    if (GRADIENT)
+      Rlp(0 + l, 0 + l) = Dlp(0 + l, 0 + l);
+    cosmal = c1;
+    sinmal = s1;
     sign = -1;
     for (int mp = 1; mp < l + 1; ++mp) {
-      cosmga = 0;
-      sinmga = 1;
+      cosmga = c3;
+      sinmga = s3;
       Rl(mp + l, 0 + l) = root_two * Dl(0 + l, mp + l) * cosmal;
-      Rlp(mp + l, 0 + l) = root_two * Dlp(0 + l, mp + l) * cosmal;
       Rl(-mp + l, 0 + l) = root_two * Dl(0 + l, mp + l) * sinmal;
-      Rlp(-mp + l, 0 + l) = root_two * Dlp(0 + l, mp + l) * sinmal;
+      if (GRADIENT) {
+        Rlp(mp + l, 0 + l) = root_two * Dlp(0 + l, mp + l) * cosmal;
+        Rlp(-mp + l, 0 + l) = root_two * Dlp(0 + l, mp + l) * sinmal;
+      }
       for (int m = 1; m < l + 1; ++m) {
         d1 = Dl(-mp + l, -m + l);
-        d1p = Dlp(-mp + l, -m + l);
         d2 = sign * Dl(mp + l, -m + l);
-        d2p = sign * Dlp(mp + l, -m + l);
         cosag = cosmal * cosmga - sinmal * sinmga;
         cosagm = cosmal * cosmga + sinmal * sinmga;
         sinag = sinmal * cosmga + cosmal * sinmga;
         sinagm = sinmal * cosmga - cosmal * sinmga;
         Rl(l, m + l) = root_two * Dl(m + l, 0 + l) * cosmga;
-        Rlp(l, m + l) = root_two * Dlp(m + l, 0 + l) * cosmga;
         Rl(l, -m + l) = -root_two * Dl(m + l, 0 + l) * sinmga;
-        Rlp(l, -m + l) = -root_two * Dlp(m + l, 0 + l) * sinmga;
         Rl(mp + l, m + l) = d1 * cosag + d2 * cosagm;
-        Rlp(mp + l, m + l) = d1p * cosag + d2p * cosagm;
         Rl(mp + l, -m + l) = -d1 * sinag + d2 * sinagm;
-        Rlp(mp + l, -m + l) = -d1p * sinag + d2p * sinagm;
         Rl(-mp + l, m + l) = d1 * sinag + d2 * sinagm;
-        Rlp(-mp + l, m + l) = d1p * sinag + d2p * sinagm;
         Rl(-mp + l, -m + l) = d1 * cosag - d2 * cosagm;
-        Rlp(-mp + l, -m + l) = d1p * cosag - d2p * cosagm;
-        aux = -sinmga;
-        sinmga = cosmga;
+        if (GRADIENT) {
+          d1p = Dlp(-mp + l, -m + l);
+          d2p = sign * Dlp(mp + l, -m + l);
+          Rlp(l, m + l) = root_two * Dlp(m + l, 0 + l) * cosmga;
+          Rlp(l, -m + l) = -root_two * Dlp(m + l, 0 + l) * sinmga;
+          Rlp(mp + l, m + l) = d1p * cosag + d2p * cosagm;
+          Rlp(mp + l, -m + l) = -d1p * sinag + d2p * sinagm;
+          Rlp(-mp + l, m + l) = d1p * sinag + d2p * sinagm;
+          Rlp(-mp + l, -m + l) = d1p * cosag - d2p * cosagm;
+        }
+        aux = cosmga * c3 - sinmga * s3;
+        sinmga = sinmga * c3 + cosmga * s3;
         cosmga = aux;
       }
       sign *= -1;
-      aux = sinmal;
-      sinmal = -cosmal;
+      aux = cosmal * c1 - sinmal * s1;
+      sinmal = sinmal * c1 + cosmal * s1;
       cosmal = aux;
     }
 
@@ -275,65 +311,214 @@ inline void rotar(const Scalar &theta, T &R, T &Rp) {
   return;
 }
 
+/**
+Compute the Wigner D matrices for a rotation about the `x` axis.
+
+*/
+template <bool GRADIENT = true, class Scalar, class T>
+inline void rotar(const Scalar &theta, T &R, T &Rp) {
+  rotar<GRADIENT>(theta, Scalar(0.0), Scalar(-1.0), Scalar(0.0), Scalar(1.0),
+                  R, Rp);
+}
+
+/**
+ * Compute the Wigner rotation matrices and their derivatives for each of
+ * the `K` angles `theta`. The `k`-th row of the (row-major) `K x NWIG`
+ * outputs `R` and `dRdtheta` contains the matrices for all degrees,
+ * flattened one after the other. Angles are processed in parallel. If
+ * `GRADIENT` is false, `dRdtheta` is not computed.
+*/
+template <bool GRADIENT, typename SCALAR>
+inline void computeR(const SCALAR *theta, const npy_intp &K,
+                     const SCALAR &alpha, const SCALAR &gamma, SCALAR *R,
+                     SCALAR *dRdtheta) {
+  SCALAR c1 = cos(alpha), s1 = sin(alpha);
+  SCALAR c3 = cos(gamma), s3 = sin(gamma);
+#pragma omp parallel for num_threads(num_threads())
+  for (npy_intp k = 0; k < K; ++k) {
+    Map<Vector<SCALAR, SP__NWIG>> Rk(R + k * SP__NWIG);
+    Map<Vector<SCALAR, SP__NWIG>> dRk(dRdtheta + k * SP__NWIG);
+    rotar<GRADIENT>(theta[k], c1, s1, c3, s3, Rk, dRk);
+  }
+}
+
 /**
  * Compute the Wigner rotation matrix Rx(theta).
 */
-template <typename SCALAR, typename VECTOR>
+template <bool GRADIENT, typename SCALAR, typename VECTOR>
 inline void computeRx(const SCALAR &theta, VECTOR &Rx, VECTOR &dRxdtheta) {
-  rotar(theta, Rx, dRxdtheta);
+  rotar<GRADIENT>(theta, Rx, dRxdtheta);
 }
 
 /**
- * Compute the tensor dot product M . Rz(theta)
+ * Compute the Wigner rotation matrix Ry(theta).
 */
-template <typename VECTOR, typename MATRIX>
-inline void computeTensordotRz(const MATRIX &M, const VECTOR &theta,
-                               MATRIX &f) {
+template <bool GRADIENT, typename SCALAR, typename VECTOR>
+inline void computeRy(const SCALAR &theta, VECTOR &Ry, VECTOR &dRydtheta) {
+  rotar<GRADIENT>(theta, SCALAR(1.0), SCALAR(0.0), SCALAR(1.0), SCALAR(0.0),
+                  Ry, dRydtheta);
+}
 
-  using Scalar = typename VECTOR::Scalar;
-  int K = theta.size();
-
-  // Compute sin & cos
-  auto costheta = theta.array().cos();
-  auto sintheta = theta.array().sin();
-
-  // Initialize our z rotation vectors
-  RowMatrix<Scalar, Dynamic, SP__LMAX + 1> cosnt(K, SP__LMAX + 1);
-  RowMatrix<Scalar, Dynamic, SP__LMAX + 1> sinnt(K, SP__LMAX + 1);
-  RowMatrix<Scalar, Dynamic, SP__N> cosmt(K, SP__N);
-  RowMatrix<Scalar, Dynamic, SP__N> sinmt(K, SP__N);
-  cosnt.col(0).setOnes();
-  sinnt.col(0).setZero();
-
-  // Compute the cos and sin vectors for the zhat rotation
-  cosnt.col(1) = costheta;
-  sinnt.col(1) = sintheta;
-  for (int n = 2; n < SP__LMAX + 1; ++n) {
-    cosnt.col(n) =
-        2.0 * cosnt.col(n - 1).cwiseProduct(cosnt.col(1)) - cosnt.col(n - 2);
-    sinnt.col(n) =
-        2.0 * sinnt.col(n - 1).cwiseProduct(cosnt.col(1)) - sinnt.col(n - 2);
+/**
+ * Compute the dot product M . Rx(theta), where Rx is the block-diagonal
+ * Wigner rotation matrix for a rotation about the `x` axis.
+*/
+template <typename SCALAR, typename MATRIX>
+inline void computeDotRx(const MATRIX &M, const SCALAR &theta, MATRIX &f) {
+
+  using Scalar = typename MATRIX::Scalar;
+  int K = M.rows();
+
+  // Compute the rotation matrices
+  Vector<Scalar, SP__NWIG> Rx, dRxdtheta;
+  rotar<false>(Scalar(theta), Rx, dRxdtheta);
+
+  // Dot them in, one degree at a time
+  for (int l = 0; l < SP__LMAX + 1; ++l) {
+    int n = 2 * l + 1;
+    Map<RowMatrix<Scalar, Dynamic, Dynamic>> Rxl(
+        Rx.data() + nwig(l - 1), n, n);
+    f.block(0, l * l, K, n).noalias() = M.block(0, l * l, K, n) * Rxl;
   }
-  int n = 0;
+}
+
+/**
+ * Compute the gradient of the dot product M . Rx(theta).
+*/
+template <typename SCALAR, typename MATRIX>
+inline void computeDotRxGradient(const MATRIX &M, const SCALAR &theta,
+                                 const MATRIX &bf, MATRIX &bM,
+                                 SCALAR &btheta) {
+
+  using Scalar = typename MATRIX::Scalar;
+  int K = M.rows();
+
+  // Compute the rotation matrices
+  Vector<Scalar, SP__NWIG> Rx, dRxdtheta;
+  rotar(Scalar(theta), Rx, dRxdtheta);
+
+  // Chain rule, one degree at a time
+  btheta = 0.0;
   for (int l = 0; l < SP__LMAX + 1; ++l) {
-    for (int m = -l; m < 0; ++m) {
-      cosmt.col(n) = cosnt.col(-m);
-      sinmt.col(n) = -sinnt.col(-m);
-      ++n;
+    int n = 2 * l + 1;
+    Map<RowMatrix<Scalar, Dynamic, Dynamic>> Rxl(
+        Rx.data() + nwig(l - 1), n, n);
+    Map<RowMatrix<Scalar, Dynamic, Dynamic>> dRxl(
+        dRxdtheta.data() + nwig(l - 1), n, n);
+    bM.block(0, l * l, K, n).noalias() =
+        bf.block(0, l * l, K, n) * Rxl.transpose();
+    RowMatrix<Scalar, Dynamic, Dynamic> MTbf =
+        M.block(0, l * l, K, n).transpose() * bf.block(0, l * l, K, n);
+    btheta += MTbf.cwiseProduct(dRxl).sum();
+  }
+}
+
+/**
+ * Compute the block-diagonal contraction
+ *
+ *     Y[l^2 + a, k, j] = sum_bc R[l][a, b, c] X[l^2 + c, k] Z[l^2 + b, j]
+ *
+ * for all degrees `l` at once, where `R` holds the flattened (row-major)
+ * `(2l + 1, 2l + 1, 2l + 1)` tensors of each degree one after the other,
+ * `X` is `N x K`, `Z` is `N x J` and `Y` is `N x K x J` (all row-major).
+ * Degrees are processed in parallel.
+*/
+template <typename Scalar>
+inline void computeTensordotR(const Scalar *R, const Scalar *X,
+                              const npy_intp &K, const Scalar *Z,
+                              const npy_intp &J, Scalar *Y) {
+#pragma omp parallel for schedule(dynamic) num_threads(num_threads())
+  for (int l = SP__LMAX; l >= 0; --l) {
+    int n = 2 * l + 1;
+    Map<const RowMatrix<Scalar, Dynamic, Dynamic>> Rl(R + nwig3(l - 1),
+                                                       n * n, n);
+    Map<const RowMatrix<Scalar, Dynamic, Dynamic>> Xl(X + l * l * K, n, K);
+    Map<const RowMatrix<Scalar, Dynamic, Dynamic>> Zl(Z + l * l * J, n, J);
+    RowMatrix<Scalar, Dynamic, Dynamic> P = Rl * Xl;
+    for (int a = 0; a < n; ++a) {
+      Map<RowMatrix<Scalar, Dynamic, Dynamic>> Ya(Y + (l * l + a) * K * J, K,
+                                                  J);
+      Ya.noalias() = P.block(a * n, 0, n, K).transpose() * Zl;
     }
-    for (int m = 0; m < l + 1; ++m) {
-      cosmt.col(n) = cosnt.col(m);
-      sinmt.col(n) = sinnt.col(m);
-      ++n;
+  }
+}
+
+/**
+ * Compute the gradient of `computeTensordotR` with respect to `X` and `Z`
+ * given the gradient `bY` with respect to the output.
+*/
+template <typename Scalar>
+inline void computeTensordotRGradient(const Scalar *R, const Scalar *X,
+                                      const npy_intp &K, const Scalar *Z,
+                                      const npy_intp &J, const Scalar *bY,
+                                      Scalar *bX, Scalar *bZ) {
+#pragma omp parallel for schedule(dynamic) num_threads(num_threads())
+  for (int l = SP__LMAX; l >= 0; --l) {
+    int n = 2 * l + 1;
+    Map<const RowMatrix<Scalar, Dynamic, Dynamic>> Rl(R + nwig3(l - 1),
+                                                       n * n, n);
+    Map<const RowMatrix<Scalar, Dynamic, Dynamic>> Xl(X + l * l * K, n, K);
+    Map<const RowMatrix<Scalar, Dynamic, Dynamic>> Zl(Z + l * l * J, n, J);
+    Map<RowMatrix<Scalar, Dynamic, Dynamic>> bXl(bX + l * l * K, n, K);
+    Map<RowMatrix<Scalar, Dynamic, Dynamic>> bZl(bZ + l * l * J, n, J);
+    RowMatrix<Scalar, Dynamic, Dynamic> P = Rl * Xl;
+    RowMatrix<Scalar, Dynamic, Dynamic> Q(n * n, K);
+    bZl.setZero();
+    for (int a = 0; a < n; ++a) {
+      Map<const RowMatrix<Scalar, Dynamic, Dynamic>> bYa(
+          bY + (l * l + a) * K * J, K, J);
+      Q.block(a * n, 0, n, K).noalias() = Zl * bYa.transpose();
+      bZl.noalias() += P.block(a * n, 0, n, K) * bYa;
     }
+    bXl.noalias() = Rl.transpose() * Q;
   }
+}
 
-  // Dot them in
-  for (int l = 0; l < SP__LMAX + 1; ++l) {
-    for (int j = 0; j < 2 * l + 1; ++j) {
-      f.col(l * l + j) =
-          M.col(l * l + j).cwiseProduct(cosmt.col(l * l + j)) +
-          M.col(l * l + 2 * l - j).cwiseProduct(sinmt.col(l * l + j));
+/**
+ * Compute `c[m] = cos(m theta)` and `s[m] = sin(m theta)` for
+ * `m = 0 ... LMAX` using the Chebyshev recurrence.
+*/
+template <typename Scalar>
+inline void zrot(const Scalar &theta, Scalar *c, Scalar *s) {
+  c[0] = 1.0;
+  s[0] = 0.0;
+  if (SP__LMAX > 0) {
+    c[1] = cos(theta);
+    s[1] = sin(theta);
+  }
+  for (int n = 2; n < SP__LMAX + 1; ++n) {
+    c[n] = 2.0 * c[n - 1] * c[1] - c[n - 2];
+    s[n] = 2.0 * s[n - 1] * c[1] - s[n - 2];
+  }
+}
+
+/**
+ * Compute the tensor dot product M . Rz(theta)
+ *
+ * Each row of the output only depends on the same row of `M` and on the
+ * corresponding angle, so rows are processed in parallel (in tiles of
+ * `SP_TILE_SIZE` rows) and the `cos(m theta)`, `sin(m theta)` terms are
+ * computed on the fly.
+*/
+template <typename VECTOR, typename MATRIX>
+inline void computeTensordotRz(const MATRIX &M, const VECTOR &theta,
+                               MATRIX &f) {
+
+  using Scalar = typename VECTOR::Scalar;
+  npy_intp K = theta.size();
+
+#pragma omp parallel for schedule(static, SP_TILE_SIZE)                        \
+    num_threads(num_threads())
+  for (npy_intp k = 0; k < K; ++k) {
+    Scalar c[SP__LMAX + 1], s[SP__LMAX + 1];
+    zrot(Scalar(theta(k)), c, s);
+    for (int l = 0; l < SP__LMAX + 1; ++l) {
+      int n0 = l * l + l;
+      f(k, n0) = M(k, n0);
+      for (int m = 1; m < l + 1; ++m) {
+        f(k, n0 + m) = M(k, n0 + m) * c[m] + M(k, n0 - m) * s[m];
+        f(k, n0 - m) = M(k, n0 - m) * c[m] - M(k, n0 + m) * s[m];
+      }
     }
   }
 }
@@ -347,115 +532,80 @@ inline void computeTensordotRzGradient(const MATRIX &M, const VECTOR &theta,
                                        VECTOR &btheta) {
 
   using Scalar = typename VECTOR::Scalar;
-  int K = theta.size();
-
-  // Init grads
-  btheta.setZero();
-  bM.setZero();
-
-  // Compute sin & cos
-  auto costheta = theta.array().cos();
-  auto sintheta = theta.array().sin();
-
-  // Initialize our z rotation vectors
-  RowMatrix<Scalar, Dynamic, SP__LMAX + 1> cosnt(K, SP__LMAX + 1);
-  RowMatrix<Scalar, Dynamic, SP__LMAX + 1> sinnt(K, SP__LMAX + 1);
-  RowMatrix<Scalar, Dynamic, SP__N> cosmt(K, SP__N);
-  RowMatrix<Scalar, Dynamic, SP__N> sinmt(K, SP__N);
-  cosnt.col(0).setOnes();
-  sinnt.col(0).setZero();
-
-  // Compute the cos and sin vectors for the zhat rotation
-  cosnt.col(1) = costheta;
-  sinnt.col(1) = sintheta;
-  for (int n = 2; n < SP__LMAX + 1; ++n) {
-    cosnt.col(n) =
-        2.0 * cosnt.col(n - 1).cwiseProduct(cosnt.col(1)) - cosnt.col(n - 2);
-    sinnt.col(n) =
-        2.0 * sinnt.col(n - 1).cwiseProduct(cosnt.col(1)) - sinnt.col(n - 2);
-  }
-  int n = 0;
-  for (int l = 0; l < SP__LMAX + 1; ++l) {
-    for (int m = -l; m < 0; ++m) {
-      cosmt.col(n) = cosnt.col(-m);
-      sinmt.col(n) = -sinnt.col(-m);
-      ++n;
-    }
-    for (int m = 0; m < l + 1; ++m) {
-      cosmt.col(n) = cosnt.col(m);
-      sinmt.col(n) = sinnt.col(m);
-      ++n;
-    }
-  }
-
-  // Dot them in
-  for (int l = 0; l < SP__LMAX + 1; ++l) {
-    for (int j = 0; j < 2 * l + 1; ++j) {
-      Vector<Scalar, Dynamic> tmp_c =
-          bf.col(l * l + j).cwiseProduct(cosmt.col(l * l + j));
-      Vector<Scalar, Dynamic> tmp_s =
-          bf.col(l * l + j).cwiseProduct(sinmt.col(l * l + j));
-      btheta += (j - l) * (M.col(l * l + 2 * l - j).cwiseProduct(tmp_c) -
-                           M.col(l * l + j).cwiseProduct(tmp_s));
-      bM.col(l * l + 2 * l - j) += tmp_s;
-      bM.col(l * l + j) += tmp_c;
+  npy_intp K = theta.size();
+
+#pragma omp parallel for schedule(static, SP_TILE_SIZE)                        \
+    num_threads(num_threads())
+  for (npy_intp k = 0; k < K; ++k) {
+    Scalar c[SP__LMAX + 1], s[SP__LMAX + 1];
+    zrot(Scalar(theta(k)), c, s);
+    Scalar btheta_k = 0.0;
+    for (int l = 0; l < SP__LMAX + 1; ++l) {
+      int n0 = l * l + l;
+      bM(k, n0) = bf(k, n0);
+      for (int m = 1; m < l + 1; ++m) {
+        Scalar bp = bf(k, n0 + m), bm = bf(k, n0 - m);
+        Scalar Mp = M(k, n0 + m), Mm = M(k, n0 - m);
+        bM(k, n0 + m) = bp * c[m] - bm * s[m];
+        bM(k, n0 - m) = bm * c[m] + bp * s[m];
+        btheta_k += m * (bp * (Mm * c[m] - Mp * s[m]) -
+                         bm * (Mp * c[m] + Mm * s[m]));
+      }
     }
+    btheta(k) = btheta_k;
   }
 }
 
 /**
  * Compute the batched tensor dot product T_ij R_ilk M_lj
+ *
+ * Since the sum over `j` doesn't depend on the angle, this is
+ *
+ *     f = sum_n cos(m_n theta) a_n + sin(m_n theta) b_n
+ *
+ * where `a` and `b` are the row sums of the products of `T` with `M` and
+ * with `M` mirrored about `m = 0`. This is linear in the number of angles,
+ * which are processed in parallel.
 */
 template <typename VECTOR, typename MATRIX>
 inline void computeSpecialTensordotRz(const MATRIX &T, const MATRIX &M,
                                       const VECTOR &theta, VECTOR &f) {
 
   using Scalar = typename VECTOR::Scalar;
-  int K = theta.size();
-
-  // Compute sin & cos
-  auto costheta = theta.array().cos();
-  auto sintheta = theta.array().sin();
-
-  // Initialize our z rotation vectors
-  RowMatrix<Scalar, Dynamic, SP__LMAX + 1> cosnt(K, SP__LMAX + 1);
-  RowMatrix<Scalar, Dynamic, SP__LMAX + 1> sinnt(K, SP__LMAX + 1);
-  RowMatrix<Scalar, Dynamic, SP__N> cosmt(K, SP__N);
-  RowMatrix<Scalar, Dynamic, SP__N> sinmt(K, SP__N);
-  cosnt.col(0).setOnes();
-  sinnt.col(0).setZero();
-  RowMatrix<Scalar, Dynamic, Dynamic> TM1 = T.cwiseProduct(M);
-  RowMatrix<Scalar, Dynamic, Dynamic> TM2(SP__N, SP__N);
-
-  // Compute the cos and sin vectors for the zhat rotation
-  cosnt.col(1) = costheta;
-  sinnt.col(1) = sintheta;
-  for (int n = 2; n < SP__LMAX + 1; ++n) {
-    cosnt.col(n) =
-        2.0 * cosnt.col(n - 1).cwiseProduct(cosnt.col(1)) - cosnt.col(n - 2);
-    sinnt.col(n) =
-        2.0 * sinnt.col(n - 1).cwiseProduct(cosnt.col(1)) - sinnt.col(n - 2);
-  }
-  int n = 0;
+  npy_intp K = theta.size();
+
+  // Contract over `j`
+  Vector<Scalar, SP__N> a, b;
   for (int l = 0; l < SP__LMAX + 1; ++l) {
-    for (int m = -l; m < 0; ++m) {
-      cosmt.col(n) = cosnt.col(-m);
-      sinmt.col(n) = -sinnt.col(-m);
-      TM2.col(l * l + l + m) =
-          T.col(l * l + l + m).cwiseProduct(M.col(l * l + l - m));
-      ++n;
-    }
-    for (int m = 0; m < l + 1; ++m) {
-      cosmt.col(n) = cosnt.col(m);
-      sinmt.col(n) = sinnt.col(m);
-      TM2.col(l * l + l + m) =
-          T.col(l * l + l + m).cwiseProduct(M.col(l * l + l - m));
-      ++n;
+    int n0 = l * l + l;
+    for (int m = -l; m < l + 1; ++m) {
+      a(n0 + m) = T.row(n0 + m).dot(M.row(n0 + m));
+      b(n0 + m) = 0.0;
+      for (int lp = 0; lp < SP__LMAX + 1; ++lp) {
+        int j0 = lp * lp + lp;
+        for (int mp = -lp; mp < lp + 1; ++mp)
+          b(n0 + m) += T(n0 + m, j0 + mp) * M(n0 + m, j0 - mp);
+      }
     }
   }
 
   // Apply the rotation
-  f = (cosmt * TM1 + sinmt * TM2).rowwise().sum();
+#pragma omp parallel for schedule(static, SP_TILE_SIZE)                        \
+    num_threads(num_threads())
+  for (npy_intp k = 0; k < K; ++k) {
+    Scalar c[SP__LMAX + 1], s[SP__LMAX + 1];
+    zrot(Scalar(theta(k)), c, s);
+    Scalar f_k = 0.0;
+    for (int l = 0; l < SP__LMAX + 1; ++l) {
+      int n0 = l * l + l;
+      f_k += a(n0);
+      for (int m = 1; m < l + 1; ++m) {
+        f_k += c[m] * (a(n0 + m) + a(n0 - m)) +
+               s[m] * (b(n0 + m) - b(n0 - m));
+      }
+    }
+    f(k) = f_k;
+  }
 }
 
 /**
@@ -468,66 +618,73 @@ inline void computeSpecialTensordotRzGradient(const MATRIX &T, const MATRIX &M,
                                               VECTOR &btheta) {
 
   using Scalar = typename VECTOR::Scalar;
-  int K = theta.size();
-
-  // Compute sin & cos
-  auto costheta = theta.array().cos();
-  auto sintheta = theta.array().sin();
-
-  // Initialize our z rotation vectors
-  RowMatrix<Scalar, Dynamic, SP__LMAX + 1> cosnt(K, SP__LMAX + 1);
-  RowMatrix<Scalar, Dynamic, SP__LMAX + 1> sinnt(K, SP__LMAX + 1);
-  RowMatrix<Scalar, Dynamic, SP__N> cosmt(K, SP__N);
-  RowMatrix<Scalar, Dynamic, SP__N> sinmt(K, SP__N);
-  cosnt.col(0).setOnes();
-  sinnt.col(0).setZero();
-  RowMatrix<Scalar, Dynamic, Dynamic> TM1 = T.cwiseProduct(M);
-  RowMatrix<Scalar, Dynamic, Dynamic> TM2(SP__N, SP__N);
-  RowMatrix<Scalar, Dynamic, Dynamic> T_r(SP__N, SP__N);
-  RowMatrix<Scalar, Dynamic, Dynamic> mmat(SP__N, SP__N);
-
-  // Compute the cos and sin vectors for the zhat rotation
-  cosnt.col(1) = costheta;
-  sinnt.col(1) = sintheta;
-  for (int n = 2; n < SP__LMAX + 1; ++n) {
-    cosnt.col(n) =
-        2.0 * cosnt.col(n - 1).cwiseProduct(cosnt.col(1)) - cosnt.col(n - 2);
-    sinnt.col(n) =
-        2.0 * sinnt.col(n - 1).cwiseProduct(cosnt.col(1)) - sinnt.col(n - 2);
-  }
-  int n = 0;
+  npy_intp K = theta.size();
+
+  // Contract over `j`
+  Vector<Scalar, SP__N> a, b;
   for (int l = 0; l < SP__LMAX + 1; ++l) {
-    for (int m = -l; m < 0; ++m) {
-      cosmt.col(n) = cosnt.col(-m);
-      sinmt.col(n) = -sinnt.col(-m);
-      TM2.col(l * l + l + m) =
-          T.col(l * l + l + m).cwiseProduct(M.col(l * l + l - m));
-      T_r.col(l * l + l + m) = T.col(l * l + l - m);
-      mmat.col(n).setConstant(m);
-      ++n;
+    int n0 = l * l + l;
+    for (int m = -l; m < l + 1; ++m) {
+      a(n0 + m) = T.row(n0 + m).dot(M.row(n0 + m));
+      b(n0 + m) = 0.0;
+      for (int lp = 0; lp < SP__LMAX + 1; ++lp) {
+        int j0 = lp * lp + lp;
+        for (int mp = -lp; mp < lp + 1; ++mp)
+          b(n0 + m) += T(n0 + m, j0 + mp) * M(n0 + m, j0 - mp);
+      }
     }
-    for (int m = 0; m < l + 1; ++m) {
-      cosmt.col(n) = cosnt.col(m);
-      sinmt.col(n) = sinnt.col(m);
-      TM2.col(l * l + l + m) =
-          T.col(l * l + l + m).cwiseProduct(M.col(l * l + l - m));
-      T_r.col(l * l + l + m) = T.col(l * l + l - m);
-      mmat.col(n).setConstant(m);
-      ++n;
+  }
+
+  // Accumulate `sum_k bf_k cos(m theta_k)` and `sum_k bf_k sin(m theta_k)`
+  // and compute the gradient with respect to `theta`
+  Vector<Scalar, SP__LMAX + 1> bc, bs;
+  bc.setZero();
+  bs.setZero();
+#pragma omp parallel num_threads(num_threads())
+  {
+    Vector<Scalar, SP__LMAX + 1> bc_loc, bs_loc;
+    bc_loc.setZero();
+    bs_loc.setZero();
+#pragma omp for schedule(static, SP_TILE_SIZE)
+    for (npy_intp k = 0; k < K; ++k) {
+      Scalar c[SP__LMAX + 1], s[SP__LMAX + 1];
+      zrot(Scalar(theta(k)), c, s);
+      Scalar btheta_k = 0.0;
+      for (int m = 0; m < SP__LMAX + 1; ++m) {
+        bc_loc(m) += bf(k) * c[m];
+        bs_loc(m) += bf(k) * s[m];
+      }
+      for (int l = 0; l < SP__LMAX + 1; ++l) {
+        int n0 = l * l + l;
+        for (int m = 1; m < l + 1; ++m) {
+          btheta_k += m * (-s[m] * (a(n0 + m) + a(n0 - m)) +
+                           c[m] * (b(n0 + m) - b(n0 - m)));
+        }
+      }
+      btheta(k) = bf(k) * btheta_k;
+    }
+#pragma omp critical
+    {
+      bc += bc_loc;
+      bs += bs_loc;
     }
   }
 
   // d/dM
-  for (n = 0; n < SP__N; ++n) {
-    bM.row(n) = bf.cwiseProduct(sinmt.col(n)).sum() * T_r.row(n) +
-                bf.cwiseProduct(cosmt.col(n)).sum() * T.row(n);
+  for (int l = 0; l < SP__LMAX + 1; ++l) {
+    int n0 = l * l + l;
+    for (int m = -l; m < l + 1; ++m) {
+      int ma = (m < 0) ? -m : m;
+      Scalar cn = bc(ma);
+      Scalar sn = (m < 0) ? -bs(ma) : bs(ma);
+      for (int lp = 0; lp < SP__LMAX + 1; ++lp) {
+        int j0 = lp * lp + lp;
+        for (int mp = -lp; mp < lp + 1; ++mp)
+          bM(n0 + m, j0 + mp) =
+              cn * T(n0 + m, j0 + mp) + sn * T(n0 + m, j0 - mp);
+      }
+    }
   }
-
-  // d/dtheta
-  btheta = bf.cwiseProduct(
-      (-mmat.cwiseProduct(sinmt) * TM1 + mmat.cwiseProduct(cosmt) * TM2)
-          .rowwise()
-          .sum());
 }
 
 } // namespace wigner
@@ -74,7 +74,7 @@ int APPLY_SPECIFIC(latitude)(PyArrayObject *input0,   // alpha
   Map<RowMatrix<DO5, SP__N, SP__N>> dQdb(dQdb_out);
 
   // Compute the integrals
-  computeLatitudeIntegrals(alpha, beta, q, dqda, dqdb, Q, dQda, dQdb);
+  computeLatitudeIntegrals<SP__GRADIENT>(alpha, beta, q, dqda, dqdb, Q, dQda, dQdb);
 
   // We're done!
   return 0;
@@ -1,9 +1,54 @@
 # -*- coding: utf-8 -*-
 from ..base_op import IntegralOp
+from ...compat import theano
 
-__all__ = ["LatitudeIntegralOp"]
+__all__ = ["LatitudeIntegralOp", "LatitudeIntegralHessOp"]
 
 
 class LatitudeIntegralOp(IntegralOp):
     func_file = "./latitude.cc"
     func_name = "APPLY_SPECIFIC(latitude)"
+
+    def second_derivatives(self, inputs):
+        hess = self.related_op(LatitudeIntegralHessOp)(*inputs)
+        d2qdaa, d2qdab, d2qdbb, d2Qdaa, d2Qdab, d2Qdbb = hess
+        return [
+            None,
+            [d2qdaa, d2qdab],
+            [d2qdab, d2qdbb],
+            None,
+            [d2Qdaa, d2Qdab],
+            [d2Qdab, d2Qdbb],
+        ]
+
+
+class LatitudeIntegralHessOp(IntegralOp):
+    """
+    The second derivatives of the latitude integrals ``q`` and ``Q`` with
+    respect to ``alpha`` and ``beta``. These are the exact derivatives of
+    the analytic first derivatives of ``LatitudeIntegralOp``, computed by
+    forward-mode automatic differentiation. Returns ``d2q / dalpha2``,
+    ``d2q / dalpha dbeta``, ``d2q / dbeta2`` and the same for ``Q``.
+
+    """
+
+    func_file = "./latitude_hess.cc"
+    func_name = "APPLY_SPECIFIC(latitude_hess)"
+    value_outputs = None
+    derivative_outputs = None
+
+    def c_compile_args(self, *args, **kwargs):
+        # The intermediate autodiff matrices are three times larger than
+        # those of `LatitudeIntegralOp`
+        args = super().c_compile_args(*args, **kwargs)
+        args += ["-DEIGEN_STACK_ALLOCATION_LIMIT=0"]
+        return args
+
+    def grad(self, inputs, gradients):
+        return [
+            theano.gradient.grad_not_implemented(self, i, x)
+            for i, x in enumerate(inputs)
+        ]
+
+    def R_op(self, inputs, eval_points):
+        raise NotImplementedError("Third derivatives not implemented.")
@@ -0,0 +1,118 @@
+#section support_code
+
+#include <unsupported/Eigen/AutoDiff>
+
+namespace Eigen {
+
+// Print the value of an autodiff scalar (used in error messages)
+template <typename DerType>
+inline std::ostream &operator<<(std::ostream &os,
+                                const AutoDiffScalar<DerType> &x) {
+  return os << x.value();
+}
+
+} // namespace Eigen
+
+#section support_code_struct
+
+// Shorthand
+#define DI0 DTYPE_INPUT_0
+#define DI1 DTYPE_INPUT_1
+#define DO0 DTYPE_OUTPUT_0
+#define DO1 DTYPE_OUTPUT_1
+#define DO2 DTYPE_OUTPUT_2
+#define DO3 DTYPE_OUTPUT_3
+#define DO4 DTYPE_OUTPUT_4
+#define DO5 DTYPE_OUTPUT_5
+#define TO0 TYPENUM_OUTPUT_0
+#define TO1 TYPENUM_OUTPUT_1
+#define TO2 TYPENUM_OUTPUT_2
+#define TO3 TYPENUM_OUTPUT_3
+#define TO4 TYPENUM_OUTPUT_4
+#define TO5 TYPENUM_OUTPUT_5
+
+int APPLY_SPECIFIC(latitude_hess)(PyArrayObject *input0,   // alpha
+                                  PyArrayObject *input1,   // beta
+                                  PyArrayObject **output0, // d2q / dalpha2
+                                  PyArrayObject **output1, // d2q / dalphadbeta
+                                  PyArrayObject **output2, // d2q / dbeta2
+                                  PyArrayObject **output3, // d2Q / dalpha2
+                                  PyArrayObject **output4, // d2Q / dalphadbeta
+                                  PyArrayObject **output5  // d2Q / dbeta2
+) {
+
+  using namespace sp::theano;
+  using namespace sp::latitude;
+  using namespace sp::utils;
+  typedef Eigen::AutoDiffScalar<Eigen::Matrix<double, 2, 1>> ADScalar;
+
+  // Get the inputs
+  int success = 0;
+  int ndim = -1;
+  npy_intp *shape;
+  auto alpha_in = get_input<DI0>(&ndim, &shape, input0, &success);
+  if (ndim != 0) {
+    PyErr_Format(PyExc_ValueError, "alpha must be a scalar");
+    return 1;
+  }
+  auto beta_in = get_input<DI1>(&ndim, &shape, input1, &success);
+  if (ndim != 0) {
+    PyErr_Format(PyExc_ValueError, "beta must be a scalar");
+    return 1;
+  }
+
+  // Forward-mode derivatives with respect to alpha and beta
+  ADScalar alpha(*alpha_in > 0.0 ? *alpha_in : 0.0, 2, 0);
+  ADScalar beta(*beta_in > 0.0 ? *beta_in : 0.0, 2, 1);
+
+  // Allocate the outputs
+  int ndim_q = 1;
+  int ndim_Q = 2;
+  std::vector<npy_intp> shape_q_vec(ndim_q);
+  shape_q_vec[0] = SP__N;
+  npy_intp *shape_q = &(shape_q_vec[0]);
+  std::vector<npy_intp> shape_Q_vec(ndim_Q);
+  shape_Q_vec[0] = SP__N;
+  shape_Q_vec[1] = SP__N;
+  npy_intp *shape_Q = &(shape_Q_vec[0]);
+  auto d2qdaa_out =
+      allocate_output<DO0>(ndim_q, shape_q, TO0, output0, &success);
+  auto d2qdab_out =
+      allocate_output<DO1>(ndim_q, shape_q, TO1, output1, &success);
+  auto d2qdbb_out =
+      allocate_output<DO2>(ndim_q, shape_q, TO2, output2, &success);
+  auto d2Qdaa_out =
+      allocate_output<DO3>(ndim_Q, shape_Q, TO3, output3, &success);
+  auto d2Qdab_out =
+      allocate_output<DO4>(ndim_Q, shape_Q, TO4, output4, &success);
+  auto d2Qdbb_out =
+      allocate_output<DO5>(ndim_Q, shape_Q, TO5, output5, &success);
+  if (success) {
+    return 1;
+  }
+  Map<Vector<DO0, SP__N>> d2qdaa(d2qdaa_out);
+  Map<Vector<DO1, SP__N>> d2qdab(d2qdab_out);
+  Map<Vector<DO2, SP__N>> d2qdbb(d2qdbb_out);
+  Map<RowMatrix<DO3, SP__N, SP__N>> d2Qdaa(d2Qdaa_out);
+  Map<RowMatrix<DO4, SP__N, SP__N>> d2Qdab(d2Qdab_out);
+  Map<RowMatrix<DO5, SP__N, SP__N>> d2Qdbb(d2Qdbb_out);
+
+  // Differentiate the analytic first derivatives
+  Vector<ADScalar, Dynamic> q(SP__N), dqda(SP__N), dqdb(SP__N);
+  RowMatrix<ADScalar, Dynamic, Dynamic> Q(SP__N, SP__N), dQda(SP__N, SP__N),
+      dQdb(SP__N, SP__N);
+  computeLatitudeIntegrals<true>(alpha, beta, q, dqda, dqdb, Q, dQda, dQdb);
+  for (int n1 = 0; n1 < SP__N; ++n1) {
+    d2qdaa(n1) = dqda(n1).derivatives()(0);
+    d2qdab(n1) = dqda(n1).derivatives()(1);
+    d2qdbb(n1) = dqdb(n1).derivatives()(1);
+    for (int n2 = 0; n2 < SP__N; ++n2) {
+      d2Qdaa(n1, n2) = dQda(n1, n2).derivatives()(0);
+      d2Qdab(n1, n2) = dQda(n1, n2).derivatives()(1);
+      d2Qdbb(n1, n2) = dQdb(n1, n2).derivatives()(1);
+    }
+  }
+
+  // We're done!
+  return 0;
+}
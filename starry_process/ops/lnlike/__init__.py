@@ -0,0 +1 @@
+from .lnlike import LowRankLogLikeOp
@@ -0,0 +1,200 @@
+#section support_code_struct
+
+// Shorthand
+#define DI0 DTYPE_INPUT_0
+#define DI7 DTYPE_INPUT_7
+#define DO0 DTYPE_OUTPUT_0
+#define TO0 TYPENUM_OUTPUT_0
+#define TO1 TYPENUM_OUTPUT_1
+#define TO2 TYPENUM_OUTPUT_2
+#define TO3 TYPENUM_OUTPUT_3
+#define TO4 TYPENUM_OUTPUT_4
+#define TO5 TYPENUM_OUTPUT_5
+#define TO6 TYPENUM_OUTPUT_6
+#define TO7 TYPENUM_OUTPUT_7
+
+int APPLY_SPECIFIC(lnlike)(PyArrayObject *input0,   // U
+                           PyArrayObject *input1,   // S
+                           PyArrayObject *input2,   // scale
+                           PyArrayObject *input3,   // V
+                           PyArrayObject *input4,   // T
+                           PyArrayObject *input5,   // r
+                           PyArrayObject *input6,   // d
+                           PyArrayObject *input7,   // offsets
+                           PyArrayObject **output0, // lnlike
+                           PyArrayObject **output1, // bU
+                           PyArrayObject **output2, // bS
+                           PyArrayObject **output3, // bscale
+                           PyArrayObject **output4, // bV
+                           PyArrayObject **output5, // bT
+                           PyArrayObject **output6, // br
+                           PyArrayObject **output7  // bd
+) {
+
+  using namespace sp::theano;
+  using namespace sp::lnlike;
+  using namespace sp::utils;
+
+  // Get the inputs
+  int success = 0;
+  npy_intp Ktot, R, nS, nstars, Q, N1, N2;
+  auto U_in = get_matrix_input<DI0>(&Ktot, &R, input0, &success);
+  if (success)
+    return 1;
+
+  int ndim = 3;
+  std::vector<npy_intp> shape_S(3);
+  shape_S[0] = -1;
+  shape_S[1] = R;
+  shape_S[2] = R;
+  auto S_in = get_input<DI0>(ndim, &(shape_S[0]), input1, &success);
+  if (success)
+    return 1;
+  nS = PyArray_DIMS(input1)[0];
+
+  nstars = -1;
+  auto scale_in = get_input<DI0>(&nstars, input2, &success);
+  if (success)
+    return 1;
+  if ((nS != 1) && (nS != nstars)) {
+    PyErr_Format(PyExc_ValueError, "S must have shape (1, R, R) or "
+                                   "(nstars, R, R)");
+    return 1;
+  }
+
+  auto V_in = get_matrix_input<DI0>(&N1, &Q, input3, &success);
+  if (success)
+    return 1;
+  if (N1 != Ktot) {
+    PyErr_Format(PyExc_ValueError, "dimension mismatch in V");
+    return 1;
+  }
+
+  std::vector<npy_intp> shape_T(3);
+  shape_T[0] = nstars;
+  shape_T[1] = Q;
+  shape_T[2] = Q;
+  auto T_in = get_input<DI0>(ndim, &(shape_T[0]), input4, &success);
+  if (success)
+    return 1;
+
+  N1 = Ktot;
+  auto r_in = get_input<DI0>(&N1, input5, &success);
+  if (success)
+    return 1;
+  auto d_in = get_input<DI0>(&N1, input6, &success);
+  if (success)
+    return 1;
+  N2 = nstars + 1;
+  auto offsets = get_input<DI7>(&N2, input7, &success);
+  if (success)
+    return 1;
+  if ((offsets[0] != 0) || (offsets[nstars] != Ktot)) {
+    PyErr_Format(PyExc_ValueError, "invalid offsets");
+    return 1;
+  }
+  for (npy_intp n = 0; n < nstars; ++n) {
+    if (offsets[n + 1] < offsets[n]) {
+      PyErr_Format(PyExc_ValueError, "offsets must be non-decreasing");
+      return 1;
+    }
+  }
+
+  // Allocate the outputs
+  auto lnlike_out = allocate_output<DO0>(0, NULL, TO0, output0, &success);
+  if (success)
+    return 1;
+  std::vector<npy_intp> shape_vec(2);
+  shape_vec[0] = Ktot;
+  shape_vec[1] = R;
+  auto bU_out =
+      allocate_output<DO0>(2, &(shape_vec[0]), TO1, output1, &success);
+  if (success)
+    return 1;
+  shape_S[0] = nS;
+  auto bS_out = allocate_output<DO0>(3, &(shape_S[0]), TO2, output2, &success);
+  if (success)
+    return 1;
+  auto bscale_out = allocate_output<DO0>(1, &nstars, TO3, output3, &success);
+  if (success)
+    return 1;
+  shape_vec[1] = Q;
+  auto bV_out =
+      allocate_output<DO0>(2, &(shape_vec[0]), TO4, output4, &success);
+  if (success)
+    return 1;
+  auto bT_out = allocate_output<DO0>(3, &(shape_T[0]), TO5, output5, &success);
+  if (success)
+    return 1;
+  auto br_out = allocate_output<DO0>(1, &Ktot, TO6, output6, &success);
+  if (success)
+    return 1;
+  auto bd_out = allocate_output<DO0>(1, &Ktot, TO7, output7, &success);
+  if (success)
+    return 1;
+
+  Map<RowMatrix<DO0, Dynamic, Dynamic>> bS(bS_out, nS, R * R);
+  bS.setZero();
+
+  // Loop over the stars
+  int J = R + Q;
+  DO0 lnlike = 0.0;
+#pragma omp parallel for schedule(dynamic) reduction(+ : lnlike)       \
+    num_threads(num_threads())
+  for (npy_intp n = 0; n < nstars; ++n) {
+
+    npy_intp k = offsets[n];
+    npy_intp K = offsets[n + 1] - k;
+    if (K == 0) {
+      bscale_out[n] = 0.0;
+      Map<RowMatrix<DO0, Dynamic, Dynamic>>(bT_out + n * Q * Q, Q, Q)
+          .setZero();
+      continue;
+    }
+
+    // The inputs for this star
+    Map<RowMatrix<DI0, Dynamic, Dynamic>> U(U_in + k * R, K, R);
+    Map<RowMatrix<DI0, Dynamic, Dynamic>> S(S_in + (nS > 1 ? n : 0) * R * R,
+                                            R, R);
+    Map<RowMatrix<DI0, Dynamic, Dynamic>> V(V_in + k * Q, K, Q);
+    Map<RowMatrix<DI0, Dynamic, Dynamic>> T(T_in + n * Q * Q, Q, Q);
+    Vector<DO0, Dynamic> r = Map<Vector<DI0, Dynamic>>(r_in + k, K);
+    Vector<DO0, Dynamic> d = Map<Vector<DI0, Dynamic>>(d_in + k, K);
+
+    // The full low-rank factorization
+    RowMatrix<DO0, Dynamic, Dynamic> W(K, J);
+    W.leftCols(R) = U;
+    W.rightCols(Q) = V;
+    RowMatrix<DO0, Dynamic, Dynamic> B(J, J);
+    B.setZero();
+    B.topLeftCorner(R, R) = scale_in[n] * S;
+    B.bottomRightCorner(Q, Q) = T;
+
+    // Compute
+    RowMatrix<DO0, Dynamic, Dynamic> bW(K, J), bB(J, J);
+    Vector<DO0, Dynamic> br(K), bd(K);
+    lnlike += computeLowRankLogLike<DO0>(W, B, r, d, bW, bB, br, bd);
+
+    // Store the gradients
+    Map<RowMatrix<DO0, Dynamic, Dynamic>>(bU_out + k * R, K, R) =
+        bW.leftCols(R);
+    Map<RowMatrix<DO0, Dynamic, Dynamic>>(bV_out + k * Q, K, Q) =
+        bW.rightCols(Q);
+    Map<RowMatrix<DO0, Dynamic, Dynamic>>(bT_out + n * Q * Q, Q, Q) =
+        bB.bottomRightCorner(Q, Q);
+    Map<Vector<DO0, Dynamic>>(br_out + k, K) = br;
+    Map<Vector<DO0, Dynamic>>(bd_out + k, K) = bd;
+    bscale_out[n] = bB.topLeftCorner(R, R).cwiseProduct(S).sum();
+    RowMatrix<DO0, Dynamic, Dynamic> bSn = scale_in[n] * bB.topLeftCorner(R, R);
+    if (nS > 1) {
+      Map<RowMatrix<DO0, Dynamic, Dynamic>>(bS_out + n * R * R, R, R) = bSn;
+    } else {
+#pragma omp critical
+      Map<RowMatrix<DO0, Dynamic, Dynamic>>(bS_out, R, R) += bSn;
+    }
+  }
+  lnlike_out[0] = lnlike;
+
+  // We're done!
+  return 0;
+}
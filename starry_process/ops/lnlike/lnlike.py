@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+from ..base_op import BaseOp
+from ...compat import theano, tt, floatX, Apply
+import sys
+
+__all__ = ["LowRankLogLikeOp"]
+
+
+class LowRankLogLikeOp(BaseOp):
+    """
+    Total log likelihood of a batch of ``nstars`` light curves of
+    different lengths, each one with covariance
+
+        C_n = diag(d_n) + scale_n U_n . S_n . U_n^T + V_n . T_n . V_n^T.
+
+    The rows of ``U``, ``V``, ``r`` (the residuals) and ``d`` corresponding
+    to star ``n`` are ``offsets[n]:offsets[n + 1]``. The matrix ``S`` may
+    either be shared by all stars (if it has shape ``(1, R, R)``) or be
+    different for each one. The stars are processed in parallel, and the
+    gradient with respect to all inputs is computed in the same pass.
+
+    """
+
+    func_file = "./lnlike.cc"
+    func_name = "APPLY_SPECIFIC(lnlike)"
+
+    def c_compile_args(self, *args, **kwargs):
+        args = super().c_compile_args(*args, **kwargs)
+        if sys.platform != "darwin":
+            args += ["-fopenmp"]
+        return args
+
+    def make_node(self, U, S, scale, V, T, r, d, offsets):
+        CC = tt.extra_ops.CpuContiguous()
+        in_args = [
+            CC(tt.as_tensor_variable(arg).astype(floatX))
+            for arg in [U, S, scale, V, T, r, d]
+        ]
+        in_args += [CC(tt.as_tensor_variable(offsets).astype("int64"))]
+        out_args = [tt.TensorType(dtype=floatX, broadcastable=[])()] + [
+            arg.type() for arg in in_args[:-1]
+        ]
+        return Apply(self, in_args, out_args)
+
+    def infer_shape(self, *args):
+        shapes = args[-1]
+        return [()] + list(shapes[:-1])
+
+    def connection_pattern(self, node):
+        return [[True] * 8] * 7 + [[False] * 8]
+
+    def grad(self, inputs, gradients):
+        outputs = self(*inputs)
+        bL = gradients[0]
+
+        # Derivs of derivs not implemented
+        for i, g in enumerate(list(gradients[1:])):
+            if not isinstance(g.type, theano.gradient.DisconnectedType):
+                raise ValueError(
+                    "can't propagate gradients wrt parameter {0}".format(i + 1)
+                )
+
+        # Chain rule
+        return [bL * f for f in outputs[1:]] + [
+            theano.gradient.DisconnectedType()()
+        ]
+
+    def R_op(self, inputs, eval_points):
+        outputs = self(*inputs)
+
+        # The directional derivative of the log likelihood is the sum of
+        # its gradients dotted into the eval points
+        jvp = tt.zeros_like(outputs[0])
+        for bx, v in zip(outputs[1:], eval_points[:-1]):
+            if v is not None:
+                jvp += tt.sum(bx * v)
+
+        # Derivs of derivs not implemented
+        return [jvp] + [
+            theano.gradient.grad_undefined(
+                self, i, inputs[i], "second derivatives are not available"
+            )
+            for i in range(7)
+        ]
@@ -1,69 +1,62 @@
 # -*- coding: utf-8 -*-
 import numpy as np
-from ...compat import theano, tt, Op, Apply, floatX
+from math import perm
+from ..base_op import derivative_grad, derivative_R_op
+from ...compat import tt, Op, Apply, floatX
 
 __all__ = ["AlphaBetaOp"]
 
 
 class AlphaBetaOp(Op):
-    """"""
+    """
+    Series coefficients of the normalized covariance. This op is applied
+    elementwise, so ``z`` may be a scalar or an array. Returns the
+    ``order``-th derivatives of ``alpha`` and ``beta`` with respect to
+    ``z`` and their derivatives.
 
-    __props__ = ("N",)
+    """
 
-    def __init__(self, N=20):
+    __props__ = ("N", "order")
+    value_outputs = (0, 1)
+    derivative_outputs = ((2,), (3,))
+
+    def __init__(self, N=20, order=0):
         self.N = N
+        self.order = order
 
     def make_node(self, z):
         inputs = [tt.as_tensor_variable(z).astype(floatX)]
-        outputs = [
-            tt.TensorType(dtype=floatX, broadcastable=[])() for n in range(4)
-        ]
+        outputs = [inputs[0].type() for n in range(4)]
         return Apply(self, inputs, outputs)
 
     def infer_shape(self, *args):
-        return [(), (), (), ()]
+        shapes = args[-1]
+        return [shapes[0], shapes[0], shapes[0], shapes[0]]
 
     def perform(self, node, inputs, outputs):
+        # The series are `alpha = sum_n c_n z^n` and
+        # `beta = sum_n 2 n c_n z^n`, with `c_n = (2n + 1)!!`.
+        # We differentiate them term by term
         z = inputs[0]
-        fac = 1.0
-        alpha = 0.0
-        beta = 0.0
-        dadz = 0.0
-        dbdz = 0.0
-        dfdz = 0.0
+        res = [np.zeros_like(z) for k in range(4)]
+        c = 1.0
         for n in range(0, self.N + 1):
-            dadz += dfdz
-            dbdz += 2 * n * dfdz
-            dfdz = (2 * n + 3) * (dfdz * z + fac)
-            alpha += fac
-            beta += 2 * n * fac
-            fac *= z * (2 * n + 3)
-        outputs[0][0] = np.array(alpha)
-        outputs[1][0] = np.array(beta)
-        outputs[2][0] = np.array(dadz)
-        outputs[3][0] = np.array(dbdz)
+            for k, m in enumerate((self.order, self.order + 1)):
+                if n >= m:
+                    term = c * perm(n, m) * z ** (n - m)
+                    res[2 * k] += term
+                    res[2 * k + 1] += 2 * n * term
+            c *= 2 * n + 3
+        for k in range(4):
+            outputs[k][0] = np.array(res[k])
+
+    def second_derivatives(self, inputs):
+        op = AlphaBetaOp(self.N, self.order + 1)
+        _, _, d2adz2, d2bdz2 = op(*inputs)
+        return [None, None, [d2adz2], [d2bdz2]]
 
     def grad(self, inputs, gradients):
-        z = inputs[0]
-        ba = gradients[0]
-        bb = gradients[1]
-        a, b, dadz, dbdz = self(*inputs)
-
-        # Derivs of derivs not implemented
-        for i, g in enumerate(list(gradients[2:])):
-            if not isinstance(g.type, theano.gradient.DisconnectedType):
-                raise ValueError(
-                    "can't propagate gradients wrt parameter {0}".format(i + 1)
-                )
-
-        bz = tt.as_tensor_variable(0.0)
-        for dxdz, bx in zip([dadz, dbdz], [ba, bb]):
-            if not isinstance(bx.type, theano.gradient.DisconnectedType):
-                bz += dxdz * bx
-
-        return [bz]
+        return derivative_grad(self, inputs, gradients)
 
     def R_op(self, inputs, eval_points):
-        if eval_points[0] is None:
-            return eval_points
-        return self.grad(inputs, eval_points)
+        return derivative_R_op(self, inputs, eval_points)
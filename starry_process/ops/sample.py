@@ -6,7 +6,16 @@ __all__ = ["SampleYlmTemporalOp"]
 
 
 class SampleYlmTemporalOp(Op):
-    """"""
+    """
+    Transform a batch of standard normal draws ``U`` of shape
+    ``(nsamples, Nt, Ny)`` into samples from a process with Kronecker
+    covariance ``(Lt . Lt^T) x (Ly . Ly^T)``. Each sample is
+
+        y[i] = Lt . U[i] . Ly^T,
+
+    which is computed for all samples at once with two matrix products.
+
+    """
 
     def make_node(self, *inputs):
         inputs = [
@@ -22,12 +31,17 @@ class SampleYlmTemporalOp(Op):
         return [shapes[-1]]
 
     def perform(self, node, inputs, outputs):
-        # TODO: Implement this in C++
         Ly, Lt, U = inputs
-        nsamples, Nt, Ny = U.shape
-        y = np.zeros((nsamples, Nt, Ny))
-        for i in range(nsamples):
-            for j in range(Ny):
-                for k in range(Nt):
-                    y[i, k] += Ly.T[j] * (Lt[k] @ U[i, :, j])
-        outputs[0][0] = y
+
+        # A single product over all samples and times, followed by
+        # a batched product over samples
+        outputs[0][0] = np.matmul(Lt, np.dot(U, Ly.T))
+
+    def grad(self, inputs, gradients):
+        Ly, Lt, U = inputs
+        (by,) = gradients
+        bU = self(tt.transpose(Ly), tt.transpose(Lt), by)
+        bLt = tt.tensordot(tt.dot(by, Ly), U, axes=[[0, 2], [0, 2]])
+        LtU = tt.tensordot(U, Lt, axes=[[1], [1]]).dimshuffle(0, 2, 1)
+        bLy = tt.tensordot(by, LtU, axes=[[0, 1], [0, 1]])
+        return bLy, bLt, bU
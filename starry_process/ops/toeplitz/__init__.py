@@ -0,0 +1 @@
+from .toeplitz import ToeplitzSolveOp, ToeplitzDotOp
@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+from scipy.linalg import toeplitz, cho_factor, cho_solve, LinAlgError
+import functools
+from ...compat import theano, tt, Op, Apply, floatX
+
+__all__ = ["ToeplitzSolveOp", "ToeplitzDotOp"]
+
+
+def _levinson(c):
+    """
+    Return the log determinant of the symmetric Toeplitz matrix ``T`` with
+    first column ``c`` and the first column ``x = T^-1 . e_0`` of its
+    inverse, computed with the Levinson-Durbin recursion in ``O(K^2)``.
+
+    """
+    K = len(c)
+    c0 = c[0]
+    if K == 1:
+        return np.log(c0), np.array([1.0 / c0])
+    r = c[1:] / c0
+    y = np.empty(K - 1)
+    y[0] = alpha = -r[0]
+    beta = 1.0
+    logdet = K * np.log(c0)
+    for k in range(1, K - 1):
+        beta *= 1 - alpha ** 2
+        logdet += np.log(beta)
+        alpha = -(r[k] + np.dot(r[k - 1 :: -1], y[:k])) / beta
+        y[:k] += alpha * y[k - 1 :: -1]
+        y[k] = alpha
+    beta *= 1 - alpha ** 2
+    logdet += np.log(beta)
+    x = np.concatenate(([1.0], y)) / (c0 * beta)
+    return logdet, x
+
+
+def _rfft(u, nfft):
+    return np.fft.rfft(u, nfft, axis=0)
+
+
+def _lower(fu, v, nfft):
+    """
+    Return ``L(u) . v``, where ``L(u)`` is the lower triangular Toeplitz
+    matrix with first column ``u`` and ``fu`` is its Fourier transform.
+
+    """
+    K = v.shape[0]
+    return np.fft.irfft(fu * _rfft(v, nfft), nfft, axis=0)[:K]
+
+
+def _upper(fu, v, nfft):
+    """Return ``L(u)^T . v``; see ``_lower``."""
+    return _lower(fu, v[::-1], nfft)[::-1]
+
+
+def _correlate(a, b):
+    """
+    Return ``sum_n a_(n + k) b_n`` for ``k = 0, 1, ... K - 1``, summed
+    over the columns of ``a`` and ``b``.
+
+    """
+    K = a.shape[0]
+    nfft = 2 * K
+    res = np.fft.irfft(
+        _rfft(a, nfft) * np.conj(_rfft(b, nfft)), nfft, axis=0
+    )[:K]
+    if res.ndim == 2:
+        res = np.sum(res, axis=1)
+    return res
+
+
+def _diag_sums(a, b):
+    """
+    Return the sums of the ``k``-th and ``-k``-th diagonals of the matrix
+    ``a . b^T`` for ``k = 0, 1, ... K - 1``. This is the gradient of
+    ``tr(a^T . T . b)`` with respect to the first column of the symmetric
+    Toeplitz matrix ``T``.
+
+    """
+    res = _correlate(a, b) + _correlate(b, a)
+    res[0] /= 2
+    return res
+
+
+class _GohbergSemencul:
+    """
+    The inverse of a symmetric Toeplitz matrix in the Gohberg-Semencul
+    form
+
+        T^-1 = (L(x) . L(x)^T - L(w) . L(w)^T) / x_0
+
+    where ``x`` is the first column of ``T^-1`` and
+    ``w = (0, x_(K-1), ... x_1)``. Once ``x`` is known, products with
+    ``T^-1`` cost ``O(K log K)``.
+
+    """
+
+    def __init__(self, c):
+        self.K = len(c)
+        self.nfft = 2 * self.K
+        self.logdet, self.x = _levinson(c)
+        self.w = np.concatenate(([0.0], self.x[:0:-1]))
+        self.fx = _rfft(self.x, self.nfft)
+        self.fw = _rfft(self.w, self.nfft)
+
+    def solve(self, Y):
+        fx, fw = self.fx, self.fw
+        if Y.ndim == 2:
+            fx, fw = fx[:, None], fw[:, None]
+        return (
+            _lower(fx, _upper(fx, Y, self.nfft), self.nfft)
+            - _lower(fw, _upper(fw, Y, self.nfft), self.nfft)
+        ) / self.x[0]
+
+    def logdet_grad(self):
+        # The gradient of the log determinant is the trace of `T^-1`
+        # along each diagonal
+        K = self.K
+        k = np.arange(K)
+        x, w = self.x, self.w
+        res = (K - k) * (_correlate(x, x) - _correlate(w, w))
+        res -= _correlate(x, k * x) - _correlate(w, k * w)
+        res[1:] *= 2
+        return res / x[0]
+
+
+class _DenseToeplitz:
+    """
+    The Cholesky factorization of a symmetric Toeplitz matrix, with the
+    same interface as ``_GohbergSemencul``. This costs ``O(K^3)`` but is
+    backward stable, so it is used for ill-conditioned matrices.
+
+    """
+
+    def __init__(self, c):
+        self.K = len(c)
+        try:
+            self.factor = cho_factor(toeplitz(c), lower=True)
+        except LinAlgError:
+            self.factor = None
+            self.logdet = np.nan
+        else:
+            self.logdet = 2 * np.sum(np.log(np.diag(self.factor[0])))
+
+    def solve(self, Y):
+        if self.factor is None:
+            return np.nan * np.ones_like(Y)
+        return cho_solve(self.factor, Y)
+
+    def logdet_grad(self):
+        if self.factor is None:
+            return np.nan * np.ones(self.K)
+        eye = np.eye(self.K)
+        return _diag_sums(cho_solve(self.factor, eye), eye)
+
+
+@functools.lru_cache(maxsize=8)
+def _factorize_bytes(c, tol):
+    c = np.frombuffer(c, dtype=np.float64)
+    T = _GohbergSemencul(c)
+
+    # The prediction error after the last step of the recursion,
+    # ``prod(1 - alpha_k^2)``, where ``alpha_k`` are the reflection
+    # coefficients. It vanishes as they approach unity, in which case
+    # the recursion is unstable and we fall back to the dense solver
+    if c[0] * T.x[0] * tol > 1:
+        T = _DenseToeplitz(c)
+    return T
+
+
+def _factorize(c, tol=1e-6):
+    """
+    Return the ``_GohbergSemencul`` representation of the inverse of the
+    symmetric Toeplitz matrix with first column ``c``, or its dense
+    Cholesky factorization if the product of ``1 - alpha_k^2`` over the
+    reflection coefficients ``alpha_k`` of the Levinson-Durbin recursion
+    is smaller than ``tol``. The solves in a given graph usually all
+    involve the same matrix, so the last few factorizations are cached.
+
+    """
+    with np.errstate(all="ignore"):
+        return _factorize_bytes(
+            np.ascontiguousarray(c, dtype=np.float64).tobytes(), tol
+        )
+
+
+def _toeplitz_dot(c, Y):
+    """Return ``T . Y``, where ``T`` is the symmetric Toeplitz matrix ``c``."""
+    nfft = 2 * len(c)
+    fc = _rfft(c, nfft)
+    if Y.ndim == 2:
+        fc = fc[:, None]
+    return _lower(fc, Y, nfft) + _upper(fc, Y, nfft) - c[0] * Y
+
+
+class ToeplitzSolveOp(Op):
+    """
+    Given the first column ``c`` of a symmetric positive definite Toeplitz
+    matrix ``T``, compute ``log|T|`` and ``X = T^-1 . Y``. The inverse is
+    computed with the Levinson-Durbin recursion in ``O(K^2)`` and applied
+    in the Gohberg-Semencul form at a cost of ``O(K log K)`` per column.
+    If ``T`` is so ill-conditioned that the recursion is unstable (i.e.,
+    its reflection coefficients approach unity), falls back to a dense
+    Cholesky factorization. Returns NaNs if ``T`` is not positive
+    definite. The most recent factorizations are cached, so repeated
+    solves with the same matrix (e.g., in a Woodbury update) only pay for
+    the recursion once.
+
+    """
+
+    __props__ = ()
+
+    def make_node(self, c, Y):
+        inputs = [tt.as_tensor_variable(arg).astype(floatX) for arg in [c, Y]]
+        outputs = [tt.TensorType(floatX, ())(), inputs[1].type()]
+        return Apply(self, inputs, outputs)
+
+    def infer_shape(self, *args):
+        shapes = args[-1]
+        return [(), shapes[1]]
+
+    def perform(self, node, inputs, outputs):
+        c, Y = inputs
+        T = _factorize(c)
+        with np.errstate(all="ignore"):
+            X = T.solve(Y)
+        if not np.isfinite(T.logdet):
+            outputs[0][0] = np.array(np.nan)
+            outputs[1][0] = np.nan * np.ones_like(Y)
+        else:
+            outputs[0][0] = np.array(T.logdet)
+            outputs[1][0] = X
+
+    def grad(self, inputs, gradients):
+        c, Y = inputs
+        blogdet, bX = gradients
+        if isinstance(blogdet.type, theano.gradient.DisconnectedType):
+            blogdet = tt.zeros(())
+        if isinstance(bX.type, theano.gradient.DisconnectedType):
+            bX = tt.zeros_like(Y)
+        return ToeplitzSolveRevOp()(c, Y, blogdet, bX)
+
+
+class ToeplitzSolveRevOp(Op):
+    """
+    The reverse-mode (adjoint) pass of ``ToeplitzSolveOp``.
+
+    """
+
+    __props__ = ()
+
+    def make_node(self, c, Y, blogdet, bX):
+        inputs = [
+            tt.as_tensor_variable(arg).astype(floatX)
+            for arg in [c, Y, blogdet, bX]
+        ]
+        outputs = [inputs[0].type(), inputs[1].type()]
+        return Apply(self, inputs, outputs)
+
+    def infer_shape(self, *args):
+        shapes = args[-1]
+        return shapes[:2]
+
+    def perform(self, node, inputs, outputs):
+        c, Y, blogdet, bX = inputs
+        T = _factorize(c)
+        with np.errstate(all="ignore"):
+            X = T.solve(Y)
+            bY = T.solve(bX)
+            bc = blogdet * T.logdet_grad() - _diag_sums(bY, X)
+        outputs[0][0] = bc
+        outputs[1][0] = bY
+
+    def grad(self, inputs, gradients):
+        raise NotImplementedError(
+            "Second derivatives are not implemented for the `toeplitz` "
+            "solver. Use the `lowrank` or `dense` solver instead."
+        )
+
+
+class ToeplitzDotOp(Op):
+    """
+    Compute the product ``T . Y`` of the symmetric Toeplitz matrix with
+    first column ``c`` and ``Y`` at a cost of ``O(K log K)`` per column.
+
+    """
+
+    __props__ = ()
+
+    def make_node(self, c, Y):
+        inputs = [tt.as_tensor_variable(arg).astype(floatX) for arg in [c, Y]]
+        outputs = [inputs[1].type()]
+        return Apply(self, inputs, outputs)
+
+    def infer_shape(self, *args):
+        shapes = args[-1]
+        return [shapes[1]]
+
+    def perform(self, node, inputs, outputs):
+        c, Y = inputs
+        outputs[0][0] = _toeplitz_dot(c, Y)
+
+    def grad(self, inputs, gradients):
+        c, Y = inputs
+        return ToeplitzDotRevOp()(c, Y, gradients[0])
+
+
+class ToeplitzDotRevOp(Op):
+    """
+    The reverse-mode (adjoint) pass of ``ToeplitzDotOp``.
+
+    """
+
+    __props__ = ()
+
+    def make_node(self, c, Y, bZ):
+        inputs = [
+            tt.as_tensor_variable(arg).astype(floatX) for arg in [c, Y, bZ]
+        ]
+        outputs = [inputs[0].type(), inputs[1].type()]
+        return Apply(self, inputs, outputs)
+
+    def infer_shape(self, *args):
+        shapes = args[-1]
+        return shapes[:2]
+
+    def perform(self, node, inputs, outputs):
+        c, Y, bZ = inputs
+        outputs[0][0] = _diag_sums(bZ, Y)
+        outputs[1][0] = _toeplitz_dot(c, bZ)
+
+    def grad(self, inputs, gradients):
+        raise NotImplementedError(
+            "Second derivatives are not implemented for the `toeplitz` "
+            "solver. Use the `lowrank` or `dense` solver instead."
+        )
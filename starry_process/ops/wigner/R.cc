@@ -0,0 +1,50 @@
+#section support_code_struct
+
+// Shorthand
+#define DI0 DTYPE_INPUT_0
+#define DO0 DTYPE_OUTPUT_0
+#define DO1 DTYPE_OUTPUT_1
+#define TO0 TYPENUM_OUTPUT_0
+#define TO1 TYPENUM_OUTPUT_1
+
+int APPLY_SPECIFIC(R)(PyArrayObject *input0,   // theta
+                      PyArrayObject *input1,   // alpha
+                      PyArrayObject *input2,   // gamma
+                      PyArrayObject **output0, // R
+                      PyArrayObject **output1  // dR / dtheta
+) {
+
+  using namespace sp::theano;
+  using namespace sp::wigner;
+  using namespace sp::utils;
+
+  // Get the inputs
+  int success = 0;
+  npy_intp K = -1, one = 1;
+  auto theta = get_input<DI0>(&K, input0, &success);
+  if (success)
+    return 1;
+  auto alpha = get_input<DI0>(&one, input1, &success);
+  if (success)
+    return 1;
+  auto gamma = get_input<DI0>(&one, input2, &success);
+  if (success)
+    return 1;
+
+  // Allocate the outputs
+  std::vector<npy_intp> shape(2);
+  shape[0] = K;
+  shape[1] = SP__NWIG;
+  auto R = allocate_output<DO0>(2, &(shape[0]), TO0, output0, &success);
+  if (success)
+    return 1;
+  auto dRdtheta = allocate_output<DO1>(2, &(shape[0]), TO1, output1, &success);
+  if (success)
+    return 1;
+
+  // Compute!
+  computeR<SP__GRADIENT, DO0>(theta, K, alpha[0], gamma[0], R, dRdtheta);
+
+  // We're done!
+  return 0;
+}
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+from ..base_op import BaseOp, derivative_grad, derivative_R_op
+from ...compat import theano, tt, floatX, Apply
+import sys
+
+__all__ = ["ROp"]
+
+
+def _wigner_second_derivative(ydeg, dR, R0, dR0):
+    """
+    Return the second derivatives of the flattened Wigner matrices with
+    respect to ``theta`` given their first derivatives ``dR``. The rotation
+    about the ``theta`` axis is generated by a fixed matrix, so in each
+    degree ``l`` the second derivative is ``dR . G``, where
+    ``G = R0^T . dR0`` is computed from the matrices ``R0`` and their
+    derivatives ``dR0`` at ``theta = 0``. The leading axes of ``dR`` are
+    treated as a batch dimension.
+
+    """
+    dR2 = dR.reshape((-1, dR.shape[-1]), ndim=2)
+    d2R = []
+    offset = 0
+    for l in range(ydeg + 1):
+        m = 2 * l + 1
+        G = tt.dot(
+            R0[offset : offset + m ** 2].reshape((m, m)).T,
+            dR0[offset : offset + m ** 2].reshape((m, m)),
+        )
+        dRl = dR2[:, offset : offset + m ** 2].reshape((-1, m, m))
+        d2R.append(tt.dot(dRl, G).reshape((-1, m ** 2)))
+        offset += m ** 2
+    return tt.concatenate(d2R, axis=1).reshape(dR.shape, ndim=dR.ndim)
+
+
+class ROp(BaseOp):
+    """
+    The real Wigner rotation matrices for the rotation with Euler angles
+    ``alpha``, ``theta`` and ``gamma``, for all degrees up to ``ydeg`` and
+    a vector of angles ``theta``. Returns the ``(K, nwig)`` matrices of
+    the flattened rotation matrices and of their derivatives with respect
+    to ``theta``. Angles are processed in parallel.
+
+    """
+
+    func_file = "./R.cc"
+    func_name = "APPLY_SPECIFIC(R)"
+    value_outputs = (0,)
+    derivative_outputs = ((1,),)
+
+    def c_compile_args(self, *args, **kwargs):
+        args = super().c_compile_args(*args, **kwargs)
+        if sys.platform != "darwin":
+            args += ["-fopenmp"]
+        return args
+
+    def make_node(self, theta, alpha, gamma):
+        CC = tt.extra_ops.CpuContiguous()
+        in_args = [
+            CC(tt.as_tensor_variable(arg).astype(floatX))
+            for arg in [theta, alpha, gamma]
+        ]
+        out_args = [
+            tt.TensorType(dtype=floatX, broadcastable=[False, False])(),
+            tt.TensorType(dtype=floatX, broadcastable=[False, False])(),
+        ]
+        return Apply(self, in_args, out_args)
+
+    def infer_shape(self, *args):
+        shapes = args[-1]
+        nwig = (
+            (self.ydeg + 1) * (2 * self.ydeg + 1) * (2 * self.ydeg + 3)
+        ) // 3
+        return ([shapes[0][0], nwig], [shapes[0][0], nwig])
+
+    def second_derivatives(self, inputs):
+        theta, alpha, gamma = inputs
+        _, dR = self(*inputs)
+        R0, dR0 = self(tt.zeros((1,)), alpha, gamma)
+        d2R = _wigner_second_derivative(self.ydeg, dR, R0[0], dR0[0])
+        return [None, [d2R]]
+
+    def grad(self, inputs, gradients):
+        theta, alpha, gamma = inputs
+        (btheta,) = derivative_grad(self, inputs, gradients)
+        return (
+            btheta,
+            theano.gradient.grad_not_implemented(self, 1, alpha),
+            theano.gradient.grad_not_implemented(self, 2, gamma),
+        )
+
+    def R_op(self, inputs, eval_points):
+        if any(v is not None for v in eval_points[1:]):
+            raise NotImplementedError(
+                "can't compute R_op with respect to alpha or gamma"
+            )
+        return derivative_R_op(self, inputs, eval_points)
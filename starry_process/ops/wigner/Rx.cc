@@ -42,7 +42,7 @@ int APPLY_SPECIFIC(Rx)(PyArrayObject *input0,   // theta
   Map<Vector<DO1, SP__NWIG>> dRxdtheta(dRxdtheta_out);
 
   // Compute!
-  computeRx(theta, Rx, dRxdtheta);
+  computeRx<SP__GRADIENT>(theta, Rx, dRxdtheta);
 
   // We're done!
   return 0;
@@ -42,7 +42,7 @@ int APPLY_SPECIFIC(Ry)(PyArrayObject *input0,   // theta
   Map<Vector<DO1, SP__NWIG>> dRydtheta(dRydtheta_out);
 
   // Compute!
-  computeRy(theta, Ry, dRydtheta);
+  computeRy<SP__GRADIENT>(theta, Ry, dRydtheta);
 
   // We're done!
   return 0;
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
-from ..base_op import BaseOp
+from ..base_op import BaseOp, derivative_grad, derivative_R_op
+from .R import _wigner_second_derivative
 from ...compat import Apply, theano, tt, floatX
 
 __all__ = ["RyOp"]
@@ -8,6 +9,8 @@ __all__ = ["RyOp"]
 class RyOp(BaseOp):
     func_file = "./Ry.cc"
     func_name = "APPLY_SPECIFIC(Ry)"
+    value_outputs = (0,)
+    derivative_outputs = ((1,),)
 
     def make_node(self, theta):
         in_args = [
@@ -25,19 +28,13 @@ class RyOp(BaseOp):
         ) // 3
         return ([nwig], [nwig])
 
+    def second_derivatives(self, inputs):
+        _, dR = self(*inputs)
+        R0, dR0 = self(0.0)
+        return [None, [_wigner_second_derivative(self.ydeg, dR, R0, dR0)]]
+
     def grad(self, inputs, gradients):
-        (theta,) = inputs
-        Ry, dRydtheta = self(*inputs)
-        bRy = gradients[0]
-        for i, g in enumerate(gradients[1:]):
-            if not isinstance(g.type, theano.gradient.DisconnectedType):
-                raise ValueError(
-                    "can't propagate gradients wrt parameter {0}".format(i + 1)
-                )
-        btheta = tt.sum(bRy * dRydtheta)
-        return (btheta,)
+        return derivative_grad(self, inputs, gradients)
 
     def R_op(self, inputs, eval_points):
-        if eval_points[0] is None:
-            return eval_points
-        return self.grad(inputs, eval_points)
+        return derivative_R_op(self, inputs, eval_points)
@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
+from .R import ROp
 from .Rx import RxOp
 from .Ry import RyOp
+from .dotRx import dotRxOp
+from .tensordotR import tensordotROp
 from .tensordotRz import tensordotRzOp
 from .special_tensordotRz import special_tensordotRzOp
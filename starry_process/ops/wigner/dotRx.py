@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+from ..base_op import BaseOp
+from ...compat import Apply, theano, tt, floatX
+from .dotRx_rev import dotRxRevOp
+from .Rx import RxOp
+
+__all__ = ["dotRxOp"]
+
+
+class dotRxOp(BaseOp):
+    """
+    The dot product ``M . Rx(theta)`` of a ``(K, N)`` matrix ``M`` and the
+    block-diagonal Wigner matrix for a rotation by ``theta`` about the
+    ``x`` axis.
+
+    """
+
+    func_file = "./dotRx.cc"
+    func_name = "APPLY_SPECIFIC(dotRx)"
+
+    def __init__(self, *args, **kwargs):
+        self.grad_op = dotRxRevOp(*args, **kwargs)
+        super().__init__(*args, **kwargs)
+
+    def make_node(self, M, theta):
+        CC = tt.extra_ops.CpuContiguous()
+        in_args = [
+            CC(tt.as_tensor_variable(arg).astype(floatX))
+            for arg in [M, theta]
+        ]
+        out_args = [
+            tt.TensorType(dtype=floatX, broadcastable=[False, False])()
+        ]
+        return Apply(self, in_args, out_args)
+
+    def infer_shape(self, *args):
+        shapes = args[-1]
+        return (shapes[0],)
+
+    def grad(self, inputs, gradients):
+        return self.grad_op(*inputs, gradients[0])
+
+    def generator(self):
+        """
+        The block-diagonal derivative ``G`` of the ``x`` rotation matrix at
+        ``theta = 0``, so that ``d(M . Rx(theta)) / dtheta = (M . G) .
+        Rx(theta)``.
+
+        """
+        dRx = self.related_op(RxOp)(0.0)[1]
+        G = tt.zeros((self.N, self.N))
+        i = 0
+        for l in range(self.ydeg + 1):
+            n = 2 * l + 1
+            G = tt.set_subtensor(
+                G[l * l : l * l + n, l * l : l * l + n],
+                tt.reshape(dRx[i : i + n * n], (n, n)),
+            )
+            i += n * n
+        return G
+
+    def R_op(self, inputs, eval_points):
+        M, theta = inputs
+        vM, vtheta = eval_points
+        f = None
+        if vM is not None:
+            f = self(vM, theta)
+        if vtheta is not None:
+            df = vtheta * self(tt.dot(M, self.generator()), theta)
+            f = df if f is None else f + df
+        return [f]
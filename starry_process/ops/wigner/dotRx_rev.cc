@@ -0,0 +1,75 @@
+#section support_code_struct
+
+// Shorthand
+#define DI0 DTYPE_INPUT_0
+#define DI1 DTYPE_INPUT_1
+#define DI2 DTYPE_INPUT_2
+#define DO0 DTYPE_OUTPUT_0
+#define DO1 DTYPE_OUTPUT_1
+#define TO0 TYPENUM_OUTPUT_0
+#define TO1 TYPENUM_OUTPUT_1
+
+int APPLY_SPECIFIC(dotRx_rev)(PyArrayObject *input0,   // M
+                              PyArrayObject *input1,   // theta
+                              PyArrayObject *input2,   // bf
+                              PyArrayObject **output0, // bM
+                              PyArrayObject **output1  // btheta
+                              ) {
+
+  using namespace sp::theano;
+  using namespace sp::wigner;
+  using namespace sp::utils;
+
+  // Get the inputs
+  int success = 0;
+  int ndim = -1;
+  npy_intp *shape;
+  auto M_in = get_input<DI0>(&ndim, &shape, input0, &success);
+  if (ndim != 2) {
+    PyErr_Format(PyExc_ValueError, "M must be a matrix");
+    return 1;
+  }
+  if (shape[1] != SP__N) {
+    PyErr_Format(PyExc_ValueError, "M has the wrong number of columns");
+    return 1;
+  }
+  int K = shape[0];
+  ndim = -1;
+  auto theta_in = get_input<DI1>(&ndim, &shape, input1, &success);
+  if (ndim != 0) {
+    PyErr_Format(PyExc_ValueError, "theta must be a scalar");
+    return 1;
+  }
+  DI1 theta = *theta_in;
+  ndim = -1;
+  auto bf_in = get_input<DI2>(&ndim, &shape, input2, &success);
+  if ((ndim != 2) || (shape[0] != K) || (shape[1] != SP__N)) {
+    PyErr_Format(PyExc_ValueError, "bf must be a matrix of the same shape "
+                                   "as M");
+    return 1;
+  }
+  Map<RowMatrix<DI0, Dynamic, SP__N>> M(M_in, K, SP__N);
+  Map<RowMatrix<DI2, Dynamic, SP__N>> bf(bf_in, K, SP__N);
+
+  // Allocate the outputs
+  ndim = 2;
+  std::vector<npy_intp> shape_KxN_vec(ndim);
+  shape_KxN_vec[0] = K;
+  shape_KxN_vec[1] = SP__N;
+  npy_intp *shape_KxN = &(shape_KxN_vec[0]);
+  auto bM_out = allocate_output<DO0>(ndim, shape_KxN, TO0, output0, &success);
+  ndim = 0;
+  auto btheta_out = allocate_output<DO1>(ndim, NULL, TO1, output1, &success);
+  if (success) {
+    return 1;
+  }
+  Map<RowMatrix<DO0, Dynamic, SP__N>> bM(bM_out, K, SP__N);
+
+  // Compute!
+  DO1 btheta;
+  computeDotRxGradient(M, theta, bf, bM, btheta);
+  *btheta_out = btheta;
+
+  // We're done!
+  return 0;
+}
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from ..base_op import BaseOp, reverse_grad
+from ...compat import Apply, theano, tt, floatX
+
+__all__ = ["dotRxRevOp"]
+
+
+class dotRxRevOp(BaseOp):
+    func_file = "./dotRx_rev.cc"
+    func_name = "APPLY_SPECIFIC(dotRx_rev)"
+
+    def make_node(self, M, theta, bf):
+        CC = tt.extra_ops.CpuContiguous()
+        in_args = [
+            CC(tt.as_tensor_variable(arg).astype(floatX))
+            for arg in [M, theta, bf]
+        ]
+        out_args = [
+            tt.TensorType(dtype=floatX, broadcastable=[False, False])(),
+            tt.TensorType(dtype=floatX, broadcastable=[])(),
+        ]
+        return Apply(self, in_args, out_args)
+
+    def infer_shape(self, *args):
+        shapes = args[-1]
+        return (shapes[0], ())
+
+    def grad(self, inputs, gradients):
+        from .dotRx import dotRxOp
+
+        return reverse_grad(self, self.related_op(dotRxOp), inputs, gradients)
@@ -2,6 +2,8 @@
 from ..base_op import BaseOp
 from ...compat import Apply, theano, tt, floatX
 from .special_tensordotRz_rev import special_tensordotRzRevOp
+import numpy as np
+import sys
 
 __all__ = ["special_tensordotRzOp"]
 
@@ -14,6 +16,12 @@ class special_tensordotRzOp(BaseOp):
         self.grad_op = special_tensordotRzRevOp(*args, **kwargs)
         super().__init__(*args, **kwargs)
 
+    def c_compile_args(self, *args, **kwargs):
+        args = super().c_compile_args(*args, **kwargs)
+        if sys.platform != "darwin":
+            args += ["-fopenmp"]
+        return args
+
     def make_node(self, T, M, theta):
         in_args = [
             tt.as_tensor_variable(arg).astype(floatX) for arg in [T, M, theta]
@@ -31,7 +39,35 @@ class special_tensordotRzOp(BaseOp):
             *inputs, gradients[0]
         )
 
+    def generator(self):
+        """
+        Matrices ``D`` and ``P`` such that the derivative of the output
+        with respect to ``theta`` is the output for ``(D . M . P, -theta)``.
+        ``D`` is the diagonal matrix of the spherical harmonic orders ``m``
+        and ``P`` mirrors the columns of ``M`` about ``m = 0``.
+
+        """
+        D = np.zeros((self.N, self.N))
+        P = np.zeros((self.N, self.N))
+        for l in range(self.ydeg + 1):
+            n0 = l * l + l
+            for m in range(-l, l + 1):
+                D[n0 + m, n0 + m] = m
+                P[n0 + m, n0 - m] = 1
+        return D, P
+
     def R_op(self, inputs, eval_points):
-        if eval_points[0] is None:
-            return eval_points
-        return self.grad(inputs, eval_points)
+        # The op is bilinear in `T` and `M`
+        T, M, theta = inputs
+        vT, vM, vtheta = eval_points
+        f = None
+        if vT is not None:
+            f = self(vT, M, theta)
+        if vM is not None:
+            df = self(T, vM, theta)
+            f = df if f is None else f + df
+        if vtheta is not None:
+            D, P = self.generator()
+            df = vtheta * self(T, tt.dot(tt.dot(D, M), P), -theta)
+            f = df if f is None else f + df
+        return [f]
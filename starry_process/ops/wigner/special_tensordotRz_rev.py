@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
-from ..base_op import BaseOp
+from ..base_op import BaseOp, reverse_grad
 from ...compat import Apply, theano, tt, floatX
+import sys
 
 __all__ = ["special_tensordotRzRevOp"]
 
@@ -9,6 +10,12 @@ class special_tensordotRzRevOp(BaseOp):
     func_file = "./special_tensordotRz_rev.cc"
     func_name = "APPLY_SPECIFIC(special_tensordotRz_rev)"
 
+    def c_compile_args(self, *args, **kwargs):
+        args = super().c_compile_args(*args, **kwargs)
+        if sys.platform != "darwin":
+            args += ["-fopenmp"]
+        return args
+
     def make_node(self, T, M, theta, bf):
         in_args = [
             tt.as_tensor_variable(arg).astype(floatX)
@@ -24,3 +31,15 @@ class special_tensordotRzRevOp(BaseOp):
         shapes = args[-1]
         K = shapes[2][0]
         return ([self.N, self.N], [K])
+
+    def grad(self, inputs, gradients):
+        from .special_tensordotRz import special_tensordotRzOp
+
+        # There's no gradient with respect to `T` among the outputs
+        return reverse_grad(
+            self,
+            self.related_op(special_tensordotRzOp),
+            inputs,
+            [None] + list(gradients),
+            constant=(0,),
+        )
@@ -0,0 +1,64 @@
+#section support_code_struct
+
+// Shorthand
+#define DI0 DTYPE_INPUT_0
+#define DI1 DTYPE_INPUT_1
+#define DI2 DTYPE_INPUT_2
+#define DO0 DTYPE_OUTPUT_0
+#define TO0 TYPENUM_OUTPUT_0
+
+int APPLY_SPECIFIC(tensordotR)(PyArrayObject *input0,  // R
+                               PyArrayObject *input1,  // X
+                               PyArrayObject *input2,  // Z
+                               PyArrayObject **output0 // Y
+                               ) {
+
+  using namespace sp::theano;
+  using namespace sp::wigner;
+  using namespace sp::utils;
+
+  // Get the inputs
+  int success = 0;
+  int ndim = -1;
+  npy_intp *shape;
+
+  auto R_in = get_input<DI0>(&ndim, &shape, input0, &success);
+  if ((ndim != 1) || (shape[0] != nwig3(SP__LMAX))) {
+    PyErr_Format(PyExc_ValueError, "R has the wrong shape");
+    return 1;
+  }
+
+  ndim = -1;
+  auto X_in = get_input<DI1>(&ndim, &shape, input1, &success);
+  if ((ndim != 2) || (shape[0] != SP__N)) {
+    PyErr_Format(PyExc_ValueError, "X must be a matrix with N rows");
+    return 1;
+  }
+  npy_intp K = shape[1];
+
+  ndim = -1;
+  auto Z_in = get_input<DI2>(&ndim, &shape, input2, &success);
+  if ((ndim != 2) || (shape[0] != SP__N)) {
+    PyErr_Format(PyExc_ValueError, "Z must be a matrix with N rows");
+    return 1;
+  }
+  npy_intp J = shape[1];
+
+  // Allocate the outputs
+  ndim = 3;
+  std::vector<npy_intp> shape_vec(ndim);
+  shape_vec[0] = SP__N;
+  shape_vec[1] = K;
+  shape_vec[2] = J;
+  shape = &(shape_vec[0]);
+  auto Y_out = allocate_output<DO0>(ndim, shape, TO0, output0, &success);
+  if (success) {
+    return 1;
+  }
+
+  // Compute!
+  computeTensordotR(R_in, X_in, K, Z_in, J, Y_out);
+
+  // We're done!
+  return 0;
+}
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+from ..base_op import BaseOp
+from ...compat import Apply, theano, tt, floatX
+from .tensordotR_rev import tensordotRRevOp
+import sys
+
+__all__ = ["tensordotROp"]
+
+
+class tensordotROp(BaseOp):
+    """
+    The block-diagonal contraction
+
+        Y[l^2 + a, k, j] = sum_bc R[l][a, b, c] X[l^2 + c, k] Z[l^2 + b, j]
+
+    over all degrees ``l``, where ``R`` is the concatenation of the
+    flattened ``(2l + 1, 2l + 1, 2l + 1)`` Wigner basis tensors of each
+    degree, ``X`` is ``(N, K)`` and ``Z`` is ``(N, J)``. Returns the
+    ``(N, K, J)`` tensor ``Y``. Degrees are processed in parallel.
+
+    """
+
+    func_file = "./tensordotR.cc"
+    func_name = "APPLY_SPECIFIC(tensordotR)"
+
+    def __init__(self, *args, **kwargs):
+        self.grad_op = tensordotRRevOp(*args, **kwargs)
+        super().__init__(*args, **kwargs)
+
+    def c_compile_args(self, *args, **kwargs):
+        args = super().c_compile_args(*args, **kwargs)
+        if sys.platform != "darwin":
+            args += ["-fopenmp"]
+        return args
+
+    def make_node(self, R, X, Z):
+        CC = tt.extra_ops.CpuContiguous()
+        in_args = [
+            CC(tt.as_tensor_variable(arg).astype(floatX))
+            for arg in [R, X, Z]
+        ]
+        out_args = [
+            tt.TensorType(
+                dtype=floatX, broadcastable=[False, False, False]
+            )()
+        ]
+        return Apply(self, in_args, out_args)
+
+    def infer_shape(self, *args):
+        shapes = args[-1]
+        return ([self.N, shapes[1][1], shapes[2][1]],)
+
+    def grad(self, inputs, gradients):
+        R, X, Z = inputs
+        (bY,) = gradients
+        if isinstance(bY.type, theano.gradient.DisconnectedType):
+            bX, bZ = tt.zeros_like(X), tt.zeros_like(Z)
+        else:
+            bX, bZ = self.grad_op(R, X, Z, bY)
+        return (theano.gradient.grad_not_implemented(self, 0, R), bX, bZ)
+
+    def R_op(self, inputs, eval_points):
+        # The op is bilinear in `X` and `Z`
+        R, X, Z = inputs
+        if eval_points[0] is not None:
+            raise NotImplementedError(
+                "can't compute R_op with respect to the tensor R"
+            )
+        Y = None
+        if eval_points[1] is not None:
+            Y = self(R, eval_points[1], Z)
+        if eval_points[2] is not None:
+            dY = self(R, X, eval_points[2])
+            Y = dY if Y is None else Y + dY
+        return [Y]
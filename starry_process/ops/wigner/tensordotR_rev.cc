@@ -0,0 +1,77 @@
+#section support_code_struct
+
+// Shorthand
+#define DI0 DTYPE_INPUT_0
+#define DI1 DTYPE_INPUT_1
+#define DI2 DTYPE_INPUT_2
+#define DI3 DTYPE_INPUT_3
+#define DO0 DTYPE_OUTPUT_0
+#define DO1 DTYPE_OUTPUT_1
+#define TO0 TYPENUM_OUTPUT_0
+#define TO1 TYPENUM_OUTPUT_1
+
+int APPLY_SPECIFIC(tensordotR_rev)(PyArrayObject *input0,   // R
+                                   PyArrayObject *input1,   // X
+                                   PyArrayObject *input2,   // Z
+                                   PyArrayObject *input3,   // bY
+                                   PyArrayObject **output0, // bX
+                                   PyArrayObject **output1  // bZ
+                                   ) {
+
+  using namespace sp::theano;
+  using namespace sp::wigner;
+  using namespace sp::utils;
+
+  // Get the inputs
+  int success = 0;
+  int ndim = -1;
+  npy_intp *shape;
+
+  auto R_in = get_input<DI0>(&ndim, &shape, input0, &success);
+  if ((ndim != 1) || (shape[0] != nwig3(SP__LMAX))) {
+    PyErr_Format(PyExc_ValueError, "R has the wrong shape");
+    return 1;
+  }
+
+  ndim = -1;
+  auto X_in = get_input<DI1>(&ndim, &shape, input1, &success);
+  if ((ndim != 2) || (shape[0] != SP__N)) {
+    PyErr_Format(PyExc_ValueError, "X must be a matrix with N rows");
+    return 1;
+  }
+  npy_intp K = shape[1];
+
+  ndim = -1;
+  auto Z_in = get_input<DI2>(&ndim, &shape, input2, &success);
+  if ((ndim != 2) || (shape[0] != SP__N)) {
+    PyErr_Format(PyExc_ValueError, "Z must be a matrix with N rows");
+    return 1;
+  }
+  npy_intp J = shape[1];
+
+  ndim = -1;
+  auto bY_in = get_input<DI3>(&ndim, &shape, input3, &success);
+  if ((ndim != 3) || (shape[0] != SP__N) || (shape[1] != K) ||
+      (shape[2] != J)) {
+    PyErr_Format(PyExc_ValueError, "bY has the wrong shape");
+    return 1;
+  }
+
+  // Allocate the outputs
+  ndim = 2;
+  std::vector<npy_intp> shape_X_vec{SP__N, K};
+  std::vector<npy_intp> shape_Z_vec{SP__N, J};
+  auto bX_out =
+      allocate_output<DO0>(ndim, &(shape_X_vec[0]), TO0, output0, &success);
+  auto bZ_out =
+      allocate_output<DO1>(ndim, &(shape_Z_vec[0]), TO1, output1, &success);
+  if (success) {
+    return 1;
+  }
+
+  // Compute!
+  computeTensordotRGradient(R_in, X_in, K, Z_in, J, bY_in, bX_out, bZ_out);
+
+  // We're done!
+  return 0;
+}
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+from ..base_op import BaseOp, reverse_grad
+from ...compat import Apply, theano, tt, floatX
+import sys
+
+__all__ = ["tensordotRRevOp"]
+
+
+class tensordotRRevOp(BaseOp):
+    func_file = "./tensordotR_rev.cc"
+    func_name = "APPLY_SPECIFIC(tensordotR_rev)"
+
+    def c_compile_args(self, *args, **kwargs):
+        args = super().c_compile_args(*args, **kwargs)
+        if sys.platform != "darwin":
+            args += ["-fopenmp"]
+        return args
+
+    def make_node(self, R, X, Z, bY):
+        CC = tt.extra_ops.CpuContiguous()
+        in_args = [
+            CC(tt.as_tensor_variable(arg).astype(floatX))
+            for arg in [R, X, Z, bY]
+        ]
+        out_args = [
+            tt.TensorType(dtype=floatX, broadcastable=[False, False])(),
+            tt.TensorType(dtype=floatX, broadcastable=[False, False])(),
+        ]
+        return Apply(self, in_args, out_args)
+
+    def infer_shape(self, *args):
+        shapes = args[-1]
+        return (shapes[1], shapes[2])
+
+    def grad(self, inputs, gradients):
+        from .tensordotR import tensordotROp
+
+        # There's no gradient with respect to `R` among the outputs
+        return reverse_grad(
+            self,
+            self.related_op(tensordotROp),
+            inputs,
+            [None] + list(gradients),
+            constant=(0,),
+        )
@@ -2,6 +2,8 @@
 from ..base_op import BaseOp
 from ...compat import Apply, theano, tt, floatX
 from .tensordotRz_rev import tensordotRzRevOp
+import numpy as np
+import sys
 
 __all__ = ["tensordotRzOp"]
 
@@ -14,6 +16,12 @@ class tensordotRzOp(BaseOp):
         self.grad_op = tensordotRzRevOp(*args, **kwargs)
         super().__init__(*args, **kwargs)
 
+    def c_compile_args(self, *args, **kwargs):
+        args = super().c_compile_args(*args, **kwargs)
+        if sys.platform != "darwin":
+            args += ["-fopenmp"]
+        return args
+
     def make_node(self, M, theta):
         in_args = [
             tt.as_tensor_variable(arg).astype(floatX) for arg in [M, theta]
@@ -31,7 +39,29 @@ class tensordotRzOp(BaseOp):
     def grad(self, inputs, gradients):
         return self.grad_op(*inputs, gradients[0])
 
+    def generator(self):
+        """
+        The derivative of the ``z`` rotation matrix at ``theta = 0``, so
+        that ``d(M . Rz(theta)) / dtheta = (M . D) . Rz(theta)``.
+
+        """
+        D = np.zeros((self.N, self.N))
+        for l in range(self.ydeg + 1):
+            n0 = l * l + l
+            for m in range(1, l + 1):
+                D[n0 - m, n0 + m] = m
+                D[n0 + m, n0 - m] = -m
+        return D
+
     def R_op(self, inputs, eval_points):
-        if eval_points[0] is None:
-            return eval_points
-        return self.grad(inputs, eval_points)
+        M, theta = inputs
+        vM, vtheta = eval_points
+        f = None
+        if vM is not None:
+            f = self(vM, theta)
+        if vtheta is not None:
+            df = tt.shape_padright(vtheta) * self(
+                tt.dot(M, self.generator()), theta
+            )
+            f = df if f is None else f + df
+        return [f]
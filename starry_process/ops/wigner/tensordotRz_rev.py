@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
-from ..base_op import BaseOp
+from ..base_op import BaseOp, reverse_grad
 from ...compat import Apply, theano, tt, floatX
+import sys
 
 __all__ = ["tensordotRzRevOp"]
 
@@ -9,6 +10,12 @@ class tensordotRzRevOp(BaseOp):
     func_file = "./tensordotRz_rev.cc"
     func_name = "APPLY_SPECIFIC(tensordotRz_rev)"
 
+    def c_compile_args(self, *args, **kwargs):
+        args = super().c_compile_args(*args, **kwargs)
+        if sys.platform != "darwin":
+            args += ["-fopenmp"]
+        return args
+
     def make_node(self, M, theta, bf):
         in_args = [
             tt.as_tensor_variable(arg).astype(floatX) for arg in [M, theta, bf]
@@ -23,3 +30,10 @@ class tensordotRzRevOp(BaseOp):
         shapes = args[-1]
         K = shapes[0][0]
         return ([K, self.N], [K])
+
+    def grad(self, inputs, gradients):
+        from .tensordotRz import tensordotRzOp
+
+        return reverse_grad(
+            self, self.related_op(tensordotRzOp), inputs, gradients
+        )
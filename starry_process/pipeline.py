@@ -0,0 +1,203 @@
+"""
+A two-stage compiled pipeline for evaluating the likelihood.
+
+The mean and covariance of the spherical harmonic process depend only
+on the hyperparameters of the spot distribution, and computing them is by
+far the most expensive step in the evaluation of the likelihood. The
+``MomentsStage`` compiles this step on its own (together with its
+vector-Jacobian product), while the ``LikelihoodStage`` compiles the
+star-specific step, which takes the moments as inputs. This allows callers
+to compute the moments once and reuse them for many stars, inclinations,
+periods, etc.
+
+"""
+from .sp import StarryProcessMoments, StarryProcess
+from .defaults import defaults
+from .compat import theano, tt
+from collections import OrderedDict
+import numpy as np
+
+
+__all__ = ["MomentsStage", "LikelihoodStage"]
+
+
+class MomentsStage:
+    """
+    The first stage of the pipeline: a compiled function mapping the
+    hyperparameters ``(r, a, b, c, n)`` (or ``(r, dr, a, b, c, n)``) to the
+    mean and covariance of the spherical harmonic process and to the log of
+    the latitude jacobian (see ``StarryProcess.log_jac``).
+
+    Args:
+        uniform_size (bool, optional): If ``True``, the spot radii are
+            uniformly distributed in ``[r - dr, r + dr]`` and ``dr`` is one
+            of the hyperparameters. Otherwise, all spots have radius ``r``
+            (this is the same as ``dr=None`` in ``StarryProcess``). Default
+            is ``False``.
+        kwargs: Additional keyword arguments passed to ``StarryProcess``
+            (such as ``ydeg``).
+
+    """
+
+    def __init__(self, uniform_size=False, **kwargs):
+        if uniform_size:
+            self.hyperparameters = ("r", "dr", "a", "b", "c", "n")
+        else:
+            self.hyperparameters = ("r", "a", "b", "c", "n")
+        x = [tt.dscalar(name) for name in self.hyperparameters]
+        sp = StarryProcess(**dict(zip(self.hyperparameters, x)), **kwargs)
+        mean, cov, log_jac = sp.mean_ylm, sp.cov_ylm, sp.log_jac()
+        self._func = theano.function(
+            x, [mean, cov, log_jac], on_unused_input="ignore"
+        )
+
+        # The vector-Jacobian product
+        bmean = tt.dvector()
+        bcov = tt.dmatrix()
+        blog_jac = tt.dscalar()
+        grad = tt.grad(
+            None,
+            x,
+            known_grads=OrderedDict(
+                [(mean, bmean), (cov, bcov), (log_jac, blog_jac)]
+            ),
+            disconnected_inputs="ignore",
+        )
+        self._vjp = theano.function(
+            x + [bmean, bcov, blog_jac], grad, on_unused_input="ignore"
+        )
+
+    def _ingest(self, args, kwargs):
+        x = dict(zip(self.hyperparameters, args))
+        for name in self.hyperparameters:
+            if name not in x:
+                x[name] = kwargs.pop(name, defaults[name])
+        if len(kwargs):
+            raise TypeError(
+                "Unexpected hyperparameter(s): {}.".format(
+                    ", ".join(kwargs.keys())
+                )
+            )
+        return [x[name] for name in self.hyperparameters]
+
+    def __call__(self, *args, **kwargs):
+        """
+        Return the tuple ``(mean_ylm, cov_ylm, log_jac)`` given the
+        hyperparameters, passed either positionally (in the order given by
+        ``hyperparameters``) or by name. Missing hyperparameters take
+        their default values.
+
+        """
+        return tuple(self._func(*self._ingest(args, kwargs)))
+
+    def vjp(self, x, bmean_ylm, bcov_ylm, blog_jac=0.0):
+        """
+        Return the vector-Jacobian product of this stage, i.e., the
+        gradient of a scalar function of the outputs of this stage with
+        respect to the hyperparameters ``x`` (a sequence in the order
+        given by ``hyperparameters``), given its gradients with respect to
+        the outputs.
+
+        """
+        return np.array(
+            self._vjp(*self._ingest(x, {}), bmean_ylm, bcov_ylm, blog_jac)
+        )
+
+
+class LikelihoodStage:
+    """
+    The second stage of the pipeline: a compiled function mapping the
+    moments of the spherical harmonic process and the data and properties
+    of a star to the log likelihood (see ``StarryProcess.log_likelihood``).
+
+    Args:
+        grad (bool, optional): If ``True``, also return the gradient of the
+            log likelihood with respect to the moments, which may be passed
+            to ``MomentsStage.vjp``. Default is ``False``.
+        kwargs: Additional keyword arguments passed to ``StarryProcess``
+            (such as ``ydeg``, ``normalized`` or
+            ``marginalize_over_inclination``).
+
+    """
+
+    def __init__(self, grad=False, **kwargs):
+        self._grad = grad
+        mean_ylm = tt.dvector()
+        cov_ylm = tt.dmatrix()
+        t = tt.dvector()
+        flux = tt.dmatrix()
+        data_cov = tt.dscalar()
+        i = tt.dscalar()
+        p = tt.dscalar()
+        u = tt.dvector()
+        baseline_mean = tt.dscalar()
+        baseline_var = tt.dscalar()
+        sp = StarryProcessMoments(mean_ylm, cov_ylm, **kwargs)
+        lnlike = sp.log_likelihood(
+            t,
+            flux,
+            data_cov,
+            i=i,
+            p=p,
+            u=u,
+            baseline_mean=baseline_mean,
+            baseline_var=baseline_var,
+        )
+        outputs = [lnlike]
+        if grad:
+            outputs += tt.grad(lnlike, [mean_ylm, cov_ylm])
+        self._func = theano.function(
+            [
+                mean_ylm,
+                cov_ylm,
+                t,
+                flux,
+                data_cov,
+                i,
+                p,
+                u,
+                baseline_mean,
+                baseline_var,
+            ],
+            outputs,
+            on_unused_input="ignore",
+        )
+
+    def __call__(
+        self,
+        mean_ylm,
+        cov_ylm,
+        t,
+        flux,
+        data_cov,
+        i=defaults["i"],
+        p=defaults["p"],
+        u=defaults["u"][: defaults["udeg"]],
+        baseline_mean=defaults["baseline_mean"],
+        baseline_var=defaults["baseline_var"],
+    ):
+        """
+        Return the log likelihood of ``flux`` (a vector, or a matrix whose
+        rows are light curves of stars with the same properties) given the
+        moments ``mean_ylm`` and ``cov_ylm`` of the spherical harmonic
+        process. The data variance ``data_cov`` must be a scalar. If
+        ``grad`` is set, also return the gradient with respect to
+        ``mean_ylm`` and ``cov_ylm``.
+
+        """
+        out = self._func(
+            mean_ylm,
+            cov_ylm,
+            np.atleast_1d(t),
+            np.atleast_2d(flux),
+            data_cov,
+            i,
+            p,
+            np.atleast_1d(u),
+            baseline_mean,
+            baseline_var,
+        )
+        if self._grad:
+            return tuple(out)
+        else:
+            return out[0]
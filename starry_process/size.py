@@ -4,6 +4,31 @@ from .compat import tt, ifelse
 import numpy as np
 from scipy.special import legendre as P
 from .math import matrix_sqrt
+from .cache import cache, shared
+
+
+@cache()
+def _projection(ydeg, spts, eps4, smoothing):
+    """
+    Return the (smoothed) least-squares projection of a function of the
+    colatitude sampled on a grid of ``spts`` points onto the zonal
+    spherical harmonics. This doesn't depend on any user inputs, so it
+    is cached on disk.
+
+    """
+    theta = np.linspace(0, np.pi, spts)
+    cost = np.cos(theta)
+    B = np.hstack(
+        [
+            np.sqrt(2 * l + 1) * P(l)(cost).reshape(-1, 1)
+            for l in range(ydeg + 1)
+        ]
+    )
+    A = np.linalg.solve(B.T @ B + eps4 * np.eye(ydeg + 1), B.T)
+    l = np.arange(ydeg + 1)
+    i = l * (l + 1)
+    S = np.exp(-0.5 * i * smoothing ** 2)
+    return dict(Bp=S[:, None] * A)
 
 
 class Spot:
@@ -22,18 +47,9 @@ class Spot:
 
         """
         theta = np.linspace(0, np.pi, spts)
-        cost = np.cos(theta)
-        B = np.hstack(
-            [
-                np.sqrt(2 * l + 1) * P(l)(cost).reshape(-1, 1)
-                for l in range(ydeg + 1)
-            ]
-        )
-        A = np.linalg.solve(B.T @ B + eps4 * np.eye(ydeg + 1), B.T)
+        Bp = _projection(ydeg, spts, eps4, smoothing)["Bp"]
         l = np.arange(ydeg + 1)
         i = l * (l + 1)
-        S = np.exp(-0.5 * i * smoothing ** 2)
-        Bp = S[:, None] * A
         self.i = i
         self.ij = np.ix_(i, i)
         self.N = (ydeg + 1) ** 2
@@ -97,7 +113,7 @@ class SizeIntegral(MomentIntegral):
 
         """
         # Set up the spot operator
-        self._spot = Spot(ydeg=self._ydeg, **kwargs)
+        self._spot = shared(Spot, ydeg=self._ydeg, **kwargs)
 
         # Ingest params
         self._r = CheckBoundsOp(name="r", lower=0, upper=0.5 * np.pi)(
@@ -3,12 +3,38 @@ from .latitude import LatitudeIntegral, gauss2beta, beta2gauss
 from .longitude import LongitudeIntegral
 from .contrast import ContrastIntegral
 from .flux import FluxIntegral
-from .math import cho_factor, cho_solve, cast, is_tensor
+from .math import (
+    cho_factor,
+    cho_solve,
+    cho_inv,
+    cast,
+    is_tensor,
+    is_evenly_spaced,
+)
+from .covariance import (
+    Covariance,
+    DenseCovariance,
+    DiagonalCovariance,
+    LowRankCovariance,
+    SemiseparableCovariance,
+    ToeplitzCovariance,
+    is_zero,
+)
+from .cost import solver_costs
+from .cache import shared
 from .defaults import defaults
 from .visualize import mollweide_transform, latlon_transform, visualize
-from .ops import CheckBoundsOp, AlphaBetaOp, SampleYlmTemporalOp
-from .compat import tt, ifelse, RandomStream, random_normal, random_uniform
+from .ops import (
+    CheckBoundsOp,
+    AlphaBetaOp,
+    SampleYlmTemporalOp,
+    LowRankLogLikeOp,
+)
+from .compat import tt, RandomStream, random_normal, random_uniform
 import numpy as np
+import logging
+
+logger = logging.getLogger("starry_process")
 
 
 __all__ = ["StarryProcess"]
@@ -182,6 +208,14 @@ class StarryProcess(object):
                 This value is used to penalize such distributions when
                 computing the jacobian of the transformation.
                 Default is %%defaults["sigma_max"]%%.
+            latitude_tol (float, optional): If set, the latitude integrals
+                are interpolated from a table of the moments of the latitude
+                distribution instead of being computed from scratch at every
+                call. The table is computed once (and cached on disk) on a
+                grid fine enough for the relative error of the integrals to
+                be below this value; a ``ValueError`` is raised if that
+                can't be achieved. Values around ``1e-4`` are cheap to
+                tabulate. Default is %%defaults["latitude_tol"]%% (no table).
             compile_args (list, optional): Additional arguments to be passed to
                 the C compiler when compiling the ops for this class. Each
                 entry in the list should be a tuple of ``(name, value)`` pairs.
@@ -196,6 +230,51 @@ class StarryProcess(object):
                 diagonal of the spherical harmonic covariance matrix
                 above degree ``15``, which become particularly unstable.
                 Default is %%defaults["epsy15"]%%.
+            solver (str, optional): The linear algebra strategy used to
+                evaluate the likelihood, predictions and samples in flux
+                space. If ``"dense"``, the full flux covariance matrix is
+                instantiated and Cholesky-factorized at a cost of
+                ``O(K^3)``, where ``K`` is the number of data points. If
+                ``"lowrank"``, the covariance is instead kept in the
+                factored form ``U . S . U^T`` and all solves are done via
+                the Woodbury identity. If ``marginalize_over_inclination``
+                is ``True``, this is an *exact* rank ``2 * ydeg + 1``
+                Fourier expansion in the phase, at a cost of
+                ``O(K ydeg^2)``; this also removes the dependence on
+                ``covpts``. Otherwise, ``U`` is the flux design matrix and
+                the cost is ``O(K N^2 + N^3)``, where
+                ``N = (ydeg + 1)^2``. This option is ignored for
+                time-variable processes. If ``"celerite"`` and ``tau`` is
+                set, the covariance of the time-variable process is
+                represented as a semiseparable matrix and the likelihood
+                and predictions are evaluated with the generalized
+                celerite algorithm at a cost of ``O(K R^2)``, where ``R``
+                is the rank of the low-rank representation above. This
+                requires the ``temporal_kernel`` to have a ``transition``
+                attribute (see ``starry_process.temporal``); it works for
+                arbitrarily sampled times. For processes that are not
+                time-variable, ``"celerite"`` is the same as
+                ``"lowrank"``. If ``"toeplitz"`` and the (numerical) times
+                are evenly spaced, the covariance, which depends only on
+                the time lag, is represented as a Toeplitz matrix and
+                solved with the Levinson-Durbin recursion at a cost of
+                ``O(K^2)``, without instantiating it; this works for
+                time-variable processes as well, but requires the data
+                variance to be the same for all points. Light curves with
+                gaps are not evenly spaced and use the ``"lowrank"`` or
+                ``"dense"`` solver instead. If a solver can't be used for
+                a given problem (e.g., if the data covariance is a full
+                matrix), the ``"dense"`` solver is used instead. If
+                ``"auto"``, the cheapest of these for each call is chosen
+                based on the number of data points, ``ydeg``, the
+                structure of the noise, time-variability and
+                normalization, using the cost model in
+                ``starry_process.cost``; the decision is reported in
+                ``solver_info``. The ``"celerite"`` and ``"toeplitz"``
+                solvers don't support second derivatives of the
+                likelihood (e.g., its Hessian), so set ``solver`` to
+                ``"lowrank"`` or ``"dense"`` to compute these. Default is
+                %%defaults["solver"]%%.
             mx (int, optional): x resolution of Mollweide grid
                 (for map visualizations). Default is %%defaults["mx"]%%.
             my (int, optional): y resolution of Mollweide grid
@@ -238,6 +317,25 @@ class StarryProcess(object):
         assert self._udeg >= 0, "Degree of limb darkening must be >= 0."
         self._nylm = (self._ydeg + 1) ** 2
         self._covpts = int(covpts)
+        self._solver = kwargs.get("solver", defaults["solver"])
+        if self._solver not in [
+            "auto",
+            "dense",
+            "lowrank",
+            "celerite",
+            "toeplitz",
+        ]:
+            raise ValueError("Invalid value for `solver`.")
+        self._solver_info = None
+        if (
+            self._solver == "celerite"
+            and self._time_variable
+            and not hasattr(self._temporal_kernel, "transition")
+        ):
+            raise ValueError(
+                "The `celerite` solver requires a `temporal_kernel` "
+                "with a `transition` attribute."
+            )
         self._kwargs = kwargs
         self._M = None
         self._mx = kwargs.get("mx", defaults["mx"])
@@ -253,25 +351,39 @@ class StarryProcess(object):
         )
         self._get_alpha_beta = AlphaBetaOp(self._normN)
 
-        # Initialize the Ylm integral ops
+        # Mean and covariance of the Ylm process
+        self._marginalize_over_inclination = marginalize_over_inclination
+        self._set_moments(*self._compute_moments(r, dr, a, b, c, n))
+
+        # Seed the randomizer
+        self.random = RandomStream(kwargs.get("seed", 0))
+
+    def _compute_moments(self, r, dr, a, b, c, n):
+        """
+        Return the mean and covariance of the Ylm process given
+        the hyperparameters.
+
+        """
+        kwargs = self._kwargs
         self._size = SizeIntegral(r, dr, **kwargs)
         self._latitude = LatitudeIntegral(a, b, child=self._size, **kwargs)
         self._longitude = LongitudeIntegral(child=self._latitude, **kwargs)
         self._contrast = ContrastIntegral(
             c, n, child=self._longitude, **kwargs
         )
+        return self._contrast.mean(), self._contrast.cov()
 
-        # Mean and covariance of the Ylm process
-        self._mean_ylm = self._contrast.mean()
-        self._cov_ylm = self._contrast.cov()
+    def _set_moments(self, mean_ylm, cov_ylm):
+        """
+        Set the mean and covariance of the Ylm process and initialize
+        the flux integral op.
+
+        """
+        self._mean_ylm = mean_ylm
+        self._cov_ylm = cov_ylm
         self._cho_cov_ylm = cho_factor(self._cov_ylm)
-        self._LInv = cho_solve(
-            self._cho_cov_ylm, tt.eye((self._ydeg + 1) ** 2)
-        )
+        self._LInv = cho_inv(self._cho_cov_ylm)
         self._LInvmu = cho_solve(self._cho_cov_ylm, self._mean_ylm)
-
-        # Initialize the flux integral op
-        self._marginalize_over_inclination = marginalize_over_inclination
         self._flux = FluxIntegral(
             self._mean_ylm,
             self._cov_ylm,
@@ -280,9 +392,6 @@ class StarryProcess(object):
             **self._kwargs,
         )
 
-        # Seed the randomizer
-        self.random = RandomStream(kwargs.get("seed", 0))
-
     @special_property
     def a(self):
         """Hyperparameter controlling the shape of the latitude distribution."""
@@ -358,6 +467,88 @@ class StarryProcess(object):
         """
         return self._covpts
 
+    @property
+    def solver(self):
+        """
+        The linear algebra strategy used to evaluate the flux process.
+
+        """
+        return self._solver
+
+    @property
+    def solver_info(self):
+        """
+        The solver used in the most recent call to a method that evaluates
+        the flux process, as a dictionary with keys ``solver`` (the name of
+        the solver), ``cost`` (its estimated cost in seconds), ``costs``
+        (the estimated costs of all the solvers that could have been used)
+        and ``ntimes`` (the number of data points, or ``None`` if not known
+        when the graph was built). See ``starry_process.cost``.
+
+        """
+        return self._solver_info
+
+    def _get_solver(
+        self, t, flux=None, data_cov=0.0, baseline_var=0.0, structured=True
+    ):
+        """
+        Return the name of the solver to use for a given problem.
+
+        If ``solver`` is ``"auto"``, this is the cheapest exact solver
+        according to the cost model in ``starry_process.cost``; otherwise,
+        it is the requested solver if it can be used for this problem, or
+        ``"dense"`` if not. If ``structured`` is ``False``, the
+        semiseparable representation is not allowed.
+
+        """
+        # Number of data points and light curves, if known
+        if is_tensor(t):
+            K = None
+        else:
+            K = np.size(t)
+        if flux is None or is_tensor(flux):
+            nflux = 1
+        else:
+            nflux = np.size(flux) // max(1, np.size(t))
+
+        # Estimate the cost of all solvers we can use
+        data_cov = cast(data_cov)
+        baseline_var = cast(baseline_var)
+        costs = solver_costs(
+            K,
+            self._ydeg,
+            nflux=nflux,
+            marginalize_over_inclination=self._marginalize_over_inclination,
+            normalized=self._normalized,
+            time_variable=self._time_variable,
+            baseline_var=not is_zero(baseline_var),
+            dense_noise=data_cov.ndim == 2 or baseline_var.ndim == 2,
+            celerite=structured
+            and hasattr(self._temporal_kernel, "transition"),
+            toeplitz=structured
+            and data_cov.ndim == 0
+            and is_evenly_spaced(t),
+        )
+
+        # Choose one
+        if self._solver == "auto":
+            solver = min(costs, key=costs.get)
+        elif self._solver in costs:
+            solver = self._solver
+        elif self._solver in ["celerite", "toeplitz"] and "lowrank" in costs:
+            solver = "lowrank"
+        else:
+            solver = "dense"
+        self._solver_info = dict(
+            solver=solver, cost=costs[solver], costs=costs, ntimes=K
+        )
+        logger.debug(
+            "Using the `{}` solver (estimated cost: {:.2e} s).".format(
+                solver, costs[solver]
+            )
+        )
+        return solver
+
     @property
     def normalized(self):
         """
@@ -604,36 +795,27 @@ class StarryProcess(object):
                 "Method not implemented for time-variable maps."
             )
 
-        # Get the full data covariance
+        # Get the data covariance
         flux = cast(flux)
-        data_cov = cast(data_cov)
-        if data_cov.ndim == 0:
-            C = data_cov * tt.eye(flux.shape[0])
-        elif data_cov.ndim == 1:
-            C = tt.diag(data_cov)
-        else:
-            C = data_cov
-
-        # TODO: If we're not marginalizing over the baseline,
-        # we don't need to instantiate the full covariance matrix!
-
-        # Marginalize over the baseline; note we're adding
-        # `baseline_var` to *every* entry in the covariance matrix
-        C += baseline_var
+        K = flux.shape[0]
+        C = self._noise_covariance(K, data_cov, baseline_var)
 
-        # Compute C^-1 . A
-        cho_C = cho_factor(C)
+        # Compute A^T . C^-1 . (flux - baseline_mean) and A^T . C^-1 . A
         A = self._flux.design_matrix(t, i, p, u)
-        CInvA = cho_solve(cho_C, A)
+        b = tt.concatenate(
+            (tt.reshape(flux - baseline_mean, (-1, 1)), A), axis=1
+        )
+        x = C.inv_quad(A, b)
+        ATCInvy = x[:, 0]
+        ATCInvA = x[:, 1:]
 
         # Compute W = A^T . C^-1 . A + L^-1
-        W = tt.dot(tt.transpose(A), CInvA) + self._LInv
+        W = ATCInvA + self._LInv
 
         # Compute the conditional mean and covariance
         cho_W = cho_factor(W)
-        M = cho_solve(cho_W, tt.transpose(CInvA))
-        ymu = tt.dot(M, flux - baseline_mean) + cho_solve(cho_W, self._LInvmu)
-        ycov = cho_solve(cho_W, tt.eye(cho_W.shape[0]))
+        ymu = cho_solve(cho_W, ATCInvy + self._LInvmu)
+        ycov = cho_inv(cho_W)
         cho_ycov = cho_factor(ycov)
 
         # Sample from it
@@ -693,38 +875,165 @@ class StarryProcess(object):
                 star. Default is %%defaults["u"]%%.
 
         """
-        cov = self._flux.cov(t, i, p, u)
-        if self._time_variable:
-            cov *= self._temporal_kernel(t, t, self._tau)
+        solver = self._get_solver(t, structured=False)
+        return self._covariance(t, i, p, u, solver=solver).dense()
+
+    def _covariance(
+        self, t, i, p, u, data_cov=0.0, baseline_var=0.0, solver="dense"
+    ):
+        """
+        Return the flux covariance (optionally including the data covariance
+        and the baseline variance) as a structured ``Covariance`` operator.
+
+        The representation depends on the ``solver`` (see ``_get_solver``):
+        a dense matrix, a low-rank matrix, a Toeplitz matrix or, for
+        time-variable processes, a semiseparable matrix.
+
+        """
+        t = cast(t)
+        K = t.shape[0]
+        data_cov = cast(data_cov)
+        baseline_var = cast(baseline_var)
+        if solver == "celerite":
+            cov = self._semiseparable_cov(t, i, p, u)
+        elif solver == "toeplitz":
+            cov = self._toeplitz_cov(t, i, p, u)
+        elif solver == "lowrank":
+            cov = LowRankCovariance(*self._flux.low_rank_cov(t, i, p, u))
+        else:
+            Sig = self._flux.cov(t, i, p, u)
+            if self._time_variable:
+                Sig *= self._temporal_kernel(t, t, self._tau)
+            cov = DenseCovariance(Sig)
         if self._normalized:
             mean = self._flux.mean(t, i, p, u)[0]
-            return self._normalize(1.0 + mean, cov)
+            cov = self._normalize(1.0 + mean, cov)
+        if is_zero(data_cov) and is_zero(baseline_var):
+            return cov
+        return cov + self._noise_covariance(K, data_cov, baseline_var)
+
+    def _noise_covariance(self, K, data_cov, baseline_var):
+        """
+        Return the sum of the data covariance and the baseline variance
+        as a ``Covariance`` operator.
+
+        """
+        # Get the data covariance
+        data_cov = cast(data_cov)
+        if data_cov.ndim < 2:
+            cov = DiagonalCovariance(data_cov, K)
         else:
+            cov = DenseCovariance(data_cov)
+
+        # Marginalize over the baseline; note that we are adding
+        # `baseline_var` to *every* entry in the covariance matrix
+        # To see why, c.f. Equation (4) in Luger et al. (2017),
+        # where `A` is a column vector of ones (our baseline regressor)
+        # and `Lambda` is our prior baseline variance. This is just a
+        # rank-1 update to the covariance.
+        if is_zero(baseline_var):
             return cov
+        baseline_var = cast(baseline_var)
+        if baseline_var.ndim == 0:
+            return cov + LowRankCovariance(
+                tt.ones((K, 1)), tt.reshape(baseline_var, (1, 1))
+            )
+        else:
+            return cov + DenseCovariance(baseline_var)
 
-    def _normalize(self, mu, Sig):
+    def _normalize(self, mu, cov):
         """
         Return the series expansion of the normalized covariance matrix.
+        If ``cov`` is a ``Covariance`` operator, so is the output, and the
+        correction terms are a symbolic rank-2 update; otherwise, the
+        output is a dense matrix.
 
         See Luger (2021) for details.
 
         """
+        if not isinstance(cov, Covariance):
+            return self._normalize(mu, DenseCovariance(cov)).dense()
+
         # Terms
-        K = Sig.shape[0]
-        j = tt.ones((K, 1))
-        m = tt.mean(Sig)
-        q = tt.dot(Sig, j) / (K * m)
+        K = cov.K
+        Sigj = cov.dot(tt.ones((K, 1)))[:, 0]
+        m = tt.sum(Sigj) / K ** 2
+        q = Sigj / (K * m)
         self._z = m / mu ** 2
-        p = j - q
+        p = 1.0 - q
         alpha, beta, _, _ = self._get_alpha_beta(self._z)
 
         # We're done
-        ppT = tt.dot(p, tt.transpose(p))
-        qqT = tt.dot(q, tt.transpose(q))
-        normSig = (alpha / mu ** 2) * Sig + self._z * (
-            (alpha + beta) * ppT - alpha * qqT
+        return cov.scale(alpha / mu ** 2) + LowRankCovariance(
+            tt.stack((p, q), axis=1),
+            tt.diag(
+                tt.stack((self._z * (alpha + beta), -self._z * alpha))
+            ),
         )
-        return normSig
+
+    def _semiseparable_cov(self, t, i, p, u):
+        """
+        Return the semiseparable representation of the flux covariance
+        of a time-variable process; see ``math.celerite_solve``.
+
+        Each of the ``nblk`` columns of the low-rank factor of the
+        rotational covariance is paired with the two-dimensional state of
+        the temporal kernel.
+
+        """
+        # The solver requires sorted times
+        t = cast(t)
+        K = t.shape[0]
+        inds = tt.argsort(t)
+        t = t[inds]
+
+        # Generators of the semiseparable matrix
+        if self._marginalize_over_inclination:
+            nblk = 2 * self._ydeg + 1
+        else:
+            nblk = self._nylm
+        Ur, Sr = self._flux.low_rank_cov(t, i, p, u)
+        U = tt.reshape(tt.stack((Ur, tt.zeros_like(Ur)), axis=2), (K, -1))
+        V = tt.dot(Ur, Sr)
+        V = tt.reshape(tt.stack((V, tt.zeros_like(V)), axis=2), (K, -1))
+        dt = tt.concatenate((tt.zeros(1), t[1:] - t[:-1]))
+        Phi = self._temporal_kernel.transition(dt, self._tau)
+        return SemiseparableCovariance(
+            tt.sum(U * V, axis=1), U, V, Phi, nblk, inds
+        )
+
+    def _toeplitz_cov(self, t, i, p, u):
+        """
+        Return the Toeplitz representation of the flux covariance for
+        evenly spaced times. Its first column is the (exact) covariance
+        between the first data point and all the others.
+
+        """
+        t = cast(t)
+        U, S = self._flux.low_rank_cov(t, i, p, u)
+        c = tt.dot(U, tt.dot(S, U[0]))
+        if self._time_variable:
+            c *= self._temporal_kernel(t, t[:1], self._tau)[:, 0]
+        return ToeplitzCovariance(c)
+
+    def _cross_cov(self, t1, t2, i, p, u, solver="dense"):
+        """
+        Return the flux covariance between the times ``t1`` and ``t2``.
+
+        """
+        if solver != "dense":
+            U1, S = self._flux.low_rank_cov(t1, i, p, u)
+            U2, _ = self._flux.low_rank_cov(t2, i, p, u)
+            cov = tt.dot(tt.dot(U1, S), tt.transpose(U2))
+        elif self._marginalize_over_inclination:
+            cov = self._flux._interpolate_cross_cov(cast(t1), cast(t2))
+        else:
+            A1 = self._flux.design_matrix(t1, i, p, u)
+            A2 = self._flux.design_matrix(t2, i, p, u)
+            cov = tt.dot(tt.dot(A1, self._cov_ylm), tt.transpose(A2))
+        if self._time_variable:
+            cov *= self._temporal_kernel(t1, t2, self._tau)
+        return cov
 
     def sample(
         self,
@@ -757,11 +1066,11 @@ class StarryProcess(object):
             An array of samples of shape ``(nsamples, ntimes)``.
 
         """
+        solver = self._get_solver(t, data_cov=eps, structured=False)
         t = cast(t)
-        U = random_normal(self.random, (t.shape[0], nsamples))
-        cho_cov = cho_factor(self.cov(t, i, p, u) + eps * tt.eye(t.shape[0]))
+        cov = self._covariance(t, i, p, u, data_cov=eps, solver=solver)
         return tt.transpose(
-            self.mean(t, i, p, u)[:, None] + tt.dot(cho_cov, U)
+            self.mean(t, i, p, u)[:, None] + cov.sample(self.random, nsamples)
         )
 
     def predict(
@@ -846,60 +1155,40 @@ class StarryProcess(object):
             )
 
         # Parse inputs
+        solver = self._get_solver(t, flux, data_cov, baseline_var)
         t = cast(t)
-        cov_t = self.cov(t, i, p, u)
         if t_sample is None:
-            ts = cast(t)
-            cov_ts = cov_t
+            ts = t
         else:
             ts = cast(t_sample)
-            cov_ts = self.cov(ts, i, p, u)
         y = cast(flux - baseline_mean)
-        data_cov = cast(data_cov)
-        if data_cov.ndim == 0:
-            data_cov = data_cov * tt.eye(tt.shape(t)[0])
-        elif data_cov.ndim == 1:
-            data_cov = tt.diag(data_cov)
 
         # Process mean (independent of time)
         mean = self._flux.mean(cast([0.0]), i, p, u)[0]
 
         # Covariance at (t, t)
-        K_t_t = cov_t + data_cov + baseline_var
+        K_t_t = self._covariance(
+            t,
+            i,
+            p,
+            u,
+            data_cov=data_cov,
+            baseline_var=baseline_var,
+            solver=solver,
+        )
 
-        # Covariance at (ts, ts)
-        K_ts_ts = cov_ts + baseline_var
+        # Covariance at (ts, ts) and (ts, t)
+        K_ts_ts = self._cross_cov(ts, ts, i, p, u, solver) + baseline_var
+        K_ts_t = self._cross_cov(ts, t, i, p, u, solver) + baseline_var
 
-        # Covariance at (ts, t)
-        if self._marginalize_over_inclination:
-            theta_t = 2 * np.pi * tt.mod(t / self._flux._p, 1.0)
-            theta_ts = 2 * np.pi * tt.mod(ts / self._flux._p, 1.0)
-            x = tt.reshape(
-                tt.abs_(theta_ts[:, None] - theta_t[None, :]), (-1,)
-            )
-            inds = tt.cast(tt.floor(x / self._flux._dx), "int64")
-            x0 = (x - self._flux._xp[inds + 1]) / self._flux._dx
-            K_ts_t = tt.reshape(
-                self._flux._a0[inds]
-                + self._flux._a1[inds] * x0
-                + self._flux._a2[inds] * x0 ** 2
-                + self._flux._a3[inds] * x0 ** 3,
-                (theta_ts.shape[0], theta_t.shape[0]),
-            )
-        else:
-            A_ts = self._flux.design_matrix(ts, i, p, u)
-            A_t = self._flux.design_matrix(t, i, p, u)
-            K_ts_t = tt.dot(tt.dot(A_ts, self._cov_ylm), tt.transpose(A_t))
-        if self._time_variable:
-            K_ts_t *= self._temporal_kernel(ts, t, self._tau)
-        K_ts_t += baseline_var
-
-        # Compute the mean and covariance of the GP
-        cho_K_t_t = cho_factor(K_t_t)
-        mu = mean + tt.dot(K_ts_t, cho_solve(cho_K_t_t, y - mean))
-        K = K_ts_ts - tt.dot(
-            K_ts_t, cho_solve(cho_K_t_t, tt.transpose(K_ts_t))
+        # Compute the mean and covariance of the GP; solve the system for
+        # the residuals and the cross-covariance at once
+        b = tt.concatenate(
+            (tt.reshape(y - mean, (-1, 1)), tt.transpose(K_ts_t)), axis=1
         )
+        x = K_t_t.inv_quad(tt.transpose(K_ts_t), b)
+        mu = mean + x[:, 0]
+        K = K_ts_ts - x[:, 1:]
         return mu, K
 
     def sample_conditional(
@@ -997,7 +1286,7 @@ class StarryProcess(object):
         cho_K = cho_factor(K + eps * tt.eye(tt.shape(K)[0]))
 
         # Draw samples
-        U = random_normal(self.random, (ts.shape[0], nsamples))
+        U = random_normal(self.random, (tt.shape(K)[0], nsamples))
         samples = tt.transpose(mu[:, None] + tt.dot(cho_K, U))
         return samples
 
@@ -1126,51 +1415,27 @@ class StarryProcess(object):
             marginalized over all possible spherical harmonic vectors.
 
         """
-        # Get the flux gp mean and covariance
+        # Get the flux gp mean and the full covariance; covariances add!
+        solver = self._get_solver(t, flux, data_cov, baseline_var)
         gp_mean = self.mean(t, i=i, p=p, u=u)
-        gp_cov = self.cov(t, i=i, p=p, u=u)
+        gp_cov = self._covariance(
+            t,
+            i,
+            p,
+            u,
+            data_cov=data_cov,
+            baseline_var=baseline_var,
+            solver=solver,
+        )
         K = gp_mean.shape[0]
 
-        # Get the full data covariance
-        data_cov = cast(data_cov)
-        if data_cov.ndim == 0:
-            C = data_cov * tt.eye(K)
-        elif data_cov.ndim == 1:
-            C = tt.diag(data_cov)
-        else:
-            C = data_cov
-
-        # Covariances add!
-        gp_cov += C
-
-        # Marginalize over the baseline; note that we are adding
-        # `baseline_var` to *every* entry in the covariance matrix
-        # To see why, c.f. Equation (4) in Luger et al. (2017),
-        # where `A` is a column vector of ones (our baseline regressor)
-        # and `Lambda` is our prior baseline variance
-        gp_cov += baseline_var
-
-        # Cholesky factorization
-        cho_gp_cov = cho_factor(gp_cov)
-
         # Compute the marginal likelihood
         mean = tt.reshape(gp_mean + baseline_mean, (K, 1))
         r = (
             tt.reshape(tt.transpose(tt.as_tensor_variable(flux)), (K, -1))
             - mean
         )
-        M = r.shape[1]
-        lnlike = -0.5 * ifelse(
-            M > 1,
-            tt.sum(
-                tt.batched_dot(
-                    tt.transpose(r), tt.transpose(cho_solve(cho_gp_cov, r))
-                )
-            ),
-            tt.sum(tt.dot(tt.transpose(r), cho_solve(cho_gp_cov, r))),
-        )
-        lnlike -= M * tt.sum(tt.log(tt.diag(cho_gp_cov)))
-        lnlike -= 0.5 * K * M * tt.log(2 * np.pi)
+        lnlike = gp_cov.log_likelihood(r)
 
         # If we're modeling a normalized process, return -np.inf log likelihood
         # if we're outside the regime where the GP is a good approximation
@@ -1187,6 +1452,142 @@ class StarryProcess(object):
             tt.isnan(lnlike), -np.inf * tt.ones_like(lnlike), lnlike
         )
 
+    def log_likelihood_batch(
+        self,
+        t,
+        flux,
+        data_cov,
+        i=defaults["i"],
+        p=defaults["p"],
+        u=defaults["u"][: defaults["udeg"]],
+        baseline_mean=defaults["baseline_mean"],
+        baseline_var=defaults["baseline_var"],
+    ):
+        """
+        Compute the total log marginal likelihood of the light curves of
+        a batch of stars that share the same spot properties.
+
+        Unlike the matrix ``flux`` input to ``log_likelihood``, the light
+        curves may all have different lengths, and each star may have its
+        own period, inclination, limb darkening coefficients and noise.
+        The moments of the spherical harmonic process are computed once,
+        and the likelihoods of all stars (as well as their gradients) are
+        evaluated in a single, parallelized op using the exact low-rank
+        representation of the covariance (see ``solver``). This is
+        currently not implemented for time-variable surfaces.
+
+        Args:
+            t (list): The time arrays of each of the ``nstars`` stars.
+            flux (list): The flux arrays of each star. See
+                ``log_likelihood`` for details.
+            data_cov (scalar or list): The data variance. This may be a
+                scalar shared by all stars, or a list containing the
+                (scalar or vector) variance of each star.
+            i (scalar or vector, optional): The inclination of each star in
+                degrees. Default is %%defaults["i"]%%. If
+                ``marginalize_over_inclination`` is set, this argument is
+                ignored.
+            p (scalar or vector, optional): The rotational period of each
+                star. Default is %%defaults["p"]%%.
+            u (vector or matrix, optional): The limb darkening coefficients,
+                either shared by all stars or one row per star.
+                Default is %%defaults["u"]%%.
+            baseline_mean (scalar or vector, optional): The flux baseline of
+                each star. Default is %%defaults["baseline_mean"]%%.
+            baseline_var (scalar or vector, optional): The variance on the
+                true value of the baseline of each star. Default is
+                %%defaults["baseline_var"]%%.
+
+        Returns:
+            The sum of the log marginal likelihoods of all light curves.
+
+        """
+        if self._time_variable:
+            raise NotImplementedError(
+                "Method not implemented for time-variable maps."
+            )
+
+        # Concatenate the light curves
+        nstars = len(t)
+        assert len(flux) == nstars, "Mismatch in the number of light curves."
+        t = [cast(tn, vectorize=True) for tn in t]
+        lengths = tt.stack([tn.shape[0] for tn in t])
+        offsets = tt.concatenate(
+            (tt.zeros(1, dtype="int64"), tt.cumsum(lengths))
+        )
+        star = tt.extra_ops.repeat(tt.arange(nstars), lengths)
+        Kn = tt.cast(lengths, tt.config.floatX)
+        if isinstance(data_cov, (list, tuple)):
+            assert (
+                len(data_cov) == nstars
+            ), "Mismatch in the number of data variances."
+            d = tt.concatenate(
+                [cast(dn) * tt.ones_like(tn) for dn, tn in zip(data_cov, t)]
+            )
+        else:
+            d = cast(data_cov) * tt.ones_like(tt.concatenate(t))
+        t = tt.concatenate(t)
+        flux = tt.concatenate([cast(fn, vectorize=True) for fn in flux])
+        i = cast(i) * tt.ones(nstars)
+        p = cast(p) * tt.ones(nstars)
+        baseline_mean = (cast(baseline_mean) * tt.ones(nstars))[star]
+
+        # Segment sums over the points of each star
+        segsum = lambda x: tt.inc_subtensor(
+            tt.zeros((nstars,) + tuple(x.shape[1:]))[star], x
+        )
+
+        # The low-rank factorization of the flux covariance
+        U, S, mean = self._flux.batch_low_rank_cov(t, star, i, p, u)
+        scale = tt.ones(nstars)
+        r = flux - baseline_mean
+        if not self._normalized:
+            r -= mean
+
+        # Additional low-rank terms
+        V = []
+        T = []
+        if self._normalized:
+            u1 = segsum(U)
+            Su1 = tt.sum(S * u1[:, None, :], axis=2)
+            Sigj = tt.sum(U * Su1[star], axis=1)
+            m = segsum(Sigj) / Kn ** 2
+            q = Sigj / (Kn * m)[star]
+            mu = 1.0 + segsum(mean) / Kn
+            z = m / mu ** 2
+            alpha, beta, _, _ = self._get_alpha_beta(z)
+            scale = alpha / mu ** 2
+            V += [1.0 - q, q]
+            T += [z * (alpha + beta), -z * alpha]
+        if not is_zero(baseline_var):
+            V += [tt.ones_like(t)]
+            T += [cast(baseline_var) * tt.ones(nstars)]
+        Q = len(V)
+        if Q:
+            V = tt.stack(V, axis=1)
+            T = tt.set_subtensor(
+                tt.zeros((nstars, Q, Q))[:, np.arange(Q), np.arange(Q)],
+                tt.stack(T, axis=1),
+            )
+        else:
+            V = tt.zeros((t.shape[0], 0))
+            T = tt.zeros((nstars, 0, 0))
+
+        # Compute the log likelihood
+        lnlike_op = shared(LowRankLogLikeOp, ydeg=self._ydeg, udeg=self._udeg)
+        lnlike = lnlike_op(U, S, scale, V, T, r, d, offsets)[0]
+
+        # See `log_likelihood`
+        if self._normalized:
+            lnlike = tt.switch(
+                tt.any(tt.gt(z, self._normzmax)),
+                -np.inf * tt.ones_like(lnlike),
+                lnlike,
+            )
+        return tt.switch(
+            tt.isnan(lnlike), -np.inf * tt.ones_like(lnlike), lnlike
+        )
+
     def __add__(self, other):
         return StarryProcessSum(self, other)
 
@@ -1348,6 +1749,7 @@ class StarryProcessSum(StarryProcess):
             == second._marginalize_over_inclination
         ), "Mismatch in `marginalize_over_inclination`."
         assert first._covpts == second._covpts, "Mismatch in `covpts`."
+        assert first._solver == second._solver, "Mismatch in `solver`."
         assert (
             first._time_variable is False and second._time_variable is False
         ), "Sums of `StarryProcess` instances not implemented for time-variable surfaces."
@@ -1359,10 +1761,13 @@ class StarryProcessSum(StarryProcess):
             first._marginalize_over_inclination
         )
         self._covpts = first._covpts
+        self._solver = first._solver
+        self._solver_info = None
         self._normN = first._normN
         self._normzmax = first._normzmax
         self._get_alpha_beta = first._get_alpha_beta
         self._time_variable = False
+        self._temporal_kernel = None
         self._kwargs = first._kwargs
         self._M = first._M
         self._mx = first._mx
@@ -1378,19 +1783,34 @@ class StarryProcessSum(StarryProcess):
                 self._children += [child]
 
         # Sum the random variables
-        self._mean_ylm = first._mean_ylm + second._mean_ylm
-        self._cov_ylm = first._cov_ylm + second._cov_ylm
-        self._cho_cov_ylm = cho_factor(self._cov_ylm)
-        self._LInv = cho_solve(
-            self._cho_cov_ylm, tt.eye((self._ydeg + 1) ** 2)
+        self._set_moments(
+            first._mean_ylm + second._mean_ylm,
+            first._cov_ylm + second._cov_ylm,
         )
-        self._LInvmu = cho_solve(self._cho_cov_ylm, self._mean_ylm)
 
-        # Initialize the flux integral op
-        self._flux = FluxIntegral(
-            self._mean_ylm,
-            self._cov_ylm,
-            marginalize_over_inclination=self._marginalize_over_inclination,
-            covpts=self._covpts,
-            **self._kwargs,
-        )
+
+class StarryProcessMoments(StarryProcess):
+    def __init__(self, mean_ylm, cov_ylm, **kwargs):
+        """
+        A ``StarryProcess`` whose Ylm process has a given mean and
+        covariance, rather than one computed from the spot hyperparameters.
+
+        This is useful for reusing the (expensive) moments of the process
+        across many evaluations of the flux model; see
+        ``starry_process.pipeline``. Since the spot hyperparameters are
+        not defined, the properties that depend on them (such as
+        ``latitude`` and ``log_jac``) are not available.
+
+        Args:
+            mean_ylm: The mean of the Ylm process, a vector of length
+                ``(ydeg + 1) ** 2``.
+            cov_ylm: The covariance of the Ylm process, a matrix of shape
+                ``((ydeg + 1) ** 2, (ydeg + 1) ** 2)``.
+            kwargs: Additional keyword arguments passed to
+                ``StarryProcess``.
+        """
+        self._moments = (cast(mean_ylm), cast(cov_ylm))
+        super().__init__(**kwargs)
+
+    def _compute_moments(self, r, dr, a, b, c, n):
+        return self._moments
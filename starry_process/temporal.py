@@ -14,3 +14,25 @@ def Matern32Kernel(t1, t2, tau):
     dt = tt.abs_(tt.reshape(t1, (-1, 1)) - tt.reshape(t2, (1, -1)))
     x = np.sqrt(3) * dt / tau
     return (1 + x) * tt.exp(-x)
+
+
+def Matern32Transition(dt, tau):
+    """
+    The ``(K, 2, 2)`` state transition matrices of the Matern-3/2 kernel
+    for the time lags ``dt``, whose ``[0, 0]`` entries are equal to the
+    kernel itself. This is used by the ``celerite`` solver.
+
+    """
+    lam = np.sqrt(3) / tau
+    x = lam * dt
+    e = tt.exp(-x)
+    return tt.stack(
+        (
+            tt.stack((e * (1 + x), e * dt), axis=1),
+            tt.stack((-e * lam * x, e * (1 - x)), axis=1),
+        ),
+        axis=1,
+    )
+
+
+Matern32Kernel.transition = Matern32Transition
@@ -0,0 +1,82 @@
+from starry_process.compat import theano
+from theano.configparser import change_flags
+from starry_process.ops import ROp, RxOp
+from starry_process.wigner import R
+import numpy as np
+import pytest
+
+
+def test_R(ydeg=5):
+
+    # The compiled matrices for many angles at once...
+    theta = np.linspace(-np.pi, np.pi, 7)
+    Rl = R(ydeg, phi=theta, cos_alpha=0.6, sin_alpha=0.8)
+    for k in range(len(theta)):
+
+        # ... should match those computed for each angle
+        Rk = R(ydeg, phi=theta[k], cos_alpha=0.6, sin_alpha=0.8)
+        for l in range(ydeg + 1):
+            assert np.allclose(Rl[l][k], Rk[l])
+
+        # They should be orthogonal
+        for l in range(ydeg + 1):
+            assert np.allclose(Rl[l][k] @ Rl[l][k].T, np.eye(2 * l + 1))
+
+    # The rotation about `x` is a special case
+    Rx = np.array([RxOp(ydeg)(t)[0].eval() for t in theta])
+    assert np.allclose(
+        ROp(ydeg)(theta, -0.5 * np.pi, 0.5 * np.pi)[0].eval(), Rx
+    )
+
+
+def test_R_grad(ydeg=5, abs_tol=1e-5, rel_tol=1e-5, eps=1e-7):
+    theta = np.array([-1.0, 0.3, 2.0])
+    with change_flags(compute_test_value="off"):
+        op = ROp(ydeg)
+        theano.gradient.verify_grad(
+            lambda theta: op(theta, 0.3, -1.2)[0],
+            (theta,),
+            n_tests=1,
+            abs_tol=abs_tol,
+            rel_tol=rel_tol,
+            eps=eps,
+            rng=np.random,
+        )
+
+
+def test_R_hess(ydeg=5, abs_tol=1e-5, rel_tol=1e-5, eps=1e-7):
+    theta = np.array([-1.0, 0.3, 2.0])
+    with change_flags(compute_test_value="off"):
+        op = ROp(ydeg)
+        theano.gradient.verify_grad(
+            lambda theta: op(theta, 0.3, -1.2)[1],
+            (theta,),
+            n_tests=1,
+            abs_tol=abs_tol,
+            rel_tol=rel_tol,
+            eps=eps,
+            rng=np.random,
+        )
+
+
+def test_R_batched(ydeg=5, nsamples=20):
+    # Rotating a map by many angles at once...
+    np.random.seed(0)
+    s = np.random.randn((ydeg + 1) ** 2)
+    phi = np.random.uniform(-np.pi, np.pi, nsamples)
+    lam = np.random.uniform(-np.pi, np.pi, nsamples)
+    Rx = R(ydeg, phi=phi, cos_alpha=0, sin_alpha=1, cos_gamma=0, sin_gamma=-1)
+    Ry = R(ydeg, phi=lam, cos_alpha=1, sin_alpha=0, cos_gamma=1, sin_gamma=0)
+    for l in range(ydeg + 1):
+        i = slice(l ** 2, (l + 1) ** 2)
+        y = np.einsum("kij,kjl,l->ki", Ry[l], Rx[l], s[i])
+
+        # ... should match rotating it by one angle at a time
+        for k in range(nsamples):
+            assert np.allclose(y[k], Ry[l][k] @ (Rx[l][k] @ s[i]))
+
+
+def test_R_tol():
+    # The `tol` argument is deprecated
+    with pytest.warns(DeprecationWarning):
+        R(2, phi=0.3, tol=1e-12)
@@ -1,6 +1,7 @@
 from starry_process.compat import theano, tt
 from theano.configparser import change_flags
-from starry_process.ops import RxOp
+from starry_process.ops import RxOp, dotRxOp
+from scipy.linalg import block_diag
 import numpy as np
 
 
@@ -18,3 +19,69 @@ def test_Rx_grad(
             eps=eps,
             rng=np.random,
         )
+
+
+def test_dotRx(ydeg=5, theta=np.pi / 3):
+    # Compare to the dense block-diagonal rotation matrix
+    np.random.seed(0)
+    rx = RxOp(ydeg)(theta)[0].eval()
+    blocks = []
+    start = 0
+    for l in range(ydeg + 1):
+        stop = start + (2 * l + 1) ** 2
+        blocks.append(rx[start:stop].reshape(2 * l + 1, 2 * l + 1))
+        start = stop
+    M = np.random.randn(7, (ydeg + 1) ** 2)
+    f = dotRxOp(ydeg)(M, theta).eval()
+    assert np.allclose(f, M @ block_diag(*blocks))
+
+
+def test_dotRx_grad(ydeg=5, abs_tol=1e-5, rel_tol=1e-5, eps=1e-7):
+    np.random.seed(0)
+    with change_flags(compute_test_value="off"):
+        op = dotRxOp(ydeg)
+        M = np.random.randn(3, (ydeg + 1) ** 2)
+        theano.gradient.verify_grad(
+            op,
+            (M, np.pi / 3),
+            n_tests=1,
+            abs_tol=abs_tol,
+            rel_tol=rel_tol,
+            eps=eps,
+            rng=np.random,
+        )
+
+
+def test_Rx_hess(
+    ydeg=5, theta=np.pi / 3, abs_tol=1e-5, rel_tol=1e-5, eps=1e-7
+):
+    with change_flags(compute_test_value="off"):
+        op = RxOp(ydeg)
+        theano.gradient.verify_grad(
+            lambda theta: op(theta)[1],
+            (theta,),
+            n_tests=1,
+            abs_tol=abs_tol,
+            rel_tol=rel_tol,
+            eps=eps,
+            rng=np.random,
+        )
+
+
+def test_dotRx_hess(ydeg=5, abs_tol=1e-5, rel_tol=1e-5, eps=1e-7):
+    np.random.seed(0)
+    with change_flags(compute_test_value="off"):
+        op = dotRxOp(ydeg)
+        M = np.random.randn(3, (ydeg + 1) ** 2)
+        bf = np.random.randn(3, (ydeg + 1) ** 2)
+        theano.gradient.verify_grad(
+            lambda M, theta, bf: tt.concatenate(
+                [g.flatten() for g in op.grad_op(M, theta, bf)]
+            ),
+            (M, np.pi / 3, bf),
+            n_tests=1,
+            abs_tol=abs_tol,
+            rel_tol=rel_tol,
+            eps=eps,
+            rng=np.random,
+        )
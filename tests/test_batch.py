@@ -0,0 +1,108 @@
+from starry_process import StarryProcess
+from starry_process.ops import LowRankLogLikeOp
+from starry_process.compat import theano, tt
+import numpy as np
+import pytest
+
+
+def get_data(seed=0):
+    np.random.seed(seed)
+    lens = [50, 80, 30]
+    t = [np.sort(np.random.uniform(0, 5, K)) for K in lens]
+    flux = [1e-3 * np.random.randn(K) for K in lens]
+    data_cov = [1e-6, 2e-6 * np.ones(lens[1]), 5e-7]
+    i = np.array([60.0, 30.0, 85.0])
+    p = np.array([1.0, 2.3, 0.7])
+    u = np.array([[0.5, 0.2], [0.3, 0.1], [0.0, 0.0]])
+    return t, flux, data_cov, i, p, u
+
+
+@pytest.mark.parametrize(
+    "marginalize_over_inclination,normalized",
+    [(True, False), (True, True), (False, False), (False, True)],
+)
+def test_batch(marginalize_over_inclination, normalized):
+
+    # The batched log likelihood should equal the sum of the
+    # log likelihoods of each star
+    t, flux, data_cov, i, p, u = get_data()
+    baseline_var = 1e-4 if normalized else 0.0
+    sp = StarryProcess(
+        marginalize_over_inclination=marginalize_over_inclination,
+        normalized=normalized,
+        solver="lowrank",
+    )
+    ll = sp.log_likelihood_batch(
+        t, flux, data_cov, i=i, p=p, u=u, baseline_var=baseline_var
+    ).eval()
+    ll_sum = np.sum(
+        [
+            sp.log_likelihood(
+                tn, fn, dn, i=i_n, p=pn, u=un, baseline_var=baseline_var
+            ).eval()
+            for tn, fn, dn, i_n, pn, un in zip(t, flux, data_cov, i, p, u)
+        ]
+    )
+    assert np.allclose(ll, ll_sum)
+
+
+def test_batch_grad(eps=1e-4, rtol=1e-3, atol=1e-3):
+
+    # Compare to finite differences
+    t, flux, data_cov, i, p, u = get_data()
+    pv = tt.dvector()
+    uv = tt.dmatrix()
+    sp = StarryProcess()
+    ll = sp.log_likelihood_batch(t, flux, data_cov, p=pv, u=uv)
+    func = theano.function([pv, uv], ll)
+    grad = theano.function([pv, uv], tt.grad(ll, [pv, uv]))
+    bp, bu = grad(p, u)
+    for n in range(len(p)):
+        dp = np.zeros_like(p)
+        dp[n] = eps
+        assert np.allclose(
+            bp[n],
+            (func(p + dp, u) - func(p - dp, u)) / (2 * eps),
+            rtol=rtol,
+            atol=atol,
+        )
+        for k in range(u.shape[1]):
+            du = np.zeros_like(u)
+            du[n, k] = eps
+            assert np.allclose(
+                bu[n, k],
+                (func(p, u + du) - func(p, u - du)) / (2 * eps),
+                rtol=rtol,
+                atol=atol,
+            )
+
+
+def test_lnlike_R_op(eps=1e-6):
+
+    # Compare the directional derivative to finite differences
+    np.random.seed(0)
+    offsets = np.array([0, 10, 25])
+    nstars, K, R, Q = len(offsets) - 1, offsets[-1], 3, 2
+    U = np.random.randn(K, R)
+    S = np.random.randn(1, R, R)
+    S = np.matmul(S, np.transpose(S, (0, 2, 1)))
+    scale = np.random.uniform(0.5, 1.5, nstars)
+    V = np.random.randn(K, Q)
+    T = np.tile(np.eye(Q), (nstars, 1, 1))
+    r = np.random.randn(K)
+    d = np.random.uniform(1.0, 2.0, K)
+    x = [U, S, scale, V, T, r, d]
+    v = [np.random.randn(*np.shape(xi)) for xi in x]
+    op = LowRankLogLikeOp()
+    args = [tt.as_tensor_variable(xi) for xi in x]
+    inputs = op(*args, offsets)[0].owner.inputs
+    jvp = op.R_op(inputs, [tt.as_tensor_variable(vi) for vi in v] + [None])
+
+    def lnlike(x):
+        return op(*x, offsets)[0].eval()
+
+    jvp_num = (
+        lnlike([xi + eps * vi for xi, vi in zip(x, v)])
+        - lnlike([xi - eps * vi for xi, vi in zip(x, v)])
+    ) / (2 * eps)
+    assert np.allclose(jvp[0].eval(), jvp_num)
@@ -0,0 +1,165 @@
+from starry_process import cache
+from starry_process.longitude import LongitudeIntegral
+from starry_process.ops import RxOp
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pytest
+import time
+
+
+calls = []
+
+
+@pytest.fixture(autouse=True)
+def registry():
+    # Start each test from an empty in-process registry
+    cache.clear_cache(disk=False)
+    yield
+    cache.clear_cache(disk=False)
+
+
+@cache.cache()
+def compute(n, scale=1.0):
+    calls.append(n)
+    return dict(x=scale * np.arange(n), y=np.ones((n, n)))
+
+
+def test_cache(tmp_path, monkeypatch):
+
+    # The first call computes the results; the second loads them
+    monkeypatch.setenv("STARRY_PROCESS_CACHE_DIR", str(tmp_path))
+    calls.clear()
+    res1 = compute(5)
+    res2 = compute(5)
+    assert calls == [5]
+    assert isinstance(res2["x"], np.memmap)
+    assert np.array_equal(res1["x"], res2["x"])
+    assert np.array_equal(res1["y"], res2["y"])
+
+    # Different arguments have different keys
+    compute(5, scale=2.0)
+    assert calls == [5, 5]
+
+    # Force a recomputation
+    compute(5, clobber=True)
+    assert calls == [5, 5, 5]
+
+    # No temporary files are left behind
+    for path in tmp_path.iterdir():
+        assert not path.name.startswith(".tmp")
+
+
+def test_cache_eviction(tmp_path, monkeypatch):
+
+    # The least recently used entries are evicted first. We clear the
+    # in-process registry between calls to mimic separate processes.
+    monkeypatch.setenv("STARRY_PROCESS_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(cache, "CACHE_SIZE", 3 * 100 ** 2 * 8)
+    calls.clear()
+    for n in [100, 101, 100, 102]:
+        compute(n)
+        cache.clear_cache(disk=False)
+        time.sleep(0.05)
+    assert len(list(tmp_path.iterdir())) == 2
+    for n in [100, 101]:
+        compute(n)
+        cache.clear_cache(disk=False)
+    assert calls == [100, 101, 102, 101]
+
+
+def test_cache_disabled(monkeypatch):
+
+    # An empty cache directory disables the disk cache, but results
+    # are still shared within the process
+    monkeypatch.setenv("STARRY_PROCESS_CACHE_DIR", "")
+    calls.clear()
+    res1 = compute(5)
+    res2 = compute(5)
+    assert calls == [5]
+    assert res1["x"] is res2["x"]
+    assert not res1["x"].flags.writeable
+    cache.clear_cache(disk=False)
+    compute(5)
+    assert calls == [5, 5]
+
+
+def test_registry_threads(monkeypatch):
+
+    # Concurrent requests for the same results compute them only once
+    monkeypatch.setenv("STARRY_PROCESS_CACHE_DIR", "")
+    calls.clear()
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: compute(50), range(32)))
+    assert calls == [50]
+    assert all(res["y"] is results[0]["y"] for res in results)
+
+
+def test_shared():
+
+    # Ops with the same configuration are shared
+    op1 = cache.shared(RxOp, 5)
+    op2 = cache.shared(RxOp, 5, foo="bar")
+    op3 = cache.shared(RxOp, 6)
+    op4 = cache.shared(RxOp, 5, compile_args=[("SP__FOO", "1")])
+    assert op1 is op2
+    assert op1 is not op3
+    assert op1 is not op4
+
+
+@cache.memoize(2)
+def scaled(x, scale):
+    calls.append(scale)
+    return scale * x
+
+
+def test_memoize():
+
+    # Results are keyed on the values of the arguments
+    calls.clear()
+    x = np.arange(5.0)
+    assert np.array_equal(scaled(x, 1.0), x)
+    assert np.array_equal(scaled(np.arange(5.0), 1.0), x)
+    assert calls == [1.0]
+
+    # The least recently used results are evicted
+    scaled(x, 2.0)
+    scaled(x, 1.0)
+    scaled(x, 3.0)
+    assert scaled.cache_size() == 2
+    scaled(x, 1.0)
+    scaled(x, 2.0)
+    assert calls == [1.0, 2.0, 3.0, 2.0]
+
+    # They are discarded along with the other caches
+    cache.clear_cache(disk=False)
+    assert scaled.cache_size() == 0
+
+
+def test_cache_integrals(tmp_path, monkeypatch):
+
+    # Cached and freshly computed integrals should agree
+    monkeypatch.setenv("STARRY_PROCESS_CACHE_DIR", str(tmp_path))
+    L1 = LongitudeIntegral(ydeg=5)
+    L2 = LongitudeIntegral(ydeg=5)
+    assert isinstance(L2._Q, np.memmap)
+    assert np.array_equal(L1._q, L2._q)
+    assert np.array_equal(L1._Q, L2._Q)
+
+
+def test_code_token(monkeypatch):
+
+    # The key changes with the constants of the function...
+    def func1(n):
+        return dict(x=2.0 * np.arange(n))
+
+    def func2(n):
+        return dict(x=3.0 * np.arange(n))
+
+    assert cache._code_token(func1) != cache._code_token(func2)
+
+    # ... and with the code of the helpers it calls
+    from starry_process import latitude
+
+    token = cache._code_token(latitude._latitude_table)
+    monkeypatch.setattr(latitude, "_log_moments", latitude._interpolate)
+    assert cache._code_token(latitude._latitude_table) != token
@@ -0,0 +1,192 @@
+from starry_process import StarryProcess
+from starry_process.covariance import SemiseparableCovariance
+from starry_process.math import (
+    celerite_solve,
+    celerite_factor,
+    celerite_dot,
+    celerite_lower_dot,
+    celerite_lower_solve,
+)
+from starry_process.compat import theano, tt, RandomStream
+from theano.configparser import change_flags
+import numpy as np
+import pytest
+
+
+def get_semiseparable(K=30, nblk=2, extra=1, seed=0):
+    # A random semiseparable matrix with rotation-like transitions
+    np.random.seed(seed)
+    J = 2 * nblk + extra
+    U = np.random.randn(K, J)
+    V = np.random.randn(K, J)
+    theta = np.random.uniform(0, 0.3, K)
+    Phi = 0.9 * np.array(
+        [[[np.cos(x), np.sin(x)], [-np.sin(x), np.cos(x)]] for x in theta]
+    )
+    d = 50.0 + np.random.random(K)
+    return d, U, V, Phi
+
+
+def get_dense(U, V, Phi, nblk, d=None):
+    # The dense matrix, computed from the definition
+    K, J = U.shape
+    C = np.zeros((K, K)) if d is None else np.diag(d)
+    for n in range(K):
+        P = np.eye(J)
+        for m in range(n - 1, -1, -1):
+            Pm = np.eye(J)
+            for b in range(nblk):
+                Pm[2 * b : 2 * b + 2, 2 * b : 2 * b + 2] = Phi[m + 1]
+            P = np.dot(P, Pm)
+            C[n, m] = np.dot(U[n], np.dot(P, V[m]))
+            if d is not None:
+                C[m, n] = C[n, m]
+    return C
+
+
+def test_celerite_ops(nblk=2, M=3):
+
+    # Compare to the dense matrices
+    d, U, V, Phi = get_semiseparable(nblk=nblk)
+    C = get_dense(U, V, Phi, nblk, d)
+    Y = np.random.randn(len(d), M)
+    assert np.allclose(celerite_dot(d, U, V, Phi, nblk, Y).eval(), C @ Y)
+
+    # Factorization: C = L . D . L^T
+    D, W = [x.eval() for x in celerite_factor(d, U, V, Phi, nblk)]
+    L = np.eye(len(d)) + get_dense(U, W, Phi, nblk)
+    assert np.allclose(L @ np.diag(D) @ L.T, C)
+    D_, Z = celerite_solve(d, U, V, Phi, nblk, Y)
+    assert np.allclose(D_.eval(), D)
+    assert np.allclose(Z.eval(), np.linalg.solve(L, Y))
+
+    # Products and solves with the factor
+    assert np.allclose(
+        celerite_lower_dot(U, W, Phi, nblk, Y).eval(), L @ Y
+    )
+    assert np.allclose(
+        celerite_lower_solve(U, W, Phi, nblk, Y).eval(),
+        np.linalg.solve(L, Y),
+    )
+    assert np.allclose(
+        celerite_lower_solve(U, W, Phi, nblk, Y, transpose=True).eval(),
+        np.linalg.solve(L.T, Y),
+    )
+
+
+@pytest.mark.parametrize("K", [1, 30])
+def test_celerite_ops_grad(K, nblk=2, M=2):
+
+    # Check the gradients of all outputs, including across the
+    # checkpoints of the reverse pass
+    d, U, V, Phi = get_semiseparable(K=K, nblk=nblk)
+    Y = np.random.randn(K, M)
+    W = celerite_factor(d, U, V, Phi, nblk)[1].eval()
+
+    def solve(d, U, V, Phi, Y):
+        D, W = celerite_factor(d, U, V, Phi, nblk)
+        _, Z = celerite_solve(d, U, V, Phi, nblk, Y)
+        return tt.concatenate((D, W.flatten(), Z.flatten()))
+
+    with change_flags(compute_test_value="off"):
+        theano.gradient.verify_grad(
+            solve, (d, U, V, Phi, Y), n_tests=1, rng=np.random
+        )
+        for transpose in [False, True]:
+            theano.gradient.verify_grad(
+                lambda U, W, Phi, Y: celerite_lower_solve(
+                    U, W, Phi, nblk, Y, transpose=transpose
+                ),
+                (U, W, Phi, Y),
+                n_tests=1,
+                rng=np.random,
+            )
+        theano.gradient.verify_grad(
+            lambda U, W, Phi, Y: celerite_lower_dot(U, W, Phi, nblk, Y),
+            (U, W, Phi, Y),
+            n_tests=1,
+            rng=np.random,
+        )
+
+
+def test_semiseparable_covariance(nblk=2, M=3, nsamples=50000):
+
+    # An operator acting on unsorted vectors
+    d, U, V, Phi = get_semiseparable(K=10, nblk=nblk)
+    K = len(d)
+    inds = np.random.permutation(K)
+    cov = SemiseparableCovariance(d, U, V, Phi, nblk, inds)
+    C = np.empty((K, K))
+    C[np.ix_(inds, inds)] = get_dense(U, V, Phi, nblk, d)
+    b = np.random.randn(K, M)
+    assert np.allclose(cov.dense().eval(), C)
+    assert np.allclose(cov.solve(b).eval(), np.linalg.solve(C, b))
+    assert np.allclose(cov.solve(b[:, 0]).eval(), np.linalg.solve(C, b[:, 0]))
+    assert np.allclose(cov.logdet().eval(), np.linalg.slogdet(C)[1])
+
+    # Samples should have the right covariance
+    x = cov.sample(RandomStream(0), nsamples).eval()
+    assert np.allclose(np.cov(x), C, atol=0.05 * np.max(np.abs(C)))
+
+
+@pytest.mark.parametrize("normalized", [True, False])
+def test_celerite_lnlike(normalized, covpts=3000, rtol=1e-7):
+
+    # Generate a fake dataset with unsorted times
+    np.random.seed(0)
+    t = np.random.uniform(0, 5, 100)
+    flux = 1e-3 * np.random.randn(len(t))
+    data_cov = 1e-6
+
+    # The dense solver interpolates the kernel; make it very accurate
+    ll_dense = (
+        StarryProcess(
+            normalized=normalized, tau=2.0, solver="dense", covpts=covpts
+        )
+        .log_likelihood(t, flux, data_cov, baseline_var=1e-4)
+        .eval()
+    )
+    ll_celerite = (
+        StarryProcess(normalized=normalized, tau=2.0, solver="celerite")
+        .log_likelihood(t, flux, data_cov, baseline_var=1e-4)
+        .eval()
+    )
+    assert np.allclose(ll_dense, ll_celerite, rtol=rtol)
+
+
+def test_celerite_predict(covpts=3000):
+
+    # Generate a fake dataset
+    np.random.seed(0)
+    t = np.random.uniform(0, 5, 100)
+    t_sample = np.linspace(0.5, 1.5, 50)
+    flux = 1e-3 * np.random.randn(len(t))
+    data_cov = 1e-6 * np.ones_like(t)
+
+    mu_dense, cov_dense = StarryProcess(
+        normalized=False, tau=2.0, solver="dense", covpts=covpts
+    ).predict(t, flux, data_cov, t_sample=t_sample)
+    mu_celerite, cov_celerite = StarryProcess(
+        normalized=False, tau=2.0, solver="celerite"
+    ).predict(t, flux, data_cov, t_sample=t_sample)
+    assert np.allclose(mu_dense.eval(), mu_celerite.eval())
+    assert np.allclose(cov_dense.eval(), cov_celerite.eval(), atol=1e-12)
+
+
+def test_celerite_grad():
+
+    # Generate a fake dataset
+    np.random.seed(42)
+    t = np.linspace(0, 3, 50)
+    flux = np.random.randn(len(t))
+    data_cov = 1.0
+
+    with change_flags(compute_test_value="off"):
+        theano.gradient.verify_grad(
+            lambda tau: StarryProcess(
+                normalized=False, solver="celerite", tau=tau
+            ).log_likelihood(t, flux, data_cov),
+            (2.0,),
+            n_tests=1,
+            rng=np.random,
+        )
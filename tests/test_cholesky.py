@@ -0,0 +1,80 @@
+from starry_process.math import cho_factor, cho_solve, cho_inv
+from starry_process.compat import theano, tt
+from theano.configparser import change_flags
+import numpy as np
+import pytest
+
+
+def get_matrix(N=10):
+    np.random.seed(0)
+    A = np.random.randn(N, N)
+    return np.dot(A, A.T) + N * np.eye(N)
+
+
+def test_cholesky_ops():
+
+    # Compare to numpy
+    A = get_matrix()
+    b = np.random.randn(len(A), 3)
+    L = cho_factor(A)
+    assert np.allclose(L.eval(), np.linalg.cholesky(A))
+    assert np.allclose(cho_solve(L, b).eval(), np.linalg.solve(A, b))
+    assert np.allclose(
+        cho_solve(L, b[:, 0]).eval(), np.linalg.solve(A, b[:, 0])
+    )
+    assert np.allclose(cho_inv(L).eval(), np.linalg.inv(A))
+
+
+def test_cholesky_nan():
+
+    # Invalid inputs propagate as NaNs instead of raising errors
+    A = get_matrix()
+    b = np.random.randn(len(A))
+    for A_bad in [-A, np.where(np.eye(len(A)) > 0, A, np.nan)]:
+        L = cho_factor(A_bad)
+        assert np.all(np.isnan(L.eval()))
+        assert np.all(np.isnan(cho_solve(L, b).eval()))
+        assert np.all(np.isnan(cho_inv(L).eval()))
+
+
+@pytest.mark.parametrize("func", ["factor", "solve", "solve_vec", "inv"])
+def test_cholesky_grad(func):
+    A = get_matrix(5)
+    b = np.random.randn(len(A), 2)
+
+    def f(A, b):
+        # Symmetrize so the finite differences stay in the domain
+        L = cho_factor(0.5 * (A + tt.transpose(A)))
+        if func == "factor":
+            return L
+        elif func == "solve":
+            return cho_solve(L, b)
+        elif func == "solve_vec":
+            return cho_solve(L, b[:, 0])
+        else:
+            return cho_inv(L) + 0.0 * tt.sum(b)
+
+    with change_flags(compute_test_value="off"):
+        theano.gradient.verify_grad(f, (A, b), n_tests=1, rng=np.random)
+
+
+@pytest.mark.parametrize("func", ["factor", "solve", "inv"])
+def test_cholesky_hess(func):
+    A = get_matrix(5)
+    b = np.random.randn(len(A), 2)
+    W = np.random.randn(len(A), len(A))
+
+    def f(A):
+        L = cho_factor(0.5 * (A + tt.transpose(A)))
+        if func == "factor":
+            X = L
+        elif func == "solve":
+            X = tt.dot(cho_solve(L, b), b.T)
+        else:
+            X = cho_inv(L)
+        return tt.sum(W * X ** 2)
+
+    with change_flags(compute_test_value="off"):
+        theano.gradient.verify_grad(
+            lambda A: theano.grad(f(A), A), (A,), n_tests=1, rng=np.random
+        )
@@ -0,0 +1,44 @@
+from starry_process import StarryProcess
+from starry_process.cost import solver_costs
+import numpy as np
+
+
+def test_solver_costs():
+
+    # Tiny problems are cheapest with the dense solver
+    costs = solver_costs(10, 15)
+    assert min(costs, key=costs.get) == "dense"
+
+    # Large problems are cheapest with the structured solvers
+    costs = solver_costs(3000, 15)
+    assert min(costs, key=costs.get) == "lowrank"
+    costs = solver_costs(3000, 15, time_variable=True, celerite=True)
+    assert min(costs, key=costs.get) == "celerite"
+
+    # Only the dense solver can handle dense noise
+    costs = solver_costs(3000, 15, dense_noise=True)
+    assert list(costs.keys()) == ["dense"]
+
+
+def test_auto_solver():
+
+    # Generate a fake dataset
+    np.random.seed(0)
+    t = np.linspace(0, 3, 1000)
+    flux = 1e-3 * np.random.randn(len(t))
+    data_cov = 1e-6
+
+    # The automatic choice should be the exact low-rank solver
+    sp = StarryProcess()
+    ll_auto = sp.log_likelihood(t, flux, data_cov).eval()
+    assert sp.solver_info["solver"] == "lowrank"
+    assert sp.solver_info["ntimes"] == len(t)
+    assert sp.solver_info["cost"] < sp.solver_info["costs"]["dense"]
+
+    # Compare to the dense solver
+    ll_dense = (
+        StarryProcess(solver="dense", covpts=3000)
+        .log_likelihood(t, flux, data_cov)
+        .eval()
+    )
+    assert np.allclose(ll_auto, ll_dense)
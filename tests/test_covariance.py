@@ -0,0 +1,75 @@
+from starry_process.covariance import (
+    DenseCovariance,
+    DiagonalCovariance,
+    LowRankCovariance,
+)
+from starry_process.compat import theano
+from theano.configparser import change_flags
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize("noise", ["scalar", "vector", "matrix"])
+def test_covariance_ops(noise, K=30, R=4):
+
+    # A low-rank matrix plus a rank-1 update plus noise
+    np.random.seed(0)
+    U = np.random.randn(K, R)
+    S = np.diag(np.random.random(R))
+    if noise == "scalar":
+        d = 0.1
+        N = DiagonalCovariance(d, K)
+        Nmat = d * np.eye(K)
+    elif noise == "vector":
+        d = 0.1 + np.random.random(K)
+        N = DiagonalCovariance(d, K)
+        Nmat = np.diag(d)
+    else:
+        L = 0.1 * np.random.randn(K, K)
+        Nmat = np.dot(L, L.T) + 0.1 * np.eye(K)
+        N = DenseCovariance(Nmat)
+    cov = LowRankCovariance(U, S) + N
+    cov += LowRankCovariance(np.ones((K, 1)), [[1e-2]])
+    C = np.dot(np.dot(U, S), U.T) + Nmat + 1e-2
+
+    # Compare to the dense results
+    b = np.random.randn(K, 3)
+    assert np.allclose(cov.dense().eval(), C)
+    assert np.allclose(cov.dot(b).eval(), np.dot(C, b))
+    assert np.allclose(cov.solve(b).eval(), np.linalg.solve(C, b))
+    assert np.allclose(cov.logdet().eval(), np.linalg.slogdet(C)[1])
+    assert np.allclose(
+        cov.inv_quad(b[:, :1], b).eval(),
+        np.dot(b[:, :1].T, np.linalg.solve(C, b)),
+    )
+    K, M = b.shape
+    lnlike = -0.5 * np.sum(b * np.linalg.solve(C, b))
+    lnlike -= 0.5 * M * np.linalg.slogdet(C)[1]
+    lnlike -= 0.5 * K * M * np.log(2 * np.pi)
+    assert np.allclose(cov.log_likelihood(b).eval(), lnlike)
+    assert np.allclose(DenseCovariance(C).log_likelihood(b).eval(), lnlike)
+
+
+def test_dense_log_likelihood_grad(K=8, M=2):
+
+    # The covariance is symmetrized so that the finite differences
+    # are consistent with the (symmetric) analytic gradient
+    np.random.seed(0)
+    A = np.random.randn(K, K)
+    C = np.dot(A, A.T) + K * np.eye(K)
+    r = np.random.randn(K, M)
+    with change_flags(compute_test_value="off"):
+        theano.gradient.verify_grad(
+            lambda C, r: DenseCovariance(0.5 * (C + C.T)).log_likelihood(r),
+            (C, r),
+            n_tests=1,
+            rng=np.random,
+        )
+
+
+def test_dense_log_likelihood_nan(K=8):
+
+    # An invalid covariance results in a NaN likelihood
+    C = -np.eye(K)
+    r = np.ones((K, 1))
+    assert np.isnan(DenseCovariance(C).log_likelihood(r).eval())
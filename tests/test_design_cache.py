@@ -0,0 +1,32 @@
+from starry_process.flux import FluxIntegral, _numerical_design_matrix
+from starry_process.cache import clear_cache
+from starry_process.compat import theano, tt
+import numpy as np
+
+
+def test_design_cache(ydeg=10, i=65.0, p=1.3, u=[0.5, 0.25]):
+
+    # Numerical star parameters: the design matrix is cached
+    t = np.linspace(-1, 1, 50)
+    N = (ydeg + 1) ** 2
+    F = FluxIntegral(
+        tt.as_tensor_variable(np.zeros(N)),
+        tt.as_tensor_variable(np.zeros((N, N))),
+        ydeg=ydeg,
+        marginalize_over_inclination=False,
+    )
+    clear_cache(disk=False)
+    assert _numerical_design_matrix.cache_size() == 0
+    A1 = F.design_matrix(t, i, p, u)
+    assert _numerical_design_matrix.cache_size() == 1
+    A2 = F.design_matrix(t, i, p, u)
+    assert _numerical_design_matrix.cache_size() == 1
+    assert np.array_equal(A1.eval(), A2.eval())
+    F.design_matrix(t, i + 1.0, p, u)
+    assert _numerical_design_matrix.cache_size() == 2
+
+    # Symbolic star parameters: the design matrix is not cached
+    iv = tt.dscalar()
+    A3 = theano.function([iv], F.design_matrix(t, iv, p, u))(i)
+    assert _numerical_design_matrix.cache_size() == 2
+    assert np.allclose(A1.eval(), A3)
@@ -16,6 +16,20 @@ def test_sqrt_grad():
         )
 
 
+def test_sqrt_hess():
+    with change_flags(compute_test_value="off"):
+        np.random.seed(0)
+        Q = np.random.randn(10, 10)
+        Q = Q @ Q.T
+        W = np.random.randn(10, 10)
+        theano.gradient.verify_grad(
+            lambda x: theano.grad(tt.sum(W * matrix_sqrt(x) ** 2), x),
+            (Q,),
+            n_tests=1,
+            rng=np.random,
+        )
+
+
 def test_eigh_grad():
     with change_flags(compute_test_value="off"):
         np.random.seed(0)
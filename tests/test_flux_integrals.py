@@ -0,0 +1,106 @@
+from starry_process.flux import FluxIntegral
+from starry_process.wigner import R
+from starry_process.compat import theano, tt
+from theano.configparser import change_flags
+import numpy as np
+import pytest
+
+
+def get_flux_integral(ydeg, udeg=0):
+    N = (ydeg + 1) ** 2
+    return FluxIntegral(
+        tt.as_tensor_variable(np.zeros(N)),
+        tt.as_tensor_variable(np.eye(N)),
+        ydeg=ydeg,
+        udeg=udeg,
+    )
+
+
+def get_Wnp(F):
+    """The original (memory-hungry) computation of the second moment."""
+    ydeg = F._ydeg
+    N = F._nylm
+    G = np.array(
+        [
+            [F._G(i, j) for i in range(4 * ydeg + 1)]
+            for j in range(4 * ydeg + 1)
+        ]
+    )
+    Q = np.empty((2 * ydeg + 1, 2 * ydeg + 1, 2 * ydeg + 1, N))
+    for l1 in range(ydeg + 1):
+        k = np.arange(l1 ** 2, (l1 + 1) ** 2)
+        k0 = np.arange(2 * l1 + 1).reshape(-1, 1)
+        for p in range(N):
+            l2 = int(np.floor(np.sqrt(p)))
+            j = np.arange(l2 ** 2, (l2 + 1) ** 2)
+            j0 = np.arange(2 * l2 + 1).reshape(1, -1)
+            L = (
+                F._R[l1][l1, k - l1 ** 2]
+                @ G[k0 + j0, 2 * l1 - k0 + 2 * l2 - j0]
+            )
+            R = F._R[l2][j - l2 ** 2, p - l2 ** 2].T
+            Q[l1, : 2 * l1 + 1, : 2 * l2 + 1, p] = L @ R
+    Wnp = np.empty((N, N))
+    for l1 in range(ydeg + 1):
+        i = np.arange(l1 ** 2, (l1 + 1) ** 2)
+        for l2 in range(ydeg + 1):
+            j = np.arange(l2 ** 2, (l2 + 1) ** 2)
+            Wnp[i.reshape(-1, 1), j.reshape(1, -1)] = Q[
+                l1, : 2 * l1 + 1, l2, j
+            ].T
+    return Wnp
+
+
+def test_Wnp(ydeg=6):
+    F = get_flux_integral(ydeg)
+    assert np.allclose(F._Wnp, get_Wnp(F))
+
+
+def test_Wnp_high_degree(ydeg=25):
+    # The blocks don't depend on the maximum degree. Note that the ops
+    # aren't compiled for such high degrees, so we only compute the
+    # integrals here.
+    F1 = get_flux_integral(5)
+    F2 = FluxIntegral.__new__(FluxIntegral)
+    F2._ydeg = ydeg
+    F2._nylm = (ydeg + 1) ** 2
+    F2._R = R(ydeg, cos_alpha=0, sin_alpha=1, cos_gamma=0, sin_gamma=-1)
+    Wnp = F2._integrals()["Wnp"]
+    assert np.allclose(Wnp[:36, :36], F1._Wnp)
+
+
+def get_W(F, rTA1):
+    """The original (blockwise) assembly of the second moment."""
+    m0 = np.array([l ** 2 + l for l in range(F._ydeg + 1)])
+    Z = np.outer(rTA1[m0], rTA1[m0])
+    W = np.zeros((F._nylm, F._nylm))
+    for l1 in range(F._ydeg + 1):
+        i = np.arange(l1 ** 2, (l1 + 1) ** 2).reshape(-1, 1)
+        for l2 in range(F._ydeg + 1):
+            j = np.arange(l2 ** 2, (l2 + 1) ** 2).reshape(1, -1)
+            W[i, j] = F._Wnp[i, j] * Z[l1, l2]
+    return W
+
+
+@pytest.mark.parametrize("udeg", [0, 2])
+def test_W(udeg, ydeg=6):
+    F = get_flux_integral(ydeg, udeg=udeg)
+    F._u = tt.as_tensor_variable([0.5, 0.25])
+    F._compute_inclination_integrals()
+    rTA1 = F._rTA1 if udeg == 0 else F._rTA1.eval()
+    W = F._W if udeg == 0 else F._W.eval()
+    assert np.allclose(W, get_W(F, rTA1))
+
+
+def test_W_grad(ydeg=4):
+    F = get_flux_integral(ydeg, udeg=2)
+
+    def W(u):
+        F._u = u
+        F._compute_inclination_integrals()
+        return F._W
+
+    with change_flags(compute_test_value="off"):
+        theano.gradient.verify_grad(
+            W, (np.array([0.5, 0.25]),), n_tests=1, rng=np.random
+        )
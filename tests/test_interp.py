@@ -0,0 +1,115 @@
+from starry_process.ops import KernelInterpOp
+from starry_process.compat import theano, tt
+from theano.configparser import change_flags
+import numpy as np
+import pytest
+
+
+def get_args(K1=30, K2=20, n=40):
+    np.random.seed(0)
+    dx = 2 * np.pi / (n - 4)
+    theta1 = 2 * np.pi * np.random.random(K1)
+    theta2 = 2 * np.pi * np.random.random(K2)
+    A = np.random.randn(4, n)
+    return theta1, theta2, A, dx
+
+
+def interp(theta1, theta2, A, dx):
+    x = np.abs(theta1[:, None] - theta2[None, :])
+    inds = np.floor(x / dx).astype(int)
+    x0 = (x - dx * inds) / dx
+    return (
+        A[0, inds]
+        + A[1, inds] * x0
+        + A[2, inds] * x0 ** 2
+        + A[3, inds] * x0 ** 3
+    )
+
+
+@pytest.mark.parametrize("symmetric", [False, True])
+def test_interp(symmetric):
+
+    # Compare to the numpy implementation
+    theta1, theta2, A, dx = get_args()
+    if symmetric:
+        theta2 = theta1
+    cov = KernelInterpOp(symmetric=symmetric)(theta1, theta2, A, dx).eval()
+    assert np.allclose(cov, interp(theta1, theta2, A, dx))
+
+
+@pytest.mark.parametrize("symmetric", [False, True])
+def test_interp_grad(symmetric):
+
+    # Check the gradient with respect to the lags and the coefficients
+    theta1, theta2, A, dx = get_args()
+    op = KernelInterpOp(symmetric=symmetric)
+    with change_flags(compute_test_value="off"):
+        if symmetric:
+            theano.gradient.verify_grad(
+                lambda theta, A: op(theta, theta, A, dx),
+                (theta1, A),
+                n_tests=1,
+                rng=np.random,
+            )
+        else:
+            theano.gradient.verify_grad(
+                lambda theta1, theta2, A: op(theta1, theta2, A, dx),
+                (theta1, theta2, A),
+                n_tests=1,
+                rng=np.random,
+            )
+
+
+@pytest.mark.parametrize("symmetric", [False, True])
+def test_interp_hess(symmetric, eps=1e-8):
+
+    # Check the gradient of the gradient of a scalar function of the
+    # covariance with respect to the lags and the coefficients
+    theta1, theta2, A, dx = get_args()
+    op = KernelInterpOp(symmetric=symmetric)
+
+    def hess(*args):
+        if symmetric:
+            theta, A = args
+            f = tt.sum(op(theta, theta, A, dx) ** 2)
+        else:
+            theta1, theta2, A = args
+            f = tt.sum(op(theta1, theta2, A, dx) ** 2)
+        return tt.concatenate([g.flatten() for g in theano.grad(f, args)])
+
+    with change_flags(compute_test_value="off"):
+        if symmetric:
+            args = (theta1, A)
+        else:
+            args = (theta1, theta2, A)
+        theano.gradient.verify_grad(
+            hess, args, n_tests=1, eps=eps, rng=np.random
+        )
+
+
+@pytest.mark.parametrize("symmetric", [False, True])
+def test_interp_R_op(symmetric, eps=1e-7):
+
+    # Compare the Jacobian-vector product to finite differences
+    theta1, theta2, A, dx = get_args()
+    if symmetric:
+        theta2 = theta1
+    np.random.seed(1)
+    v1 = np.random.randn(*theta1.shape)
+    v2 = v1 if symmetric else np.random.randn(*theta2.shape)
+    vA = np.random.randn(*A.shape)
+    with change_flags(compute_test_value="off"):
+        args = [tt.dvector(), tt.dvector(), tt.dmatrix()]
+        vargs = [tt.dvector(), tt.dvector(), tt.dmatrix()]
+        op = KernelInterpOp(symmetric=symmetric)
+        inputs = op(*args, dx).owner.inputs
+        jvp = theano.function(
+            args + vargs,
+            op.R_op(inputs, vargs + [None])[0],
+            on_unused_input="ignore",
+        )(theta1, theta2, A, v1, v2, vA)
+    jvp_num = (
+        interp(theta1 + eps * v1, theta2 + eps * v2, A + eps * vA, dx)
+        - interp(theta1 - eps * v1, theta2 - eps * v2, A - eps * vA, dx)
+    ) / (2 * eps)
+    assert np.allclose(jvp, jvp_num, atol=1e-5)
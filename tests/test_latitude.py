@@ -1,3 +1,4 @@
+import pytest
 from starry_process.latitude import LatitudeIntegral
 from starry_process.ops import LatitudeIntegralOp
 from starry_process.wigner import R
@@ -127,3 +128,95 @@ def test_latitude_grad(
             eps=eps,
             rng=np.random,
         )
+
+
+def test_latitude_hess(
+    ydeg=3,
+    a=defaults["a"],
+    b=defaults["b"],
+    abs_tol=1e-5,
+    rel_tol=1e-5,
+    eps=1e-7,
+):
+    with change_flags(compute_test_value="off"):
+        op = LatitudeIntegralOp(ydeg)
+        alpha = np.exp(a * 10 - 5)
+        beta = np.exp(b * 10 - 5)
+
+        # Gradient of the gradient of a scalar function of q and Q
+        def grad(alpha, beta):
+            q, _, _, Q, _, _ = op(alpha, beta)
+            f = tt.sum(q ** 2) + tt.sum(Q ** 2)
+            return tt.stack(theano.grad(f, [alpha, beta]))
+
+        theano.gradient.verify_grad(
+            grad,
+            (alpha, beta),
+            n_tests=1,
+            abs_tol=abs_tol,
+            rel_tol=rel_tol,
+            eps=eps,
+            rng=np.random,
+        )
+
+
+@pytest.mark.parametrize("ydeg", [3, 15])
+def test_latitude_second_derivatives(
+    ydeg, a=defaults["a"], b=defaults["b"], h=1e-5, rtol=1e-6
+):
+    with change_flags(compute_test_value="off"):
+        op = LatitudeIntegralOp(ydeg)
+        alpha = tt.dscalar()
+        beta = tt.dscalar()
+        alpha_ = np.exp(a * 10 - 5)
+        beta_ = np.exp(b * 10 - 5)
+
+        # Exact second derivatives
+        second = op.second_derivatives([alpha, beta])
+        d2 = theano.function([alpha, beta], second[1] + second[4])
+        d2 = d2(alpha_, beta_)
+        d2q, d2Q = d2[:2], d2[2:]
+
+        # Central differences of the analytic first derivatives
+        outputs = op(alpha, beta)
+        d1 = theano.function([alpha, beta], [outputs[1], outputs[4]])
+        for i, (da, db) in enumerate([(h, 0), (0, h)]):
+            up = d1(alpha_ + da * alpha_, beta_ + db * beta_)
+            down = d1(alpha_ - da * alpha_, beta_ - db * beta_)
+            dx = 2 * h * (alpha_ if da else beta_)
+            for exact, fp, fm in zip([d2q, d2Q], up, down):
+                assert np.allclose(
+                    exact[i], (fp - fm) / dx, rtol=rtol, atol=rtol
+                )
+
+
+def test_latitude_table(ydeg=3, tol=1e-5):
+    # Compare the interpolated integrals to the exact ones, which are
+    # only accurate to ~1e-16 in absolute terms
+    a, b = tt.dscalar(), tt.dscalar()
+    I = LatitudeIntegral(a, b, ydeg=ydeg)
+    J = LatitudeIntegral(a, b, ydeg=ydeg, latitude_tol=tol)
+    func = theano.function([a, b], [I._q, I._Q, J._q, J._Q])
+    for av, bv in [(0.4, 0.27), (0.1, 0.9), (0.9, 0.1), (0.73, 0.58)]:
+        q, Q, q_interp, Q_interp = func(av, bv)
+        assert np.allclose(q_interp, q, rtol=tol, atol=1e-15)
+        assert np.allclose(Q_interp, Q, rtol=tol, atol=1e-15)
+
+    # The derivatives are those of the interpolant
+    with change_flags(compute_test_value="off"):
+
+        def f(a, b):
+            J = LatitudeIntegral(a, b, ydeg=ydeg, latitude_tol=tol)
+            return tt.sum(J._q) + tt.sum(J._Q)
+
+        theano.gradient.verify_grad(
+            f, (0.4, 0.27), n_tests=1, eps=1e-7, rng=np.random
+        )
+
+
+def test_latitude_table_is_shared(ydeg=3, tol=1e-5):
+    # All graphs share a single copy of the table
+    I = LatitudeIntegral(0.4, 0.27, ydeg=ydeg, latitude_tol=tol)
+    J = LatitudeIntegral(0.1, 0.9, ydeg=ydeg, latitude_tol=tol)
+    func = theano.function([], [I._Q, J._Q])
+    assert len(func.get_shared()) == 1
@@ -22,6 +22,40 @@ def test_rTA1L_grad():
         )
 
 
+def test_rTA1L_hess():
+    np.random.seed(0)
+    with change_flags(compute_test_value="off"):
+        op = rTA1LOp(ydeg=1, udeg=3)
+        bf = np.random.randn(4)
+        theano.gradient.verify_grad(
+            lambda u, bf: op.grad_op(u, bf),
+            [[0.5, 0.25, 0.1], bf],
+            n_tests=1,
+            abs_tol=1e-5,
+            rel_tol=1e-5,
+            rng=np.random,
+        )
+
+
+@pytest.mark.parametrize("shape", [(3,), (2, 3)])
+def test_rTA1L_R_op(shape, h=1e-6):
+    np.random.seed(0)
+    with change_flags(compute_test_value="off"):
+        op = rTA1LOp(ydeg=2, udeg=3)
+        u = tt.TensorType("float64", [False] * len(shape))()
+        v = tt.TensorType("float64", [False] * len(shape))()
+        jvp = theano.function([u, v], op.R_op([u], [v])[0])
+        f = theano.function([u], op(u))
+        u_ = 0.5 * np.random.random(shape)
+        v_ = np.random.randn(*shape)
+        assert np.allclose(
+            jvp(u_, v_),
+            (f(u_ + h * v_) - f(u_ - h * v_)) / (2 * h),
+            rtol=1e-7,
+            atol=1e-7,
+        )
+
+
 @pytest.mark.skipif(starry is None, reason="starry not installed")
 def test_compare_to_starry(ydeg=15, udeg=2):
 
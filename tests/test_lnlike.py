@@ -134,3 +134,36 @@ def test_lnlike_grad(param, marginalize_over_inclination):
                 n_tests=1,
                 rng=np.random,
             )
+
+
+@pytest.mark.skipif(ON_AZURE, reason="consumes too much memory")
+@pytest.mark.parametrize("solver", ["dense", "lowrank"])
+def test_lnlike_hess(solver, eps=1e-5):
+
+    # Generate a fake dataset
+    np.random.seed(0)
+    t = np.linspace(0, 1, 50)
+    flux = 1e-3 * np.random.randn(len(t))
+    data_cov = 1e-6
+
+    # The Hessian with respect to the size and the latitude parameters
+    x = [tt.dscalar() for n in range(3)]
+    x0 = [0.3, 0.4, 0.3]
+    r, a, b = x
+    lnlike = StarryProcess(r=r, a=a, b=b, solver=solver).log_likelihood(
+        t, flux, data_cov
+    )
+    grad = theano.grad(lnlike, x)
+    hess = [theano.grad(g, x) for g in grad]
+    grad = theano.function(x, grad)
+    hess = np.array(theano.function(x, sum(hess, []))(*x0)).reshape(3, 3)
+
+    # Compare to finite differences of the gradient
+    hess_num = np.zeros((3, 3))
+    for k in range(3):
+        xp = list(x0)
+        xp[k] += eps
+        xm = list(x0)
+        xm[k] -= eps
+        hess_num[k] = (np.array(grad(*xp)) - np.array(grad(*xm))) / (2 * eps)
+    assert np.allclose(hess, hess_num, rtol=1e-5, atol=1e-5)
@@ -0,0 +1,79 @@
+from starry_process import StarryProcess
+from starry_process.defaults import defaults
+from starry_process.compat import theano, tt
+from theano.configparser import change_flags
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize("normalized", [True, False])
+@pytest.mark.parametrize("marginalize_over_inclination", [True, False])
+def test_lowrank_lnlike(
+    normalized, marginalize_over_inclination, covpts=3000, rtol=1e-8
+):
+
+    # Generate a fake dataset
+    np.random.seed(0)
+    t = np.linspace(0, 3, 200)
+    flux = 1e-3 * np.random.randn(len(t))
+    data_cov = 1e-6
+
+    # The dense solver interpolates the kernel; make it very accurate
+    ll_dense = (
+        StarryProcess(
+            normalized=normalized,
+            marginalize_over_inclination=marginalize_over_inclination,
+            solver="dense",
+            covpts=covpts,
+        )
+        .log_likelihood(t, flux, data_cov, baseline_var=1e-4)
+        .eval()
+    )
+    ll_lowrank = (
+        StarryProcess(
+            normalized=normalized,
+            marginalize_over_inclination=marginalize_over_inclination,
+            solver="lowrank",
+        )
+        .log_likelihood(t, flux, data_cov, baseline_var=1e-4)
+        .eval()
+    )
+    assert np.allclose(ll_dense, ll_lowrank, rtol=rtol)
+
+
+def test_lowrank_predict(covpts=3000):
+
+    # Generate a fake dataset
+    np.random.seed(0)
+    t = np.linspace(0, 3, 200)
+    t_sample = np.linspace(0.5, 1.5, 50)
+    flux = 1e-3 * np.random.randn(len(t))
+    data_cov = 1e-6
+
+    mu_dense, cov_dense = StarryProcess(
+        normalized=False, solver="dense", covpts=covpts
+    ).predict(t, flux, data_cov, t_sample=t_sample)
+    mu_lowrank, cov_lowrank = StarryProcess(
+        normalized=False, solver="lowrank"
+    ).predict(t, flux, data_cov, t_sample=t_sample)
+    assert np.allclose(mu_dense.eval(), mu_lowrank.eval())
+    assert np.allclose(cov_dense.eval(), cov_lowrank.eval(), atol=1e-12)
+
+
+def test_lowrank_grad():
+
+    # Generate a fake dataset
+    np.random.seed(42)
+    t = np.linspace(0, 3, 100)
+    flux = np.random.randn(len(t))
+    data_cov = 1.0
+
+    with change_flags(compute_test_value="off"):
+        theano.gradient.verify_grad(
+            lambda a: StarryProcess(
+                normalized=False, solver="lowrank", a=a
+            ).log_likelihood(t, flux, data_cov),
+            (defaults["a"],),
+            n_tests=1,
+            rng=np.random,
+        )
@@ -47,3 +47,17 @@ def test_norm(ftol=0.05):
         print(cov_norm)
         print(cov_norm_num)
         raise e
+
+
+def test_norm_hess():
+    with change_flags(compute_test_value="off"):
+        z = 0.001
+        op = AlphaBetaOp(20)
+        get_dalpha = lambda z: op(z)[2]
+        get_dbeta = lambda z: op(z)[3]
+        theano.gradient.verify_grad(
+            get_dalpha, [z], n_tests=1, rel_tol=1e-5, rng=np.random
+        )
+        theano.gradient.verify_grad(
+            get_dbeta, [z], n_tests=1, rel_tol=1e-5, rng=np.random
+        )
@@ -0,0 +1,81 @@
+from starry_process import StarryProcess
+from starry_process.pipeline import MomentsStage, LikelihoodStage
+from starry_process.compat import theano, tt
+import numpy as np
+from scipy.stats import multivariate_normal
+
+
+def get_data(seed=0, K=100, nlc=2):
+    np.random.seed(seed)
+    t = np.linspace(0, 3, K)
+    flux = 1e-3 * np.random.randn(nlc, K)
+    return t, flux
+
+
+def test_pipeline(ydeg=10):
+
+    # The two-stage pipeline should match the full likelihood
+    t, flux = get_data()
+    x = dict(r=15.0, dr=5.0, a=0.4, b=0.3, c=0.1, n=10.0)
+    kwargs = dict(i=65.0, p=1.3, u=[0.5, 0.25], baseline_var=1e-4)
+    sp = StarryProcess(ydeg=ydeg, **x)
+    ll = sp.log_likelihood(t, flux, 1e-6, **kwargs).eval()
+    moments = MomentsStage(uniform_size=True, ydeg=ydeg)
+    mean_ylm, cov_ylm, log_jac = moments(**x)
+    assert np.allclose(mean_ylm, sp.mean_ylm.eval())
+    assert np.allclose(cov_ylm, sp.cov_ylm.eval())
+    assert np.allclose(log_jac, sp.log_jac().eval())
+    ll_pipeline = LikelihoodStage(ydeg=ydeg)(
+        mean_ylm, cov_ylm, t, flux, 1e-6, **kwargs
+    )
+    assert np.allclose(ll, ll_pipeline)
+
+
+def test_pipeline_grad(ydeg=10):
+
+    # Chaining the vjp of the first stage with the gradient of the
+    # second stage should give the gradient of the full likelihood
+    t, flux = get_data()
+    moments = MomentsStage(ydeg=ydeg)
+    names = moments.hyperparameters
+    x0 = [15.0, 0.4, 0.3, 0.1, 10.0]
+    kwargs = dict(i=65.0, p=1.3, u=[0.5, 0.25], baseline_var=1e-4)
+    x = [tt.dscalar(name) for name in names]
+    sp = StarryProcess(ydeg=ydeg, **dict(zip(names, x)))
+    ll = sp.log_likelihood(t, flux, 1e-6, **kwargs)
+    grad = np.array(theano.function(x, tt.grad(ll, x))(*x0))
+    mean_ylm, cov_ylm, _ = moments(*x0)
+    _, bmean_ylm, bcov_ylm = LikelihoodStage(grad=True, ydeg=ydeg)(
+        mean_ylm, cov_ylm, t, flux, 1e-6, **kwargs
+    )
+    grad_pipeline = moments.vjp(x0, bmean_ylm, bcov_ylm)
+    assert np.allclose(grad, grad_pipeline)
+
+
+def test_pipeline_zmax(ydeg=10):
+
+    # With `normalization_zmax=np.inf` (as in `compute_inclination_pdf`),
+    # the pipeline should match the dense likelihood computed from the
+    # normalized covariance (as in `get_log_prob`) even for large values
+    # of the normalization parameter `z`
+    t, flux = get_data(nlc=1)
+    x = dict(r=15.0, a=0.4, b=0.3, c=0.45, n=30.0)
+    mean_ylm, cov_ylm, _ = MomentsStage(ydeg=ydeg)(**x)
+    kwargs = dict(
+        ydeg=ydeg,
+        marginalize_over_inclination=False,
+        covpts=len(t) - 1,
+        solver="dense",
+    )
+    ll = LikelihoodStage(**kwargs)(
+        mean_ylm, cov_ylm, t, flux, 1e-6, i=65.0, p=1.0
+    )
+    assert ll == -np.inf
+    ll = LikelihoodStage(normalization_zmax=np.inf, **kwargs)(
+        mean_ylm, cov_ylm, t, flux, 1e-6, i=65.0, p=1.0
+    )
+    sp = StarryProcess(**x, **kwargs)
+    mean = sp.mean(t, i=65.0, p=1.0).eval()
+    cov = sp.cov(t, i=65.0, p=1.0).eval() + 1e-6 * np.eye(len(t))
+    ll_dense = multivariate_normal.logpdf(flux[0], mean, cov)
+    assert np.allclose(ll, ll_dense)
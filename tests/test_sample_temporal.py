@@ -0,0 +1,30 @@
+from starry_process.ops import SampleYlmTemporalOp
+from starry_process.compat import theano
+from theano.configparser import change_flags
+import numpy as np
+
+
+def test_sample_temporal(nsamples=3, Nt=20, Ny=16):
+    # Compare to the explicit loop over samples, coefficients and times
+    np.random.seed(0)
+    Ly = np.tril(np.random.randn(Ny, Ny))
+    Lt = np.tril(np.random.randn(Nt, Nt))
+    U = np.random.randn(nsamples, Nt, Ny)
+    y = SampleYlmTemporalOp()(Ly, Lt, U).eval()
+    y_loop = np.zeros((nsamples, Nt, Ny))
+    for i in range(nsamples):
+        for j in range(Ny):
+            for k in range(Nt):
+                y_loop[i, k] += Ly.T[j] * (Lt[k] @ U[i, :, j])
+    assert np.allclose(y, y_loop)
+
+
+def test_sample_temporal_grad(nsamples=2, Nt=5, Ny=4):
+    np.random.seed(0)
+    Ly = np.random.randn(Ny, Ny)
+    Lt = np.random.randn(Nt, Nt)
+    U = np.random.randn(nsamples, Nt, Ny)
+    with change_flags(compute_test_value="off"):
+        theano.gradient.verify_grad(
+            SampleYlmTemporalOp(), (Ly, Lt, U), n_tests=1, rng=np.random
+        )
@@ -1,6 +1,11 @@
 from theano.configparser import change_flags
 from starry_process.compat import theano, tt
-from starry_process.ops import tensordotRzOp, special_tensordotRzOp
+from starry_process.ops import (
+    tensordotRzOp,
+    special_tensordotRzOp,
+    tensordotROp,
+)
+from starry_process.wigner import R
 import numpy as np
 
 
@@ -42,3 +47,133 @@ def test_special_tensordotRz_grad(
             eps=eps,
             rng=np.random,
         )
+
+
+def get_zrot(ydeg, theta):
+    """The dense `cos(m theta)` and `sin(m theta)` matrices."""
+    ls = np.floor(np.sqrt(np.arange((ydeg + 1) ** 2))).astype(int)
+    ms = np.arange((ydeg + 1) ** 2) - ls ** 2 - ls
+    mirror = ls ** 2 + ls - ms
+    mt = np.outer(theta, ms)
+    return np.cos(mt), np.sin(mt), mirror
+
+
+def test_tensordotRz(ydeg=4, K=300):
+    # Compare to the dense products over several tiles of rows,
+    # using an explicit number of threads
+    np.random.seed(0)
+    N = (ydeg + 1) ** 2
+    theta = np.random.uniform(-np.pi, np.pi, K)
+    M = np.random.randn(K, N)
+    T = np.random.randn(N, N)
+    M2 = np.random.randn(N, N)
+    cosmt, sinmt, mirror = get_zrot(ydeg, theta)
+    kwargs = dict(compile_args=[("SP_NUM_THREADS", "2")])
+    f = tensordotRzOp(ydeg, **kwargs)(M, theta).eval()
+    assert np.allclose(f, M * cosmt + M[:, mirror] * sinmt)
+    f = special_tensordotRzOp(ydeg, **kwargs)(T, M2, theta).eval()
+    TM1 = T * M2
+    TM2 = T * M2[:, mirror]
+    assert np.allclose(f, np.sum(cosmt @ TM1 + sinmt @ TM2, axis=1))
+
+
+def get_R(ydeg):
+    return R(ydeg, cos_alpha=0, sin_alpha=1, cos_gamma=0, sin_gamma=-1)
+
+
+def test_tensordotR(ydeg=4, K=3, J=2):
+    # Compare to a blockwise contraction
+    np.random.seed(0)
+    Rl = get_R(ydeg)
+    Rflat = np.concatenate([Rl[l].reshape(-1) for l in range(ydeg + 1)])
+    X = np.random.randn((ydeg + 1) ** 2, K)
+    Z = np.random.randn((ydeg + 1) ** 2, J)
+    Y = tensordotROp(ydeg)(Rflat, X, Z).eval()
+    for l in range(ydeg + 1):
+        i = slice(l ** 2, (l + 1) ** 2)
+        Yl = np.einsum("abc,ck,bj->akj", Rl[l], X[i], Z[i])
+        assert np.allclose(Y[i], Yl)
+
+
+def test_tensordotR_grad(ydeg=3, abs_tol=1e-5, rel_tol=1e-5, eps=1e-7):
+    np.random.seed(0)
+    Rl = get_R(ydeg)
+    Rflat = np.concatenate([Rl[l].reshape(-1) for l in range(ydeg + 1)])
+    with change_flags(compute_test_value="off"):
+        op = tensordotROp(ydeg)
+        X = np.random.randn((ydeg + 1) ** 2, 3)
+        Z = np.random.randn((ydeg + 1) ** 2, 2)
+        theano.gradient.verify_grad(
+            lambda X, Z: op(Rflat, X, Z),
+            (X, Z),
+            n_tests=1,
+            abs_tol=abs_tol,
+            rel_tol=rel_tol,
+            eps=eps,
+            rng=np.random,
+        )
+
+
+def test_tensordotRz_hess(ydeg=2, abs_tol=1e-5, rel_tol=1e-5, eps=1e-7):
+    np.random.seed(0)
+    with change_flags(compute_test_value="off"):
+        op = tensordotRzOp(ydeg)
+        theta = np.random.uniform(-np.pi, np.pi, 5)
+        M = np.random.randn(5, (ydeg + 1) ** 2)
+        bf = np.random.randn(5, (ydeg + 1) ** 2)
+        theano.gradient.verify_grad(
+            lambda M, theta, bf: tt.concatenate(
+                [g.flatten() for g in op.grad_op(M, theta, bf)]
+            ),
+            (M, theta, bf),
+            n_tests=1,
+            abs_tol=abs_tol,
+            rel_tol=rel_tol,
+            eps=eps,
+            rng=np.random,
+        )
+
+
+def test_special_tensordotRz_hess(
+    ydeg=2, abs_tol=1e-5, rel_tol=1e-5, eps=1e-7
+):
+    np.random.seed(0)
+    with change_flags(compute_test_value="off"):
+        op = special_tensordotRzOp(ydeg)
+        theta = np.random.uniform(-np.pi, np.pi, 5)
+        M = np.random.randn((ydeg + 1) ** 2, (ydeg + 1) ** 2)
+        T = np.random.randn((ydeg + 1) ** 2, (ydeg + 1) ** 2)
+        bf = np.random.randn(5)
+        theano.gradient.verify_grad(
+            lambda M, theta, bf: tt.concatenate(
+                [g.flatten() for g in op.grad_op(T, M, theta, bf)]
+            ),
+            (M, theta, bf),
+            n_tests=1,
+            abs_tol=abs_tol,
+            rel_tol=rel_tol,
+            eps=eps,
+            rng=np.random,
+        )
+
+
+def test_tensordotR_hess(ydeg=3, abs_tol=1e-5, rel_tol=1e-5, eps=1e-7):
+    np.random.seed(0)
+    Rl = get_R(ydeg)
+    Rflat = np.concatenate([Rl[l].reshape(-1) for l in range(ydeg + 1)])
+    with change_flags(compute_test_value="off"):
+        op = tensordotROp(ydeg)
+        X = np.random.randn((ydeg + 1) ** 2, 3)
+        Z = np.random.randn((ydeg + 1) ** 2, 2)
+        bY = np.random.randn((ydeg + 1) ** 2, 3, 2)
+        theano.gradient.verify_grad(
+            lambda X, Z, bY: tt.concatenate(
+                [g.flatten() for g in op.grad_op(Rflat, X, Z, bY)]
+            ),
+            (X, Z, bY),
+            n_tests=1,
+            abs_tol=abs_tol,
+            rel_tol=rel_tol,
+            eps=eps,
+            rng=np.random,
+        )
@@ -1,5 +1,6 @@
 from starry_process import StarryProcess
 from starry_process.defaults import defaults
+from starry_process.longitude import LongitudeIntegral
 from starry_process.compat import theano, tt
 import timeit
 import numpy as np
@@ -143,3 +144,18 @@ def test_profile_marg(gradient, profile, ydeg=15, npts=1000):
         print("time elapsed: {:.4f} s".format(time))
         if (gradient and time > 0.2) or (not gradient and time > 0.1):
             warnings.warn("too slow! ({:.4f} s)".format(time))
+
+
+@pytest.mark.parametrize("ydeg", [5, 10, 15, 20, 25])
+def test_startup(ydeg):
+
+    # Time the hyperparameter-independent precomputations
+    L = LongitudeIntegral(ydeg=ydeg)
+    number = 10
+    time = (
+        timeit.timeit(lambda: L._integrals(clobber=True), number=number)
+        / number
+    )
+    print("ydeg = {}: time elapsed: {:.4f} s".format(ydeg, time))
+    if time > 0.1:
+        warnings.warn("too slow! ({:.4f} s)".format(time))
@@ -0,0 +1,111 @@
+from starry_process import StarryProcess, ExpSquaredKernel
+from starry_process.math import toeplitz_solve, toeplitz_dot
+from starry_process.compat import theano, tt
+from theano.configparser import change_flags
+from scipy.linalg import toeplitz, cho_factor, cho_solve
+import numpy as np
+import pytest
+
+
+def get_column(K=50):
+    x = np.arange(K) / K
+    c = np.exp(-0.5 * (x / 0.1) ** 2) + 0.3 * np.cos(4 * np.pi * x)
+    c[0] += 1.0
+    return c
+
+
+def test_toeplitz_ops():
+
+    # Compare to the dense matrix
+    np.random.seed(0)
+    c = get_column()
+    T = toeplitz(c)
+    Y = np.random.randn(len(c), 3)
+    logdet, X = toeplitz_solve(c, Y)
+    assert np.allclose(logdet.eval(), np.linalg.slogdet(T)[1])
+    assert np.allclose(X.eval(), np.linalg.solve(T, Y))
+    assert np.allclose(toeplitz_dot(c, Y).eval(), np.dot(T, Y))
+
+
+def test_toeplitz_grad():
+
+    # Check the gradients of the ops
+    np.random.seed(0)
+    c = get_column()
+    Y = np.random.randn(len(c), 2)
+    with change_flags(compute_test_value="off"):
+        theano.gradient.verify_grad(
+            lambda c, Y: toeplitz_solve(c, Y)[0]
+            + tt.sum(toeplitz_solve(c, Y)[1] ** 2),
+            (c, Y),
+            n_tests=1,
+            rng=np.random,
+        )
+        theano.gradient.verify_grad(
+            lambda c, Y: toeplitz_dot(c, Y),
+            (c, Y),
+            n_tests=1,
+            rng=np.random,
+        )
+
+
+@pytest.mark.parametrize(
+    "marginalize_over_inclination,normalized,tau",
+    [
+        (True, True, None),
+        (True, False, 2.0),
+        (False, True, None),
+    ],
+)
+def test_toeplitz_lnlike(
+    marginalize_over_inclination, normalized, tau, rtol=1e-7
+):
+
+    # Generate a fake dataset with evenly spaced times
+    np.random.seed(0)
+    t = np.linspace(0, 5, 100)
+    flux = 1e-3 * np.random.randn(len(t))
+    data_cov = 1e-6
+    kwargs = dict(
+        marginalize_over_inclination=marginalize_over_inclination,
+        normalized=normalized,
+        tau=tau,
+        temporal_kernel=ExpSquaredKernel,
+    )
+
+    # Compare to the low-rank solver (or, for time-variable processes,
+    # to the dense solver with a very accurate interpolant)
+    if tau is None:
+        sp = StarryProcess(solver="lowrank", **kwargs)
+    else:
+        sp = StarryProcess(solver="dense", covpts=3000, **kwargs)
+    ll = sp.log_likelihood(t, flux, data_cov, baseline_var=1e-4).eval()
+    sp = StarryProcess(solver="toeplitz", **kwargs)
+    ll_toeplitz = sp.log_likelihood(
+        t, flux, data_cov, baseline_var=1e-4
+    ).eval()
+    assert sp.solver_info["solver"] == "toeplitz"
+    assert np.allclose(ll, ll_toeplitz, rtol=rtol)
+
+    # Unevenly spaced times can't use the Toeplitz solver
+    sp.log_likelihood(t ** 2, flux, data_cov)
+    assert sp.solver_info["solver"] != "toeplitz"
+
+
+@pytest.mark.parametrize("data_cov", [1e-4, 1e-8, 1e-12])
+def test_toeplitz_conditioning(data_cov, K=200):
+
+    # A smooth kernel plus a tiny white noise term is very
+    # ill-conditioned; compare to the dense Cholesky solve
+    np.random.seed(0)
+    t = np.linspace(0, 5, K)
+    c = np.exp(-0.5 * (t / 0.5) ** 2)
+    c[0] += data_cov
+    T = toeplitz(c)
+    Y = np.random.randn(K, 2)
+    logdet, X = toeplitz_solve(c, Y)
+    factor = cho_factor(T, lower=True)
+    X_dense = cho_solve(factor, Y)
+    logdet_dense = 2 * np.sum(np.log(np.diag(factor[0])))
+    assert np.allclose(logdet.eval(), logdet_dense, rtol=1e-12)
+    assert np.allclose(X.eval(), X_dense, rtol=1e-8)
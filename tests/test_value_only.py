@@ -0,0 +1,66 @@
+from starry_process.ops import LatitudeIntegralOp, ROp, RxOp, RyOp
+from starry_process.compat import theano, tt
+import numpy as np
+import pytest
+
+
+def get_ops(func):
+    return [node.op for node in func.maker.fgraph.toposort()]
+
+
+@pytest.mark.parametrize("name", ["latitude", "R", "Rx", "Ry"])
+def test_value_only(name, ydeg=4):
+
+    # The ops and the indices of the values among their outputs
+    if name == "latitude":
+        op = LatitudeIntegralOp(ydeg)
+        inputs = [tt.dscalar(), tt.dscalar()]
+        values = [10.0, 30.0]
+        idx = [0, 3]
+    elif name == "R":
+        op = ROp(ydeg)
+        inputs = [tt.dvector(), tt.dscalar(), tt.dscalar()]
+        values = [[0.1, 0.2, 0.3], 0.4, 0.5]
+        idx = [0]
+    else:
+        op = RxOp(ydeg) if name == "Rx" else RyOp(ydeg)
+        inputs = [tt.dscalar()]
+        values = [0.3]
+        idx = [0]
+    outputs = op(*inputs)
+
+    # The value-only op is used if we only need the values...
+    func = theano.function(inputs, [outputs[i] for i in idx])
+    ops = [o for o in get_ops(func) if isinstance(o, type(op))]
+    assert len(ops) == 1 and ops[0].value_only
+
+    # ... but not if we need the derivatives
+    func_full = theano.function(inputs, outputs)
+    ops = [o for o in get_ops(func_full) if isinstance(o, type(op))]
+    assert len(ops) == 1 and not ops[0].value_only
+
+    # Both ops should agree
+    res = func(*values)
+    res_full = func_full(*values)
+    for k, i in enumerate(idx):
+        assert np.allclose(res[k], res_full[i], rtol=1e-12, atol=1e-14)
+
+
+def test_value_only_grad(ydeg=4):
+
+    # The full op is used when computing gradients
+    alpha, beta = tt.dscalar(), tt.dscalar()
+    q, _, _, Q, _, _ = LatitudeIntegralOp(ydeg)(alpha, beta)
+    f = tt.sum(q) + tt.sum(Q)
+    func = theano.function([alpha, beta], [f] + theano.grad(f, [alpha, beta]))
+    ops = [o for o in get_ops(func) if isinstance(o, LatitudeIntegralOp)]
+    assert len(ops) == 1 and not ops[0].value_only
+
+
+def test_Ry(ydeg=4):
+
+    # Ry is the rotation with Euler angles alpha = gamma = 0
+    theta = 0.3
+    Ry = RyOp(ydeg)(theta)[0].eval()
+    R = ROp(ydeg)([theta], 0.0, 0.0)[0].eval()
+    assert np.allclose(Ry, R[0])